@@ -0,0 +1,269 @@
+"""
+Local HTTP server for offline ingestion benchmarks.
+
+Serves the recorded feeds in fixtures/feeds and article pages built from the
+templates in fixtures/articles, plus synthesized large, slow and malformed
+variants, so ingestion can be measured end to end without touching real
+sites. Standard library only; run it standalone or let
+``python manage.py benchmark_ingestion`` start it.
+
+Routes (every feed is served once per ``copy`` so many sources can share a
+fixture without their articles colliding):
+    
+    /feeds/<copy>/<fixture>.xml          recorded fixture, links rewritten to /site/
+    /synthetic/<copy>/large.xml          generated RSS 2.0 (?entries=N, default 500)
+    /malformed/<copy>/<kind>.xml         truncated | garbage | html | empty
+    /site/<copy>/<host>/<path>           article page (or a tiny image for image paths)
+
+Any route accepts ``?delay=<seconds>`` (time to first byte),
+``?chunk_delay=<seconds>`` (pause between 16KB chunks) and ``?status=<code>``;
+``?hub=<url>`` advertises a WebSub hub in a ``Link`` header (see websub_hub.py).
+Recorded dates are shifted so the newest fixture entry is a few minutes old.
+"""
+import argparse
+import hashlib
+import html
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+CHUNK_SIZE = 16 * 1024
+
+# When the recorded fixtures were captured; their dates are shifted relative to this
+FIXTURE_TIME = datetime(2026, 10, 16, 18, 30, tzinfo=timezone.utc)
+
+# Hosts that only appear in scheme URIs, never as article links
+SCHEME_HOSTS = {'purl.org', 'www.w3.org', 'schemas.google.com', 'www.blogger.com'}
+
+URL_RE = re.compile(r'https?://([a-z0-9.-]+\.[a-z]{2,})', re.I)
+NAMESPACE_RE = re.compile(r'xmlns(:\w+)?=["\']$')
+DATE_RE = re.compile(r'<(pubDate|lastBuildDate|published|updated|dc:date)>([^<]+)</\1>')
+IMAGE_RE = re.compile(r'\.(jpe?g|png|gif|webp)$', re.I)
+
+WORDS = (
+    "model training inference dataset benchmark transformer agent robotics vision language research "
+    "startup funding chip cluster latency open source release paper evaluation safety alignment policy "
+    "regulation hardware GPU memory token context retrieval embedding fine-tuning reasoning multimodal"
+).split()
+
+# 1x1 transparent GIF
+PIXEL = bytes.fromhex('47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b')
+
+
+def shift_dates(body: str, delta: timedelta) -> str:
+    """Move every feed date forward by ``delta``, keeping its format."""
+    def replace(match):
+        tag, value = match.group(1), match.group(2).strip()
+        try:
+            if value[:1].isdigit():
+                shifted = datetime.fromisoformat(value.replace('Z', '+00:00')) + delta
+                value = shifted.isoformat()
+            else:
+                value = format_datetime(parsedate_to_datetime(value) + delta)
+        except (TypeError, ValueError):
+            pass
+        return f'<{tag}>{value}</{tag}>'
+    return DATE_RE.sub(replace, body)
+
+
+def rewrite_links(body: str, base_url: str, copy: str) -> str:
+    """Point article, image and site links at this server's /site/ route."""
+    def replace(match):
+        host = match.group(1).lower()
+        if host in SCHEME_HOSTS or NAMESPACE_RE.search(body, max(0, match.start() - 20), match.start()):
+            return match.group(0)
+        return f'{base_url}/site/{copy}/{host}'
+    return URL_RE.sub(replace, body)
+
+
+def _rng(*parts) -> random.Random:
+    """Deterministic generator so a URL always gets the same content."""
+    seed = hashlib.blake2b('/'.join(map(str, parts)).encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(seed, 'big'))
+
+
+def _sentence(rng: random.Random, words: int = 0) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words or rng.randint(8, 20)))
+    return text.capitalize() + '.'
+
+
+def _title(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(5, 10)))
+
+
+def synthetic_feed(base_url: str, copy: str, entries: int) -> str:
+    """RSS 2.0 feed with ``entries`` items, one minute apart, each with media and full content."""
+    rng = _rng('synthetic', copy)
+    now = datetime.now(timezone.utc)
+    items = []
+    for i in range(entries):
+        title = _title(rng)
+        link = f'{base_url}/site/{copy}/synthetic.example/{i}/{title.lower().replace(" ", "-")}'
+        summary = ' '.join(_sentence(rng) for _ in range(3))
+        content = ''.join(f'<p>{_sentence(rng)} {_sentence(rng)}</p>' for _ in range(6))
+        items.append(
+            f'<item><title>{html.escape(title)}</title><link>{link}</link>'
+            f'<guid isPermaLink="true">{link}</guid>'
+            f'<pubDate>{format_datetime(now - timedelta(minutes=i))}</pubDate>'
+            f'<description>{html.escape(summary)}</description>'
+            f'<content:encoded><![CDATA[{content}]]></content:encoded>'
+            f'<media:content url="{link}/image.jpg" medium="image" width="1200" height="675"/>'
+            f'</item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'xmlns:media="http://search.yahoo.com/mrss/"><channel>'
+        f'<title>Synthetic feed {copy}</title><link>{base_url}/site/{copy}/synthetic.example/</link>'
+        f'<description>Generated benchmark feed</description>{"".join(items)}</channel></rss>'
+    )
+
+
+def malformed_feed(kind: str, base_url: str, copy: str) -> bytes:
+    """Broken feed bodies of the kinds seen in production."""
+    if kind == 'truncated':
+        body = synthetic_feed(base_url, f'truncated{copy}', 50).encode()
+        return body[:len(body) * 3 // 5]
+    if kind == 'garbage':
+        return _rng('garbage', copy).randbytes(32 * 1024)
+    if kind == 'html':
+        return b'<!DOCTYPE html><html><head><title>Moved</title></head><body><p>This feed has moved.</p></body></html>'
+    return b''
+
+
+def article_page(base_url: str, path: str) -> str:
+    """Article HTML from one of the recorded page templates, filled deterministically from the path."""
+    templates = sorted((FIXTURES_DIR / 'articles').glob('*.html'))
+    rng = _rng('article', path)
+    template = Template(templates[rng.randrange(len(templates))].read_text())
+    canonical = f'{base_url}{path.rstrip("/")}'
+    paragraphs = '\n'.join(
+        f'<p>{" ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))}</p>'
+        for _ in range(rng.randint(6, 14))
+    )
+    return template.safe_substitute(
+        title=html.escape(_title(rng)),
+        canonical=canonical,
+        image=f'{canonical}/lead.jpg',
+        author=rng.choice(['Ada Lovelace', 'Alan Turing', 'Grace Hopper', 'Claude Shannon']),
+        published=(datetime.now(timezone.utc) - timedelta(minutes=rng.randint(5, 600))).isoformat(),
+        body=paragraphs,
+    )
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves fixture feeds and pages; see the module docstring for routes."""
+    
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GenieNewsFixtureServer/1.0'
+    
+    def do_GET(self):
+        parsed = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        
+        delay = float(params.get('delay', 0))
+        if delay:
+            time.sleep(delay)
+        
+        status = int(params.get('status', 200))
+        if status != 200:
+            self._send(status, b'', 'text/plain')
+            return
+        
+        try:
+            body, content_type = self._route(parsed.path, params)
+        except (FileNotFoundError, ValueError):
+            self._send(404, b'Not found', 'text/plain')
+            return
+        headers = {}
+        if params.get('hub'):
+            base_url = f'http://{self.headers.get("Host")}'
+            headers['Link'] = f'<{params["hub"]}>; rel="hub", <{base_url}{self.path}>; rel="self"'
+        self._send(200, body, content_type, float(params.get('chunk_delay', 0)), headers)
+    
+    def _route(self, path: str, params: dict):
+        base_url = f'http://{self.headers.get("Host") or "%s:%d" % self.server.server_address}'
+        parts = path.strip('/').split('/')
+        
+        if parts[0] == 'feeds' and len(parts) == 3:
+            return self.server.recorded_feed(parts[2], base_url, parts[1]), 'application/rss+xml; charset=utf-8'
+        if parts[0] == 'synthetic' and len(parts) == 3:
+            entries = int(params.get('entries', 500))
+            return synthetic_feed(base_url, parts[1], entries).encode(), 'application/rss+xml; charset=utf-8'
+        if parts[0] == 'malformed' and len(parts) == 3:
+            return malformed_feed(parts[2].rsplit('.', 1)[0], base_url, parts[1]), 'application/rss+xml'
+        if parts[0] == 'site' and len(parts) >= 3:
+            if IMAGE_RE.search(path):
+                return PIXEL, 'image/gif'
+            return article_page(base_url, path).encode(), 'text/html; charset=utf-8'
+        raise FileNotFoundError(path)
+    
+    def _send(self, status: int, body: bytes, content_type: str, chunk_delay: float = 0, headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            for start in range(0, len(body), CHUNK_SIZE):
+                if chunk_delay and start:
+                    time.sleep(chunk_delay)
+                self.wfile.write(body[start:start + CHUNK_SIZE])
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (e.g. hit its body size limit or timeout)
+            self.close_connection = True
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Threaded server that caches rewritten recorded feeds."""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, verbose: bool = False):
+        super().__init__(address, FixtureHandler)
+        self.verbose = verbose
+        self._feeds = {}
+    
+    def recorded_feed(self, filename: str, base_url: str, copy: str) -> bytes:
+        key = (filename, base_url, copy)
+        if key not in self._feeds:
+            path = FIXTURES_DIR / 'feeds' / Path(filename).name
+            body = shift_dates(path.read_text(encoding='utf-8'), datetime.now(timezone.utc) - FIXTURE_TIME)
+            self._feeds[key] = rewrite_links(body, base_url, copy).encode('utf-8')
+        return self._feeds[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='Port to listen on (default: any free port)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+    
+    server = FixtureServer((args.host, args.port), verbose=args.verbose)
+    # benchmark_ingestion reads this line to find the port
+    print(f'Fixture server listening on http://{args.host}:{server.server_address[1]}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
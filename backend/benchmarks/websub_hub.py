@@ -0,0 +1,171 @@
+"""
+Local stand-in WebSub hub for exercising push ingestion offline.
+
+Implements the hub side of the WebSub spec closely enough for our
+subscriber: it verifies (un)subscribe intent at the callback, keeps the
+verified subscriptions in memory, and on a publish ping fetches the topic
+and POSTs it to every subscriber, signed with their secret. Standard
+library only.
+
+Routes:
+    
+    POST /           hub.mode=subscribe|unsubscribe (hub.topic, hub.callback,
+                     hub.secret, hub.lease_seconds), answered 202 and verified
+                     in the background; hub.mode=publish with hub.url=<topic>
+                     distributes the topic to its subscribers
+    GET /subscriptions   verified subscriptions as JSON
+
+Point a source at it by serving its feed from fixture_server.py with
+``?hub=http://127.0.0.1:8900/``, which advertises the hub in a Link header.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import secrets
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import URLError
+from urllib.parse import parse_qs, urlencode, urlsplit
+from urllib.request import Request, urlopen
+
+TIMEOUT = 10
+
+
+class HubHandler(BaseHTTPRequestHandler):
+    """Accepts subscription requests and publish pings; see the module docstring."""
+    
+    server_version = 'GenieNewsFixtureHub/1.0'
+    
+    def do_GET(self):
+        if urlsplit(self.path).path.rstrip('/') != '/subscriptions':
+            self._send(404, b'Not found')
+            return
+        with self.server.lock:
+            body = [
+                {'topic': topic, 'callback': callback, 'lease_seconds': lease}
+                for (topic, callback), (_, lease) in self.server.subscriptions.items()
+            ]
+        self._send(200, json.dumps(body, indent=2).encode(), 'application/json')
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {key: values[-1] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        mode = form.get('hub.mode')
+        
+        if mode in ('subscribe', 'unsubscribe'):
+            if not form.get('hub.topic') or not form.get('hub.callback'):
+                self._send(400, b'hub.topic and hub.callback are required')
+                return
+            self._send(202, b'')
+            threading.Thread(target=self.server.verify, args=(form,), daemon=True).start()
+        elif mode == 'publish':
+            topic = form.get('hub.url') or form.get('hub.topic')
+            if not topic:
+                self._send(400, b'hub.url is required')
+                return
+            self._send(204, b'')
+            threading.Thread(target=self.server.distribute, args=(topic,), daemon=True).start()
+        else:
+            self._send(400, b'Unsupported hub.mode')
+    
+    def _send(self, status: int, body: bytes, content_type: str = 'text/plain'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FixtureHub(ThreadingHTTPServer):
+    """Threaded hub holding verified subscriptions as {(topic, callback): (secret, lease_seconds)}."""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, verbose: bool = False):
+        super().__init__(address, HubHandler)
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+    
+    def log(self, message: str):
+        print(message, flush=True)
+    
+    def verify(self, form: dict):
+        """Verify intent at the callback and record the (un)subscription if it echoes the challenge."""
+        mode, topic, callback = form['hub.mode'], form['hub.topic'], form['hub.callback']
+        challenge = secrets.token_urlsafe(16)
+        params = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': challenge}
+        if mode == 'subscribe':
+            params['hub.lease_seconds'] = form.get('hub.lease_seconds', '864000')
+        
+        separator = '&' if urlsplit(callback).query else '?'
+        try:
+            with urlopen(f'{callback}{separator}{urlencode(params)}', timeout=TIMEOUT) as response:
+                verified = response.status == 200 and response.read().decode() == challenge
+        except (URLError, OSError) as e:
+            self.log(f'Verification of {mode} {topic} failed: {e}')
+            return
+        if not verified:
+            self.log(f'Subscriber did not confirm {mode} of {topic}')
+            return
+        
+        with self.lock:
+            if mode == 'subscribe':
+                self.subscriptions[(topic, callback)] = (form.get('hub.secret', ''), int(params['hub.lease_seconds']))
+            else:
+                self.subscriptions.pop((topic, callback), None)
+        self.log(f'Verified {mode} of {topic} for {callback}')
+    
+    def distribute(self, topic: str):
+        """Fetch the topic and POST it to each of its subscribers."""
+        try:
+            with urlopen(topic, timeout=TIMEOUT) as response:
+                body = response.read()
+                content_type = response.headers.get('Content-Type', 'application/rss+xml')
+        except (URLError, OSError) as e:
+            self.log(f'Fetching topic {topic} failed: {e}')
+            return
+        
+        with self.lock:
+            targets = [(callback, secret) for (t, callback), (secret, _) in self.subscriptions.items() if t == topic]
+        hub_url = f'http://{self.server_address[0]}:{self.server_address[1]}/'
+        for callback, secret in targets:
+            headers = {
+                'Content-Type': content_type,
+                'Link': f'<{hub_url}>; rel="hub", <{topic}>; rel="self"',
+            }
+            if secret:
+                headers['X-Hub-Signature'] = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            try:
+                with urlopen(Request(callback, data=body, headers=headers, method='POST'), timeout=TIMEOUT) as response:
+                    self.log(f'Delivered {topic} to {callback}: HTTP {response.status}')
+            except (URLError, OSError) as e:
+                self.log(f'Delivering {topic} to {callback} failed: {e}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='Port to listen on (default: any free port)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+    
+    server = FixtureHub((args.host, args.port), verbose=args.verbose)
+    print(f'Fixture hub listening on http://{args.host}:{server.server_address[1]}/', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
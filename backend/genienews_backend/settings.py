@@ -214,42 +214,102 @@ if IS_PRODUCTION:
 else:
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+# Redis used for state shared between workers (rate limits, etc.)
+SHARED_STATE_REDIS_URL = os.getenv('SHARED_STATE_REDIS_URL', CELERY_BROKER_URL)
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
-# Celery Beat Schedule for Weekly Feed Ingestion
+# Celery Beat Schedule for Feed Ingestion
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
-    'ingest-feeds-weekly': {
+    'ingest-feeds-scheduled': {
         'task': 'news.tasks.ingest_all_feeds_task',
-        'schedule': crontab(day_of_week=1, hour=2, minute=0),  # Every Monday at 2 AM
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes; only sources that are due get fetched
     },
     'fetch-missing-content-weekly': {
         'task': 'news.tasks.fetch_missing_content_task',
         'schedule': crontab(day_of_week=1, hour=4, minute=0),  # Every Monday at 4 AM (after ingestion)
     },
+    'renew-websub-subscriptions': {
+        'task': 'news.tasks.renew_websub_subscriptions_task',
+        'schedule': crontab(minute=30),  # Hourly; renews leases before they expire
+    },
     'curate-articles-hourly': {
         'task': 'news.tasks.curate_articles_task',
         'schedule': crontab(minute=0),  # Every hour on the hour
     },
+    'poll-curation-batches': {
+        'task': 'news.tasks.poll_curation_batches_task',
+        'schedule': crontab(minute='*/30'),  # Applies offline curation batches once they finish
+    },
+    'evict-llm-cache': {
+        'task': 'news.tasks.evict_llm_cache_task',
+        'schedule': crontab(hour=3, minute=15),  # Daily; expired and least recently used LLM results
+    },
 }
 
 # Feed Ingestion Configuration
 FEED_FETCH_TIMEOUT = int(os.getenv('FEED_FETCH_TIMEOUT', '30'))
+FEED_MIN_INTERVAL_MINUTES = int(os.getenv('FEED_MIN_INTERVAL_MINUTES', '15'))  # Fastest any source is polled
 FEED_USER_AGENT = os.getenv('FEED_USER_AGENT', 'GenieNewsBot/1.0')
+FEED_MAX_BODY_BYTES = int(os.getenv('FEED_MAX_BODY_BYTES', str(10 * 1024 * 1024)))  # Larger feed bodies are rejected
 CONTENT_FETCH_TIMEOUT = int(os.getenv('CONTENT_FETCH_TIMEOUT', '60'))
+CONTENT_FETCH_CONCURRENCY = int(os.getenv('CONTENT_FETCH_CONCURRENCY', '20'))  # Max article pages fetched at once
+CONTENT_FETCH_PER_HOST = int(os.getenv('CONTENT_FETCH_PER_HOST', '2'))  # Max concurrent article fetches per host
+CONTENT_BATCH_LIMIT = int(os.getenv('CONTENT_BATCH_LIMIT', '2000'))  # Max articles fetch_missing_content_task fetches per run
+CONTENT_FETCH_MAX_ATTEMPTS = int(os.getenv('CONTENT_FETCH_MAX_ATTEMPTS', '5'))  # Failed fetches before an article is given up on
+CONTENT_FETCH_RETRY_HOURS = int(os.getenv('CONTENT_FETCH_RETRY_HOURS', '6'))  # Wait before refetching an article whose fetch failed
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
 ENABLE_PLAYWRIGHT = os.getenv('ENABLE_PLAYWRIGHT', 'false').lower() == 'true'
 PLAYWRIGHT_HEADLESS = os.getenv('PLAYWRIGHT_HEADLESS', 'true').lower() == 'true'
-RATE_LIMIT_DELAY = int(os.getenv('RATE_LIMIT_DELAY', '3'))
+PLAYWRIGHT_QUEUE = os.getenv('PLAYWRIGHT_QUEUE', 'browser')  # Celery queue of the worker that keeps the browser pool
+PLAYWRIGHT_CONTEXTS = int(os.getenv('PLAYWRIGHT_CONTEXTS', '4'))  # Browser contexts per worker, i.e. pages rendered at once
+PLAYWRIGHT_PAGES_PER_CONTEXT = int(os.getenv('PLAYWRIGHT_PAGES_PER_CONTEXT', '50'))  # Pages before a context is recycled
+PLAYWRIGHT_PAGE_TIMEOUT = int(os.getenv('PLAYWRIGHT_PAGE_TIMEOUT', '15'))  # Seconds one page render may take
+PLAYWRIGHT_SETTLE_MS = int(os.getenv('PLAYWRIGHT_SETTLE_MS', '2000'))  # Longest wait after load for client-side content
+RESPONSE_ARCHIVE_ENABLED = os.getenv('RESPONSE_ARCHIVE_ENABLED', 'false').lower() == 'true'  # Keep fetched pages and feeds on disk (news.response_archive)
+RESPONSE_ARCHIVE_DIR = os.getenv('RESPONSE_ARCHIVE_DIR', os.path.join(BASE_DIR, 'response_archive'))
+RESPONSE_ARCHIVE_MAX_MB = int(os.getenv('RESPONSE_ARCHIVE_MAX_MB', '2048'))  # Compressed size before the oldest responses are evicted
+# Pages of JavaScript-only sources are rendered by a dedicated worker:
+#   celery -A genienews_backend worker -Q browser -c 1
+CELERY_TASK_ROUTES = {
+    'news.tasks.fetch_rendered_content_task': {'queue': PLAYWRIGHT_QUEUE},
+}
+STRATEGY_MIN_ATTEMPTS = int(os.getenv('STRATEGY_MIN_ATTEMPTS', '5'))  # Attempts before a domain's strategy record is trusted
+STRATEGY_SKIP_BELOW = float(os.getenv('STRATEGY_SKIP_BELOW', '0.1'))  # Skip strategies succeeding less often than this for a domain
+STRATEGY_EXPLORE_RATE = float(os.getenv('STRATEGY_EXPLORE_RATE', '0.05'))  # Chance of re-trying a skipped strategy anyway
+STRATEGY_STATS_FLUSH_SECONDS = int(os.getenv('STRATEGY_STATS_FLUSH_SECONDS', '30'))  # How often workers write and reload strategy stats
+RATE_LIMIT_DELAY = int(os.getenv('RATE_LIMIT_DELAY', '3'))  # Seconds between requests to one domain
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '1'))  # Requests allowed back-to-back per domain
+RATE_LIMIT_MAX_INLINE_WAIT = float(os.getenv('RATE_LIMIT_MAX_INLINE_WAIT', '5'))  # Longer waits reschedule the task
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '50'))  # Hosts with a kept-alive connection pool
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))  # Kept-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '1'))  # Retries of failed connections (HTTP errors are retried by callers)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))  # Consecutive host failures before failing fast
+CIRCUIT_BASE_COOLDOWN = float(os.getenv('CIRCUIT_BASE_COOLDOWN', '60'))  # Seconds; doubles after each failed probe
+CIRCUIT_MAX_COOLDOWN = float(os.getenv('CIRCUIT_MAX_COOLDOWN', '21600'))
+CIRCUIT_PROBE_TIMEOUT = float(os.getenv('CIRCUIT_PROBE_TIMEOUT', '120'))  # Seconds before a lost probe is replaced
+SIMHASH_MAX_DISTANCE = int(os.getenv('SIMHASH_MAX_DISTANCE', '3'))  # Max differing bits (of 64) for a near-duplicate
+DUPLICATE_WINDOW_DAYS = int(os.getenv('DUPLICATE_WINDOW_DAYS', '3'))  # Max publish-time gap between duplicates
+# 'async' fetches all due feeds concurrently in one task; 'fanout' queues one task per source
+FEED_INGEST_MODE = os.getenv('FEED_INGEST_MODE', 'async')
+FEED_FETCH_CONCURRENCY = int(os.getenv('FEED_FETCH_CONCURRENCY', '20'))  # Max feeds fetched at once
+FEED_FETCH_PER_HOST = int(os.getenv('FEED_FETCH_PER_HOST', '2'))  # Max concurrent requests per host
+FEED_AUTO_CURATE = os.getenv('FEED_AUTO_CURATE', 'true').lower() == 'true'  # Queue curation when ingestion creates articles
+WEBSUB_CALLBACK_BASE_URL = os.getenv('WEBSUB_CALLBACK_BASE_URL', '')  # Public base URL hubs push to; empty disables WebSub
+WEBSUB_LEASE_SECONDS = int(os.getenv('WEBSUB_LEASE_SECONDS', str(10 * 24 * 3600)))  # Lease asked of hubs
+WEBSUB_RENEW_MARGIN_HOURS = int(os.getenv('WEBSUB_RENEW_MARGIN_HOURS', '24'))  # Renew leases this long before expiry
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'sk-mock-key-replace-later')
 AI_MODEL = os.getenv('AI_MODEL', 'gpt-4')
 EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv('EMBEDDING_BATCH_MAX_INPUTS', '512'))  # Texts per embeddings request (API limit: 2048)
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv('EMBEDDING_BATCH_MAX_TOKENS', '200000'))  # Tokens per embeddings request (API limit: 300k)
 AI_TEMPERATURE = float(os.getenv('AI_TEMPERATURE', '0.3'))
 AI_MAX_TOKENS = int(os.getenv('AI_MAX_TOKENS', '1000'))
 
@@ -263,6 +323,15 @@ AI_RELEVANCE_KEYWORDS = os.getenv(
 ).split(',')
 AI_RELEVANCE_THRESHOLD = float(os.getenv('AI_RELEVANCE_THRESHOLD', '0.3'))
 AI_BATCH_SIZE = int(os.getenv('AI_BATCH_SIZE', '20'))
+AI_CURATION_MODE = os.getenv('AI_CURATION_MODE', 'combined')  # 'combined': one JSON call per article; 'separate': one call per field
+CURATION_CONCURRENCY = int(os.getenv('CURATION_CONCURRENCY', '8'))  # Articles curated at once per task
+CURATION_MAX_REQUESTS = int(os.getenv('CURATION_MAX_REQUESTS', '16'))  # Ceiling on OpenAI requests in flight; halved on 429s, regrown gradually
+CURATION_BATCH_BACKEND = os.getenv('CURATION_BATCH_BACKEND', 'openai')  # 'openai', 'local' or a BatchBackend class path (news.batch_curation)
+CURATION_BATCH_SIZE = int(os.getenv('CURATION_BATCH_SIZE', '2000'))  # Articles per submitted batch (the Batch API takes files up to 200MB)
+CURATION_BATCH_LOCAL_DIR = os.getenv('CURATION_BATCH_LOCAL_DIR', os.path.join(BASE_DIR, 'curation_batches'))
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'  # Reuse LLM results for identical inputs (news.llm_cache)
+LLM_CACHE_TTL_DAYS = float(os.getenv('LLM_CACHE_TTL_DAYS', '30'))
+LLM_CACHE_MAX_MB = int(os.getenv('LLM_CACHE_MAX_MB', '1024'))  # Above this the least recently used entries are evicted
 
 # Text-to-Speech (TTS) Configuration for Audio Generation
 TTS_VOICE = os.getenv('TTS_VOICE', 'nova')  # Options: alloy, echo, fable, onyx, nova, shimmer, maple (if available)
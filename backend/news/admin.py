@@ -1,12 +1,14 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.urls import reverse
-from .models import Source, ArticleRaw, MediaAsset, ArticleCurated, UserInteraction, FeedIngestionLog, AudioSegment
+from .models import Source, ArticleRaw, MediaAsset, ArticleCurated, UserInteraction, FeedIngestionLog, AudioSegment, WebSubSubscription, ExtractionStrategyStat, CurationBatch, LLMCacheEntry
+from .stage_timing import STAGES
+from .strategy_memory import get_strategy_memory
 
 
 @admin.register(Source)
 class SourceAdmin(admin.ModelAdmin):
-    list_display = ['name', 'feed_url', 'active', 'last_fetched_at', 'error_count', 'created_at']
+    list_display = ['name', 'feed_url', 'active', 'last_fetched_at', 'next_fetch_at', 'error_count', 'created_at']
     list_filter = ['active', 'requires_javascript', 'created_at', 'last_fetched_at']
     search_fields = ['name', 'feed_url', 'site_url']
     fieldsets = (
@@ -17,7 +19,11 @@ class SourceAdmin(admin.ModelAdmin):
             'fields': ('fetch_interval_minutes', 'max_articles_per_fetch', 'requires_javascript', 'custom_headers')
         }),
         ('Status', {
-            'fields': ('last_fetched_at', 'last_error', 'error_count')
+            'fields': ('last_fetched_at', 'next_fetch_at', 'publish_interval_minutes', 'last_error', 'error_count')
+        }),
+        ('Incremental Fetching', {
+            'fields': ('etag', 'last_modified', 'content_hash', 'high_water_mark'),
+            'classes': ('collapse',)
         }),
     )
 
@@ -25,9 +31,13 @@ class SourceAdmin(admin.ModelAdmin):
 @admin.register(ArticleRaw)
 class ArticleRawAdmin(admin.ModelAdmin):
     list_display = ['title_short', 'source', 'is_curated', 'published_at', 'created_at']
-    list_filter = ['source', 'published_at', 'created_at']
+    list_filter = ['source', 'published_at', 'created_at', ('canonical_article', admin.EmptyFieldListFilter)]
     search_fields = ['title', 'url', 'summary_feed']
     date_hierarchy = 'published_at'
+    raw_id_fields = ['canonical_article']
+    readonly_fields = [
+        'url_hash', 'canonical_url_hash', 'simhash', 'simhash_band_0', 'simhash_band_1', 'simhash_band_2', 'simhash_band_3', 'extraction_meta',
+    ]
     actions = ['curate_selected_articles']
     
     def title_short(self, obj):
@@ -190,12 +200,149 @@ class UserInteractionAdmin(admin.ModelAdmin):
 
 @admin.register(FeedIngestionLog)
 class FeedIngestionLogAdmin(admin.ModelAdmin):
-    list_display = ['source', 'status', 'articles_found', 'articles_created', 'started_at', 'execution_time_seconds']
+    list_display = [
+        'source', 'status', 'articles_found', 'articles_created', 'started_at', 'execution_time_seconds',
+        'slowest_stage', 'query_count', 'bytes_received',
+    ]
     list_filter = ['status', 'started_at', 'source']
     search_fields = ['source__name', 'error_message']
     raw_id_fields = ['source']
     date_hierarchy = 'started_at'
-    readonly_fields = ['started_at', 'completed_at', 'execution_time_seconds']
+    readonly_fields = [
+        'started_at', 'completed_at', 'execution_time_seconds', 'stage_breakdown',
+        'stage_timings', 'stage_queries', 'query_count', 'bytes_received',
+    ]
+    
+    def slowest_stage(self, obj):
+        """Stage that took longest in this run."""
+        if not obj.stage_timings:
+            return '-'
+        name = max(obj.stage_timings, key=obj.stage_timings.get)
+        return f"{name} ({obj.stage_timings[name]:.2f}s)"
+    slowest_stage.short_description = 'Slowest stage'
+    
+    def stage_breakdown(self, obj):
+        """Table of seconds and queries per stage, in pipeline order."""
+        if not obj.stage_timings and not obj.stage_queries:
+            return '-'
+        order = {name: i for i, name in enumerate(STAGES)}
+        names = sorted(set(obj.stage_timings) | set(obj.stage_queries), key=lambda n: (order.get(n, len(order)), n))
+        rows = format_html_join(
+            '',
+            '<tr><td>{}</td><td>{}</td><td>{}</td></tr>',
+            ((name, f"{obj.stage_timings.get(name, 0):.3f}s", obj.stage_queries.get(name, 0)) for name in names),
+        )
+        return format_html('<table><tr><th>Stage</th><th>Time</th><th>Queries</th></tr>{}</table>', rows)
+    stage_breakdown.short_description = 'Stage breakdown'
+
+
+@admin.register(WebSubSubscription)
+class WebSubSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ['source', 'hub_url', 'status', 'expires_at', 'last_push_at', 'push_count']
+    list_filter = ['status']
+    search_fields = ['source__name', 'hub_url', 'topic_url']
+    raw_id_fields = ['source']
+    readonly_fields = [
+        'lease_seconds', 'expires_at', 'requested_at', 'verified_at', 'last_push_at', 'push_count',
+        'last_error', 'created_at', 'updated_at',
+    ]
+    actions = ['resubscribe', 'unsubscribe']
+    
+    def resubscribe(self, request, queryset):
+        """Admin action to (re)send subscribe requests, renewing the lease."""
+        from .tasks import subscribe_websub_task
+        
+        for subscription in queryset:
+            subscribe_websub_task.delay(subscription.id)
+        self.message_user(request, f"Subscribe requested for {queryset.count()} subscription(s).")
+    resubscribe.short_description = 'Subscribe / renew lease'
+    
+    def unsubscribe(self, request, queryset):
+        """Admin action to unsubscribe at the hub; the sources fall back to polling."""
+        from .tasks import subscribe_websub_task
+        
+        for subscription in queryset:
+            subscribe_websub_task.delay(subscription.id, mode='unsubscribe')
+        self.message_user(request, f"Unsubscribe requested for {queryset.count()} subscription(s).")
+    unsubscribe.short_description = 'Unsubscribe'
+
+
+@admin.register(ExtractionStrategyStat)
+class ExtractionStrategyStatAdmin(admin.ModelAdmin):
+    """The learned per-domain strategy table; delete rows to make the extractor re-learn a domain."""
+    list_display = [
+        'domain', 'strategy', 'attempts', 'success_rate', 'avg_content_length', 'avg_latency',
+        'skipped', 'last_success_at', 'last_failure_at',
+    ]
+    list_filter = ['strategy']
+    search_fields = ['domain']
+    readonly_fields = [
+        'domain', 'strategy', 'attempts', 'successes', 'total_content_length', 'total_latency_seconds',
+        'last_success_at', 'last_failure_at', 'updated_at',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def success_rate(self, obj):
+        if not obj.attempts:
+            return '-'
+        return f"{obj.successes / obj.attempts:.0%}"
+    success_rate.short_description = 'Success rate'
+    
+    def avg_content_length(self, obj):
+        if not obj.successes:
+            return '-'
+        return f"{obj.total_content_length // obj.successes:,} chars"
+    avg_content_length.short_description = 'Avg content'
+    
+    def avg_latency(self, obj):
+        if not obj.attempts:
+            return '-'
+        return f"{obj.total_latency_seconds / obj.attempts:.2f}s"
+    avg_latency.short_description = 'Avg latency'
+    
+    def skipped(self, obj):
+        """Whether the extractor currently skips this strategy for the domain (bar occasional probes)."""
+        return get_strategy_memory().is_unreliable(obj.attempts, obj.successes)
+    skipped.boolean = True
+    skipped.short_description = 'Skipped'
+
+
+@admin.register(CurationBatch)
+class CurationBatchAdmin(admin.ModelAdmin):
+    """Offline curation batches; submitted with ``manage.py curate_batch --submit``."""
+    list_display = [
+        'batch_id', 'backend', 'status', 'recurate', 'request_count', 'applied_count', 'failed_count',
+        'created_at', 'applied_at',
+    ]
+    list_filter = ['status', 'backend', 'recurate']
+    search_fields = ['batch_id']
+    readonly_fields = [
+        'backend', 'batch_id', 'status', 'article_ids', 'recurate', 'request_count', 'applied_count',
+        'failed_count', 'error', 'created_at', 'completed_at', 'applied_at',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(LLMCacheEntry)
+class LLMCacheEntryAdmin(admin.ModelAdmin):
+    """Cached LLM results (see news.llm_cache); delete entries to have them recomputed."""
+    list_display = ['key_short', 'operation', 'model', 'hits', 'size_bytes', 'last_used_at', 'expires_at']
+    list_filter = ['operation', 'model']
+    search_fields = ['key']
+    readonly_fields = [
+        'key', 'operation', 'model', 'value', 'size_bytes', 'hits', 'created_at', 'last_used_at', 'expires_at',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def key_short(self, obj):
+        return obj.key[:12]
+    key_short.short_description = 'Key'
 
 
 @admin.register(AudioSegment)
@@ -6,18 +6,44 @@ Provides methods for:
 - Creating embeddings for vector search
 - Extracting AI/tech tags
 - Calculating relevance scores
+- All of the above but embeddings in one structured JSON call (curate_article)
 """
+import json
 import logging
 import time
-from typing import Dict, List, Tuple, Optional
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Tuple, Optional
 import re
 
 from django.conf import settings
-from openai import OpenAI, OpenAIError, RateLimitError, APIConnectionError
+from openai import OpenAI, OpenAIError, RateLimitError, APIConnectionError, BadRequestError
 import tiktoken
 
+from .llm_cache import get_llm_cache
+
 logger = logging.getLogger(__name__)
 
+# Part of every LLM cache key (see news.llm_cache): bump an operation's
+# version when its prompt or parameters change, so old answers are not reused
+PROMPT_VERSIONS = {
+    'summaries': 1,
+    'tags': 1,
+    'relevance': 1,
+    'curation': 1,
+    'structured_summary': 1,
+    'embedding': 1,
+}
+
+# Answers in the format the summaries prompt asks for
+SUMMARIES_FORMAT = re.compile(r'SHORT:\s*\S.*DETAILED:\s*\S', re.DOTALL | re.IGNORECASE)
+
+# Fields of a complete combined curation answer (see AIService._curation_fields)
+CURATION_FIELDS = ('summary_short', 'summary_detailed', 'tags', 'relevance')
+
+# Input limit of the embedding models is 8191 tokens
+EMBEDDING_MAX_INPUT_TOKENS = 8000
+EMBEDDING_DIMENSIONS = 1536
+
 
 class AIServiceError(Exception):
     """Custom exception for AI service errors."""
@@ -27,9 +53,22 @@ class AIServiceError(Exception):
 class AIService:
     """Service class for OpenAI API interactions."""
     
-    def __init__(self):
-        """Initialize OpenAI client with API key from settings."""
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, limiter=None):
+        """
+        Initialize OpenAI client with API key from settings.
+        
+        Args:
+            limiter: Optional news.curation.AdaptiveConcurrency bounding the
+                requests in flight; it is told about every 429, so the client
+                does not retry on its own and _retry_with_backoff retries longer
+        """
+        self.limiter = limiter
+        if limiter is None:
+            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.max_attempts = 3
+        else:
+            self.client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+            self.max_attempts = 5
         self.model = settings.AI_MODEL
         self.embedding_model = settings.EMBEDDING_MODEL
         self.temperature = settings.AI_TEMPERATURE
@@ -39,26 +78,63 @@ class AIService:
         self.tts_voice = settings.TTS_VOICE
         self.tts_speed = settings.TTS_SPEED
         self.tts_model = settings.TTS_MODEL
+        # Cleared if the model rejects response_format (JSON mode)
+        self.json_mode = True
+        self.embedding_batch_inputs = settings.EMBEDDING_BATCH_MAX_INPUTS
+        self.embedding_batch_tokens = settings.EMBEDDING_BATCH_MAX_TOKENS
+        # tiktoken encoding of the embedding model: None until loaded, False if it cannot be
+        self._embedding_encoding = None
+        self.llm_cache = get_llm_cache()
         
-    def _retry_with_backoff(self, func, max_attempts=3):
+    def _retry_with_backoff(self, func, max_attempts=None):
         """Execute function with exponential backoff retry logic."""
+        max_attempts = max_attempts or self.max_attempts
         for attempt in range(max_attempts):
             try:
-                return func()
+                # The limiter slot is held for the request only, not while backing off
+                with self.limiter.slot() if self.limiter else nullcontext():
+                    return func()
             except RateLimitError as e:
+                if self.limiter:
+                    self.limiter.throttled()
                 if attempt == max_attempts - 1:
-                    raise AIServiceError(f"Rate limit exceeded after {max_attempts} attempts: {str(e)}")
+                    raise AIServiceError(f"Rate limit exceeded after {max_attempts} attempts: {str(e)}") from e
                 wait_time = (2 ** attempt) * 2  # 2, 4, 8 seconds
+                retry_after = e.response.headers.get('retry-after') if e.response is not None else None
+                if retry_after and retry_after.replace('.', '', 1).isdigit():
+                    wait_time = max(wait_time, float(retry_after))
                 logger.warning(f"Rate limit hit, waiting {wait_time}s before retry {attempt + 1}/{max_attempts}")
                 time.sleep(wait_time)
             except APIConnectionError as e:
                 if attempt == max_attempts - 1:
-                    raise AIServiceError(f"API connection failed after {max_attempts} attempts: {str(e)}")
+                    raise AIServiceError(f"API connection failed after {max_attempts} attempts: {str(e)}") from e
                 wait_time = (2 ** attempt) * 1
                 logger.warning(f"Connection error, retrying in {wait_time}s")
                 time.sleep(wait_time)
             except OpenAIError as e:
-                raise AIServiceError(f"OpenAI API error: {str(e)}")
+                raise AIServiceError(f"OpenAI API error: {str(e)}") from e
+    
+    def _cached_call(self, operation: str, inputs: Tuple[str, ...], func, valid: Callable[[Any], bool]):
+        """
+        Result of a chat call, from the LLM cache if the same inputs were sent before.
+        
+        func makes the call (with retries). Its result is only cached when
+        ``valid`` accepts it, so an answer the caller cannot parse is not
+        replayed; errors are never cached.
+        """
+        key = self.llm_cache.make_key(operation, self.model, PROMPT_VERSIONS[operation], *inputs)
+        result = self.llm_cache.get(operation, key)
+        if result is None:
+            result = func()
+            try:
+                usable = valid(result)
+            except Exception:
+                usable = False
+            if usable:
+                self.llm_cache.set(operation, self.model, key, result)
+            else:
+                logger.warning(f"Not caching invalid {operation} answer: {str(result)[:100]}")
+        return result
         
     def generate_summaries(self, article_text: str, title: str) -> Tuple[str, str]:
         """
@@ -110,7 +186,10 @@ DETAILED: [your 3-4 paragraph summary]"""
             return response.choices[0].message.content
         
         try:
-            result = self._retry_with_backoff(_call_api)
+            result = self._cached_call(
+                'summaries', (title, truncated_text), lambda: self._retry_with_backoff(_call_api),
+                valid=lambda answer: bool(SUMMARIES_FORMAT.search(answer)),
+            )
             
             # Parse response
             short_summary, detailed_summary = self._parse_summaries(result)
@@ -157,25 +236,103 @@ DETAILED: [your 3-4 paragraph summary]"""
         Returns:
             List of 1536 floats representing the embedding vector
         """
-        # Truncate text if too long (8191 tokens max for embedding model)
-        truncated_text = self._truncate_text(text, max_tokens=8000)
+        return self.generate_embeddings_batch([text])[0]
+    
+    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for many texts with as few requests as possible.
+        
+        Texts are truncated to the model's input limit and packed, in order,
+        into requests of at most EMBEDDING_BATCH_MAX_INPUTS texts and
+        EMBEDDING_BATCH_MAX_TOKENS tokens (counted with tiktoken). Vectors are
+        matched to texts by the index the API returns with each. A request
+        that is rejected is split in halves and retried, so a bad input only
+        costs its own vector; a request that stays rate limited is not split.
+        
+        Args:
+            texts: Texts to embed
+            
+        Texts embedded before (whitespace aside) come from the LLM cache.
+        
+        Returns:
+            One vector per text, in order; the zero vector for empty texts and
+            texts that could not be embedded
+        """
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        keys = {
+            index: self.llm_cache.make_key('embedding', self.embedding_model, PROMPT_VERSIONS['embedding'], text)
+            for index, text in enumerate(texts) if text and text.strip()
+        }
+        cached = self.llm_cache.get_many('embedding', list(keys.values()))
+        for index, key in keys.items():
+            vectors[index] = cached.get(key)
         
+        chunk, chunk_tokens = [], 0
+        requests = 0
+        for index, text in enumerate(texts):
+            if index not in keys or vectors[index] is not None:
+                continue
+            text, tokens = self._embedding_input(text)
+            if chunk and (len(chunk) >= self.embedding_batch_inputs or chunk_tokens + tokens > self.embedding_batch_tokens):
+                requests += self._embed_chunk(chunk, vectors)
+                chunk, chunk_tokens = [], 0
+            chunk.append((index, text))
+            chunk_tokens += tokens
+        if chunk:
+            requests += self._embed_chunk(chunk, vectors)
+        self.llm_cache.set_many('embedding', self.embedding_model, {
+            key: vectors[index] for index, key in keys.items()
+            if vectors[index] is not None and len(vectors[index]) == EMBEDDING_DIMENSIONS and key not in cached
+        })
+        
+        failed = sum(1 for index, text in enumerate(texts) if vectors[index] is None and text and text.strip())
+        if failed:
+            logger.error(f"Could not embed {failed} of {len(texts)} texts, using zero vectors")
+        logger.info(
+            f"Generated {len(texts) - failed} embedding vectors in {requests} requests ({len(cached)} cached)"
+        )
+        return [vector if vector is not None else [0.0] * EMBEDDING_DIMENSIONS for vector in vectors]
+    
+    def _embed_chunk(self, chunk: List[Tuple[int, str]], vectors: List) -> int:
+        """Embed (index, text) pairs with one request, splitting it if rejected. Returns the requests made."""
         def _call_api():
-            response = self.client.embeddings.create(
+            return self.client.embeddings.create(
                 model=self.embedding_model,
-                input=truncated_text
+                input=[text for _, text in chunk]
             )
-            return response.data[0].embedding
         
         try:
-            embedding = self._retry_with_backoff(_call_api)
-            logger.info(f"Generated embedding vector (dim={len(embedding)})")
-            return embedding
-            
-        except Exception as e:
-            logger.error(f"Error generating embeddings: {str(e)}")
-            # Return zero vector as fallback
-            return [0.0] * 1536
+            response = self._retry_with_backoff(_call_api)
+        except AIServiceError as e:
+            if len(chunk) == 1 or isinstance(e.__cause__, (RateLimitError, APIConnectionError)):
+                logger.error(f"Error generating embeddings for {len(chunk)} texts: {str(e)}")
+                return 1
+            half = len(chunk) // 2
+            return 1 + self._embed_chunk(chunk[:half], vectors) + self._embed_chunk(chunk[half:], vectors)
+        
+        for item in response.data:
+            if 0 <= item.index < len(chunk):
+                vectors[chunk[item.index][0]] = item.embedding
+        return 1
+    
+    def _embedding_input(self, text: str) -> Tuple[str, int]:
+        """Text cut to the embedding model's input limit, and its token count."""
+        if self._embedding_encoding is None:
+            try:
+                self._embedding_encoding = tiktoken.encoding_for_model(self.embedding_model)
+            except Exception as e:
+                logger.warning(f"Error loading tiktoken encoding: {str(e)}, estimating tokens from characters")
+                self._embedding_encoding = False
+        
+        if not self._embedding_encoding:
+            # Rough estimate: 4 chars per token
+            text = text[:EMBEDDING_MAX_INPUT_TOKENS * 4]
+            return text, len(text) // 4 + 1
+        tokens = self._embedding_encoding.encode(text, disallowed_special=())
+        if len(tokens) > EMBEDDING_MAX_INPUT_TOKENS:
+            tokens = tokens[:EMBEDDING_MAX_INPUT_TOKENS]
+            text = self._embedding_encoding.decode(tokens)
+        return text, len(tokens)
     
     def generate_tags(self, article_text: str, title: str) -> List[str]:
         """
@@ -218,11 +375,12 @@ Example: GPT-4,natural-language-processing,OpenAI,large-language-models"""
             return response.choices[0].message.content
         
         try:
-            result = self._retry_with_backoff(_call_api)
+            result = self._cached_call(
+                'tags', (title, truncated_text[:1000]), lambda: self._retry_with_backoff(_call_api),
+                valid=lambda answer: bool(self._parse_tags(answer)),
+            )
             
-            # Parse comma-separated tags
-            tags = [tag.strip().lower() for tag in result.split(',')]
-            tags = [tag for tag in tags if tag and len(tag) > 1][:8]  # Limit to 8 tags
+            tags = self._parse_tags(result)
             
             logger.info(f"Generated tags: {tags}")
             return tags
@@ -258,15 +416,18 @@ Example: GPT-4,natural-language-processing,OpenAI,large-language-models"""
         # AI-based semantic relevance
         try:
             ai_score = self._calculate_ai_relevance(article_text, title)
-            # Combine scores (weighted average: 30% keyword, 70% AI)
-            final_score = (0.3 * keyword_score) + (0.7 * ai_score)
-            logger.info(f"Relevance score: {final_score:.2f} (keyword: {keyword_score:.2f}, AI: {ai_score:.2f})")
-            return round(final_score, 3)
+            return self._combine_relevance(keyword_score, ai_score)
         except Exception as e:
             logger.error(f"Error calculating AI relevance: {str(e)}")
             # Fallback to keyword score only
             return keyword_score
     
+    def _combine_relevance(self, keyword_score: float, ai_score: float) -> float:
+        """Weighted average of the keyword and AI relevance scores (30% keyword, 70% AI)."""
+        final_score = (0.3 * keyword_score) + (0.7 * ai_score)
+        logger.info(f"Relevance score: {final_score:.2f} (keyword: {keyword_score:.2f}, AI: {ai_score:.2f})")
+        return round(final_score, 3)
+    
     def _calculate_keyword_score(self, text: str) -> float:
         """Calculate relevance score based on keyword matching."""
         text_lower = text.lower()
@@ -322,22 +483,217 @@ Return ONLY a single number from 0-10, nothing else."""
             return response.choices[0].message.content
         
         try:
-            result = self._retry_with_backoff(_call_api)
+            result = self._cached_call(
+                'relevance', (title, truncated_text[:800]), lambda: self._retry_with_backoff(_call_api),
+                valid=lambda answer: self._parse_relevance(answer) is not None,
+            )
             
-            # Extract number from response
-            score_match = re.search(r'\d+', result)
-            if score_match:
-                score = int(score_match.group())
-                # Normalize to 0-1 range
-                return round(score / 10.0, 3)
-            else:
+            score = self._parse_relevance(result)
+            if score is None:
                 logger.warning(f"Could not parse AI relevance score: {result}")
                 return 0.5
+            return score
                 
         except Exception as e:
             logger.error(f"Error in AI relevance calculation: {str(e)}")
             return 0.5
     
+    def curate_article(self, article_text: str, title: str) -> Dict[str, Any]:
+        """
+        Generate summaries, tags and relevance for an article in one chat call.
+        
+        The model answers with a JSON object that is validated field by
+        field (see parse_curation), so a bad answer costs at most the round
+        trips the separate calls would have.
+        
+        Args:
+            article_text: Full article text
+            title: Article title
+            
+        Returns:
+            Dict with 'summary_short', 'summary_detailed', 'tags',
+            'relevance_score' (as calculate_relevance_score computes it) and
+            'fallbacks', the fields that needed a dedicated call
+        """
+        request = self.curation_request(article_text, title)
+        
+        def _call_api():
+            if self.json_mode:
+                try:
+                    return self.client.chat.completions.create(**request).choices[0].message.content
+                except BadRequestError as e:
+                    if 'response_format' not in str(e):
+                        raise
+                    logger.warning(f"Model {self.model} does not support JSON mode, relying on the prompt")
+                    self.json_mode = False
+            plain = {key: value for key, value in request.items() if key != 'response_format'}
+            return self.client.chat.completions.create(**plain).choices[0].message.content
+        
+        try:
+            response = self._cached_call(
+                'curation', (request['messages'][-1]['content'],), lambda: self._retry_with_backoff(_call_api),
+                valid=lambda answer: len(self._curation_fields(self._parse_json_object(answer))) == len(CURATION_FIELDS),
+            )
+        except Exception as e:
+            logger.error(f"Error in combined curation call: {str(e)}")
+            response = None
+        return self.parse_curation(response, article_text, title)
+    
+    def curation_request(self, article_text: str, title: str) -> Dict[str, Any]:
+        """
+        Chat completion parameters of the combined curation call.
+        
+        Also the request body of each line of a batch (see news.batch_curation).
+        """
+        truncated_text = self._truncate_text(article_text, max_tokens=8000)
+        
+        prompt = f"""You are curating AI and technology news.
+
+Article Title: {title}
+
+Article Content:
+{truncated_text}
+
+Return a JSON object with exactly these keys:
+- "summary_short": 1-2 sentence overview suitable for a news feed card
+- "summary_detailed": 3-4 paragraph summary covering key facts, technical details, industry impact and context, in an objective, neutral tone
+- "tags": 3-8 specific technical tags (AI models, techniques, companies, research areas, technologies) in kebab-case, avoiding generic tags like "technology" or "news"
+- "relevance": integer 0-10 rating the relevance to AI and emerging technology (10: major AI research or model release; 7-9: clearly AI-related; 4-6: tech news with an AI angle; 1-3: tangentially related; 0: unrelated)
+
+Example:
+{{"summary_short": "...", "summary_detailed": "...", "tags": ["gpt-4", "openai", "large-language-models"], "relevance": 8}}"""
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are an expert AI and technology news curator. Answer with a single JSON object."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens + 200,
+            "response_format": {"type": "json_object"},
+        }
+    
+    def parse_curation(self, response: Optional[str], article_text: str, title: str) -> Dict[str, Any]:
+        """
+        Validate the answer to curation_request field by field.
+        
+        A field that is missing or malformed is recovered with the parser of
+        its dedicated method (comma-separated tags, a number in a string),
+        and failing that with the dedicated method itself.
+        
+        Args:
+            response: Message content of the answer (None if the call failed)
+            article_text: Full article text
+            title: Article title
+        
+        Returns:
+            See curate_article
+        """
+        data = {}
+        if response is not None:
+            try:
+                data = self._parse_json_object(response)
+            except ValueError as e:
+                logger.error(f"Invalid combined curation answer: {str(e)}")
+        
+        fields = self._curation_fields(data)
+        result = {'fallbacks': []}
+        
+        if 'summary_short' in fields:
+            result['summary_short'] = fields['summary_short']
+            result['summary_detailed'] = fields['summary_detailed']
+        else:
+            result['fallbacks'].append('summaries')
+            result['summary_short'], result['summary_detailed'] = self.generate_summaries(article_text, title)
+        
+        if 'tags' in fields:
+            result['tags'] = fields['tags']
+        else:
+            result['fallbacks'].append('tags')
+            result['tags'] = self.generate_tags(article_text, title)
+        
+        # Same rule as calculate_relevance_score: the keyword score alone decides off-topic articles
+        keyword_score = self._calculate_keyword_score(title + " " + article_text)
+        ai_score = fields.get('relevance')
+        if keyword_score < 0.1:
+            result['relevance_score'] = keyword_score
+        elif ai_score is not None:
+            result['relevance_score'] = self._combine_relevance(keyword_score, ai_score)
+        else:
+            result['fallbacks'].append('relevance')
+            result['relevance_score'] = self.calculate_relevance_score(article_text, title)
+        
+        if result['fallbacks']:
+            logger.warning(f"Combined curation fell back for {', '.join(result['fallbacks'])}: {title[:50]}...")
+        else:
+            logger.info(f"Curated article in one call: {title[:50]}...")
+        return result
+    
+    def _curation_fields(self, data: Dict) -> Dict[str, Any]:
+        """
+        The usable fields of a combined curation answer.
+        
+        Returns:
+            Dict with the CURATION_FIELDS that are present and valid:
+            'summary_short' and 'summary_detailed' (together), 'tags' and
+            'relevance' (normalized to 0-1)
+        """
+        fields = {}
+        short = data.get('summary_short')
+        detailed = data.get('summary_detailed')
+        if isinstance(short, str) and short.strip() and isinstance(detailed, str) and detailed.strip():
+            short = short.strip()
+            fields['summary_short'] = short[:497] + "..." if len(short) > 500 else short
+            fields['summary_detailed'] = detailed.strip()
+        
+        tags = data.get('tags')
+        if isinstance(tags, str):
+            tags = self._parse_tags(tags)
+        elif isinstance(tags, list):
+            tags = self._parse_tags(','.join(str(tag) for tag in tags))
+        if tags:
+            fields['tags'] = tags
+        
+        relevance = self._parse_relevance(data.get('relevance'))
+        if relevance is not None:
+            fields['relevance'] = relevance
+        return fields
+    
+    @staticmethod
+    def _parse_json_object(response: str) -> Dict:
+        """The JSON object in a response, tolerating code fences or text around it."""
+        try:
+            data = json.loads(response)
+        except (TypeError, json.JSONDecodeError):
+            match = re.search(r'\{.*\}', response or '', re.DOTALL)
+            if not match:
+                raise ValueError(f"No JSON object in response: {(response or '')[:100]}")
+            data = json.loads(match.group())
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+        return data
+    
+    @staticmethod
+    def _parse_tags(value: str) -> List[str]:
+        """Tags from a comma-separated list: lowercased, at most 8."""
+        tags = [tag.strip().lower() for tag in value.split(',')]
+        return [tag for tag in tags if tag and len(tag) > 1][:8]
+    
+    @staticmethod
+    def _parse_relevance(value) -> Optional[float]:
+        """A 0-10 rating (number, or the first number in a string) normalized to 0-1, else None."""
+        if isinstance(value, bool) or value is None:
+            return None
+        if not isinstance(value, (int, float)):
+            match = re.search(r'\d+(?:\.\d+)?', str(value))
+            if not match:
+                return None
+            value = float(match.group())
+        if not 0 <= value <= 10:
+            return None
+        return round(value / 10.0, 3)
+    
     def _truncate_text(self, text: str, max_tokens: int = 8000) -> str:
         """Truncate text to fit within token limit."""
         try:
@@ -443,7 +799,10 @@ Keep each point concise (1-2 sentences) and highly informative."""
             return response.choices[0].message.content
         
         try:
-            result = self._retry_with_backoff(_call_api)
+            result = self._cached_call(
+                'structured_summary', (title, truncated_content), lambda: self._retry_with_backoff(_call_api),
+                valid=lambda answer: 'categories' in self._parse_keypoints_summary(answer),
+            )
             
             # Parse the keypoints response
             structured = self._parse_keypoints_summary(result)
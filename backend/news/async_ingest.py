@@ -0,0 +1,214 @@
+"""
+Concurrent feed fetching with asyncio.
+
+Fetches every due source on one event loop instead of one Celery task per
+source, so a full sweep takes roughly as long as the slowest feed.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+from django.conf import settings
+
+from .circuit_breaker import get_circuit_breaker, is_host_failure
+from .feed_parser import FEED_CHUNK_SIZE, FeedParser, FeedParseError, TransientFeedError, is_not_modified
+from .rate_limiter import get_rate_limiter
+from .stage_timing import StageTimer
+from .utils import get_request_headers, get_domain_from_url
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFeedFetcher:
+    """Fetch and parse many feeds concurrently with global and per-host limits."""
+    
+    def __init__(self, timeout: int = 30, max_concurrency: int = 20, per_host_limit: int = 2,
+                 max_attempts: int = 2):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.max_attempts = max_attempts
+        self._global_semaphore = None
+        self._host_semaphores = {}
+    
+    def run(self, sources) -> List[Dict]:
+        """Synchronous entry point: fetch all sources and return one result per source."""
+        if not sources:
+            return []
+        return asyncio.run(self.fetch_all(sources))
+    
+    async def fetch_all(self, sources) -> List[Dict]:
+        """
+        Fetch all sources concurrently.
+        
+        Returns:
+            List of dicts with 'source', 'feed', 'entries', 'error',
+            'started_at' and the source's StageTimer as 'timer', in the same
+            order as ``sources``
+        """
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_semaphores = {}
+        
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True, limits=limits) as client:
+            results = await asyncio.gather(
+                *(self._fetch_source(client, source) for source in sources)
+            )
+        
+        failed = sum(1 for r in results if r['error'])
+        logger.info(f"Concurrent fetch completed: {len(results)} sources, {failed} failed")
+        return results
+    
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent requests to one host."""
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+    
+    async def _fetch_source(self, client: httpx.AsyncClient, source) -> Dict:
+        """Fetch, parse and extract entries for a single source."""
+        result = {
+            'source': source,
+            'feed': None,
+            'entries': [],
+            'error': None,
+            'started_at': time.time(),
+            'timer': StageTimer(),
+        }
+        parser = FeedParser(timeout=self.timeout, max_articles=source.max_articles_per_fetch, timer=result['timer'])
+        host = get_domain_from_url(source.feed_url)
+        
+        # The breaker checks Redis; keep the blocking call off the event loop
+        if not await asyncio.to_thread(get_circuit_breaker().allow, host):
+            result['error'] = f"Circuit open for {host}, skipping feed: {source.feed_url}"
+            return result
+        
+        try:
+            # Take the per-host slot first so waiting on a busy host never holds a global slot
+            queued_at = time.perf_counter()
+            async with self._host_semaphore(host):
+                parser.timer.add('queue', time.perf_counter() - queued_at)
+                response, chunks = await self._get_with_retry(client, parser, source)
+            
+            # Parsing is CPU-bound; keep it off the event loop
+            feed = await asyncio.to_thread(
+                parser.parse_response,
+                source.feed_url,
+                status=response.status_code,
+                content=chunks,
+                response_headers=response.headers,
+                etag=source.etag,
+                last_modified=source.last_modified,
+                content_hash=source.content_hash,
+            )
+            result['feed'] = feed
+            
+            if not is_not_modified(feed):
+                result['entries'] = await asyncio.to_thread(
+                    parser.parse_feed_entries,
+                    feed,
+                    source.feed_url,
+                    source.high_water_mark,
+                    source.recent_entry_ids,
+                )
+        except FeedParseError as e:
+            result['error'] = str(e)
+        except Exception as e:
+            result['error'] = f"Unexpected error fetching feed: {str(e)}"
+        
+        return result
+    
+    async def _get_with_retry(self, client: httpx.AsyncClient, parser: FeedParser, source) -> Tuple[httpx.Response, List[bytes]]:
+        """
+        GET a feed with conditional headers, retrying transient failures with backoff.
+        
+        Called holding the host's slot. A global slot is only taken once the
+        host's rate limit lets the request go, and is released during backoff.
+        
+        Returns:
+            Tuple of (response, body_chunks)
+        """
+        feed_url = source.feed_url
+        domain = get_domain_from_url(feed_url)
+        breaker = get_circuit_breaker()
+        timer = parser.timer
+        headers = get_request_headers(source.custom_headers)
+        headers.update(parser.conditional_headers(source.etag, source.last_modified))
+        
+        for attempt in range(self.max_attempts):
+            try:
+                with timer.stage('rate_limit'):
+                    await get_rate_limiter().wait_async(domain)
+                queued_at = time.perf_counter()
+                async with self._global_semaphore:
+                    timer.add('queue', time.perf_counter() - queued_at)
+                    logger.info(f"Fetching feed: {feed_url}")
+                    connect = _ConnectTrace()
+                    request_start = time.perf_counter()
+                    async with client.stream('GET', feed_url, headers=headers, extensions={'trace': connect}) as response:
+                        timer.add('connect', connect.seconds)
+                        timer.add('wait', time.perf_counter() - request_start - connect.seconds)
+                        if is_host_failure(response.status_code):
+                            await asyncio.to_thread(breaker.record_failure, domain)
+                            raise TransientFeedError(f"HTTP error {response.status_code}: {feed_url}")
+                        await asyncio.to_thread(breaker.record_success, domain)
+                        if response.status_code == 404:
+                            raise FeedParseError(f"Feed not found (404): {feed_url}")
+                        if response.status_code == 403:
+                            raise FeedParseError(f"Feed access forbidden (403): {feed_url}")
+                        if response.status_code >= 400:
+                            raise FeedParseError(f"HTTP error {response.status_code}: {feed_url}")
+                        return response, await self._read_body(response, feed_url, timer)
+            except TransientFeedError as e:
+                error = e
+            except httpx.TimeoutException:
+                await asyncio.to_thread(breaker.record_failure, domain)
+                error = TransientFeedError(f"Timeout fetching feed: {feed_url}")
+            except httpx.TransportError:
+                await asyncio.to_thread(breaker.record_failure, domain)
+                error = TransientFeedError(f"Connection error fetching feed: {feed_url}")
+            
+            if attempt < self.max_attempts - 1:
+                wait_time = 2 ** attempt
+                logger.warning(f"{error}, retrying in {wait_time}s")
+                await asyncio.sleep(wait_time)
+        
+        raise error
+    
+    async def _read_body(self, response: httpx.Response, feed_url: str, timer: StageTimer) -> List[bytes]:
+        """Read a streamed body in chunks, refusing bodies over FEED_MAX_BODY_BYTES."""
+        max_bytes = settings.FEED_MAX_BODY_BYTES
+        chunks = []
+        size = 0
+        with timer.stage('download'):
+            async for chunk in response.aiter_bytes(FEED_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise FeedParseError(f"Feed body exceeds {max_bytes} bytes: {feed_url}")
+                chunks.append(chunk)
+        # parse_response counts the bytes as it reads the chunks
+        return chunks
+
+
+class _ConnectTrace:
+    """httpcore trace hook adding up the time spent on TCP connects and TLS handshakes."""
+    
+    CONNECT_EVENTS = ('connection.connect_tcp', 'connection.start_tls')
+    
+    def __init__(self):
+        self.seconds = 0.0
+        self._started = {}
+    
+    async def __call__(self, event_name: str, info: Dict):
+        name, _, phase = event_name.rpartition('.')
+        if name not in self.CONNECT_EVENTS:
+            return
+        if phase == 'started':
+            self._started[name] = time.perf_counter()
+        elif name in self._started:
+            self.seconds += time.perf_counter() - self._started.pop(name)
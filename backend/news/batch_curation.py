@@ -0,0 +1,374 @@
+"""
+Offline curation of large backlogs through a batch service.
+
+Instead of one real-time chat call per article, BatchCurator writes the
+combined curation request of every article (AIService.curation_request) as
+one JSONL line, submits the file to a batch service and records a
+CurationBatch. Polling collects finished batches and applies their answers
+in bulk: each answer goes through AIService.parse_curation, the detailed
+summaries are embedded in batched requests, and ArticleCurated rows are
+created, or updated for articles that are already curated (re-curation
+after a prompt change). Requests that failed in the batch are left for the next run.
+A batch stays 'submitted' until its answers have been applied, so a batch
+whose apply fails (bad output, database error) is polled and applied again.
+
+The batch service is pluggable (settings.CURATION_BATCH_BACKEND):
+- 'openai': the OpenAI Batch API (half price, separate rate limits, results
+  within 24 hours)
+- 'local': LocalBatchBackend, which answers the requests itself on the
+  first poll, with the real-time API or a given responder (for tests)
+- the dotted path of any other BatchBackend subclass
+"""
+import json
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .ai_service import get_ai_service
+from .curation import cover_media, curation_text
+from .models import ArticleCurated, ArticleRaw, CurationBatch
+
+logger = logging.getLogger(__name__)
+
+CHAT_ENDPOINT = '/v1/chat/completions'
+# Batch statuses after which nothing changes any more
+FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+class BatchBackend(ABC):
+    """A service that runs a JSONL file of API requests and returns a JSONL file of answers."""
+    
+    name = ''
+    
+    @property
+    def path(self) -> str:
+        """What get_batch_backend takes to get this backend again: its name, or else its class path."""
+        return self.name or f"{type(self).__module__}.{type(self).__qualname__}"
+    
+    @abstractmethod
+    def submit(self, requests: bytes) -> str:
+        """
+        Submit a batch of requests in the OpenAI batch input format.
+        
+        Returns:
+            The service's id for the batch
+        """
+    
+    @abstractmethod
+    def poll(self, batch_id: str) -> Dict:
+        """
+        Check on a batch.
+        
+        Returns:
+            Dict with 'status' ('pending' or one of FINAL_STATUSES), 'output'
+            (the answers in the OpenAI batch output format, once there are
+            any, else None) and 'error'
+        """
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """The OpenAI Batch API."""
+    
+    name = 'openai'
+    
+    # Batch API statuses that are not final yet
+    PENDING_STATUSES = ('validating', 'in_progress', 'finalizing', 'cancelling')
+    
+    def __init__(self, client=None):
+        self.client = client or get_ai_service().client
+    
+    def submit(self, requests: bytes) -> str:
+        input_file = self.client.files.create(file=('curation.jsonl', requests), purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_ENDPOINT,
+            completion_window='24h',
+        )
+        return batch.id
+    
+    def poll(self, batch_id: str) -> Dict:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in self.PENDING_STATUSES:
+            return {'status': 'pending', 'output': None, 'error': None}
+        
+        # Expired and cancelled batches still return the answers they finished
+        output = self.client.files.content(batch.output_file_id).content if batch.output_file_id else None
+        error = None
+        if batch.errors and batch.errors.data:
+            error = '; '.join(f"{e.code}: {e.message}" for e in batch.errors.data[:5])
+        return {'status': batch.status, 'output': output, 'error': error}
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Stand-in batch service: answers a batch itself on its first poll.
+    
+    Requests are answered by ``responder(body) -> response body`` (defaults
+    to the real-time chat API), so tests can supply canned answers.
+    """
+    
+    name = 'local'
+    
+    def __init__(self, directory: Optional[str] = None, responder: Optional[Callable[[Dict], Dict]] = None):
+        """
+        Args:
+            directory: Where batch files are kept (defaults to settings.CURATION_BATCH_LOCAL_DIR)
+            responder: Turns one request body into a chat completion body
+        """
+        self.directory = Path(directory or settings.CURATION_BATCH_LOCAL_DIR)
+        self.responder = responder or _chat_completion
+    
+    def submit(self, requests: bytes) -> str:
+        batch_id = f"local-{uuid.uuid4().hex}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f'{batch_id}.input.jsonl').write_bytes(requests)
+        return batch_id
+    
+    def poll(self, batch_id: str) -> Dict:
+        output_path = self.directory / f'{batch_id}.output.jsonl'
+        if not output_path.exists():
+            input_path = self.directory / f'{batch_id}.input.jsonl'
+            if not input_path.exists():
+                return {'status': 'failed', 'output': None, 'error': f"No input file for {batch_id}"}
+            lines = []
+            for line in input_path.read_bytes().splitlines():
+                request = json.loads(line)
+                answer = {'id': f"batch_req_{uuid.uuid4().hex}", 'custom_id': request['custom_id'],
+                          'response': None, 'error': None}
+                try:
+                    answer['response'] = {'status_code': 200, 'body': self.responder(request['body'])}
+                except Exception as e:
+                    answer['error'] = {'code': type(e).__name__, 'message': str(e)}
+                lines.append(json.dumps(answer))
+            tmp = output_path.with_suffix('.tmp')
+            tmp.write_text('\n'.join(lines) + '\n')
+            os.replace(tmp, output_path)
+        return {'status': 'completed', 'output': output_path.read_bytes(), 'error': None}
+
+
+def _chat_completion(body: Dict) -> Dict:
+    return get_ai_service().client.chat.completions.create(**body).model_dump()
+
+
+BACKENDS = {backend.name: backend for backend in (OpenAIBatchBackend, LocalBatchBackend)}
+
+
+def get_batch_backend(name: Optional[str] = None) -> BatchBackend:
+    """
+    A batch backend by name or dotted class path (defaults to settings.CURATION_BATCH_BACKEND).
+    
+    Raises:
+        ImportError: If the class path cannot be imported
+        TypeError: If it is not a complete BatchBackend subclass
+    """
+    name = name or settings.CURATION_BATCH_BACKEND
+    backend_class = BACKENDS.get(name) or import_string(name)
+    if not (isinstance(backend_class, type) and issubclass(backend_class, BatchBackend)):
+        raise TypeError(f"{name} is not a BatchBackend")
+    return backend_class()
+
+
+def open_batch_article_ids() -> List[int]:
+    """Articles waiting in submitted batches, which real-time curation leaves alone."""
+    ids = []
+    for article_ids in CurationBatch.objects.filter(status='submitted').values_list('article_ids', flat=True):
+        ids.extend(article_ids)
+    return ids
+
+
+class BatchCurator:
+    """Submit curation batches and apply their results; see the module docstring."""
+    
+    def __init__(self, backend: Optional[BatchBackend] = None, batch_size: Optional[int] = None):
+        """
+        Args:
+            backend: Batch service for new batches (defaults to settings.CURATION_BATCH_BACKEND)
+            batch_size: Max requests per batch (defaults to settings.CURATION_BATCH_SIZE)
+        """
+        self.backend = backend or get_batch_backend()
+        self.batch_size = batch_size or settings.CURATION_BATCH_SIZE
+        self.ai_service = get_ai_service()
+    
+    def submit(self, limit: Optional[int] = None, recurate: bool = False) -> List[CurationBatch]:
+        """
+        Submit the curation requests of pending articles, ``batch_size`` per batch.
+        
+        Args:
+            limit: Max articles submitted
+            recurate: Include articles that are already curated
+        """
+        articles = ArticleRaw.objects.filter(canonical_article__isnull=True).exclude(id__in=open_batch_article_ids())
+        if not recurate:
+            articles = articles.filter(curated__isnull=True)
+        articles = articles.only('id', 'title', 'summary_feed', 'raw_html').order_by('id')
+        if limit:
+            articles = articles[:limit]
+        
+        batches = []
+        for chunk in self._chunks(articles.iterator(chunk_size=500)):
+            lines = [
+                json.dumps({
+                    'custom_id': f"article-{article.id}",
+                    'method': 'POST',
+                    'url': CHAT_ENDPOINT,
+                    'body': self.ai_service.curation_request(curation_text(article), article.title),
+                })
+                for article in chunk
+            ]
+            batch_id = self.backend.submit(('\n'.join(lines) + '\n').encode('utf-8'))
+            batches.append(CurationBatch.objects.create(
+                backend=self.backend.path,
+                batch_id=batch_id,
+                article_ids=[article.id for article in chunk],
+                recurate=recurate,
+                request_count=len(chunk),
+            ))
+            logger.info(f"Submitted curation batch {batch_id} with {len(chunk)} articles")
+        return batches
+    
+    def poll(self) -> Dict:
+        """
+        Check every submitted batch and apply the finished ones.
+        
+        Returns:
+            Dict with 'pending', 'applied' (batches), 'articles' curated, 'failed'
+            requests and 'errors' (batches whose answers could not be applied)
+        """
+        stats = {'pending': 0, 'applied': 0, 'articles': 0, 'failed': 0, 'errors': 0}
+        for batch in CurationBatch.objects.filter(status='submitted').order_by('created_at'):
+            try:
+                backend = self.backend if batch.backend == self.backend.path else get_batch_backend(batch.backend)
+                result = backend.poll(batch.batch_id)
+            except Exception as e:
+                logger.error(f"Could not poll curation batch {batch.batch_id}: {str(e)}")
+                stats['pending'] += 1
+                continue
+            
+            if result['status'] == 'pending':
+                stats['pending'] += 1
+                continue
+            if not result['output']:
+                batch.status = result['status']
+                batch.error = result['error']
+                batch.completed_at = timezone.now()
+                batch.save(update_fields=['status', 'error', 'completed_at'])
+                continue
+            
+            try:
+                self.apply(batch, result['output'], error=result['error'])
+            except Exception as e:
+                # Left 'submitted': the next poll fetches the output and applies it again
+                logger.error(f"Could not apply curation batch {batch.batch_id}: {str(e)}")
+                CurationBatch.objects.filter(id=batch.id).update(error=f"Apply failed: {str(e)}")
+                stats['errors'] += 1
+                continue
+            stats['applied'] += 1
+            stats['articles'] += batch.applied_count
+            stats['failed'] += batch.failed_count
+        return stats
+    
+    def apply(self, batch: CurationBatch, output: bytes, error: Optional[str] = None):
+        """
+        Store the answers of a finished batch on ArticleCurated rows and mark it applied.
+        
+        Malformed output lines are skipped (and counted as failed requests);
+        database and embedding errors propagate, leaving the batch as it was.
+        
+        Args:
+            batch: The batch the output belongs to
+            output: The batch's answers in the OpenAI batch output format
+            error: Error the batch service reported for the batch, if any
+        """
+        answers = {}
+        malformed = 0
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                answer = json.loads(line)
+                response = answer.get('response') or {}
+                if answer.get('error') or response.get('status_code') != 200:
+                    continue
+                article_id = int(answer['custom_id'].split('-', 1)[1])
+                answers[article_id] = response['body']['choices'][0]['message']['content']
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                malformed += 1
+        if malformed:
+            logger.warning(f"Skipped {malformed} malformed lines in the output of curation batch {batch.batch_id}")
+        
+        applied = 0
+        ids = sorted(answers)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            articles = ArticleRaw.objects.filter(id__in=chunk).prefetch_related('media_assets')
+            applied += self._store(articles, answers)
+        
+        # Failed requests, and those the batch never got to (e.g. it expired)
+        failed = len(set(batch.article_ids) - set(answers))
+        batch.status = 'applied'
+        batch.error = error
+        batch.applied_count = applied
+        batch.failed_count = failed
+        batch.completed_at = batch.completed_at or timezone.now()
+        batch.applied_at = timezone.now()
+        batch.save(update_fields=['status', 'error', 'applied_count', 'failed_count', 'completed_at', 'applied_at'])
+        logger.info(f"Applied curation batch {batch.batch_id}: {applied} articles, {failed} failed requests")
+    
+    def _store(self, articles: List[ArticleRaw], answers: Dict[int, str]) -> int:
+        """Parse the answers of some articles, embed their summaries and write them in bulk."""
+        curations = {
+            article.id: self.ai_service.parse_curation(answers[article.id], curation_text(article), article.title)
+            for article in articles
+        }
+        embeddings = dict(zip(curations, self.ai_service.generate_embeddings_batch(
+            [curation['summary_detailed'] for curation in curations.values()]
+        )))
+        
+        existing = {
+            curated.raw_article_id: curated
+            for curated in ArticleCurated.objects.filter(raw_article_id__in=list(curations))
+        }
+        created, updated = [], []
+        for article in articles:
+            curation = curations[article.id]
+            curated = existing.get(article.id)
+            if curated is None:
+                # Articles curated in real time since the batch was submitted are updated instead
+                curated = ArticleCurated(raw_article=article, cover_media=cover_media(article))
+                created.append(curated)
+            else:
+                # bulk_update does not touch auto_now fields
+                curated.updated_at = timezone.now()
+                updated.append(curated)
+            curated.summary_short = curation['summary_short']
+            curated.summary_detailed = curation['summary_detailed']
+            curated.relevance_score = curation['relevance_score']
+            curated.ai_tags = curation['tags']
+            curated.embedding = embeddings[article.id]
+        
+        with transaction.atomic():
+            ArticleCurated.objects.bulk_create(created, batch_size=200)
+            ArticleCurated.objects.bulk_update(
+                updated,
+                ['summary_short', 'summary_detailed', 'relevance_score', 'ai_tags', 'embedding', 'updated_at'],
+                batch_size=200,
+            )
+        return len(created) + len(updated)
+    
+    def _chunks(self, articles: Iterator[ArticleRaw]) -> Iterator[List[ArticleRaw]]:
+        chunk = []
+        for article in articles:
+            chunk.append(article)
+            if len(chunk) >= self.batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,235 @@
+"""
+Long-lived headless browser pool for rendering JavaScript-only pages.
+
+One Chromium per worker process, driven by Playwright's async API on a
+private event loop thread, so any thread of the process can render pages
+(the per-article task, or BatchContentFetcher's workers). Pages are opened
+in a fixed set of PLAYWRIGHT_CONTEXTS browser contexts, which bounds the
+concurrency; a context is replaced after PLAYWRIGHT_PAGES_PER_CONTEXT pages
+so cookies, caches and leaked memory do not pile up. Images, fonts and media
+are never downloaded, and every render is capped at PLAYWRIGHT_PAGE_TIMEOUT.
+
+Playwright is optional: without the package (or the Chromium build, see
+``playwright install chromium``) the pool reports itself unavailable and the
+extractor keeps to its HTML strategies.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .utils import get_random_user_agent
+
+try:
+    from playwright.async_api import Error as PlaywrightError
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+logger = logging.getLogger(__name__)
+
+# Requests aborted before they leave the browser
+BLOCKED_RESOURCE_TYPES = frozenset(['image', 'font', 'media'])
+# Seconds before starting the browser is tried again after it failed
+LAUNCH_RETRY_SECONDS = 300
+# A page counts as rendered once its body has this much text (or the settle time is up)
+RENDERED_CHECK = 'document.body && document.body.innerText.length > 500'
+
+
+class BrowserUnavailable(Exception):
+    """Playwright is not installed or the browser could not be started."""
+    pass
+
+
+class BrowserPool:
+    """Headless Chromium with a fixed number of recycled contexts; see the module docstring."""
+    
+    def __init__(self, contexts: Optional[int] = None, pages_per_context: Optional[int] = None,
+                 page_timeout: Optional[float] = None, settle_ms: Optional[int] = None,
+                 headless: Optional[bool] = None):
+        """
+        Args:
+            contexts: Browser contexts, i.e. pages rendered at once (defaults to settings.PLAYWRIGHT_CONTEXTS)
+            pages_per_context: Pages rendered before a context is replaced (defaults to settings.PLAYWRIGHT_PAGES_PER_CONTEXT)
+            page_timeout: Seconds one render may take in total (defaults to settings.PLAYWRIGHT_PAGE_TIMEOUT)
+            settle_ms: Longest wait after load for client-side content (defaults to settings.PLAYWRIGHT_SETTLE_MS)
+            headless: Run without a window (defaults to settings.PLAYWRIGHT_HEADLESS)
+        """
+        self.contexts = contexts or settings.PLAYWRIGHT_CONTEXTS
+        self.pages_per_context = pages_per_context or settings.PLAYWRIGHT_PAGES_PER_CONTEXT
+        self.page_timeout = page_timeout or settings.PLAYWRIGHT_PAGE_TIMEOUT
+        self.settle_ms = settings.PLAYWRIGHT_SETTLE_MS if settle_ms is None else settle_ms
+        self.headless = settings.PLAYWRIGHT_HEADLESS if headless is None else headless
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._launch_failed_at = None
+        # Created on the loop: free [context, pages rendered] slots, and a lock for relaunching
+        self._slots = None
+        self._launch_lock = None
+    
+    @staticmethod
+    def available() -> bool:
+        """Whether Playwright is installed."""
+        return async_playwright is not None
+    
+    def render(self, url: str, headers: Optional[Dict] = None) -> Dict:
+        """
+        Load a page in the browser and return its rendered HTML.
+        
+        Args:
+            url: Page to render
+            headers: Extra HTTP headers sent with the page's requests
+        
+        Returns:
+            Dict with 'html', final 'url' and HTTP 'status' (None if unknown)
+        
+        Raises:
+            BrowserUnavailable: If the browser cannot be started
+            TimeoutError: If the page takes longer than page_timeout
+            PlaywrightError: If navigation fails
+        """
+        loop = self._start()
+        future = asyncio.run_coroutine_threadsafe(self._render(url, headers or {}), loop)
+        try:
+            # The coroutine enforces page_timeout itself; this only guards against a wedged loop
+            return future.result(timeout=self.page_timeout + 30)
+        except TimeoutError:
+            future.cancel()
+            raise
+    
+    def close(self):
+        """Close the browser and stop the loop thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        except Exception as e:
+            logger.debug(f"Error closing browser pool: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+    
+    def _start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread and the browser, once."""
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            if not self.available():
+                raise BrowserUnavailable('Playwright is not installed')
+            if self._launch_failed_at and time.monotonic() - self._launch_failed_at < LAUNCH_RETRY_SECONDS:
+                raise BrowserUnavailable('The browser failed to start recently')
+            
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='browser-pool', daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._launch(), loop).result(timeout=60)
+            except Exception as e:
+                try:
+                    asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+                except Exception:
+                    pass
+                loop.call_soon_threadsafe(loop.stop)
+                self._launch_failed_at = time.monotonic()
+                # Playwright appends the whole browser log to the message
+                reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+                logger.error(f"Could not start the browser: {reason}")
+                raise BrowserUnavailable(f"Could not start the browser: {reason}") from e
+            self._loop, self._thread = loop, thread
+            self._launch_failed_at = None
+            logger.info(f"Browser pool started with {self.contexts} contexts")
+            return loop
+    
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+            self._slots = asyncio.Queue()
+            for _ in range(self.contexts):
+                self._slots.put_nowait([None, 0])
+            self._launch_lock = asyncio.Lock()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+    
+    async def _shutdown(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = None
+        self._slots = self._launch_lock = None
+    
+    async def _render(self, url: str, headers: Dict) -> Dict:
+        slot = await self._slots.get()
+        try:
+            return await asyncio.wait_for(self._render_in(slot, url, headers), timeout=self.page_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Rendering {url} took longer than {self.page_timeout}s")
+        finally:
+            self._slots.put_nowait(slot)
+    
+    async def _render_in(self, slot, url: str, headers: Dict) -> Dict:
+        context = await self._context(slot)
+        page = await context.new_page()
+        slot[1] += 1
+        try:
+            if headers:
+                await page.set_extra_http_headers(headers)
+            response = await page.goto(url, wait_until='load', timeout=self.page_timeout * 1000)
+            if self.settle_ms:
+                try:
+                    await page.wait_for_function(RENDERED_CHECK, timeout=self.settle_ms)
+                except PlaywrightTimeoutError:
+                    pass
+            return {'html': await page.content(), 'url': page.url, 'status': response.status if response else None}
+        finally:
+            await page.close()
+    
+    async def _context(self, slot):
+        """The slot's context, replaced when used up or when the browser has died."""
+        context, pages = slot
+        if context is not None and pages < self.pages_per_context and context.browser is self._browser \
+                and self._browser.is_connected():
+            return context
+        if context is not None:
+            try:
+                await context.close()
+            except PlaywrightError:
+                pass
+        async with self._launch_lock:
+            if not self._browser.is_connected():
+                logger.warning("Browser disconnected, relaunching")
+                await self._launch()
+        
+        context = await self._browser.new_context(user_agent=get_random_user_agent())
+        await context.route('**/*', _block_heavy_resources)
+        slot[0], slot[1] = context, 0
+        return context
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# Global pool instance
+_browser_pool = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get or create the global browser pool (the browser itself starts on first render)."""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+        atexit.register(_browser_pool.close)
+    return _browser_pool
@@ -0,0 +1,209 @@
+"""
+Per-host circuit breaker for outbound fetches.
+
+Tracks consecutive failures per host, shared by feed and content fetching
+across all workers through Redis (with an in-memory fallback, like the rate
+limiter). After CIRCUIT_FAILURE_THRESHOLD failures the circuit opens and
+requests to the host fail fast without touching the network. Once the
+cool-down has passed a single probe request is let through (half-open): if it
+succeeds the circuit closes, otherwise it reopens with twice the cool-down,
+up to CIRCUIT_MAX_COOLDOWN.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from .utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Decide whether a request may go out. Returns 'closed', 'probe' (the caller
+# is the half-open probe) or 'open'. ARGV[1] is how long a probe may take
+# before another one is allowed.
+CIRCUIT_ALLOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HGET', KEYS[1], 'state')
+if not state or state == 'closed' then return 'closed' end
+if state == 'open' then
+    local open_until = tonumber(redis.call('HGET', KEYS[1], 'open_until') or '0')
+    if now < open_until then return 'open' end
+end
+local probe_until = tonumber(redis.call('HGET', KEYS[1], 'probe_until') or '0')
+if state == 'half_open' and now < probe_until then return 'open' end
+redis.call('HSET', KEYS[1], 'state', 'half_open', 'probe_until', tostring(now + tonumber(ARGV[1])))
+return 'probe'
+"""
+
+# Record a failure. ARGV: threshold, base cool-down, max cool-down, key TTL.
+# Returns the cool-down in seconds if the circuit (re)opened, else '0'.
+CIRCUIT_FAILURE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local failures = tonumber(redis.call('HGET', KEYS[1], 'failures') or '0') + 1
+local trips = tonumber(redis.call('HGET', KEYS[1], 'trips') or '0')
+redis.call('HSET', KEYS[1], 'failures', failures)
+if state == 'open' then return '0' end
+if state == 'half_open' or failures >= tonumber(ARGV[1]) then
+    local cooldown = math.min(tonumber(ARGV[2]) * 2 ^ trips, tonumber(ARGV[3]))
+    redis.call('HSET', KEYS[1], 'state', 'open', 'trips', trips + 1, 'open_until', tostring(now + cooldown))
+    redis.call('EXPIRE', KEYS[1], math.ceil(cooldown) + tonumber(ARGV[4]))
+    return tostring(cooldown)
+end
+redis.call('HSET', KEYS[1], 'state', 'closed')
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return '0'
+"""
+
+
+class HostCircuitBreaker:
+    """Closed/open/half-open circuit breaker keyed by host, shared across workers."""
+    
+    KEY_PREFIX = 'genienews:circuit:'
+    
+    def __init__(self, failure_threshold: Optional[int] = None, base_cooldown: Optional[float] = None,
+                 max_cooldown: Optional[float] = None):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open a circuit (defaults to settings.CIRCUIT_FAILURE_THRESHOLD)
+            base_cooldown: Seconds a circuit first stays open (defaults to settings.CIRCUIT_BASE_COOLDOWN)
+            max_cooldown: Longest cool-down after repeated failed probes (defaults to settings.CIRCUIT_MAX_COOLDOWN)
+        """
+        from django.conf import settings
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.base_cooldown = base_cooldown or settings.CIRCUIT_BASE_COOLDOWN
+        self.max_cooldown = max_cooldown or settings.CIRCUIT_MAX_COOLDOWN
+        self.probe_timeout = settings.CIRCUIT_PROBE_TIMEOUT
+        # Forget a host's failure history after a day without failures
+        self.key_ttl = 24 * 3600
+        self._lock = threading.Lock()
+        self._local: Dict[str, Dict] = {}
+        self._scripts = {}
+    
+    def allow(self, host: str) -> bool:
+        """
+        Check whether a request to a host may be sent.
+        
+        Returns False while the circuit is open. When the cool-down has
+        passed, exactly one caller gets True and acts as the probe.
+        """
+        if not host:
+            return True
+        
+        decision = self._run_script('allow', CIRCUIT_ALLOW_SCRIPT, host, [self.probe_timeout])
+        if decision is None:
+            decision = self._allow_local(host)
+        
+        if decision == 'probe':
+            logger.info(f"Circuit half-open for {host}, sending probe request")
+        return decision != 'open'
+    
+    def record_success(self, host: str):
+        """Close the host's circuit and reset its failure count."""
+        if not host:
+            return
+        
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if client.delete(self.KEY_PREFIX + host):
+                    logger.debug(f"Circuit reset for {host}")
+                return
+            except Exception as e:
+                logger.warning(f"Redis circuit breaker failed for {host}, using in-memory fallback: {str(e)}")
+        
+        with self._lock:
+            self._local.pop(host, None)
+    
+    def record_failure(self, host: str):
+        """Count a failed request; opens the circuit at the threshold or after a failed probe."""
+        if not host:
+            return
+        
+        args = [self.failure_threshold, self.base_cooldown, self.max_cooldown, self.key_ttl]
+        cooldown = self._run_script('failure', CIRCUIT_FAILURE_SCRIPT, host, args)
+        if cooldown is None:
+            cooldown = self._record_failure_local(host)
+        
+        cooldown = float(cooldown)
+        if cooldown > 0:
+            logger.warning(f"Circuit opened for {host} for {cooldown:.0f}s")
+    
+    def state(self, host: str) -> str:
+        """Current state of a host's circuit (for admin and logging)."""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                state = client.hget(self.KEY_PREFIX + host, 'state')
+                return state.decode() if state else CLOSED
+            except Exception:
+                pass
+        with self._lock:
+            return self._local.get(host, {}).get('state', CLOSED)
+    
+    def _run_script(self, name: str, source: str, host: str, args) -> Optional[str]:
+        """Run a Lua script for a host; returns None if Redis is unavailable."""
+        client = get_redis_client()
+        if client is None:
+            return None
+        
+        try:
+            if name not in self._scripts:
+                self._scripts[name] = client.register_script(source)
+            result = self._scripts[name](keys=[self.KEY_PREFIX + host], args=args)
+            return result.decode() if isinstance(result, bytes) else result
+        except Exception as e:
+            logger.warning(f"Redis circuit breaker failed for {host}, using in-memory fallback: {str(e)}")
+            return None
+    
+    def _allow_local(self, host: str) -> str:
+        with self._lock:
+            circuit = self._local.get(host)
+            if circuit is None or circuit['state'] == CLOSED:
+                return 'closed'
+            now = time.time()
+            if circuit['state'] == OPEN and now < circuit['open_until']:
+                return 'open'
+            if circuit['state'] == HALF_OPEN and now < circuit['probe_until']:
+                return 'open'
+            circuit['state'] = HALF_OPEN
+            circuit['probe_until'] = now + self.probe_timeout
+            return 'probe'
+    
+    def _record_failure_local(self, host: str) -> float:
+        with self._lock:
+            circuit = self._local.setdefault(host, {'state': CLOSED, 'failures': 0, 'trips': 0})
+            circuit['failures'] += 1
+            if circuit['state'] == OPEN:
+                return 0
+            if circuit['state'] == HALF_OPEN or circuit['failures'] >= self.failure_threshold:
+                cooldown = min(self.base_cooldown * 2 ** circuit['trips'], self.max_cooldown)
+                circuit['state'] = OPEN
+                circuit['trips'] += 1
+                circuit['open_until'] = time.time() + cooldown
+                return cooldown
+            return 0
+
+
+# Global breaker instance
+_circuit_breaker = None
+
+
+def get_circuit_breaker() -> HostCircuitBreaker:
+    """Get or create the global per-host circuit breaker."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = HostCircuitBreaker()
+    return _circuit_breaker
+
+
+def is_host_failure(status_code: int) -> bool:
+    """Whether an HTTP status means the host itself is struggling (as opposed to a bad URL)."""
+    return status_code >= 500 or status_code == 429
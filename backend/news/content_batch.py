@@ -0,0 +1,272 @@
+"""
+Batch fetching of full article content.
+
+Backfills ``ArticleRaw.raw_html`` from one task instead of one Celery task
+per article: articles are read in keyset-paginated pages, fetched on a
+thread pool with a global and a per-host concurrency limit (plus the shared
+per-domain rate limiter), and written back with ``bulk_update``. Throughput
+is bounded by politeness towards each host, not by the number of workers.
+Failed fetches are counted per article, which is retried only after
+``CONTENT_FETCH_RETRY_HOURS`` and dropped after ``CONTENT_FETCH_MAX_ATTEMPTS``.
+"""
+import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .content_extractor import extract_article_content
+from .models import ArticleRaw
+from .strategy_memory import get_strategy_memory
+from .utils import get_domain_from_url, url_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class BatchContentFetcher:
+    """Fetch missing article content concurrently, at most ``per_host_limit`` requests per host at a time."""
+    
+    # Fields written back for fetched articles
+    UPDATE_FIELDS = ('raw_html', 'extraction_meta', 'canonical_url', 'canonical_url_hash', 'canonical_article')
+    
+    def __init__(self, max_workers: Optional[int] = None, per_host_limit: Optional[int] = None,
+                 limit: Optional[int] = None, page_size: int = 200, write_batch_size: int = 50,
+                 javascript: Optional[bool] = None):
+        """
+        Args:
+            max_workers: Concurrent fetches overall (defaults to settings.CONTENT_FETCH_CONCURRENCY)
+            per_host_limit: Concurrent fetches per host (defaults to settings.CONTENT_FETCH_PER_HOST)
+            limit: Max articles fetched per run (defaults to settings.CONTENT_BATCH_LIMIT)
+            page_size: Articles read per keyset page
+            write_batch_size: Fetched articles written per bulk update
+            javascript: Only articles of requires_javascript sources (True), only the others (False), or all (None)
+        """
+        self.max_workers = max_workers or settings.CONTENT_FETCH_CONCURRENCY
+        self.per_host_limit = per_host_limit or settings.CONTENT_FETCH_PER_HOST
+        self.limit = settings.CONTENT_BATCH_LIMIT if limit is None else limit
+        self.page_size = page_size
+        self.write_batch_size = write_batch_size
+        self.javascript = javascript
+        # Articles read ahead while waiting for busy hosts
+        self.max_pending = max(page_size, self.max_workers * 10)
+    
+    def pending_articles(self) -> Iterator[List[ArticleRaw]]:
+        """
+        Yield pages of articles that still need content, in id order.
+        
+        Keyset pagination (``id > last id``) keeps every page an index range
+        scan and never revisits an article within a run, even one whose
+        fetch failed and still has no content. Across runs, an article whose
+        fetch failed waits ``CONTENT_FETCH_RETRY_HOURS`` before it is tried
+        again, and is left alone after ``CONTENT_FETCH_MAX_ATTEMPTS`` failures.
+        """
+        retry_before = timezone.now() - timedelta(hours=settings.CONTENT_FETCH_RETRY_HOURS)
+        articles = ArticleRaw.objects.filter(
+            Q(content_attempted_at__isnull=True) | Q(content_attempted_at__lte=retry_before),
+            raw_html__isnull=True,
+            canonical_article__isnull=True,
+            content_attempts__lt=settings.CONTENT_FETCH_MAX_ATTEMPTS,
+        )
+        if self.javascript is not None:
+            articles = articles.filter(source__requires_javascript=self.javascript)
+        
+        last_id = 0
+        while True:
+            page = list(
+                articles.filter(id__gt=last_id)
+                .select_related('source')
+                .only(
+                    'id', 'url', 'url_hash', 'title', 'canonical_url', 'canonical_url_hash', 'canonical_article_id',
+                    'source__custom_headers', 'source__requires_javascript',
+                )
+                .order_by('id')[:self.page_size]
+            )
+            if not page:
+                return
+            yield page
+            last_id = page[-1].id
+    
+    def run(self) -> Dict:
+        """
+        Fetch and store content for up to ``limit`` articles.
+        
+        Returns:
+            Dict with 'fetched', 'succeeded', 'failed', per-strategy counts,
+            'hosts' and 'elapsed' seconds
+        """
+        start = time.perf_counter()
+        stats = {'fetched': 0, 'succeeded': 0, 'failed': 0, 'strategies': {}, 'hosts': 0}
+        pages = self.pending_articles()
+        # Per-host queues, served round-robin so one big host cannot starve the rest
+        pending: 'OrderedDict[str, Deque[ArticleRaw]]' = OrderedDict()
+        in_flight: Dict[str, int] = {}
+        futures = {}
+        results: List[Tuple[ArticleRaw, Dict]] = []
+        queued = 0
+        hosts = set()
+        exhausted = False
+        # Synced from this thread only, so the workers never need a database connection
+        memory = get_strategy_memory()
+        memory.sync()
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='content') as executor:
+            while True:
+                # Read ahead while workers would otherwise idle behind busy hosts
+                while not exhausted and queued < self.limit and self._pending_count(pending) < self.max_pending \
+                        and self._ready_slots(pending, in_flight) < self.max_workers - len(futures):
+                    page = next(pages, None)
+                    if page is None:
+                        exhausted = True
+                        break
+                    for article in page[:self.limit - queued]:
+                        host = get_domain_from_url(article.url)
+                        pending.setdefault(host, deque()).append(article)
+                        hosts.add(host)
+                        queued += 1
+                
+                self._submit_ready(executor, pending, in_flight, futures)
+                if not futures:
+                    break
+                
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    article, host = futures.pop(future)
+                    in_flight[host] -= 1
+                    results.append((article, self._result(future, article)))
+                
+                if len(results) >= self.write_batch_size:
+                    self._record(results, stats)
+                    results = []
+                    memory.sync()
+        
+        self._record(results, stats)
+        memory.sync(force=True)
+        stats['hosts'] = len(hosts)
+        stats['elapsed'] = round(time.perf_counter() - start, 2)
+        logger.info(
+            f"Batch content fetch: {stats['succeeded']}/{stats['fetched']} articles from "
+            f"{stats['hosts']} hosts in {stats['elapsed']}s"
+        )
+        return stats
+    
+    def _submit_ready(self, executor, pending, in_flight, futures):
+        """Start fetches for hosts under their limit until all workers are busy."""
+        while len(futures) < self.max_workers:
+            submitted = False
+            for host in list(pending):
+                if len(futures) >= self.max_workers:
+                    break
+                if in_flight.get(host, 0) >= self.per_host_limit:
+                    continue
+                article = pending[host].popleft()
+                if not pending[host]:
+                    del pending[host]
+                else:
+                    pending.move_to_end(host)
+                in_flight[host] = in_flight.get(host, 0) + 1
+                futures[executor.submit(self._fetch, article)] = (article, host)
+                submitted = True
+            if not submitted:
+                return
+    
+    def _ready_slots(self, pending, in_flight) -> int:
+        """How many queued articles could start right now without exceeding a host's limit."""
+        return sum(
+            min(len(queue), max(self.per_host_limit - in_flight.get(host, 0), 0))
+            for host, queue in pending.items()
+        )
+    
+    @staticmethod
+    def _pending_count(pending) -> int:
+        return sum(len(queue) for queue in pending.values())
+    
+    @staticmethod
+    def _fetch(article: ArticleRaw) -> Dict:
+        """Runs on a worker thread: network and parsing only, no database access."""
+        return extract_article_content(
+            article.url,
+            custom_headers=article.source.custom_headers,
+            sync_stats=False,
+            requires_javascript=article.source.requires_javascript,
+        )
+    
+    @staticmethod
+    def _result(future, article: ArticleRaw) -> Dict:
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Error fetching content for {article.url}: {str(e)}")
+            return {'success': False, 'content': '', 'error': str(e)}
+    
+    def _record(self, results: List[Tuple[ArticleRaw, Dict]], stats: Dict):
+        """Write a batch of fetch results and add them to the run's stats."""
+        if not results:
+            return
+        stats['fetched'] += len(results)
+        succeeded = [(article, result) for article, result in results if result['success'] and result['content']]
+        stats['succeeded'] += len(succeeded)
+        stats['failed'] += len(results) - len(succeeded)
+        for _, result in succeeded:
+            strategy = result.get('strategy_used') or 'unknown'
+            stats['strategies'][strategy] = stats['strategies'].get(strategy, 0) + 1
+        self._write(succeeded)
+        
+        succeeded_ids = {article.id for article, _ in succeeded}
+        failed_ids = [article.id for article, _ in results if article.id not in succeeded_ids]
+        if failed_ids:
+            ArticleRaw.objects.filter(id__in=failed_ids).update(
+                content_attempts=F('content_attempts') + 1,
+                content_attempted_at=timezone.now(),
+            )
+    
+    def _write(self, succeeded: List[Tuple[ArticleRaw, Dict]]):
+        """
+        Store fetched content with one bulk update.
+        
+        Like the per-article task, an article records the canonical URL its
+        page declares (keeping its feed URL), unless another article already
+        has it, in which case it is linked to that one as a duplicate instead.
+        """
+        if not succeeded:
+            return
+        max_url_length = ArticleRaw._meta.get_field('canonical_url').max_length
+        
+        canonical = {}
+        for article, result in succeeded:
+            article.raw_html = result['content']
+            article.extraction_meta = result.get('meta') or {}
+            url = result.get('canonical_url')
+            if url and len(url) <= max_url_length:
+                url_hash = url_fingerprint(url)
+                if url_hash != article.url_hash:
+                    canonical[article.id] = (url, url_hash)
+        
+        hashes = [h for _, h in canonical.values()]
+        owners = {}
+        for row in (
+            ArticleRaw.objects.filter(Q(url_hash__in=hashes) | Q(canonical_url_hash__in=hashes))
+            .values('id', 'url_hash', 'canonical_url_hash', 'canonical_article_id')
+            .order_by('id')
+        ):
+            for url_hash in (row['url_hash'], row['canonical_url_hash']):
+                owners.setdefault(url_hash, row['canonical_article_id'] or row['id'])
+        for article, _ in succeeded:
+            if article.id not in canonical:
+                continue
+            url, url_hash = canonical[article.id]
+            if url_hash in owners:
+                article.canonical_article_id = owners[url_hash]
+                logger.info(f"Article {article.id} is a URL variant of article {article.canonical_article_id}")
+            else:
+                # Claimed for this batch too, so two variants cannot both take the URL
+                article.canonical_url, article.canonical_url_hash = url, url_hash
+                owners[url_hash] = article.id
+        
+        with transaction.atomic():
+            ArticleRaw.objects.bulk_update([article for article, _ in succeeded], self.UPDATE_FIELDS)
@@ -1,29 +1,41 @@
 """
 Content extraction strategies for fetching full article HTML.
+
+A page is downloaded once and parsed once (see news.html_extraction), and
+the lxml extraction and newspaper3k both work on that HTML. Which strategy
+goes first, and which are skipped, is learned per domain (see
+news.strategy_memory). Pages that need JavaScript are rendered in a pooled
+headless browser (see news.browser_pool).
 """
 import logging
 import time
 from typing import Dict, List, Optional, Tuple
-from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
 from newspaper import Article
 from newspaper.article import ArticleException
+from django.conf import settings
 
+from .browser_pool import BrowserUnavailable, get_browser_pool
+from .circuit_breaker import get_circuit_breaker, is_host_failure
+from .html_extraction import extract_page, resolve_canonical, stored_meta
+from .http_client import get_http_client
+from .rate_limiter import get_rate_limiter
+from .response_archive import archive_response
+from .strategy_memory import get_strategy_memory
 from .utils import (
     get_request_headers,
-    normalize_url,
     is_valid_url,
     get_domain_from_url,
-    add_rate_limit_delay,
     retry_with_exponential_backoff,
-    detect_paywall,
     clean_text,
 )
 
 logger = logging.getLogger(__name__)
 
+# Strategies that extract from the downloaded page rather than fetching on their own
+HTML_STRATEGIES = ('requests', 'newspaper3k')
+
 
 class ContentExtractionError(Exception):
     """Custom exception for content extraction errors."""
@@ -33,17 +45,138 @@ class ContentExtractionError(Exception):
 class ContentExtractor:
     """Multi-strategy content extractor with progressive fallback."""
     
-    def __init__(self, timeout: int = 60):
+    def __init__(self, timeout: int = 60, rate_limit: bool = True, sync_stats: bool = True):
         self.timeout = timeout
+        # Disable when the caller already reserved a rate-limit slot for the first fetch
+        self.rate_limit = rate_limit
+        # Disable when the caller syncs the strategy memory itself (keeps worker threads off the database)
+        self.sync_stats = sync_stats
+    
+    def _wait_for_slot(self, article_url: str):
+        """Wait for the shared per-domain rate limiter, then re-arm it for later fetches."""
+        if self.rate_limit:
+            get_rate_limiter().wait(get_domain_from_url(article_url))
+        self.rate_limit = True
+    
+    def _fetch(self, article_url: str, custom_headers: Optional[Dict] = None) -> requests.Response:
+        """GET an article page over the pooled client, reporting the outcome to the host's circuit breaker."""
+        host = get_domain_from_url(article_url)
+        breaker = get_circuit_breaker()
+        try:
+            response = get_http_client().get(
+                article_url,
+                headers=get_request_headers(custom_headers),
+                timeout=self.timeout
+            )
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            breaker.record_failure(host)
+            raise
+        
+        if is_host_failure(response.status_code):
+            breaker.record_failure(host)
+        else:
+            breaker.record_success(host)
+        response.raise_for_status()
+        return response
     
-    def extract_content(self, article_url: str, custom_headers: Optional[Dict] = None) -> Dict:
+    def extract_content(self, article_url: str, custom_headers: Optional[Dict] = None,
+                        requires_javascript: bool = False) -> Dict:
         """
         Extract article content using progressive strategies.
         
+        Strategies are tried in the order the domain's strategy memory ranks
+        them, skipping those that keep failing there; every attempt is
+        recorded back to it. Pages of ``requires_javascript`` sources go to
+        the browser first when Playwright is enabled.
+        
         Returns:
-            Dict with 'content', 'title', 'images', 'success', 'strategy_used'
+            Dict with 'content', 'title', 'images', 'success', 'strategy_used',
+            the page's declared 'canonical_url' (empty if it has none) and
+            'meta', the extraction results to store on ArticleRaw.extraction_meta
         """
-        result = {
+        result = self._empty_result()
+        
+        # Fail fast on hosts that are known to be down
+        host = get_domain_from_url(article_url)
+        if not get_circuit_breaker().allow(host):
+            logger.info(f"Circuit open for {host}, skipping content fetch: {article_url}")
+            result['error'] = f"Circuit open for {host}"
+            return result
+        
+        memory = get_strategy_memory()
+        if self.sync_stats:
+            memory.sync()
+        
+        # The HTML strategies share one download and one lxml parse
+        response = page = download_error = None
+        download_seconds = 0.0
+        for strategy in memory.plan(host, self._strategies(requires_javascript)):
+            logger.debug(f"Trying {strategy} strategy for: {article_url}")
+            if strategy in HTML_STRATEGIES:
+                if response is None and download_error is None:
+                    try:
+                        response, page, download_seconds = self._download_page(article_url, custom_headers)
+                    except Exception as e:
+                        # Not held against the strategy
+                        logger.debug(f"Download failed: {str(e)}")
+                        download_error = f"Download failed: {str(e)}"
+                        continue
+                    if page['is_paywalled']:
+                        return self._paywalled_result(page)
+                if response is None:
+                    continue
+                
+                started = time.perf_counter()
+                result = self._html_strategy(strategy, article_url, response.text, response.url or article_url, page)
+                # Includes the shared download, to compare with Playwright fetching on its own
+                latency = download_seconds + time.perf_counter() - started
+            else:
+                started = time.perf_counter()
+                try:
+                    result = self._strategy_playwright(article_url, custom_headers)
+                except BrowserUnavailable as e:
+                    # Not held against the strategy either
+                    logger.debug(f"Browser unavailable: {str(e)}")
+                    continue
+                latency = time.perf_counter() - started
+            
+            if result['is_paywalled']:
+                return result
+            succeeded = bool(result['success'] and result['content'])
+            memory.record(host, strategy, succeeded, len(result['content']), latency)
+            if succeeded:
+                result['strategy_used'] = strategy
+                if strategy in HTML_STRATEGIES:
+                    result['meta'] = stored_meta(page, strategy)
+                logger.info(f"Strategy {strategy} successful for: {article_url}")
+                return result
+        
+        logger.warning(f"All content extraction strategies failed for: {article_url}")
+        result['error'] = download_error or 'All extraction strategies failed'
+        return result
+    
+    def _strategies(self, requires_javascript: bool = False) -> List[str]:
+        """Available strategies, in the order tried for a domain not seen before (browser first for JS-only sources)."""
+        strategies = list(HTML_STRATEGIES)
+        if settings.ENABLE_PLAYWRIGHT and get_browser_pool().available():
+            if requires_javascript:
+                strategies.insert(0, 'playwright')
+            else:
+                strategies.append('playwright')
+        return strategies
+    
+    def _paywalled_result(self, page: Dict) -> Dict:
+        """Result for a paywalled page; no strategy is tried on it."""
+        result = self._empty_result()
+        result['canonical_url'] = page['canonical_url']
+        result['meta'] = stored_meta(page)
+        result['is_paywalled'] = True
+        result['error'] = f"Paywall detected ({', '.join(page['paywall_signals'])})"
+        return result
+    
+    @staticmethod
+    def _empty_result() -> Dict:
+        return {
             'content': '',
             'title': '',
             'images': [],
@@ -51,37 +184,9 @@ class ContentExtractor:
             'strategy_used': None,
             'error': None,
             'is_paywalled': False,
+            'canonical_url': '',
+            'meta': {},
         }
-        
-        # Strategy 1: Lightweight (requests + BeautifulSoup)
-        try:
-            logger.debug(f"Trying Strategy 1 (requests) for: {article_url}")
-            result = self._strategy_requests(article_url, custom_headers)
-            if result['success'] and result['content']:
-                result['strategy_used'] = 'requests'
-                logger.info(f"Strategy 1 successful for: {article_url}")
-                return result
-        except Exception as e:
-            logger.debug(f"Strategy 1 failed: {str(e)}")
-        
-        # Strategy 2: Medium (newspaper3k)
-        try:
-            logger.debug(f"Trying Strategy 2 (newspaper3k) for: {article_url}")
-            result = self._strategy_newspaper3k(article_url, custom_headers)
-            if result['success'] and result['content']:
-                result['strategy_used'] = 'newspaper3k'
-                logger.info(f"Strategy 2 successful for: {article_url}")
-                return result
-        except Exception as e:
-            logger.debug(f"Strategy 2 failed: {str(e)}")
-        
-        # Strategy 3: Playwright (if enabled)
-        # Note: Playwright implementation would go here
-        # For now, we'll skip it and mark as failed
-        
-        logger.warning(f"All content extraction strategies failed for: {article_url}")
-        result['error'] = 'All extraction strategies failed'
-        return result
     
     @retry_with_exponential_backoff(
         max_attempts=2,
@@ -89,123 +194,82 @@ class ContentExtractor:
         max_wait=10.0,
         exceptions=(requests.RequestException,)
     )
-    def _strategy_requests(self, article_url: str, custom_headers: Optional[Dict] = None) -> Dict:
-        """Strategy 1: Simple requests + BeautifulSoup extraction."""
-        result = {
-            'content': '',
-            'title': '',
-            'images': [],
-            'success': False,
-            'error': None,
-            'is_paywalled': False,
-        }
-        
-        # Rate limiting
-        domain = get_domain_from_url(article_url)
-        add_rate_limit_delay(domain)
-        
-        # Fetch page
-        headers = get_request_headers(custom_headers)
-        response = requests.get(article_url, headers=headers, timeout=self.timeout)
-        response.raise_for_status()
-        
-        # Parse with BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
+    def _download(self, article_url: str, custom_headers: Optional[Dict] = None) -> requests.Response:
+        """Fetch the article page once for all strategies, waiting for the domain's rate limit."""
+        self._wait_for_slot(article_url)
+        return self._fetch(article_url, custom_headers)
+    
+    def _download_page(self, article_url: str, custom_headers: Optional[Dict] = None) -> Tuple[requests.Response, Dict, float]:
+        """Download, archive and parse the page; also returns the seconds spent, rate-limit waits excluded."""
+        response = self._download(article_url, custom_headers)
+        started = time.perf_counter()
+        archive_response(
+            'page', article_url, response.content,
+            final_url=response.url, status=response.status_code,
+            content_type=response.headers.get('Content-Type', ''), encoding=_declared_charset(response),
+        )
+        page = extract_page(response.content, response.url or article_url, _declared_charset(response))
+        return response, page, response.elapsed.total_seconds() + time.perf_counter() - started
+    
+    def extract_html(self, article_url: str, body: bytes, page_url: Optional[str] = None,
+                     encoding: Optional[str] = None) -> Dict:
+        """
+        Run the HTML strategies on an already fetched page, without network or strategy memory.
         
-        # Check for paywall
-        if detect_paywall(response.text):
-            result['is_paywalled'] = True
-            result['error'] = 'Paywall detected'
-            return result
+        Used to re-extract archived pages (see news.response_archive); returns
+        the same dict as extract_content.
+        """
+        page_url = page_url or article_url
+        page = extract_page(body, page_url, encoding)
+        if page['is_paywalled']:
+            return self._paywalled_result(page)
         
-        # Extract title
-        title_selectors = ['h1', 'title', '.headline', '.article-title', '[class*="title"]']
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem:
-                result['title'] = clean_text(title_elem.get_text())
-                break
+        result = self._empty_result()
+        html_text = body.decode(encoding or 'utf-8', errors='replace') if isinstance(body, bytes) else body
+        for strategy in HTML_STRATEGIES:
+            result = self._html_strategy(strategy, article_url, html_text, page_url, page)
+            if result['success'] and result['content']:
+                result['strategy_used'] = strategy
+                result['meta'] = stored_meta(page, strategy)
+                return result
+        result['error'] = 'All extraction strategies failed'
+        return result
+    
+    def _html_strategy(self, strategy: str, article_url: str, html_text: str, page_url: str, page: Dict) -> Dict:
+        """Run one of HTML_STRATEGIES on a downloaded page."""
+        if strategy == 'requests':
+            return self._strategy_requests(page)
+        return self._strategy_newspaper3k(article_url, html_text, page_url, page)
+    
+    def _strategy_requests(self, page: Dict) -> Dict:
+        """Strategy 1: Main content selected from the single lxml parse of the page."""
+        result = self._empty_result()
+        result['canonical_url'] = page['canonical_url']
         
-        # Extract main content
-        content_selectors = [
-            'article',
-            '.article-content',
-            '.post-content',
-            '.entry-content',
-            '.content',
-            'main',
-            '[class*="article"]',
-            '[class*="content"]',
+        result['title'] = page['title']
+        result['content'] = page['text']
+        result['images'] = [
+            {key: image[key] for key in ('url', 'alt', 'width', 'height')} for image in page['images']
         ]
-        
-        content_elem = None
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                break
-        
-        if content_elem:
-            # Remove unwanted elements
-            for unwanted in content_elem.select('script, style, nav, footer, .ad, .advertisement, .sidebar'):
-                unwanted.decompose()
-            
-            result['content'] = clean_text(content_elem.get_text())
-        
-        # Extract images
-        images = []
-        for img in soup.select('img'):
-            src = img.get('src')
-            if src:
-                img_url = normalize_url(src, article_url)
-                if is_valid_url(img_url):
-                    images.append({
-                        'url': img_url,
-                        'alt': img.get('alt', ''),
-                        'width': img.get('width'),
-                        'height': img.get('height'),
-                    })
-        
-        result['images'] = images
         result['success'] = bool(result['content'])
         
         return result
     
-    def _strategy_newspaper3k(self, article_url: str, custom_headers: Optional[Dict] = None) -> Dict:
-        """Strategy 2: Newspaper3k extraction."""
-        result = {
-            'content': '',
-            'title': '',
-            'images': [],
-            'success': False,
-            'error': None,
-            'is_paywalled': False,
-        }
+    def _strategy_newspaper3k(self, article_url: str, html_text: str, page_url: str, page: Dict) -> Dict:
+        """Strategy 2: Newspaper3k text extraction of the already downloaded page."""
+        result = self._empty_result()
+        result['canonical_url'] = page['canonical_url']
         
         try:
-            # Rate limiting
-            domain = get_domain_from_url(article_url)
-            add_rate_limit_delay(domain)
-            
-            # Create article object
             article = Article(article_url)
-            
-            # Set custom headers if provided
-            if custom_headers:
-                article.set_headers(custom_headers)
-            
-            # Download and parse
-            article.download()
+            article.download(input_html=html_text)
             article.parse()
-            
-            # Check for paywall
-            if detect_paywall(article.html):
-                result['is_paywalled'] = True
-                result['error'] = 'Paywall detected'
-                return result
+            if article.canonical_link and not result['canonical_url']:
+                result['canonical_url'] = resolve_canonical(article.canonical_link, page_url)
             
             # Extract content
             result['content'] = clean_text(article.text)
-            result['title'] = clean_text(article.title)
+            result['title'] = clean_text(article.title) or page['title']
             
             # Extract images
             images = []
@@ -220,7 +284,7 @@ class ContentExtractor:
             
             result['images'] = images
             result['success'] = bool(result['content'])
-            
+        
         except ArticleException as e:
             result['error'] = f"Newspaper3k error: {str(e)}"
         except Exception as e:
@@ -230,37 +294,71 @@ class ContentExtractor:
     
     def _strategy_playwright(self, article_url: str, custom_headers: Optional[Dict] = None) -> Dict:
         """
-        Strategy 3: Playwright browser automation.
+        Strategy 3: Render the page in the shared headless browser pool and extract from the rendered DOM.
         
-        Note: This is a placeholder implementation.
-        In production, you would:
-        1. Install playwright: pip install playwright
-        2. Install browsers: playwright install
-        3. Implement browser automation logic
+        Raises BrowserUnavailable if the browser cannot be started.
         """
-        result = {
-            'content': '',
-            'title': '',
-            'images': [],
-            'success': False,
-            'error': 'Playwright not implemented',
-            'is_paywalled': False,
-        }
+        result = self._empty_result()
+        host = get_domain_from_url(article_url)
+        breaker = get_circuit_breaker()
+        
+        self._wait_for_slot(article_url)
+        try:
+            rendered = get_browser_pool().render(article_url, headers=custom_headers)
+        except BrowserUnavailable:
+            raise
+        except TimeoutError as e:
+            breaker.record_failure(host)
+            result['error'] = f"Playwright timeout: {str(e)}"
+            return result
+        except Exception as e:
+            result['error'] = f"Playwright error: {str(e)}"
+            return result
+        
+        status = rendered['status']
+        if status and is_host_failure(status):
+            breaker.record_failure(host)
+        else:
+            breaker.record_success(host)
+        if status and status >= 400:
+            result['error'] = f"Playwright got HTTP {status}"
+            return result
         
-        logger.info("Playwright strategy not implemented - skipping")
+        archive_response(
+            'rendered', article_url, rendered['html'].encode('utf-8'),
+            final_url=rendered['url'], status=status, content_type='text/html; charset=utf-8', encoding='utf-8',
+        )
+        page = extract_page(rendered['html'], rendered['url'] or article_url)
+        if page['is_paywalled']:
+            return self._paywalled_result(page)
+        result = self._strategy_requests(page)
+        result['meta'] = stored_meta(page, 'playwright')
         return result
 
 
-def extract_article_content(article_url: str, custom_headers: Optional[Dict] = None) -> Dict:
+def _declared_charset(response: requests.Response) -> Optional[str]:
+    """Charset from the Content-Type header, if the server declared one."""
+    content_type = response.headers.get('Content-Type', '')
+    if 'charset=' not in content_type.lower():
+        return None
+    return response.encoding
+
+
+def extract_article_content(article_url: str, custom_headers: Optional[Dict] = None,
+                            rate_limit: bool = True, sync_stats: bool = True,
+                            requires_javascript: bool = False) -> Dict:
     """
     Extract content from article URL using progressive strategies.
     
     Args:
         article_url: URL of the article to extract
         custom_headers: Optional custom HTTP headers
+        rate_limit: Set to False if a rate-limit slot was already reserved for the first fetch
+        sync_stats: Set to False if the caller writes and reloads the strategy memory itself
+        requires_javascript: Whether the article's source only renders in a browser
     
     Returns:
         Dict with extraction results
     """
-    extractor = ContentExtractor()
-    return extractor.extract_content(article_url, custom_headers)
+    extractor = ContentExtractor(rate_limit=rate_limit, sync_stats=sync_stats)
+    return extractor.extract_content(article_url, custom_headers, requires_javascript=requires_javascript)
@@ -0,0 +1,266 @@
+"""
+Concurrent AI curation of raw articles.
+
+CurationEngine keeps CURATION_CONCURRENCY articles in flight on a thread
+pool instead of curating one article after another. Within an article the
+independent calls run side by side: with AI_CURATION_MODE='separate' the
+summaries, relevance and tags are requested at once. Workers only talk to
+OpenAI and the LLM cache; the calling thread embeds the detailed summaries
+of finished articles a round of workers at a time, in one request
+(AIService.generate_embeddings_batch), and stores the results.
+
+All OpenAI requests go through one AdaptiveConcurrency limit: it grows by
+one request per window of successful requests up to CURATION_MAX_REQUESTS
+and halves on every burst of 429 responses (additive increase,
+multiplicative decrease), so the engine settles just under the account's
+rate limit instead of hammering it.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .ai_service import AIService, AIServiceError
+from .models import ArticleCurated, ArticleRaw, MediaAsset
+
+logger = logging.getLogger(__name__)
+
+
+def _closing_connections(func):
+    """For pool threads: close the database connections func opened (LLM cache lookups) when it returns."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return wrapper
+
+
+class AdaptiveConcurrency:
+    """Bound on concurrent requests, adjusted by AIMD on rate-limit responses."""
+    
+    def __init__(self, maximum: int, minimum: int = 1, initial: Optional[int] = None, cooldown: float = 2.0):
+        """
+        Args:
+            maximum: Highest number of requests in flight
+            minimum: Lowest number of requests in flight
+            initial: Starting limit (defaults to maximum)
+            cooldown: Seconds during which further 429s count as the same burst
+        """
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.cooldown = cooldown
+        self._limit = float(initial or self.maximum)
+        self._in_flight = 0
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+        self.throttles = 0
+    
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+    
+    @contextmanager
+    def slot(self):
+        """Hold one request slot, waiting while the limit is reached."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                if succeeded and self._limit < self.maximum:
+                    # About +1 once a whole limit's worth of requests has succeeded
+                    self._limit = min(self.maximum, self._limit + 1 / self._limit)
+                self._condition.notify_all()
+    
+    def throttled(self):
+        """Halve the limit after a 429 (once per burst)."""
+        with self._condition:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._decreased_at < self.cooldown:
+                return
+            self._decreased_at = now
+            self._limit = max(self.minimum, self._limit / 2)
+            logger.warning(f"OpenAI rate limit hit, curation concurrency lowered to {self.limit}")
+
+
+class CurationEngine:
+    """Curate articles concurrently; see the module docstring."""
+    
+    def __init__(self, concurrency: Optional[int] = None, max_requests: Optional[int] = None,
+                 mode: Optional[str] = None):
+        """
+        Args:
+            concurrency: Articles curated at once (defaults to settings.CURATION_CONCURRENCY)
+            max_requests: Most OpenAI requests in flight (defaults to settings.CURATION_MAX_REQUESTS)
+            mode: 'combined' or 'separate' (defaults to settings.AI_CURATION_MODE)
+        """
+        self.concurrency = concurrency or settings.CURATION_CONCURRENCY
+        self.limiter = AdaptiveConcurrency(max_requests or settings.CURATION_MAX_REQUESTS)
+        self.ai_service = AIService(limiter=self.limiter)
+        self.mode = mode or settings.AI_CURATION_MODE
+    
+    def run(self, articles: Iterable[ArticleRaw]) -> Dict:
+        """
+        Curate and store the given articles.
+        
+        Returns:
+            Dict with 'articles_processed', 'articles_created', 'errors',
+            'throttled' (429 responses) and the final 'request_limit'
+        """
+        stats = {'articles_processed': 0, 'articles_created': 0, 'errors': []}
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='curate') as executor, \
+                ThreadPoolExecutor(max_workers=self.concurrency * 3, thread_name_prefix='curate-stage') as stages:
+            curate = _closing_connections(self._curate)
+            futures = {executor.submit(curate, article, stages): article for article in articles}
+            finished = []
+            for future in as_completed(futures):
+                article = futures[future]
+                stats['articles_processed'] += 1
+                try:
+                    finished.append((article, future.result()))
+                except Exception as e:
+                    self._failed(stats, article, e)
+                # Workers carry on with the next articles meanwhile
+                if len(finished) >= self.concurrency:
+                    self._embed_and_store(finished, stats)
+                    finished = []
+            self._embed_and_store(finished, stats)
+        
+        stats['throttled'] = self.limiter.throttles
+        stats['request_limit'] = self.limiter.limit
+        return stats
+    
+    def _curate(self, article: ArticleRaw, stages: ThreadPoolExecutor) -> Dict:
+        """Runs on a worker thread: OpenAI calls and LLM cache lookups only, no writes to articles."""
+        logger.info(f"Curating article: {article.title[:60]}...")
+        article_text = curation_text(article)
+        
+        if self.mode == 'combined':
+            # Summaries, relevance and tags from one structured call
+            curation = self.ai_service.curate_article(article_text, article.title)
+            return {
+                'summary_short': curation['summary_short'],
+                'summary_detailed': curation['summary_detailed'],
+                'relevance_score': curation['relevance_score'],
+                'ai_tags': curation['tags'],
+            }
+        
+        relevance = stages.submit(_closing_connections(self._relevance), article, article_text)
+        tags = stages.submit(_closing_connections(self._tags), article, article_text)
+        summary_short, summary_detailed = self._summaries(article, article_text)
+        return {
+            'summary_short': summary_short,
+            'summary_detailed': summary_detailed,
+            'relevance_score': relevance.result(),
+            'ai_tags': tags.result(),
+        }
+    
+    def _summaries(self, article: ArticleRaw, article_text: str):
+        try:
+            return self.ai_service.generate_summaries(article_text, article.title)
+        except AIServiceError as e:
+            logger.error(f"Failed to generate summaries for {article.id}: {str(e)}")
+            # Use fallback summaries
+            return article.title[:500], article.summary_feed[:2000] if article.summary_feed else article.title
+    
+    def _relevance(self, article: ArticleRaw, article_text: str) -> float:
+        try:
+            return self.ai_service.calculate_relevance_score(article_text, article.title)
+        except AIServiceError as e:
+            logger.error(f"Failed to calculate relevance for {article.id}: {str(e)}")
+            return 0.5  # Default fallback
+    
+    def _tags(self, article: ArticleRaw, article_text: str):
+        try:
+            return self.ai_service.generate_tags(article_text, article.title)
+        except AIServiceError as e:
+            logger.error(f"Failed to generate tags for {article.id}: {str(e)}")
+            return ['ai', 'technology']  # Default fallback
+    
+    def _embed_and_store(self, finished: List[Tuple[ArticleRaw, Dict]], stats: Dict):
+        """Embed the detailed summaries of curated articles together, then store each article."""
+        if not finished:
+            return
+        try:
+            embeddings = self.ai_service.generate_embeddings_batch([fields['summary_detailed'] for _, fields in finished])
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings for {len(finished)} articles: {str(e)}")
+            embeddings = [[0.0] * 1536 for _ in finished]  # Zero vector fallback
+        
+        for (article, fields), embedding in zip(finished, embeddings):
+            try:
+                self._store(article, {**fields, 'embedding': embedding})
+                stats['articles_created'] += 1
+                logger.info(
+                    f"Successfully curated article {article.id}: "
+                    f"relevance={fields['relevance_score']:.2f}, tags={len(fields['ai_tags'])}"
+                )
+            except Exception as e:
+                self._failed(stats, article, e)
+    
+    @staticmethod
+    def _failed(stats: Dict, article: ArticleRaw, error: Exception):
+        logger.error(f"Error curating article {article.id}: {str(error)}")
+        stats['errors'].append({
+            'article_id': article.id,
+            'title': article.title[:100],
+            'error': str(error)
+        })
+    
+    @staticmethod
+    def _store(article: ArticleRaw, fields: Dict):
+        """Create the ArticleCurated row."""
+        with transaction.atomic():
+            ArticleCurated.objects.create(raw_article=article, cover_media=cover_media(article), **fields)
+
+
+def curation_text(article: ArticleRaw) -> str:
+    """The text an article is curated from: its page content (if fetched) and feed summary."""
+    article_text = article.summary_feed
+    if article.raw_html:
+        # Use raw_html if available (truncate to reasonable length)
+        article_text = article.raw_html[:10000] + " " + article.summary_feed
+    return article_text
+
+
+def cover_media(article: ArticleRaw) -> Optional[MediaAsset]:
+    """The first image from the feed, else the best image found when the page was fetched."""
+    media_asset = article.media_assets.filter(type='image').first()
+    if media_asset is not None or not article.extraction_meta:
+        return media_asset
+    
+    from .html_extraction import best_image as pick_best_image
+    
+    best_image = pick_best_image(article.extraction_meta)
+    if not best_image:
+        return None
+    # Create MediaAsset for the extracted image
+    media_asset, created = MediaAsset.objects.get_or_create(
+        source_url=best_image['url'],
+        defaults={
+            'type': 'image',
+            'width': best_image.get('width'),
+            'height': best_image.get('height'),
+            'mime_type': 'image/jpeg'  # Default
+        }
+    )
+    # Link to article
+    article.media_assets.add(media_asset)
+    logger.info(f"Using cover image from page extraction for article {article.id}")
+    return media_asset
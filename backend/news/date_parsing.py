@@ -0,0 +1,150 @@
+"""
+Fast feed date parsing with per-source format learning.
+
+Most feeds use one date format for every entry, so once a format has parsed
+a source's date it is tried first for that source from then on. Standard
+RFC 822 and ISO 8601 dates go through the stdlib fast paths; dateutil is
+only used when nothing else matches.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+from dateutil import parser as date_parser
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Formats seen in the wild that neither RFC 822 nor ISO 8601 parsing accepts
+STRPTIME_FORMATS = (
+    '%a, %d %b %Y %H:%M:%S %Z',
+    '%a, %d %B %Y %H:%M:%S %z',
+    '%d %b %Y %H:%M:%S %z',
+    '%Y-%m-%d %H:%M:%S %z',
+    '%Y-%m-%d %H:%M:%S %Z',
+    '%B %d, %Y %H:%M:%S',
+    '%B %d, %Y',
+    '%b %d, %Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+)
+
+
+def parse_rfc822(value: str) -> Optional[datetime]:
+    """Parse an RSS-style date like 'Thu, 16 Oct 2026 18:30:00 +0000'."""
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_iso8601(value: str) -> Optional[datetime]:
+    """Parse an Atom-style date like '2026-10-16T18:30:00.000Z'."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _strptime_parser(date_format: str) -> Callable[[str], Optional[datetime]]:
+    def parse(value: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            return None
+    return parse
+
+
+class FeedDateParser:
+    """Parse entry dates, remembering which format worked for each source."""
+    
+    # Entry attributes holding date strings, in order of preference
+    DATE_FIELDS = ('published', 'updated', 'created', 'pubDate')
+    # feedparser's pre-parsed UTC struct_time fields
+    PARSED_FIELDS = ('published_parsed', 'updated_parsed', 'created_parsed')
+    
+    def __init__(self):
+        self._parsers: Dict[str, Callable[[str], Optional[datetime]]] = {
+            'rfc822': parse_rfc822,
+            'iso8601': parse_iso8601,
+        }
+        for date_format in STRPTIME_FORMATS:
+            self._parsers[date_format] = _strptime_parser(date_format)
+        # Source key -> name of the parser that last worked for it
+        self._learned: Dict[str, str] = {}
+    
+    def parse_entry_date(self, entry, source_key: str = '') -> Optional[datetime]:
+        """
+        Get an entry's published date as an aware datetime.
+        
+        Uses feedparser's ``*_parsed`` fields when present, otherwise parses
+        the first date string that any known format accepts.
+        
+        Returns:
+            Aware datetime, or None if the entry has no parseable date
+        """
+        for field in self.PARSED_FIELDS:
+            parsed = entry.get(field)
+            if parsed:
+                try:
+                    return datetime(*parsed[:6], tzinfo=dt_timezone.utc)
+                except (TypeError, ValueError):
+                    continue
+        
+        for field in self.DATE_FIELDS:
+            value = entry.get(field)
+            if value:
+                parsed = self.parse(value, source_key)
+                if parsed:
+                    return parsed
+        return None
+    
+    def parse(self, value: str, source_key: str = '') -> Optional[datetime]:
+        """
+        Parse a date string, trying the format learned for ``source_key`` first.
+        
+        Returns:
+            Aware datetime (naive values are taken as UTC), or None
+        """
+        value = value.strip()
+        learned = self._learned.get(source_key)
+        if learned:
+            parsed = self._parsers[learned](value)
+            if parsed:
+                return _as_utc(parsed)
+        
+        for name, parser in self._parsers.items():
+            if name == learned:
+                continue
+            parsed = parser(value)
+            if parsed:
+                if source_key:
+                    self._learned[source_key] = name
+                return _as_utc(parsed)
+        
+        try:
+            return _as_utc(date_parser.parse(value))
+        except (ValueError, OverflowError) as e:
+            logger.debug(f"Failed to parse date '{value}': {e}")
+            return None
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Feeds without a UTC offset are taken to be in UTC, like feedparser does."""
+    if timezone.is_naive(value):
+        return value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+# Global parser instance
+_date_parser = None
+
+
+def get_date_parser() -> FeedDateParser:
+    """Get or create the global feed date parser."""
+    global _date_parser
+    if _date_parser is None:
+        _date_parser = FeedDateParser()
+    return _date_parser
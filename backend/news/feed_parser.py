@@ -1,22 +1,32 @@
 """
 RSS/Atom feed parsing logic with error handling and retry.
 """
+import calendar
+import hashlib
 import logging
 import time
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import feedparser
 import requests
-from dateutil import parser as date_parser
+from django.conf import settings
+from django.utils import timezone
+from feedparser.sanitizer import _sanitize_html
+from lxml import etree
 
+from .circuit_breaker import get_circuit_breaker, is_host_failure
+from .date_parsing import get_date_parser, parse_iso8601, parse_rfc822
+from .http_client import get_http_client
+from .rate_limiter import get_rate_limiter
+from .response_archive import archive_response
+from .stage_timing import StageTimer
 from .utils import (
     get_request_headers,
     normalize_url,
     is_valid_url,
     get_domain_from_url,
-    add_rate_limit_delay,
     retry_with_exponential_backoff,
     extract_media_from_rss_entry,
     clean_text,
@@ -26,73 +36,238 @@ from .utils import (
 logger = logging.getLogger(__name__)
 
 
+# Entries dated this long before a source's high-water mark are treated as
+# already ingested even if their id is not remembered; newer ones are only
+# matched by id, since posts often show up in feeds after their publish time.
+HIGH_WATER_MARK_GRACE = timedelta(hours=24)
+
+# Number of recent entry ids remembered per source
+RECENT_ENTRY_IDS_LIMIT = 200
+
+# Size of the body chunks read from a streamed feed response
+FEED_CHUNK_SIZE = 64 * 1024
+
+# Namespaces understood by the streaming fast path
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+CONTENT_NS = '{http://purl.org/rss/1.0/modules/content/}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+MEDIA_NAMESPACES = ('{http://search.yahoo.com/mrss/}', '{http://search.yahoo.com/mrss}')
+
+
 class FeedParseError(Exception):
     """Custom exception for feed parsing errors."""
     pass
 
 
+class TransientFeedError(FeedParseError):
+    """Feed fetch failure worth retrying (timeouts, connection errors, 5xx/429)."""
+    pass
+
+
+class UnsupportedFeedError(Exception):
+    """Raised by StreamingFeedReader for feeds that have to go through feedparser."""
+    pass
+
+
 class FeedParser:
     """RSS/Atom feed parser with retry logic and error handling."""
     
-    def __init__(self, timeout: int = 30, max_articles: int = 50):
+    # Stop parsing a feed after this many already-ingested entries in a row
+    KNOWN_ENTRY_STOP = 3
+    
+    def __init__(self, timeout: int = 30, max_articles: int = 50, rate_limit: bool = True,
+                 timer: Optional[StageTimer] = None):
         self.timeout = timeout
         self.max_articles = max_articles
+        # Disable when the caller already reserved a rate-limit slot for this fetch
+        self.rate_limit = rate_limit
+        # Collects per-stage timings of fetching, parsing and normalizing
+        self.timer = timer or StageTimer()
     
     @retry_with_exponential_backoff(
         max_attempts=3,
         min_wait=1.0,
         max_wait=30.0,
-        exceptions=(requests.RequestException, FeedParseError)
+        exceptions=(TransientFeedError,)
     )
-    def fetch_feed(self, feed_url: str, custom_headers: Optional[Dict] = None) -> feedparser.FeedParserDict:
-        """Fetch and parse RSS/Atom feed with retry logic."""
+    def fetch_feed(
+        self,
+        feed_url: str,
+        custom_headers: Optional[Dict] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> feedparser.FeedParserDict:
+        """
+        Fetch and parse RSS/Atom feed with retry logic.
+        
+        When validators from a previous fetch are given, the request is made
+        conditional. A 304 response or a body whose hash matches
+        ``content_hash`` returns an empty feed with ``status == 304`` without
+        running feedparser (the same convention feedparser uses).
+        
+        The returned feed carries the new ``etag``, ``modified`` and
+        ``content_hash`` values so callers can persist them.
+        
+        Only transient failures are retried, and a host whose circuit is open
+        fails immediately without a request.
+        """
+        host = get_domain_from_url(feed_url)
+        breaker = get_circuit_breaker()
+        if not breaker.allow(host):
+            raise FeedParseError(f"Circuit open for {host}, skipping feed: {feed_url}")
+        
         logger.info(f"Fetching feed: {feed_url}")
         
-        # Rate limiting
-        domain = get_domain_from_url(feed_url)
-        add_rate_limit_delay(domain)
+        # Rate limiting (retries always take a fresh slot)
+        if self.rate_limit:
+            with self.timer.stage('rate_limit'):
+                get_rate_limiter().wait(host)
+        self.rate_limit = True
         
         # Prepare headers
         headers = get_request_headers(custom_headers)
+        headers.update(self.conditional_headers(etag, last_modified))
         
         try:
-            # Fetch feed
-            response = requests.get(
+            # Stream the body so it is parsed while it downloads
+            request_start = time.perf_counter()
+            response = get_http_client().get(
                 feed_url,
                 headers=headers,
                 timeout=self.timeout,
-                allow_redirects=True
+                allow_redirects=True,
+                stream=True
             )
-            response.raise_for_status()
-            
-            # Parse with feedparser
-            feed = feedparser.parse(response.content)
-            
-            # Validate feed
-            if feed.bozo:
-                logger.warning(f"Feed has parsing issues: {feed.bozo_exception}")
-            
-            if not feed.entries:
-                logger.warning(f"No entries found in feed: {feed_url}")
-                return feed
-            
-            logger.info(f"Successfully parsed feed: {len(feed.entries)} entries")
-            return feed
-            
+            self.timer.add('connect', response.connect_seconds)
+            self.timer.add('wait', time.perf_counter() - request_start - response.connect_seconds)
+            with response:
+                if is_host_failure(response.status_code):
+                    breaker.record_failure(host)
+                else:
+                    breaker.record_success(host)
+                response.raise_for_status()
+                
+                return self.parse_response(
+                    feed_url,
+                    status=response.status_code,
+                    content=response.iter_content(FEED_CHUNK_SIZE),
+                    response_headers=response.headers,
+                    etag=etag,
+                    last_modified=last_modified,
+                    content_hash=content_hash,
+                )
+        
         except requests.exceptions.Timeout:
-            raise FeedParseError(f"Timeout fetching feed: {feed_url}")
+            breaker.record_failure(host)
+            raise TransientFeedError(f"Timeout fetching feed: {feed_url}")
         except requests.exceptions.ConnectionError:
-            raise FeedParseError(f"Connection error fetching feed: {feed_url}")
+            breaker.record_failure(host)
+            raise TransientFeedError(f"Connection error fetching feed: {feed_url}")
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 raise FeedParseError(f"Feed not found (404): {feed_url}")
             elif e.response.status_code == 403:
                 raise FeedParseError(f"Feed access forbidden (403): {feed_url}")
+            elif is_host_failure(e.response.status_code):
+                raise TransientFeedError(f"HTTP error {e.response.status_code}: {feed_url}")
             else:
                 raise FeedParseError(f"HTTP error {e.response.status_code}: {feed_url}")
+        except FeedParseError:
+            raise
         except Exception as e:
             raise FeedParseError(f"Unexpected error fetching feed: {str(e)}")
     
+    @staticmethod
+    def conditional_headers(etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from stored validators."""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+    
+    def parse_response(
+        self,
+        feed_url: str,
+        status: int,
+        content: Union[bytes, Iterable[bytes]],
+        response_headers,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> feedparser.FeedParserDict:
+        """
+        Turn a fetched feed response into a FeedParserDict, skipping unchanged bodies.
+        
+        ``content`` is either the whole body or an iterable of body chunks.
+        Well-formed RSS 2.0 and Atom feeds are parsed by StreamingFeedReader
+        as the chunks arrive; anything it cannot handle goes to feedparser.
+        """
+        new_etag = response_headers.get('ETag') or etag
+        new_last_modified = response_headers.get('Last-Modified') or last_modified
+        
+        if status == 304:
+            logger.info(f"Feed not modified (304): {feed_url}")
+            return self._not_modified_feed(new_etag, new_last_modified, content_hash)
+        
+        with self.timer.stage('parse'):
+            reader = StreamingFeedReader(feed_url, max_entries=self.max_articles)
+            reader.check_content_length(response_headers.get('Content-Length'))
+            chunks = self.timer.timed_chunks([content] if isinstance(content, bytes) else content)
+            if content_hash:
+                # Hash the whole body before parsing it, so an unchanged feed is never parsed
+                reader.read(chunks, parse=False)
+                if reader.content_hash == content_hash:
+                    logger.info(f"Feed body unchanged (hash match): {feed_url}")
+                    return self._not_modified_feed(new_etag, new_last_modified, content_hash)
+                reader.parse_buffered()
+            else:
+                reader.read(chunks)
+            body_hash = reader.content_hash
+            
+            if reader.fallback_reason:
+                # Bozo or exotic feed: let feedparser deal with it
+                logger.info(f"Parsing {feed_url} with feedparser: {reader.fallback_reason}")
+                feed = feedparser.parse(reader.body)
+            else:
+                feed = reader.result()
+        archive_response(
+            'feed', feed_url, reader.body,
+            final_url=feed_url, status=status, content_type=response_headers.get('Content-Type', ''),
+        )
+        feed['status'] = status
+        feed['etag'] = new_etag
+        feed['modified'] = new_last_modified
+        feed['content_hash'] = body_hash
+        # May advertise a WebSub hub (see news.websub)
+        feed['link_header'] = response_headers.get('Link', '')
+        
+        # Validate feed
+        if feed.bozo:
+            logger.warning(f"Feed has parsing issues: {feed.bozo_exception}")
+        
+        if not feed.entries:
+            logger.warning(f"No entries found in feed: {feed_url}")
+            return feed
+        
+        logger.info(f"Successfully parsed feed: {len(feed.entries)} entries")
+        return feed
+    
+    @staticmethod
+    def _not_modified_feed(etag: Optional[str], last_modified: Optional[str], content_hash: Optional[str]) -> feedparser.FeedParserDict:
+        """Empty feed result for an unchanged feed."""
+        return feedparser.FeedParserDict(
+            status=304,
+            bozo=False,
+            entries=[],
+            feed=feedparser.FeedParserDict(),
+            etag=etag,
+            modified=last_modified,
+            content_hash=content_hash,
+        )
+    
     def parse_entry(self, entry, source_url: str) -> Optional[Dict]:
         """Parse a single RSS/Atom entry into standardized format."""
         try:
@@ -106,14 +281,15 @@ class FeedParser:
                 logger.warning(f"Skipping entry with missing title or link: {link}")
                 return None
             
-            # Normalize URL
+            # The link as the publisher gave it (made absolute); URL variants
+            # are matched by url_hash, which canonicalizes it
             article_url = normalize_url(link, source_url)
             if not is_valid_url(article_url):
                 logger.warning(f"Invalid article URL: {article_url}")
                 return None
             
             # Parse published date
-            published_at = self._parse_published_date(entry)
+            published_at, date_estimated = self._parse_published_date(entry, source_url)
             
             # Check if article is recent enough
             if not is_recent_article(published_at, max_age_days=30):
@@ -131,38 +307,32 @@ class FeedParser:
                 'title': title,
                 'url': article_url,
                 'published_at': published_at,
+                # The entry had no usable date; published_at is the time of this fetch
+                'date_estimated': date_estimated,
                 'summary_feed': summary,
                 'author': author,
                 'tags': tags,
                 'media_assets': media_assets,
                 'raw_entry': entry,  # Keep original for debugging
             }
-            
+        
         except Exception as e:
             logger.error(f"Error parsing entry: {str(e)}")
             return None
     
-    def _parse_published_date(self, entry) -> datetime:
-        """Parse published date from entry with fallbacks."""
-        # Try different date fields
-        date_fields = ['published', 'updated', 'created', 'pubDate']
+    def _parse_published_date(self, entry, source_url: str = '') -> Tuple[datetime, bool]:
+        """
+        Parse published date from entry, falling back to the current time.
+        
+        Returns:
+            Tuple of (published date, whether it is the current-time fallback)
+        """
+        published_at = get_date_parser().parse_entry_date(entry, source_url)
+        if published_at:
+            return published_at, False
         
-        for field in date_fields:
-            if hasattr(entry, field):
-                date_str = getattr(entry, field)
-                if date_str:
-                    try:
-                        # Parse with dateutil
-                        parsed_date = date_parser.parse(date_str)
-                        if parsed_date:
-                            return parsed_date
-                    except Exception as e:
-                        logger.debug(f"Failed to parse date '{date_str}': {e}")
-                        continue
-        
-        # Fallback to current time
         logger.warning("No valid published date found, using current time")
-        return datetime.now()
+        return timezone.now(), True
     
     def _extract_tags(self, entry) -> List[str]:
         """Extract tags/categories from entry."""
@@ -187,41 +357,466 @@ class FeedParser:
         # Remove duplicates and empty tags
         return list(set(filter(None, tags)))
     
-    def parse_feed_entries(self, feed: feedparser.FeedParserDict, source_url: str) -> List[Dict]:
-        """Parse all entries from a feed."""
-        parsed_entries = []
+    def parse_feed_entries(
+        self,
+        feed: feedparser.FeedParserDict,
+        source_url: str,
+        high_water_mark: Optional[datetime] = None,
+        seen_entry_ids: Optional[Iterable[str]] = None,
+    ) -> List[Dict]:
+        """Parse the new entries from a feed (see ``iter_new_entries``)."""
+        with self.timer.stage('normalize'):
+            parsed_entries = list(self.iter_new_entries(feed, source_url, high_water_mark, seen_entry_ids))
+        logger.info(f"Parsed {len(parsed_entries)} new valid entries from {min(len(feed.entries), self.max_articles)} total")
+        return parsed_entries
+    
+    def iter_new_entries(
+        self,
+        feed: feedparser.FeedParserDict,
+        source_url: str,
+        high_water_mark: Optional[datetime] = None,
+        seen_entry_ids: Optional[Iterable[str]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Yield parsed entries that have not been ingested before.
+        
+        An entry counts as already ingested when its id/link is in
+        ``seen_entry_ids`` or it is dated well before ``high_water_mark``.
+        Known entries are skipped before any text cleaning or date parsing,
+        and iteration stops after KNOWN_ENTRY_STOP known entries in a row,
+        since feeds list newest items first.
+        """
+        seen_entry_ids = set(seen_entry_ids or ())
+        cutoff = None
+        if high_water_mark:
+            cutoff = (high_water_mark - HIGH_WATER_MARK_GRACE).timestamp()
         
         # Limit number of articles
         entries = feed.entries[:self.max_articles]
+        known_streak = 0
         
         for i, entry in enumerate(entries):
+            if entry_key(entry) in seen_entry_ids or _is_dated_before(entry, cutoff):
+                known_streak += 1
+                if known_streak >= self.KNOWN_ENTRY_STOP:
+                    logger.debug(f"Reached already-ingested entries at {i+1}/{len(entries)}, stopping")
+                    break
+                continue
+            known_streak = 0
+            
             try:
                 parsed_entry = self.parse_entry(entry, source_url)
                 if parsed_entry:
-                    parsed_entries.append(parsed_entry)
+                    yield parsed_entry
                 else:
                     logger.debug(f"Skipped entry {i+1}/{len(entries)}")
             except Exception as e:
                 logger.error(f"Error processing entry {i+1}: {str(e)}")
                 continue
+
+
+class StreamingFeedReader:
+    """
+    Incremental lxml parser for well-formed RSS 2.0 and Atom feeds.
+    
+    Body chunks are pushed into an ``XMLPullParser`` as they arrive and every
+    <item>/<entry> becomes a feedparser-style entry as soon as it closes, after
+    which its element is freed. Parsing stops once ``max_entries`` entries are
+    read; the rest of the body is only hashed.
+    
+    Malformed XML, DTDs, RSS 1.0/RDF and other exotic markup are not handled:
+    the reader records a ``fallback_reason`` and keeps the raw body so the
+    caller can parse it with feedparser instead.
+    """
+    
+    def __init__(self, base_url: str = '', max_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.base_url = base_url
+        self.max_bytes = max_bytes or settings.FEED_MAX_BODY_BYTES
+        self.max_entries = max_entries
+        self.bytes_read = 0
+        self.version = None
+        self.fallback_reason = None
+        self.feed = feedparser.FeedParserDict(links=[])
+        self.entries = []
+        self._hash = hashlib.sha256()
+        self._chunks = []
+        self._parser = etree.XMLPullParser(
+            events=('start', 'end'),
+            resolve_entities=False,
+            no_network=True,
+        )
+        self._root = None
+        self._container = None
+        self._entry_tag = None
+        self._complete = False
+    
+    @property
+    def body(self) -> bytes:
+        """The raw body read so far."""
+        return b''.join(self._chunks)
+    
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the body read so far."""
+        return self._hash.hexdigest()
+    
+    def check_content_length(self, content_length: Optional[str]):
+        """Reject a response up front when its declared size is over the limit."""
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise FeedParseError(f"Feed body too large ({content_length} bytes, limit {self.max_bytes})")
+    
+    def read(self, chunks: Iterable[bytes], parse: bool = True) -> List[feedparser.FeedParserDict]:
+        """
+        Consume the whole body; returns the entries read (see ``iter_entries``).
+        
+        With ``parse=False`` the body is only buffered and hashed, so a caller
+        can compare ``content_hash`` first and call ``parse_buffered`` only
+        when the body changed.
+        """
+        for _ in self.iter_entries(chunks, parse=parse):
+            pass
+        return self.entries
+    
+    def parse_buffered(self) -> List[feedparser.FeedParserDict]:
+        """Parse the body consumed by ``read(..., parse=False)``; returns the entries read."""
+        for chunk in self._chunks:
+            for _ in self._feed(chunk):
+                pass
+        for _ in self._finish():
+            pass
+        return self.entries
+    
+    def iter_entries(self, chunks: Iterable[bytes], parse: bool = True) -> Iterator[feedparser.FeedParserDict]:
+        """
+        Feed body chunks to the parser, yielding entries as they complete.
+        
+        Entries already yielded must be discarded if ``fallback_reason`` is
+        set once the body has been consumed.
+        
+        Raises:
+            FeedParseError: If the body grows beyond ``max_bytes``
+        """
+        for chunk in chunks:
+            if not chunk:
+                continue
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                raise FeedParseError(f"Feed body exceeds {self.max_bytes} bytes")
+            self._hash.update(chunk)
+            self._chunks.append(chunk)
+            if parse:
+                yield from self._feed(chunk)
+        if parse:
+            yield from self._finish()
+    
+    def _feed(self, chunk: bytes) -> Iterator[feedparser.FeedParserDict]:
+        if self._complete or self.fallback_reason:
+            return
+        try:
+            self._parser.feed(chunk)
+            yield from self._read_events()
+        except (etree.XMLSyntaxError, UnsupportedFeedError) as e:
+            self._fall_back(e)
+    
+    def _finish(self) -> Iterator[feedparser.FeedParserDict]:
+        if not self._complete and not self.fallback_reason:
+            try:
+                self._parser.close()
+                yield from self._read_events()
+            except (etree.XMLSyntaxError, UnsupportedFeedError) as e:
+                self._fall_back(e)
         
-        logger.info(f"Parsed {len(parsed_entries)} valid entries from {len(entries)} total")
-        return parsed_entries
+        if self._container is None and not self.fallback_reason:
+            self.fallback_reason = 'no channel or feed element'
+    
+    def result(self) -> feedparser.FeedParserDict:
+        """The parsed feed, shaped like ``feedparser.parse`` output."""
+        return feedparser.FeedParserDict(
+            bozo=False,
+            entries=self.entries,
+            feed=self.feed,
+            version=self.version,
+            parser='lxml',
+        )
+    
+    def _fall_back(self, error: Exception):
+        self.fallback_reason = str(error) or error.__class__.__name__
+        self.entries = []
+    
+    def _read_events(self) -> Iterator[feedparser.FeedParserDict]:
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._start_document(elem)
+                elif self._container is None and elem.tag == 'channel' and elem.getparent() is self._root:
+                    self._container = elem
+                continue
+            
+            parent = elem.getparent()
+            if parent is None or parent is not self._container:
+                continue
+            
+            if elem.tag == self._entry_tag:
+                entry = self._build_entry(elem)
+                self.entries.append(entry)
+                # Free the finished entry and everything before it
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+                yield entry
+                
+                if self.max_entries and len(self.entries) >= self.max_entries:
+                    self._complete = True
+                    return
+            else:
+                self._read_feed_element(elem)
+    
+    def _start_document(self, root):
+        """Identify the feed format from its root element."""
+        self._root = root
+        if root.getroottree().docinfo.doctype:
+            raise UnsupportedFeedError('document has a DOCTYPE')
+        
+        if root.tag == 'rss':
+            version = root.get('version', '2.0')
+            if not version.startswith(('2.', '0.91', '0.92')):
+                raise UnsupportedFeedError(f"unsupported RSS version {version}")
+            self.version = 'rss20'
+            self._entry_tag = 'item'
+        elif root.tag == ATOM_NS + 'feed':
+            self.version = 'atom10'
+            self._entry_tag = ATOM_NS + 'entry'
+            self._container = root
+        else:
+            raise UnsupportedFeedError(f"unsupported root element {root.tag}")
+    
+    def _read_feed_element(self, elem):
+        """Record channel-level metadata."""
+        tag = elem.tag
+        if tag in ('title', ATOM_NS + 'title'):
+            self.feed['title'] = _element_text(elem)
+        elif tag in ('description', ATOM_NS + 'subtitle'):
+            self.feed['subtitle'] = _element_text(elem)
+        elif tag == 'link':
+            self.feed['link'] = _element_text(elem).strip()
+            self.feed['links'].append(feedparser.FeedParserDict(rel='alternate', href=self.feed['link'], type='text/html'))
+        elif tag == ATOM_NS + 'link':
+            link = _atom_link(elem)
+            self.feed['links'].append(link)
+            if link['rel'] == 'alternate' and 'link' not in self.feed:
+                self.feed['link'] = link['href']
+    
+    def _build_entry(self, elem) -> feedparser.FeedParserDict:
+        entry = feedparser.FeedParserDict()
+        tags = []
+        # feedparser derives ``enclosures`` from the links with rel="enclosure"
+        links = []
+        media_content = []
+        media_thumbnail = []
+        guid_is_link = False
+        
+        for child in elem:
+            tag = child.tag
+            if not isinstance(tag, str):
+                # Comments and processing instructions
+                continue
+            
+            if tag == 'title' or tag == ATOM_NS + 'title':
+                entry['title'] = _element_text(child)
+            elif tag == 'link':
+                entry['link'] = _element_text(child).strip()
+                links.append(feedparser.FeedParserDict(rel='alternate', type='text/html', href=entry['link']))
+            elif tag == ATOM_NS + 'link':
+                link = _atom_link(child)
+                if link['rel'] == 'enclosure':
+                    link['length'] = child.get('length', '')
+                elif link['rel'] == 'alternate' and 'link' not in entry:
+                    entry['link'] = link['href']
+                links.append(link)
+            elif tag == 'guid':
+                entry['id'] = _element_text(child).strip()
+                guid_is_link = child.get('isPermaLink', 'true') == 'true'
+            elif tag == ATOM_NS + 'id':
+                entry['id'] = _element_text(child).strip()
+            elif tag in ('description', ATOM_NS + 'summary'):
+                entry['summary'] = self._html(child)
+            elif tag in (CONTENT_NS + 'encoded', ATOM_NS + 'content'):
+                if child.get('src'):
+                    continue
+                entry['content'] = [feedparser.FeedParserDict(value=self._html(child), type='text/html')]
+            elif tag in ('pubDate', ATOM_NS + 'published'):
+                if 'published' not in entry:
+                    entry['published'] = _element_text(child).strip()
+                    entry['published_parsed'] = _parse_struct_time(entry['published'])
+            elif tag in (ATOM_NS + 'updated', DC_NS + 'date'):
+                entry['updated'] = _element_text(child).strip()
+                entry['updated_parsed'] = _parse_struct_time(entry['updated'])
+            elif tag in ('author', DC_NS + 'creator'):
+                entry.setdefault('author', _element_text(child).strip())
+            elif tag == ATOM_NS + 'author':
+                entry.setdefault('author', _atom_author(child))
+            elif tag == 'category':
+                tags.append(feedparser.FeedParserDict(term=_element_text(child).strip(), scheme=child.get('domain'), label=None))
+            elif tag == ATOM_NS + 'category':
+                tags.append(feedparser.FeedParserDict(term=child.get('term', ''), scheme=child.get('scheme'), label=child.get('label')))
+            elif tag == 'enclosure':
+                links.append(feedparser.FeedParserDict(
+                    rel='enclosure', href=child.get('url', ''), type=child.get('type', ''), length=child.get('length', '')
+                ))
+            elif tag.startswith(MEDIA_NAMESPACES):
+                _read_media(child, media_content, media_thumbnail, entry)
+        
+        if guid_is_link and 'link' not in entry and entry.get('id'):
+            entry['link'] = entry['id']
+            links.append(feedparser.FeedParserDict(rel='alternate', type='text/html', href=entry['link']))
+        # feedparser fills in a missing summary from the full content
+        if 'summary' not in entry and entry.get('content'):
+            entry['summary'] = entry['content'][0]['value']
+        
+        entry['links'] = links
+        if tags:
+            entry['tags'] = tags
+        if media_content:
+            entry['media_content'] = media_content
+        if media_thumbnail:
+            entry['media_thumbnail'] = media_thumbnail
+        return entry
+    
+    def _html(self, elem) -> str:
+        """Text of an HTML-bearing element, sanitized the way feedparser does it."""
+        content_type = elem.get('type', 'html')
+        if content_type in ('xhtml', 'application/xhtml+xml'):
+            raise UnsupportedFeedError('inline XHTML content')
+        
+        text = _element_text(elem)
+        if '<' in text and content_type not in ('text', 'text/plain'):
+            text = _sanitize_html(text, 'utf-8', 'text/html')
+        return text
+
+
+def _element_text(elem) -> str:
+    """Text of a simple element; nested markup is left to feedparser."""
+    if len(elem):
+        raise UnsupportedFeedError(f"markup inside <{etree.QName(elem).localname}>")
+    return elem.text or ''
+
+
+def _atom_link(elem) -> feedparser.FeedParserDict:
+    return feedparser.FeedParserDict(
+        rel=elem.get('rel', 'alternate'),
+        href=elem.get('href', ''),
+        type=elem.get('type', ''),
+    )
+
+
+def _atom_author(elem) -> str:
+    """Format an atom:author like feedparser does: 'name (email)'."""
+    name = elem.findtext(ATOM_NS + 'name', '').strip()
+    email = elem.findtext(ATOM_NS + 'email', '').strip()
+    if name and email:
+        return f"{name} ({email})"
+    return name or email
+
+
+def _read_media(elem, media_content: List, media_thumbnail: List, entry: Dict):
+    """Collect Media RSS content and thumbnails (plain dicts, as feedparser has them)."""
+    name = etree.QName(elem).localname
+    if name == 'content' and elem.get('url'):
+        media_content.append(dict(elem.attrib))
+    elif name == 'thumbnail' and elem.get('url'):
+        media_thumbnail.append(dict(elem.attrib))
+    
+    elif name == 'description':
+        # feedparser uses media:description as the summary of video feeds
+        entry.setdefault('summary', _element_text(elem))
+    
+    if name in ('group', 'content'):
+        for child in elem:
+            if isinstance(child.tag, str) and child.tag.startswith(MEDIA_NAMESPACES):
+                _read_media(child, media_content, media_thumbnail, entry)
+
+
+def _parse_struct_time(value: str) -> Optional[time.struct_time]:
+    """Parse an RFC 822 or ISO 8601 date into a UTC struct_time like feedparser's *_parsed fields."""
+    if not value:
+        return None
+    parsed = parse_rfc822(value) or parse_iso8601(value)
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.timetuple()
+    return parsed.utctimetuple()
+
+
+def entry_key(entry) -> str:
+    """Stable identifier of a feed entry: its guid/id, falling back to its link."""
+    return entry.get('id') or entry.get('link') or ''
+
+
+def _is_dated_before(entry, cutoff: Optional[float]) -> bool:
+    """Cheap date check using feedparser's pre-parsed struct_time fields."""
+    if cutoff is None:
+        return False
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    if not parsed:
+        return False
+    return calendar.timegm(parsed) < cutoff
 
 
-def parse_feed(feed_url: str, custom_headers: Optional[Dict] = None, max_articles: int = 50) -> Tuple[feedparser.FeedParserDict, List[Dict]]:
+def merge_seen_entry_ids(feed: feedparser.FeedParserDict, previous_ids: Iterable[str],
+                         max_articles: int = 50) -> List[str]:
+    """Remember the ids of a feed's current entries, newest first, capped at RECENT_ENTRY_IDS_LIMIT."""
+    current_ids = [key for key in (entry_key(entry) for entry in feed.entries[:max_articles]) if key]
+    current_set = set(current_ids)
+    merged = current_ids + [key for key in previous_ids if key not in current_set]
+    return merged[:RECENT_ENTRY_IDS_LIMIT]
+
+
+def is_not_modified(feed: feedparser.FeedParserDict) -> bool:
+    """Check whether a fetched feed was unchanged since the previous fetch."""
+    return feed.get('status') == 304
+
+
+def parse_feed(
+    feed_url: str,
+    custom_headers: Optional[Dict] = None,
+    max_articles: int = 50,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    rate_limit: bool = True,
+    high_water_mark: Optional[datetime] = None,
+    seen_entry_ids: Optional[Iterable[str]] = None,
+    timer: Optional[StageTimer] = None,
+) -> Tuple[feedparser.FeedParserDict, List[Dict]]:
     """
     Parse a feed and return both raw feed and parsed entries.
     
+    Pass the validators stored from the previous fetch to make the request
+    conditional; an unchanged feed returns no entries (see ``is_not_modified``).
+    Pass the source's high-water mark and recent entry ids to only get back
+    entries that were not ingested before. Pass a StageTimer to collect
+    per-stage timings.
+    
     Returns:
         Tuple of (raw_feed, parsed_entries)
     """
-    parser = FeedParser(max_articles=max_articles)
+    parser = FeedParser(max_articles=max_articles, rate_limit=rate_limit, timer=timer)
     
     # Fetch and parse feed
-    feed = parser.fetch_feed(feed_url, custom_headers)
+    feed = parser.fetch_feed(
+        feed_url,
+        custom_headers,
+        etag=etag,
+        last_modified=last_modified,
+        content_hash=content_hash,
+    )
+    
+    if is_not_modified(feed):
+        return feed, []
     
     # Parse entries
-    entries = parser.parse_feed_entries(feed, feed_url)
+    entries = parser.parse_feed_entries(feed, feed_url, high_water_mark, seen_entry_ids)
     
     return feed, entries
@@ -0,0 +1,256 @@
+"""
+Single-pass extraction of article pages.
+
+One lxml parse of a fetched page yields everything the pipeline needs from
+it: main text, title, canonical URL, og/twitter lead image, candidate content
+images and paywall signals. The parts worth keeping are stored on
+``ArticleRaw.extraction_meta`` so curation never parses HTML again.
+"""
+import logging
+import re
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+from lxml import etree, html
+from lxml.cssselect import CSSSelector
+
+from .utils import PAYWALL_INDICATORS, canonicalize_url, clean_text, is_valid_url, normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Tried in order; the first match holds the title / main content
+TITLE_SELECTORS = [CSSSelector(s) for s in ('h1', 'title', '.headline', '.article-title', '[class*="title"]')]
+CONTENT_SELECTORS = [
+    CSSSelector(s) for s in (
+        'article', '.article-content', '.post-content', '.entry-content', '.content', 'main',
+        '[class*="article"]', '[class*="content"]',
+    )
+]
+# Stripped from the main content before taking its text
+UNWANTED_SELECTOR = CSSSelector('nav, footer, .ad, .advertisement, .sidebar')
+# Areas whose images are candidates for the cover image
+CONTENT_AREA_CLASS = re.compile(r'article|content|post|entry', re.I)
+
+CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+NOT_FREE_RE = re.compile(r'"isAccessibleForFree"\s*:\s*"?false', re.I)
+# Image URLs that are almost never a cover image
+NON_COVER_IMAGE_RE = re.compile(r'(?<![a-z])(ads?|tracking|pixel|logo|icon|avatar)(?![a-z])', re.I)
+
+# Smallest declared width/height of a content image used as a cover
+MIN_COVER_SIZE = 200
+# Candidate images stored per article
+MAX_STORED_IMAGES = 10
+
+
+def parse_html(content: Union[bytes, str], encoding: Optional[str] = None) -> Optional[html.HtmlElement]:
+    """
+    Parse a page with lxml, or return None if there is no document.
+    
+    Bytes are decoded with ``encoding`` (the charset from the response
+    headers), else the page's <meta charset>, else UTF-8.
+    """
+    if not content:
+        return None
+    try:
+        if isinstance(content, str):
+            return html.document_fromstring(content)
+        if not encoding:
+            match = CHARSET_RE.search(content[:4096])
+            encoding = match.group(1).decode('ascii') if match else 'utf-8'
+        try:
+            parser = html.HTMLParser(encoding=encoding)
+        except LookupError:
+            parser = html.HTMLParser(encoding='utf-8')
+        return html.document_fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"Could not parse HTML: {str(e)}")
+        return None
+
+
+def extract_page(content: Union[bytes, str], page_url: str, encoding: Optional[str] = None) -> Dict:
+    """
+    Extract an article page in one parse.
+    
+    Args:
+        content: Page body
+        page_url: URL the page was fetched from (final URL after redirects)
+        encoding: Charset declared in the response headers, if any
+    
+    Returns:
+        Dict with 'title', 'text' (main content), 'canonical_url', 'lead_image'
+        (og/twitter image or None), 'images' (content images first),
+        'paywall_signals' and 'is_paywalled'
+    """
+    page = {
+        'title': '',
+        'text': '',
+        'canonical_url': '',
+        'lead_image': None,
+        'images': [],
+        'paywall_signals': [],
+        'is_paywalled': False,
+    }
+    doc = parse_html(content, encoding)
+    if doc is None:
+        return page
+    
+    page['canonical_url'] = _canonical_link(doc, page_url)
+    page['lead_image'] = _lead_image(doc, page_url)
+    page['images'] = _images(doc, page_url)
+    page['paywall_signals'] = _paywall_signals(doc)
+    page['is_paywalled'] = bool(page['paywall_signals'])
+    
+    for selector in TITLE_SELECTORS:
+        found = selector(doc)
+        if found:
+            page['title'] = clean_text(found[0].text_content())
+            break
+    
+    # Last, since it strips elements from the tree
+    for selector in CONTENT_SELECTORS:
+        found = selector(doc)
+        if found:
+            content_elem = found[0]
+            for unwanted in UNWANTED_SELECTOR(content_elem):
+                unwanted.drop_tree()
+            page['text'] = clean_text(content_elem.text_content())
+            break
+    
+    return page
+
+
+def stored_meta(page: Dict, strategy: Optional[str] = None) -> Dict:
+    """The part of an ``extract_page`` result kept on ArticleRaw.extraction_meta."""
+    return {
+        'strategy': strategy,
+        'title': page['title'],
+        'canonical_url': page['canonical_url'],
+        'lead_image': page['lead_image'],
+        'images': page['images'][:MAX_STORED_IMAGES],
+        'paywall_signals': page['paywall_signals'],
+        'text_length': len(page['text']),
+    }
+
+
+def best_image(meta: Dict) -> Optional[Dict]:
+    """
+    Pick a cover image from stored extraction results.
+    
+    Prefers the og:image / twitter:image, then the first large enough
+    content image that does not look like an ad, logo or icon. Pages
+    without an article/content area (or without images in it) fall back
+    to every image on the page.
+    """
+    if not meta:
+        return None
+    if meta.get('lead_image'):
+        return {'url': meta['lead_image']['url'], 'type': 'image', 'source': meta['lead_image']['source']}
+    
+    images = meta.get('images', [])
+    candidates = [image for image in images if image.get('in_content')] or images
+    for image in candidates:
+        if NON_COVER_IMAGE_RE.search(image['url']):
+            continue
+        width, height = _int(image.get('width')), _int(image.get('height'))
+        if width and height and (width < MIN_COVER_SIZE or height < MIN_COVER_SIZE):
+            continue
+        return {'url': image['url'], 'type': 'image', 'width': width, 'height': height, 'source': 'content'}
+    return None
+
+
+def resolve_canonical(href: str, page_url: str) -> str:
+    """
+    Resolve and canonicalize a declared canonical link.
+    
+    Links pointing at a site's front page are ignored; some CMSes emit those
+    on every page.
+    """
+    canonical = canonicalize_url(normalize_url(href.strip(), page_url))
+    if not is_valid_url(canonical) or urlparse(canonical).path in ('', '/'):
+        return ''
+    return canonical
+
+
+def _canonical_link(doc, page_url: str) -> str:
+    """The page's rel=canonical (or og:url) link."""
+    hrefs = doc.xpath('//link[@rel="canonical"]/@href') or doc.xpath('//meta[@property="og:url"]/@content')
+    href = next((h for h in hrefs if h.strip()), '')
+    return resolve_canonical(href, page_url) if href else ''
+
+
+def _lead_image(doc, page_url: str) -> Optional[Dict]:
+    """The og:image, else twitter:image, the publisher picked for the page."""
+    for source, xpath in (
+        ('og:image', '//meta[@property="og:image"]/@content'),
+        ('twitter:image', '//meta[@name="twitter:image"]/@content'),
+    ):
+        for value in doc.xpath(xpath):
+            url = normalize_url(value.strip(), page_url) if value.strip() else ''
+            if is_valid_url(url):
+                return {'url': url, 'source': source}
+    return None
+
+
+def _images(doc, page_url: str) -> List[Dict]:
+    """Every <img> on the page, those inside article/content areas first."""
+    in_content = set()
+    for area in doc.iter('article', 'main', 'div'):
+        if area.tag == 'div' and not CONTENT_AREA_CLASS.search(area.get('class', '')):
+            continue
+        in_content.update(area.iter('img'))
+    
+    images = []
+    seen = set()
+    for img in sorted(doc.iter('img'), key=lambda el: el not in in_content):
+        src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+        if not src:
+            continue
+        url = normalize_url(src.strip(), page_url)
+        if url in seen or not is_valid_url(url):
+            continue
+        seen.add(url)
+        images.append({
+            'url': url,
+            'alt': img.get('alt', ''),
+            'width': img.get('width'),
+            'height': img.get('height'),
+            'in_content': img in in_content,
+        })
+    return images
+
+
+def _paywall_signals(doc) -> List[str]:
+    """
+    Reasons to believe the page is paywalled (empty if none).
+    
+    Reads structured markers (schema.org isAccessibleForFree, the
+    article:content_tier meta tag, paywall class names) and the known
+    paywall phrases in the visible text. Removes scripts and styles from
+    the tree.
+    """
+    signals = []
+    for script in doc.xpath('//script[@type="application/ld+json"]'):
+        if NOT_FREE_RE.search(script.text or ''):
+            signals.append('json_ld:not_free')
+            break
+    
+    tier = doc.xpath('//meta[@property="article:content_tier"]/@content')
+    if tier and tier[0].strip().lower() in ('locked', 'metered'):
+        signals.append(f'content_tier:{tier[0].strip().lower()}')
+    
+    if doc.xpath('//*[contains(@class, "paywall") or contains(@id, "paywall")]'):
+        signals.append('markup:paywall')
+    
+    for elem in doc.xpath('//script | //style | //noscript'):
+        elem.drop_tree()
+    text = ' '.join(doc.text_content().lower().split())
+    signals.extend(f'text:{phrase}' for phrase in PAYWALL_INDICATORS if phrase in text)
+    return signals
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(str(value).strip().rstrip('px'))
+    except (TypeError, ValueError):
+        return None
+
@@ -0,0 +1,232 @@
+"""
+Shared HTTP client with per-host connection pooling.
+
+Feed and article fetches go through one ``requests.Session`` per thread, so
+connections to the same host are kept alive and reused instead of paying a
+TCP and TLS handshake for every request. A thread's session is closed once
+the thread is gone (e.g. a finished ThreadPoolExecutor's workers), so
+long-lived workers do not collect sessions. Pool sizes, timeouts and
+retries come from settings.
+"""
+import logging
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Seconds this thread has spent opening connections (DNS, TCP and TLS)
+_connect_time = threading.local()
+
+
+class _TimedConnectMixin:
+    """Record how long opening a new connection takes."""
+    
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_time.seconds = getattr(_connect_time, 'seconds', 0.0) + time.perf_counter() - start
+
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledHTTPClient:
+    """Per-process HTTP client keeping a pooled session per thread."""
+    
+    # Log connection reuse statistics every this many requests
+    STATS_LOG_INTERVAL = 100
+    
+    def __init__(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 connect_timeout: Optional[float] = None, retries: Optional[int] = None):
+        """
+        Args:
+            pool_connections: Number of hosts to keep pools for (defaults to settings.HTTP_POOL_CONNECTIONS)
+            pool_maxsize: Connections kept alive per host (defaults to settings.HTTP_POOL_MAXSIZE)
+            connect_timeout: Seconds to wait for a connection (defaults to settings.HTTP_CONNECT_TIMEOUT)
+            retries: Retries of failed connections or reads (defaults to settings.HTTP_RETRIES)
+        """
+        from django.conf import settings
+        self.pool_connections = pool_connections or settings.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or settings.HTTP_POOL_MAXSIZE
+        self.connect_timeout = connect_timeout or settings.HTTP_CONNECT_TIMEOUT
+        self.retries = settings.HTTP_RETRIES if retries is None else retries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Live sessions by a sequence number, and the counts of closed ones by host
+        self._sessions: Dict[int, requests.Session] = {}
+        self._session_seq = 0
+        self._retired_hosts: Dict[str, Dict[str, int]] = {}
+        self._request_count = 0
+    
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's session, created on first use."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._create_session()
+            self._local.session = session
+            with self._lock:
+                self._session_seq += 1
+                key = self._session_seq
+                self._sessions[key] = session
+            weakref.finalize(threading.current_thread(), self._release, key)
+        return session
+    
+    def _release(self, key: int):
+        """Close the session of a thread that is gone, keeping its counts for stats()."""
+        with self._lock:
+            session = self._sessions.pop(key, None)
+            if session is None:
+                return
+            for host, counts in self._pool_counts(session).items():
+                retired = self._retired_hosts.setdefault(host, {'requests': 0, 'connections': 0})
+                retired['requests'] += counts['requests']
+                retired['connections'] += counts['connections']
+        session.close()
+    
+    @staticmethod
+    def _pool_counts(session: requests.Session) -> Dict[str, Dict[str, int]]:
+        hosts = {}
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = hosts.setdefault(pool.host, {'requests': 0, 'connections': 0})
+                host['requests'] += pool.num_requests
+                host['connections'] += pool.num_connections
+        return hosts
+    
+    def _create_session(self) -> requests.Session:
+        # Only connection-level failures are retried here (e.g. a keep-alive
+        # connection the server already closed); HTTP errors are left to the
+        # callers' own retry and backoff.
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=0,
+            backoff_factor=0.3,
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+        adapter.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        GET a URL over a pooled connection.
+        
+        Args:
+            url: URL to fetch
+            timeout: Read timeout in seconds; the connect timeout comes from settings
+            **kwargs: Passed through to ``requests.Session.get``
+        
+        The response's ``connect_seconds`` attribute holds the time spent
+        opening new connections for it (0 when a kept-alive one was reused).
+        """
+        if timeout is not None:
+            kwargs['timeout'] = (self.connect_timeout, timeout)
+        connect_before = getattr(_connect_time, 'seconds', 0.0)
+        response = self.session.get(url, **kwargs)
+        response.connect_seconds = getattr(_connect_time, 'seconds', 0.0) - connect_before
+        
+        with self._lock:
+            self._request_count += 1
+            log_stats = self._request_count % self.STATS_LOG_INTERVAL == 0
+        if log_stats:
+            self.log_stats()
+        return response
+    
+    def stats(self) -> Dict:
+        """
+        Connection reuse statistics for the hosts currently pooled.
+        
+        Returns:
+            Dict with total 'requests', 'connections' opened, 'reused'
+            requests, 'reuse_ratio' and a per-host breakdown in 'hosts'
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+            hosts = {host: dict(counts) for host, counts in self._retired_hosts.items()}
+        
+        for session in sessions:
+            for name, counts in self._pool_counts(session).items():
+                host = hosts.setdefault(name, {'requests': 0, 'connections': 0})
+                host['requests'] += counts['requests']
+                host['connections'] += counts['connections']
+        
+        total_requests = sum(h['requests'] for h in hosts.values())
+        total_connections = sum(h['connections'] for h in hosts.values())
+        reused = max(total_requests - total_connections, 0)
+        return {
+            'requests': total_requests,
+            'connections': total_connections,
+            'reused': reused,
+            'reuse_ratio': round(reused / total_requests, 3) if total_requests else 0.0,
+            'hosts': hosts,
+        }
+    
+    def log_stats(self):
+        """Log a one-line summary of connection reuse."""
+        stats = self.stats()
+        logger.info(
+            f"HTTP pool: {stats['requests']} requests over {stats['connections']} connections "
+            f"to {len(stats['hosts'])} hosts ({stats['reuse_ratio']:.0%} reused)"
+        )
+    
+    def close(self):
+        """Close all sessions and their pooled connections."""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+            self._retired_hosts = {}
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+
+# Global client instance
+_http_client = None
+
+
+def get_http_client() -> PooledHTTPClient:
+    """Get or create the global pooled HTTP client."""
+    global _http_client
+    if _http_client is None:
+        _http_client = PooledHTTPClient()
+    return _http_client
@@ -0,0 +1,274 @@
+"""
+Bulk persistence of parsed feed entries.
+
+Writes a whole feed's worth of entries with a fixed number of queries per
+batch instead of several queries per entry and per media item.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArticleRaw, MediaAsset, Source
+from .near_duplicates import get_duplicate_index
+from .stage_timing import StageTimer
+from .utils import clean_text, get_mime_type, url_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class BulkArticleWriter:
+    """Upsert ArticleRaw rows and their media assets for one source in bulk."""
+    
+    # Fields refreshed from the feed on every ingest
+    ARTICLE_FIELDS = ('title', 'published_at', 'summary_feed')
+    
+    def __init__(self, source: Source, batch_size: int = 500, timer: Optional[StageTimer] = None):
+        self.source = source
+        self.batch_size = batch_size
+        self.timer = timer or StageTimer()
+    
+    def write(self, entries: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Write parsed entries.
+        
+        Known URLs are prefetched by their url_hash (or the canonical URL
+        hash of an article whose page declared that URL), new articles
+        are inserted with bulk_create, and existing articles are only updated when one of
+        ARTICLE_FIELDS actually changed.
+        
+        Returns:
+            Dict with 'created', 'updated' and 'unchanged' article counts, the
+            number of new articles that are near-'duplicates' of earlier ones,
+            and 'media_created' / 'media_linked' counts
+        """
+        stats = {
+            'created': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0,
+            'media_created': 0, 'media_linked': 0,
+        }
+        
+        # Feeds occasionally repeat an item (possibly under another URL
+        # variant); the first occurrence wins
+        entries_by_hash = {}
+        for entry in entries:
+            # Entries the database would reject are dropped here, since one
+            # failing row would roll back the whole feed's batch
+            try:
+                values = _entry_values(entry)
+            except ValueError as e:
+                logger.error(f"Error processing article {str(entry.get('title', 'Unknown'))[:100]}: {str(e)}")
+                continue
+            entries_by_hash.setdefault(url_fingerprint(entry['url']), {**entry, **values})
+        
+        if not entries_by_hash:
+            return stats
+        
+        with self.timer.stage('db_write'), transaction.atomic():
+            articles_by_hash = self._write_articles(entries_by_hash, stats)
+            with self.timer.stage('media'):
+                self._write_media(articles_by_hash, entries_by_hash, stats)
+        
+        logger.info(
+            f"Bulk write for {self.source.name}: {stats['created']} created, "
+            f"{stats['updated']} updated, {stats['unchanged']} unchanged, {stats['duplicates']} duplicates, "
+            f"{stats['media_created']} media created, {stats['media_linked']} media links"
+        )
+        return stats
+    
+    def _write_articles(self, entries_by_hash: Dict[str, Dict], stats: Dict[str, int]) -> Dict[str, ArticleRaw]:
+        """Insert new articles and update changed ones; returns all articles keyed by url_hash."""
+        fields = ('id', 'url_hash', 'canonical_url_hash', 'canonical_article_id', *self.ARTICLE_FIELDS)
+        existing = {
+            article.url_hash: article
+            for article in ArticleRaw.objects.filter(url_hash__in=list(entries_by_hash)).only(*fields)
+        }
+        # A link may also be the canonical URL an earlier article's page declared
+        missing = [url_hash for url_hash in entries_by_hash if url_hash not in existing]
+        if missing:
+            for article in ArticleRaw.objects.filter(canonical_url_hash__in=missing).only(*fields).order_by('id'):
+                existing.setdefault(article.canonical_url_hash, article)
+        
+        new_articles = []
+        changed_articles = []
+        changed_ids = set()
+        for url_hash, entry in entries_by_hash.items():
+            values = {field: entry[field] for field in self.ARTICLE_FIELDS}
+            
+            article = existing.get(url_hash)
+            if article is None:
+                new_articles.append(ArticleRaw(source=self.source, url=entry['url'], url_hash=url_hash, **values))
+                continue
+            
+            if any(getattr(article, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(article, field, value)
+                if article.id not in changed_ids:
+                    changed_ids.add(article.id)
+                    changed_articles.append(article)
+            else:
+                stats['unchanged'] += 1
+        
+        if new_articles:
+            with self.timer.stage('dedup'):
+                stats['duplicates'] = get_duplicate_index().link_duplicates(new_articles)
+            # A concurrent ingest may insert the same URL between our prefetch
+            # and this insert; treat that as an update rather than failing.
+            ArticleRaw.objects.bulk_create(
+                new_articles,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['url_hash'],
+                update_fields=list(self.ARTICLE_FIELDS),
+            )
+            new_articles = self._reread_conflicts(new_articles, existing, fields, stats)
+        if changed_articles:
+            ArticleRaw.objects.bulk_update(changed_articles, list(self.ARTICLE_FIELDS), batch_size=self.batch_size)
+        
+        stats['created'] = len(new_articles)
+        stats['updated'] += len(changed_articles)
+        
+        articles_by_hash = dict(existing)
+        articles_by_hash.update((article.url_hash, article) for article in new_articles)
+        return articles_by_hash
+    
+    def _reread_conflicts(self, new_articles: List[ArticleRaw], existing: Dict[str, ArticleRaw],
+                          fields: tuple, stats: Dict[str, int]) -> List[ArticleRaw]:
+        """
+        Tell the rows the upsert inserted from those a concurrent ingest had already inserted.
+        
+        The stored rows are read back by url_hash: a row whose created_at is
+        not the one bulk_create set on our instance was updated, not inserted.
+        Those rows go into ``existing`` (with their real id and canonical
+        article) and count as updated; the inserted articles get their ids.
+        
+        Returns:
+            The articles that were actually inserted
+        """
+        stored = {
+            row.url_hash: row
+            for row in ArticleRaw.objects.filter(url_hash__in=[article.url_hash for article in new_articles])
+            .only(*fields, 'created_at')
+        }
+        inserted = []
+        for article in new_articles:
+            row = stored[article.url_hash]
+            if row.created_at == article.created_at:
+                article.pk = row.pk
+                inserted.append(article)
+            else:
+                existing[article.url_hash] = row
+                stats['updated'] += 1
+        if len(inserted) < len(new_articles):
+            logger.info(f"{len(new_articles) - len(inserted)} articles of {self.source.name} were inserted concurrently")
+        stats['duplicates'] = sum(1 for article in inserted if article.canonical_article_id)
+        return inserted
+    
+    def _write_media(self, articles_by_hash: Dict[str, ArticleRaw], entries_by_hash: Dict[str, Dict],
+                     stats: Dict[str, int]):
+        """
+        Create missing MediaAsset rows and link them to their articles.
+        
+        Media of a near-duplicate is also linked to its canonical article, so
+        the story keeps every outlet's images even though only one copy is
+        curated.
+        """
+        media_by_url = {}
+        links = set()
+        for url_hash, entry in entries_by_hash.items():
+            article = articles_by_hash[url_hash]
+            article_ids = [article.pk]
+            if article.canonical_article_id:
+                article_ids.append(article.canonical_article_id)
+            
+            for media_data in entry.get('media_assets', []):
+                media = _normalize_media(media_data)
+                if media is None:
+                    continue
+                media_by_url.setdefault(media['source_url'], media)
+                links.update((article_id, media['source_url']) for article_id in article_ids)
+        
+        if not media_by_url:
+            return
+        
+        # source_url is not unique; reuse the oldest asset like get_or_create did
+        assets = {}
+        for asset in MediaAsset.objects.filter(source_url__in=list(media_by_url)).order_by('id').only('id', 'source_url'):
+            assets.setdefault(asset.source_url, asset)
+        
+        new_assets = [MediaAsset(**media) for url, media in media_by_url.items() if url not in assets]
+        if new_assets:
+            MediaAsset.objects.bulk_create(new_assets, batch_size=self.batch_size)
+            assets.update((asset.source_url, asset) for asset in new_assets)
+        
+        Through = ArticleRaw.media_assets.through
+        through_rows = [
+            Through(articleraw_id=article_id, mediaasset_id=assets[media_url].pk)
+            for article_id, media_url in links
+        ]
+        Through.objects.bulk_create(through_rows, batch_size=self.batch_size, ignore_conflicts=True)
+        
+        stats['media_created'] = len(new_assets)
+        stats['media_linked'] = len(through_rows)
+
+
+def _normalize_media(media_data: Dict) -> Optional[Dict]:
+    """Map an extracted media dict onto MediaAsset fields; None for unsupported media."""
+    url = media_data.get('url')
+    if not url or len(url) > 200:
+        return None
+    
+    # Feeds put either a kind ('image') or a MIME type ('image/jpeg') in 'type'
+    raw_type = str(media_data.get('type') or 'image').lower()
+    if raw_type.startswith(('audio', 'application', 'text')):
+        return None
+    media_type = 'video' if raw_type.startswith('video') else 'image'
+    mime_type = raw_type if '/' in raw_type else get_mime_type(url, media_type)
+    
+    return {
+        'source_url': url,
+        'type': media_type,
+        'mime_type': mime_type[:100],
+        'width': _to_int(media_data.get('width')),
+        'height': _to_int(media_data.get('height')),
+    }
+
+
+def _to_int(value) -> Optional[int]:
+    """Parse a width/height attribute, ignoring values like 'auto' or '100%'."""
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _entry_values(entry: Dict) -> Dict[str, Any]:
+    """
+    The ARTICLE_FIELDS values of a parsed entry, cut to fit their columns.
+    
+    Raises:
+        ValueError: If the entry cannot be stored (overlong URL, no title, bad date)
+    """
+    url = entry.get('url') or ''
+    if len(url) > ArticleRaw._meta.get_field('url').max_length:
+        raise ValueError(f"overlong URL {url[:100]}...")
+    title = clean_text(str(entry.get('title') or '')).replace('\x00', '')
+    if not title:
+        raise ValueError("no title")
+    published_at = entry.get('published_at')
+    if not isinstance(published_at, datetime):
+        raise ValueError(f"bad date {published_at!r}")
+    return {
+        'title': title[:ArticleRaw._meta.get_field('title').max_length],
+        'published_at': _as_aware(published_at),
+        # PostgreSQL text cannot hold NUL characters
+        'summary_feed': str(entry.get('summary_feed') or '').replace('\x00', ''),
+    }
+
+
+def _as_aware(value):
+    """Feed dates may be naive; store them in the default timezone like Django would."""
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
@@ -0,0 +1,198 @@
+"""
+Persistent cache of LLM results, keyed by what determines them.
+
+AIService looks up chat and embedding calls here before paying for them.
+The key is the SHA-256 of the operation, the model, the operation's prompt
+version (ai_service.PROMPT_VERSIONS) and its inputs with whitespace
+collapsed, so a re-run of the admin curation action, a batch retried after
+a crash or a syndicated copy of an article gets the earlier answer back.
+Only API answers the caller can parse are cached (AIService._cached_call
+takes a validator per operation), never malformed answers or the fallbacks
+used when a call fails.
+
+Entries are LLMCacheEntry rows that expire after LLM_CACHE_TTL_DAYS;
+evict_llm_cache_task removes expired rows and, while the cache is larger
+than LLM_CACHE_MAX_MB, the least recently used ones. Hits and misses per
+operation are counted in Redis, shared by all workers, or per process when
+Redis is unavailable.
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import LLMCacheEntry
+from .utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Evict down to this share of the size limit, so eviction does not run on every pass
+EVICT_TO = 0.9
+
+
+class LLMCache:
+    """LLM results in the database, with TTL and size-based LRU eviction; see the module docstring."""
+    
+    METRICS_KEY = 'genienews:llmcache:metrics'
+    
+    def __init__(self, enabled: Optional[bool] = None, ttl_days: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            enabled: Look up and store results at all (defaults to settings.LLM_CACHE_ENABLED)
+            ttl_days: Days an entry is kept (defaults to settings.LLM_CACHE_TTL_DAYS)
+            max_bytes: Size above which old entries are evicted (defaults to settings.LLM_CACHE_MAX_MB)
+        """
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self.ttl = timedelta(days=ttl_days or settings.LLM_CACHE_TTL_DAYS)
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        # {operation: {'hits': n, 'misses': n}} when Redis is unavailable
+        self._local_metrics: Dict[str, Dict[str, int]] = {}
+    
+    @staticmethod
+    def make_key(operation: str, model: str, version: int, *inputs: str) -> str:
+        """Cache key of a call: inputs are compared with whitespace collapsed."""
+        digest = hashlib.sha256(f"{operation}\x1f{model}\x1f{version}".encode('utf-8'))
+        for value in inputs:
+            digest.update(b'\x1e')
+            digest.update(' '.join((value or '').split()).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def get(self, operation: str, key: str) -> Optional[Any]:
+        """The cached result for a key, or None."""
+        return self.get_many(operation, [key]).get(key)
+    
+    def get_many(self, operation: str, keys: List[str]) -> Dict[str, Any]:
+        """Cached results by key, for the keys that have one."""
+        if not self.enabled or not keys:
+            return {}
+        now = timezone.now()
+        try:
+            found = dict(
+                LLMCacheEntry.objects.filter(key__in=set(keys), expires_at__gt=now).values_list('key', 'value')
+            )
+            if found:
+                LLMCacheEntry.objects.filter(key__in=list(found)).update(hits=F('hits') + 1, last_used_at=now)
+        except DatabaseError as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            found = {}
+        hits = sum(1 for key in keys if key in found)
+        self._count(operation, hits, len(keys) - hits)
+        return found
+    
+    def set(self, operation: str, model: str, key: str, value: Any):
+        """Store the result of a call."""
+        self.set_many(operation, model, {key: value})
+    
+    def set_many(self, operation: str, model: str, values: Dict[str, Any]):
+        """Store results by key. Never raises: a failed write only costs a future miss."""
+        if not self.enabled or not values:
+            return
+        now = timezone.now()
+        entries = [
+            LLMCacheEntry(
+                key=key, operation=operation, model=model, value=value,
+                size_bytes=len(json.dumps(value)), last_used_at=now, expires_at=now + self.ttl,
+            )
+            for key, value in values.items()
+        ]
+        try:
+            LLMCacheEntry.objects.bulk_create(
+                entries,
+                batch_size=200,
+                update_conflicts=True,
+                unique_fields=['key'],
+                update_fields=['value', 'size_bytes', 'last_used_at', 'expires_at'],
+            )
+        except DatabaseError as e:
+            logger.warning(f"Could not store {len(entries)} LLM cache entries: {str(e)}")
+    
+    def evict(self) -> int:
+        """
+        Delete expired entries, then the least recently used ones while the cache is over its size limit.
+        
+        Returns:
+            Number of entries deleted
+        """
+        deleted, _ = LLMCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        
+        total = LLMCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+        target = int(self.max_bytes * EVICT_TO)
+        if total > self.max_bytes:
+            evicted = []
+            for entry_id, size in LLMCacheEntry.objects.order_by('last_used_at').values_list('id', 'size_bytes').iterator():
+                if total <= target:
+                    break
+                evicted.append(entry_id)
+                total -= size
+            for start in range(0, len(evicted), 1000):
+                with transaction.atomic():
+                    LLMCacheEntry.objects.filter(id__in=evicted[start:start + 1000]).delete()
+            deleted += len(evicted)
+        
+        if deleted:
+            logger.info(f"Evicted {deleted} LLM cache entries")
+        return deleted
+    
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        """Hits and misses per operation (across workers if Redis is available)."""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                metrics: Dict[str, Dict[str, int]] = {}
+                for field, count in client.hgetall(self.METRICS_KEY).items():
+                    operation, kind = field.decode().rsplit(':', 1)
+                    metrics.setdefault(operation, {'hits': 0, 'misses': 0})[kind] = int(count)
+                return metrics
+            except Exception as e:
+                logger.warning(f"Could not read LLM cache metrics from Redis: {str(e)}")
+        with self._lock:
+            return {operation: dict(counts) for operation, counts in self._local_metrics.items()}
+    
+    def reset_metrics(self):
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.delete(self.METRICS_KEY)
+            except Exception as e:
+                logger.warning(f"Could not reset LLM cache metrics in Redis: {str(e)}")
+        with self._lock:
+            self._local_metrics = {}
+    
+    def _count(self, operation: str, hits: int, misses: int):
+        client = get_redis_client()
+        if client is not None:
+            try:
+                pipeline = client.pipeline()
+                if hits:
+                    pipeline.hincrby(self.METRICS_KEY, f"{operation}:hits", hits)
+                if misses:
+                    pipeline.hincrby(self.METRICS_KEY, f"{operation}:misses", misses)
+                pipeline.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Could not count LLM cache metrics in Redis, counting locally: {str(e)}")
+        with self._lock:
+            counts = self._local_metrics.setdefault(operation, {'hits': 0, 'misses': 0})
+            counts['hits'] += hits
+            counts['misses'] += misses
+
+
+# Global cache instance
+_llm_cache = None
+
+
+def get_llm_cache() -> LLMCache:
+    """Get or create the global LLM result cache."""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMCache()
+    return _llm_cache
@@ -0,0 +1,69 @@
+"""
+Django management command to (re-)embed curated articles in batched requests
+
+Usage:
+    python manage.py backfill_embeddings          # articles whose embedding failed (zero vector)
+    python manage.py backfill_embeddings --all    # every article, e.g. after changing EMBEDDING_MODEL
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.ai_service import EMBEDDING_DIMENSIONS, get_ai_service
+from news.models import ArticleCurated
+
+
+class Command(BaseCommand):
+    help = 'Embed the detailed summaries of curated articles again, many per request'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-embed every curated article, not only those left with the zero vector',
+        )
+        parser.add_argument('--limit', type=int, help='Max articles embedded')
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            help='Articles read and embedded at a time (default: settings.EMBEDDING_BATCH_MAX_INPUTS)',
+        )
+    
+    def handle(self, *args, **options):
+        ai_service = get_ai_service()
+        page_size = options['page_size'] or ai_service.embedding_batch_inputs
+        articles = ArticleCurated.objects.all()
+        if not options['all']:
+            articles = articles.filter(embedding=[0.0] * EMBEDDING_DIMENSIONS)
+        
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        self.stdout.write(self.style.SUCCESS('BACKFILLING EMBEDDINGS'))
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        
+        start = time.perf_counter()
+        embedded = failed = 0
+        last_id = 0
+        while not options['limit'] or embedded + failed < options['limit']:
+            size = page_size if not options['limit'] else min(page_size, options['limit'] - embedded - failed)
+            page = list(articles.filter(id__gt=last_id).only('id', 'summary_detailed').order_by('id')[:size])
+            if not page:
+                break
+            last_id = page[-1].id
+            
+            vectors = ai_service.generate_embeddings_batch([article.summary_detailed for article in page])
+            updated = []
+            for article, vector in zip(page, vectors):
+                if any(vector):
+                    article.embedding = vector
+                    updated.append(article)
+            with transaction.atomic():
+                ArticleCurated.objects.bulk_update(updated, ['embedding'], batch_size=200)
+            embedded += len(updated)
+            failed += len(page) - len(updated)
+            self.stdout.write(f"  {embedded} embedded, {failed} failed")
+        
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Embedded {embedded} articles in {elapsed:.1f}s ({failed} failed)"
+        ))
@@ -0,0 +1,137 @@
+"""
+Django management command to compare feedparser with the streaming lxml feed reader
+"""
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import feedparser
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.feed_parser import FEED_CHUNK_SIZE, StreamingFeedReader, entry_key
+from news.response_archive import ResponseArchive
+
+
+class Command(BaseCommand):
+    help = 'Benchmark feedparser against the streaming lxml reader on recorded feed fixtures or archived feeds'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fixtures',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'fixtures' / 'feeds'),
+            help='Directory of feed fixtures (*.xml)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Timed runs per parser and fixture (default: 20)',
+        )
+        parser.add_argument(
+            '--archive',
+            nargs='?',
+            const='',
+            help='Use the latest archived body of each feed in the response archive '
+                 '(default: settings.RESPONSE_ARCHIVE_DIR) instead of the fixtures',
+        )
+        parser.add_argument(
+            '--archive-limit',
+            type=int,
+            default=50,
+            help='Max archived feeds to use (default: 50)',
+        )
+
+    def handle(self, *args, **options):
+        if options['archive'] is not None:
+            fixtures = self._archived_feeds(options['archive'], options['archive_limit'])
+        else:
+            paths = sorted(Path(options['fixtures']).glob('*.xml'))
+            if not paths:
+                raise CommandError(f"No *.xml fixtures found in {options['fixtures']}")
+            fixtures = [(path.name, path.read_bytes()) for path in paths]
+        iterations = max(1, options['iterations'])
+
+        self.stdout.write(self.style.SUCCESS('=' * 100))
+        self.stdout.write(self.style.SUCCESS(f'FEED PARSER BENCHMARK ({iterations} runs per parser)'))
+        self.stdout.write(self.style.SUCCESS('=' * 100))
+        self.stdout.write(
+            f"{'fixture':<26} {'size':>8} {'path':<10} {'entries':>7} "
+            f"{'feedparser':>11} {'streaming':>10} {'speedup':>8} {'peak mem fp/st':>16}  match"
+        )
+
+        total_feedparser = 0.0
+        total_streaming = 0.0
+        for name, body in fixtures:
+            chunks = [body[i:i + FEED_CHUNK_SIZE] for i in range(0, len(body), FEED_CHUNK_SIZE)]
+
+            reference = feedparser.parse(body)
+            reader = self._read(chunks)
+            entries = feedparser.parse(reader.body).entries if reader.fallback_reason else reader.entries
+            match = [entry_key(e) for e in entries] == [entry_key(e) for e in reference.entries]
+
+            feedparser_time = self._time(lambda: feedparser.parse(body), iterations)
+            streaming_time = self._time(lambda: self._parse_streaming(chunks), iterations)
+            total_feedparser += feedparser_time
+            total_streaming += streaming_time
+
+            feedparser_peak = self._peak_memory(lambda: feedparser.parse(body))
+            streaming_peak = self._peak_memory(lambda: self._parse_streaming(chunks))
+
+            self.stdout.write(
+                f"{name[:26]:<26} {len(body) // 1024:>6}KB "
+                f"{'fallback' if reader.fallback_reason else 'lxml':<10} {len(entries):>7} "
+                f"{feedparser_time * 1000:>9.1f}ms {streaming_time * 1000:>8.1f}ms "
+                f"{feedparser_time / streaming_time:>7.1f}x "
+                f"{f'{feedparser_peak // 1024}/{streaming_peak // 1024}KB':>16}  "
+                f"{'yes' if match else 'NO'}"
+            )
+            if reader.fallback_reason:
+                self.stdout.write(f"    fallback reason: {reader.fallback_reason}")
+
+        self.stdout.write(self.style.SUCCESS('=' * 100))
+        self.stdout.write(self.style.SUCCESS(
+            f"Total median parse time: feedparser {total_feedparser * 1000:.1f}ms, "
+            f"streaming {total_streaming * 1000:.1f}ms ({total_feedparser / total_streaming:.1f}x)"
+        ))
+
+    def _archived_feeds(self, archive_dir, limit):
+        """(name, body) of the latest archived fetch of up to ``limit`` feeds."""
+        if not ResponseArchive.available():
+            raise CommandError('zstandard is not installed')
+        archive = ResponseArchive(archive_dir or None)
+        entries = archive.entries(kind='feed', limit=limit)
+        if not entries:
+            raise CommandError(f"No archived feeds in {archive.root}")
+        return [(entry['url'].split('://', 1)[-1], archive.read(entry['digest'])) for entry in entries]
+
+    def _read(self, chunks):
+        reader = StreamingFeedReader()
+        reader.read(chunks)
+        return reader
+
+    def _parse_streaming(self, chunks):
+        """What FeedParser.parse_response does: stream first, feedparser for the leftovers."""
+        reader = self._read(chunks)
+        if reader.fallback_reason:
+            return feedparser.parse(reader.body)
+        return reader.result()
+
+    def _time(self, func, iterations):
+        """Median wall time of ``func`` in seconds."""
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def _peak_memory(self, func):
+        """Peak traced allocation of one ``func`` call in bytes."""
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
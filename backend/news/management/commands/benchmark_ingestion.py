@@ -0,0 +1,324 @@
+"""
+Django management command to benchmark feed and article ingestion end to end against a local fixture server
+"""
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from news.circuit_breaker import get_circuit_breaker
+from news.content_batch import BatchContentFetcher
+from news.models import ArticleRaw, FeedIngestionLog, Source
+from news.stage_timing import percentile, summarize_ingestion_logs
+from news.tasks import fetch_article_content_task, ingest_all_feeds_task, ingest_single_feed_task
+from news.utils import get_domain_from_url
+
+BENCHMARKS_DIR = Path(settings.BASE_DIR) / 'benchmarks'
+SCENARIOS = ('recorded', 'large', 'slow', 'malformed')
+MALFORMED_KINDS = ('truncated', 'garbage', 'html', 'empty')
+
+# Metrics where a higher value is better (for the baseline comparison)
+HIGHER_IS_BETTER = {'entries_per_sec', 'articles_per_sec'}
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries from every thread it is installed in."""
+    
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark ingest_all_feeds_task / ingest_single_feed_task and fetch_article_content_task '
+        'against recorded and synthesized fixtures served locally, in a throwaway test database'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            nargs='+',
+            choices=SCENARIOS,
+            default=['recorded', 'large'],
+            help='Feed sets to ingest (default: recorded large)',
+        )
+        parser.add_argument('--copies', type=int, default=5, help='Sources per feed fixture (default: 5)')
+        parser.add_argument('--entries', type=int, default=500, help='Entries per large synthetic feed (default: 500)')
+        parser.add_argument('--delay', type=float, default=0.5, help='Time to first byte of slow feeds (default: 0.5s)')
+        parser.add_argument(
+            '--mode',
+            choices=['async', 'fanout'],
+            default=settings.FEED_INGEST_MODE,
+            help='async runs ingest_all_feeds_task; fanout runs ingest_single_feed_task per source on --workers threads',
+        )
+        parser.add_argument('--workers', type=int, default=8, help='Worker threads for fanout and content fetching (default: 8)')
+        parser.add_argument('--articles', type=int, default=200, help='Articles to fetch content for, 0 to skip (default: 200)')
+        parser.add_argument(
+            '--content-mode',
+            choices=['batch', 'task'],
+            default='batch',
+            help='batch runs one BatchContentFetcher; task runs fetch_article_content_task per article on --workers threads',
+        )
+        parser.add_argument('--server', help='Base URL of an already running fixture server')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+        parser.add_argument('--output', help='Write the metrics to this JSON file')
+        parser.add_argument('--baseline', help='Compare against metrics from an earlier --output file')
+    
+    def handle(self, *args, **options):
+        self._stage_report = {}
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = json.loads(Path(options['baseline']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+        
+        server_process = None
+        server_url = options['server']
+        if not server_url:
+            server_process, server_url = self._start_server()
+        
+        old_db_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            overrides = {
+                'FEED_AUTO_CURATE': False,
+                'FEED_INGEST_MODE': options['mode'],
+                # Every fixture is served from one host; politeness limits would only measure themselves
+                'RATE_LIMIT_DELAY': 0,
+                'FEED_FETCH_PER_HOST': settings.FEED_FETCH_CONCURRENCY,
+                'HTTP_POOL_MAXSIZE': max(settings.HTTP_POOL_MAXSIZE, options['workers']),
+                'CONTENT_FETCH_PER_HOST': options['workers'],
+            }
+            with override_settings(**overrides):
+                get_circuit_breaker().record_success(get_domain_from_url(server_url))
+                Source.objects.all().delete()
+                sources = self._create_sources(server_url, options)
+                
+                metrics = {
+                    'config': {
+                        key: options[key]
+                        for key in ('scenario', 'copies', 'entries', 'delay', 'mode', 'workers', 'articles', 'content_mode')
+                    },
+                    'feeds': self._run_feeds(sources, options),
+                }
+                if options['articles']:
+                    metrics['content'] = self._run_content(options)
+        finally:
+            connection.creation.destroy_test_db(old_db_name, verbosity=0, keepdb=options['keepdb'])
+            if server_process:
+                server_process.terminate()
+                server_process.wait()
+        
+        self._report(metrics, baseline)
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(metrics, indent=2))
+            self.stdout.write(f"Metrics written to {options['output']}")
+    
+    def _start_server(self):
+        """Run benchmarks/fixture_server.py in a subprocess so it does not compete for our GIL."""
+        process = subprocess.Popen(
+            [sys.executable, str(BENCHMARKS_DIR / 'fixture_server.py'), '--port', '0'],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        line = process.stdout.readline()
+        if 'http://' not in line:
+            process.kill()
+            raise CommandError(f"Fixture server failed to start: {line or 'no output'}")
+        return process, line.rsplit(' ', 1)[-1].strip()
+    
+    def _create_sources(self, server_url, options):
+        """One Source per feed variant of the chosen scenarios."""
+        feeds = []
+        fixtures = sorted((BENCHMARKS_DIR / 'fixtures' / 'feeds').glob('*.xml'))
+        for copy in range(options['copies']):
+            if 'recorded' in options['scenario']:
+                feeds.extend(
+                    (f'recorded {path.stem} #{copy}', f'{server_url}/feeds/{copy}/{path.name}', 50)
+                    for path in fixtures
+                )
+            if 'large' in options['scenario']:
+                feeds.append((
+                    f'large #{copy}',
+                    f"{server_url}/synthetic/{copy}/large.xml?entries={options['entries']}",
+                    options['entries'],
+                ))
+            if 'slow' in options['scenario']:
+                delay = options['delay']
+                feeds.append((
+                    f'slow #{copy}',
+                    f'{server_url}/feeds/slow{copy}/news_rss2_media.xml?delay={delay}&chunk_delay={delay / 10}',
+                    50,
+                ))
+            if 'malformed' in options['scenario']:
+                feeds.extend(
+                    (f'malformed {kind} #{copy}', f'{server_url}/malformed/{copy}/{kind}.xml', 50)
+                    for kind in MALFORMED_KINDS
+                )
+        
+        return Source.objects.bulk_create([
+            Source(name=name, feed_url=feed_url, site_url=server_url, max_articles_per_fetch=max_articles)
+            for name, feed_url, max_articles in feeds
+        ])
+    
+    def _run_feeds(self, sources, options):
+        """Ingest every source once and measure it."""
+        self.stdout.write(f"Ingesting {len(sources)} feeds ({options['mode']} mode)...")
+        counter = QueryCounter()
+        
+        start = time.perf_counter()
+        if options['mode'] == 'async':
+            with connection.execute_wrapper(counter):
+                ingest_all_feeds_task()
+        else:
+            self._run_threaded(ingest_single_feed_task, [source.id for source in sources], options['workers'], counter)
+        wall = time.perf_counter() - start
+        
+        logs = list(FeedIngestionLog.objects.values(
+            'source_id', 'source__name', 'status', 'articles_found', 'execution_time_seconds',
+            'stage_timings', 'stage_queries', 'query_count', 'bytes_received',
+        ))
+        entries = sum(log['articles_found'] for log in logs)
+        latencies = [log['execution_time_seconds'] for log in logs if log['execution_time_seconds'] is not None]
+        self._stage_report = summarize_ingestion_logs(logs)['stages']
+        return {
+            'sources': len(sources),
+            'failed_sources': sum(1 for log in logs if log['status'] == 'failed'),
+            'entries': entries,
+            'articles_created': ArticleRaw.objects.count(),
+            'wall_seconds': wall,
+            'entries_per_sec': entries / wall if wall else 0,
+            'queries': counter.count,
+            'queries_per_entry': counter.count / entries if entries else 0,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+    
+    def _run_content(self, options):
+        """Fetch full content for up to --articles articles and measure it."""
+        if options['content_mode'] == 'batch':
+            return self._run_content_batch(options)
+        
+        article_ids = list(
+            ArticleRaw.objects.filter(raw_html__isnull=True, canonical_article__isnull=True)
+            .order_by('id')
+            .values_list('id', flat=True)[:options['articles']]
+        )
+        self.stdout.write(f"Fetching content for {len(article_ids)} articles...")
+        counter = QueryCounter()
+        
+        start = time.perf_counter()
+        results = self._run_threaded(fetch_article_content_task, article_ids, options['workers'], counter)
+        wall = time.perf_counter() - start
+        
+        latencies = [latency for _, latency in results]
+        return {
+            'articles': len(article_ids),
+            'succeeded': sum(1 for result, _ in results if result.get('status') == 'success'),
+            'wall_seconds': wall,
+            'articles_per_sec': len(article_ids) / wall if wall else 0,
+            'queries': counter.count,
+            'queries_per_article': counter.count / len(article_ids) if article_ids else 0,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+    
+    def _run_content_batch(self, options):
+        """Fetch full content with one BatchContentFetcher run (what fetch_missing_content_task does)."""
+        self.stdout.write(f"Fetching content for up to {options['articles']} articles in batch mode...")
+        counter = QueryCounter()
+        
+        start = time.perf_counter()
+        # Worker threads never touch the database, so wrapping this thread counts every query
+        with connection.execute_wrapper(counter):
+            stats = BatchContentFetcher(max_workers=options['workers'], limit=options['articles']).run()
+        wall = time.perf_counter() - start
+        
+        return {
+            'articles': stats['fetched'],
+            'succeeded': stats['succeeded'],
+            'wall_seconds': wall,
+            'articles_per_sec': stats['fetched'] / wall if wall else 0,
+            'queries': counter.count,
+            'queries_per_article': counter.count / stats['fetched'] if stats['fetched'] else 0,
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+    
+    def _run_threaded(self, task, ids, workers, counter):
+        """Call a task for each id on a thread pool, like that many Celery workers would."""
+        def run(task_id):
+            # Each thread has its own connection, so the wrapper is installed per call
+            start = time.perf_counter()
+            try:
+                with connection.execute_wrapper(counter):
+                    result = task(task_id)
+            finally:
+                # Celery closes the connection after each task when CONN_MAX_AGE is 0
+                connection.close()
+            return result, time.perf_counter() - start
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, ids))
+    
+    def _report(self, metrics, baseline):
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS('INGESTION BENCHMARK'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(f"Config: {json.dumps(metrics['config'])}")
+        
+        for phase in ('feeds', 'content'):
+            if phase not in metrics:
+                continue
+            self.stdout.write(self.style.SUCCESS(f"\n{phase.upper()}"))
+            header = f"  {'metric':<22} {'value':>12}"
+            if baseline and phase in baseline:
+                header += f" {'baseline':>12} {'change':>9}"
+            self.stdout.write(header)
+            
+            for name, value in metrics[phase].items():
+                line = f"  {name:<22} {_format(value):>12}"
+                previous = (baseline or {}).get(phase, {}).get(name)
+                if isinstance(previous, (int, float)) and previous:
+                    change = (value - previous) / previous * 100
+                    better = change > 0 if name in HIGHER_IS_BETTER else change < 0
+                    styled = f"{change:+8.1f}%"
+                    if abs(change) >= 5:
+                        styled = self.style.SUCCESS(styled) if better else self.style.ERROR(styled)
+                    line += f" {_format(previous):>12} {styled}"
+                self.stdout.write(line)
+        
+        if self._stage_report:
+            self.stdout.write(self.style.SUCCESS("\nFEED STAGES (per source)"))
+            self.stdout.write(f"  {'stage':<22} {'p50 s':>12} {'p95 s':>12} {'p95 queries':>12}")
+            for name, stage in self._stage_report.items():
+                self.stdout.write(
+                    f"  {name:<22} {stage['seconds']['p50']:>12.4f} {stage['seconds']['p95']:>12.4f} "
+                    f"{stage['queries']['p95']:>12}"
+                )
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _format(value):
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
@@ -0,0 +1,93 @@
+"""
+Django management command to curate articles offline through a batch service
+
+Usage:
+    python manage.py curate_batch --submit [--limit N] [--recurate]
+    python manage.py curate_batch --poll [--wait]
+    python manage.py curate_batch
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.batch_curation import BACKENDS, BatchCurator, get_batch_backend
+from news.models import CurationBatch
+
+
+class Command(BaseCommand):
+    help = (
+        'Submit uncurated (or, with --recurate, all) articles for offline curation through a batch service, '
+        'and apply finished batches; without options, list the recent batches'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--submit', action='store_true', help='Submit pending articles as new batches')
+        parser.add_argument('--limit', type=int, help='Max articles submitted')
+        parser.add_argument(
+            '--recurate',
+            action='store_true',
+            help='Also submit articles that are already curated (e.g. after a prompt change)',
+        )
+        parser.add_argument(
+            '--backend',
+            help=f"Batch service: {', '.join(BACKENDS)} or a BatchBackend class path "
+                 f"(default: settings.CURATION_BATCH_BACKEND)",
+        )
+        parser.add_argument('--batch-size', type=int, help='Max articles per batch (default: settings.CURATION_BATCH_SIZE)')
+        parser.add_argument('--poll', action='store_true', help='Apply batches that have finished')
+        parser.add_argument('--wait', action='store_true', help='With --poll, keep polling until no batch is pending')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between polls with --wait (default: 60)')
+    
+    def handle(self, *args, **options):
+        try:
+            curator = BatchCurator(
+                backend=get_batch_backend(options['backend']) if options['backend'] else None,
+                batch_size=options['batch_size'],
+            )
+        except (ImportError, TypeError) as e:
+            raise CommandError(f"Unknown batch backend: {e}")
+        
+        if options['submit']:
+            batches = curator.submit(limit=options['limit'], recurate=options['recurate'])
+            if not batches:
+                self.stdout.write(self.style.WARNING('No articles to submit'))
+            for batch in batches:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ Submitted {batch.backend} batch {batch.batch_id} ({batch.request_count} articles)"
+                ))
+        
+        if options['poll']:
+            while True:
+                stats = curator.poll()
+                self.stdout.write(
+                    f"Applied {stats['applied']} batches ({stats['articles']} articles, "
+                    f"{stats['failed']} failed requests), {stats['pending']} pending"
+                )
+                if stats['errors']:
+                    self.stdout.write(self.style.WARNING(
+                        f"{stats['errors']} finished batches could not be applied; they are retried on the next poll"
+                    ))
+                if not (options['wait'] and stats['pending']):
+                    break
+                time.sleep(options['interval'])
+        
+        if not (options['submit'] or options['poll']):
+            self._list()
+    
+    def _list(self):
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        self.stdout.write(self.style.SUCCESS('CURATION BATCHES'))
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        batches = CurationBatch.objects.all()[:20]
+        if not batches:
+            self.stdout.write('No batches submitted yet')
+        for batch in batches:
+            line = (
+                f"{batch.created_at:%Y-%m-%d %H:%M}  {batch.backend:<8} {batch.batch_id:<40} {batch.status:<10} "
+                f"{batch.applied_count}/{batch.request_count} applied"
+            )
+            if batch.recurate:
+                line += ' (re-curation)'
+            self.stdout.write(line)
+            if batch.error:
+                self.stdout.write(self.style.WARNING(f"  {batch.error}"))
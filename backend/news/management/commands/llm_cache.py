@@ -0,0 +1,68 @@
+"""
+Django management command to inspect and maintain the LLM result cache
+
+Usage:
+    python manage.py llm_cache                          # entries, size and hit rates per operation
+    python manage.py llm_cache --evict                  # drop expired and least recently used entries
+    python manage.py llm_cache --clear [--operation X]  # drop all entries (of one operation)
+    python manage.py llm_cache --reset-metrics
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from news.llm_cache import get_llm_cache
+from news.models import LLMCacheEntry
+
+
+class Command(BaseCommand):
+    help = 'Show the LLM result cache per operation, or evict and clear its entries'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true', help='Delete expired and, above LLM_CACHE_MAX_MB, least recently used entries')
+        parser.add_argument('--clear', action='store_true', help='Delete all entries')
+        parser.add_argument('--operation', help='With --clear, only delete entries of this operation (e.g. summaries)')
+        parser.add_argument('--reset-metrics', action='store_true', help='Set the hit and miss counters back to zero')
+    
+    def handle(self, *args, **options):
+        cache = get_llm_cache()
+        
+        if options['clear']:
+            entries = LLMCacheEntry.objects.all()
+            if options['operation']:
+                entries = entries.filter(operation=options['operation'])
+            deleted, _ = entries.delete()
+            self.stdout.write(self.style.SUCCESS(f"✓ Deleted {deleted} cache entries"))
+        if options['evict']:
+            self.stdout.write(self.style.SUCCESS(f"✓ Evicted {cache.evict()} cache entries"))
+        if options['reset_metrics']:
+            cache.reset_metrics()
+            self.stdout.write(self.style.SUCCESS('✓ Reset cache metrics'))
+        
+        self._stats(cache)
+    
+    def _stats(self, cache):
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        self.stdout.write(self.style.SUCCESS(f"LLM CACHE ({'enabled' if cache.enabled else 'disabled'})"))
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        
+        rows = {
+            row['operation']: row
+            for row in LLMCacheEntry.objects.values('operation').annotate(
+                entries=Count('id'), size=Sum('size_bytes')
+            )
+        }
+        metrics = cache.metrics()
+        total_size = 0
+        self.stdout.write(f"{'operation':<20} {'entries':>8} {'size':>10} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+        for operation in sorted(set(rows) | set(metrics)):
+            row = rows.get(operation, {})
+            counts = metrics.get(operation, {'hits': 0, 'misses': 0})
+            lookups = counts['hits'] + counts['misses']
+            size = row.get('size') or 0
+            total_size += size
+            rate = f"{counts['hits'] / lookups:.0%}" if lookups else '-'
+            self.stdout.write(
+                f"{operation:<20} {row.get('entries', 0):>8} {size / 1024 / 1024:>8.1f}MB "
+                f"{counts['hits']:>8} {counts['misses']:>8} {rate:>9}"
+            )
+        self.stdout.write(f"Total size: {total_size / 1024 / 1024:.1f}MB of {cache.max_bytes / 1024 / 1024:.0f}MB")
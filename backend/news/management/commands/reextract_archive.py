@@ -0,0 +1,152 @@
+"""
+Django management command to re-run extraction over the response archive, without network access
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import feedparser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+
+from news.content_extractor import ContentExtractor
+from news.feed_parser import StreamingFeedReader
+from news.models import ArticleRaw
+from news.response_archive import KINDS, ResponseArchive
+from news.stage_timing import percentile
+from news.utils import url_fingerprint
+
+
+def _extract(entry, root, keep_content):
+    """Runs in a worker process: re-extract one archived response."""
+    body = ResponseArchive(root).read(entry['digest'])
+    start = time.perf_counter()
+    if entry['kind'] == 'feed':
+        reader = StreamingFeedReader(entry['url'])
+        reader.read([body])
+        entries = feedparser.parse(reader.body).entries if reader.fallback_reason else reader.entries
+        outcome = {'success': bool(entries), 'strategy': 'feedparser' if reader.fallback_reason else 'lxml',
+                   'length': len(entries)}
+    else:
+        result = ContentExtractor().extract_html(entry['url'], body, entry['final_url'], entry['encoding'])
+        outcome = {'success': bool(result['success'] and result['content']),
+                   'strategy': result['strategy_used'] or ('paywalled' if result['is_paywalled'] else 'failed'),
+                   'length': len(result['content'])}
+        if keep_content and outcome['success']:
+            outcome.update(content=result['content'], meta=result['meta'], canonical_url=result['canonical_url'])
+    outcome['seconds'] = time.perf_counter() - start
+    return outcome
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-run content extraction (and feed parsing) over the archived responses in parallel, '
+        'without fetching anything; optionally store the new results on the matching articles'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            nargs='+',
+            choices=KINDS,
+            default=['page', 'rendered'],
+            help='Archived responses to re-extract (default: page rendered)',
+        )
+        parser.add_argument('--archive-dir', help='Archive directory (default: settings.RESPONSE_ARCHIVE_DIR)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: CPU count)')
+        parser.add_argument('--limit', type=int, help='Max responses per kind')
+        parser.add_argument('--since-hours', type=float, help='Only responses fetched in the last N hours')
+        parser.add_argument(
+            '--all-fetches',
+            action='store_true',
+            help='Re-extract every archived fetch, not only the latest one per URL',
+        )
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Store changed content and extraction results on the matching articles',
+        )
+    
+    def handle(self, *args, **options):
+        if not ResponseArchive.available():
+            raise CommandError('zstandard is not installed')
+        archive = ResponseArchive(options['archive_dir'])
+        since = time.time() - options['since_hours'] * 3600 if options['since_hours'] else None
+        
+        stats = archive.stats()
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        self.stdout.write(self.style.SUCCESS(f'RE-EXTRACTING ARCHIVE {archive.root}'))
+        self.stdout.write(self.style.SUCCESS('=' * 70))
+        self.stdout.write(
+            f"{stats['fetches']} fetches, {stats['blobs']} distinct bodies, "
+            f"{stats['bytes'] / 2 ** 20:.1f}MB ({stats['compressed_bytes'] / 2 ** 20:.1f}MB compressed)"
+        )
+        
+        # Workers are forked; they must not share this process's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            for kind in options['kind']:
+                entries = archive.entries(
+                    kind=kind, since=since, latest_only=not options['all_fetches'], limit=options['limit']
+                )
+                if not entries:
+                    self.stdout.write(f"\n{kind}: nothing archived")
+                    continue
+                
+                start = time.perf_counter()
+                work = partial(_extract, root=str(archive.root), keep_content=options['update'] and kind != 'feed')
+                outcomes = list(executor.map(work, entries, chunksize=16))
+                self._report(kind, outcomes, time.perf_counter() - start)
+                if options['update'] and kind != 'feed':
+                    updated = self._update_articles(entries, outcomes)
+                    self.stdout.write(f"  articles updated              {updated}")
+    
+    def _report(self, kind, outcomes, wall_seconds):
+        seconds = [outcome['seconds'] for outcome in outcomes]
+        succeeded = sum(outcome['success'] for outcome in outcomes)
+        strategies = {}
+        for outcome in outcomes:
+            strategies[outcome['strategy']] = strategies.get(outcome['strategy'], 0) + 1
+        
+        self.stdout.write(f"\n{kind.upper()}")
+        self.stdout.write(f"  responses                     {len(outcomes)}")
+        self.stdout.write(f"  succeeded                     {succeeded}")
+        self.stdout.write(f"  by strategy                   {', '.join(f'{k}={v}' for k, v in sorted(strategies.items()))}")
+        self.stdout.write(f"  wall_seconds                  {wall_seconds:.2f}")
+        self.stdout.write(f"  per_sec                       {len(outcomes) / wall_seconds:.1f}")
+        self.stdout.write(f"  cpu_ms_p50                    {percentile(seconds, 50) * 1000:.2f}")
+        self.stdout.write(f"  cpu_ms_p95                    {percentile(seconds, 95) * 1000:.2f}")
+        unit = 'entries' if kind == 'feed' else 'chars'
+        lengths = [outcome['length'] for outcome in outcomes if outcome['success']]
+        if lengths:
+            self.stdout.write(f"  avg_{unit:<26}{sum(lengths) / len(lengths):.0f}")
+    
+    def _update_articles(self, entries, outcomes):
+        """Store re-extracted content on articles matched by URL (as fetched, or as declared canonical)."""
+        found = {}
+        for entry, outcome in zip(entries, outcomes):
+            if not outcome['success']:
+                continue
+            found[entry['url_key']] = outcome
+            if outcome.get('canonical_url'):
+                found.setdefault(url_fingerprint(outcome['canonical_url']), outcome)
+        
+        updated = []
+        keys = list(found)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            for article in ArticleRaw.objects.filter(Q(url_hash__in=chunk) | Q(canonical_url_hash__in=chunk)).only(
+                'id', 'url_hash', 'canonical_url_hash', 'raw_html', 'extraction_meta'
+            ):
+                outcome = found.get(article.url_hash) or found[article.canonical_url_hash]
+                if article.raw_html == outcome['content'] and article.extraction_meta == outcome['meta']:
+                    continue
+                article.raw_html = outcome['content']
+                article.extraction_meta = outcome['meta']
+                updated.append(article)
+        
+        with transaction.atomic():
+            ArticleRaw.objects.bulk_update(updated, ['raw_html', 'extraction_meta'], batch_size=200)
+        return len(updated)
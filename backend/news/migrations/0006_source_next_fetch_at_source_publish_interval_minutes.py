@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_source_content_hash_source_etag_source_last_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='next_fetch_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='publish_interval_minutes',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_source_next_fetch_at_source_publish_interval_minutes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='high_water_mark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='recent_entry_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
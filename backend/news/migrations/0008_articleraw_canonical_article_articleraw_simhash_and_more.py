@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_source_high_water_mark_source_recent_entry_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articleraw',
+            name='canonical_article',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='news.articleraw'),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='simhash_band_0',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='simhash_band_1',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='simhash_band_2',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='simhash_band_3',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:23
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import tldextract
+from django.db import migrations, models
+
+# Frozen copy of news.utils.url_fingerprint as of this migration, so the
+# backfill does not change when the canonicalization rules do
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'ocid', 'cmp', 'cmpid',
+    'ncid', 'ref_src', 'ref_url', 'referrer', 'smid', 'smtyp', 'sr_share', 'taid',
+    'guccounter', 'outputtype', '__twitter_impression',
+}
+TRACKING_PARAM_PREFIXES = ('utm_', 'mc_', 'pk_', 'hmb_', 'at_', '_hs', 'ga_', 'itm_', 'int_')
+CANONICAL_URL_RULES = {
+    'youtube.com': {'keep_params': {'v', 'list'}},
+    'news.ycombinator.com': {'keep_params': {'id'}},
+    'reddit.com': {'keep_params': set()},
+    'nytimes.com': {'keep_params': set()},
+    'washingtonpost.com': {'keep_params': set()},
+    'medium.com': {'keep_params': set()},
+    'bloomberg.com': {'strip_params': {'srnd', 'sref', 'leadsource'}},
+    'cnn.com': {'strip_params': {'iid', 'hpt'}},
+}
+AMP_CACHE_HOST = 'cdn.ampproject.org'
+
+_extract_domain = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+
+def _domain_rule(host):
+    parts = host.split('.')
+    for i in range(len(parts) - 1):
+        rule = CANONICAL_URL_RULES.get('.'.join(parts[i:]))
+        if rule is not None:
+            return rule
+    return {}
+
+
+def _is_tracking_param(name, rule):
+    lowered = name.lower()
+    return (
+        lowered in TRACKING_PARAMS
+        or lowered.startswith(TRACKING_PARAM_PREFIXES)
+        or lowered in rule.get('strip_params', ())
+    )
+
+
+def _canonicalize_url(url):
+    try:
+        parsed = urlsplit(url.strip())
+        host = (parsed.hostname or '').lower().rstrip('.')
+        port = parsed.port
+    except ValueError:
+        return url
+    if not parsed.scheme or not host:
+        return url
+    
+    scheme = parsed.scheme.lower()
+    path = parsed.path or '/'
+    if host.endswith(AMP_CACHE_HOST):
+        match = re.match(r'^/[a-z]/(s/)?([^/]+)(/.*)?$', path)
+        if match:
+            scheme = 'https' if match.group(1) else 'http'
+            host = match.group(2).lower()
+            path = match.group(3) or '/'
+            port = None
+    
+    if host.startswith('amp.') and _extract_domain(host[len('amp.'):]).domain:
+        host = host[len('amp.'):]
+    path = re.sub(r'/amp/?$', '/', path)
+    path = re.sub(r'\.amp(\.html?)$', r'\1', path)
+    path = re.sub(r'/{2,}', '/', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+    
+    rule = _domain_rule(host)
+    keep = rule.get('keep_params')
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if (name in keep if keep is not None else not _is_tracking_param(name, rule))
+    )
+    
+    netloc = host
+    if port and not (scheme == 'http' and port == 80) and not (scheme == 'https' and port == 443):
+        netloc = f"{host}:{port}"
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def url_fingerprint(url):
+    key = _canonicalize_url(url).split('://', 1)[-1]
+    if key.startswith('www.'):
+        key = key[len('www.'):]
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def backfill_url_hash(apps, schema_editor):
+    """
+    Hash existing article URLs.
+    
+    Rows whose canonical URL collides with an older row are variants of the
+    same article (tracking parameters, AMP, http/https); they are linked to the
+    older row as duplicates and keyed by a hash of their exact URL instead.
+    """
+    ArticleRaw = apps.get_model('news', 'ArticleRaw')
+    seen = {}
+    batch = []
+    
+    for article in ArticleRaw.objects.order_by('id').only('id', 'url', 'canonical_article_id').iterator(chunk_size=2000):
+        url_hash = url_fingerprint(article.url)
+        if url_hash in seen:
+            if article.canonical_article_id is None:
+                article.canonical_article_id = seen[url_hash]
+            url_hash = hashlib.sha256(article.url.encode('utf-8')).hexdigest()
+        else:
+            seen[url_hash] = article.id
+        article.url_hash = url_hash
+        batch.append(article)
+        
+        if len(batch) >= 2000:
+            ArticleRaw.objects.bulk_update(batch, ['url_hash', 'canonical_article'])
+            batch = []
+    
+    if batch:
+        ArticleRaw.objects.bulk_update(batch, ['url_hash', 'canonical_article'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_articleraw_canonical_article_articleraw_simhash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articleraw',
+            name='url_hash',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_url_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_articleraw_url_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='articleraw',
+            name='url_hash',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+        migrations.RemoveIndex(
+            model_name='articleraw',
+            name='news_articl_url_bb45b0_idx',
+        ),
+        migrations.AlterField(
+            model_name='articleraw',
+            name='url',
+            field=models.URLField(),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='canonical_url',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='canonical_url_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_alter_articleraw_url_hash_alter_articleraw_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedingestionlog',
+            name='bytes_received',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feedingestionlog',
+            name='query_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feedingestionlog',
+            name='stage_queries',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='feedingestionlog',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_feedingestionlog_bytes_received_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebSubSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_url', models.URLField(max_length=500)),
+                ('topic_url', models.URLField(max_length=500)),
+                ('secret', models.CharField(editable=False, max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending verification'), ('active', 'Active'), ('unsubscribing', 'Unsubscribing'), ('unsubscribed', 'Unsubscribed'), ('denied', 'Denied'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('lease_seconds', models.IntegerField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('requested_at', models.DateTimeField(blank=True, null=True)),
+                ('verified_at', models.DateTimeField(blank=True, null=True)),
+                ('last_push_at', models.DateTimeField(blank=True, null=True)),
+                ('push_count', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='websub', to='news.source')),
+            ],
+            options={
+                'ordering': ['expires_at'],
+            },
+        ),
+    ]
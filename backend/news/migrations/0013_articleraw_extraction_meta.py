@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_websubsubscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articleraw',
+            name='extraction_meta',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
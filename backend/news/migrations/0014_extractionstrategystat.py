@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0013_articleraw_extraction_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionStrategyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain', models.CharField(max_length=255)),
+                ('strategy', models.CharField(choices=[('requests', 'Requests + lxml'), ('newspaper3k', 'Newspaper3k'), ('playwright', 'Playwright')], max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('successes', models.IntegerField(default=0)),
+                ('total_content_length', models.BigIntegerField(default=0)),
+                ('total_latency_seconds', models.FloatField(default=0)),
+                ('last_success_at', models.DateTimeField(blank=True, null=True)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['domain', 'strategy'],
+                'unique_together': {('domain', 'strategy')},
+            },
+        ),
+    ]
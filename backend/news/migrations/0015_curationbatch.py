@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0014_extractionstrategystat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backend', models.CharField(max_length=100)),
+                ('batch_id', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('completed', 'Completed'), ('applied', 'Applied'), ('failed', 'Failed'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], db_index=True, default='submitted', max_length=20)),
+                ('article_ids', models.JSONField(default=list)),
+                ('recurate', models.BooleanField(default=False)),
+                ('request_count', models.IntegerField(default=0)),
+                ('applied_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'curation batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
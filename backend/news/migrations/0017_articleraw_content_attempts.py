@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0016_llmcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articleraw',
+            name='content_attempted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='articleraw',
+            name='content_attempts',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from pgvector.django import VectorField
 
+from .utils import url_fingerprint
+
 
 class Source(models.Model):
     """RSS/Atom feed source for news articles."""
@@ -13,11 +15,22 @@ class Source(models.Model):
     last_fetched_at = models.DateTimeField(blank=True, null=True)
     last_error = models.TextField(blank=True, null=True)
     error_count = models.IntegerField(default=0)
-    fetch_interval_minutes = models.IntegerField(default=10080)  # Weekly (7*24*60)
+    fetch_interval_minutes = models.IntegerField(default=10080)  # Max between fetches: weekly (7*24*60)
+    next_fetch_at = models.DateTimeField(blank=True, null=True, db_index=True)  # Set by the adaptive scheduler
+    publish_interval_minutes = models.FloatField(blank=True, null=True)  # Learned average gap between posts
     max_articles_per_fetch = models.IntegerField(default=50)
     requires_javascript = models.BooleanField(default=False)
     custom_headers = models.JSONField(default=dict, blank=True)
     
+    # HTTP validators from the last successful fetch (conditional GET)
+    etag = models.CharField(max_length=255, blank=True, null=True)
+    last_modified = models.CharField(max_length=255, blank=True, null=True)
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
+    
+    # High-water mark: newest ingested entry and recently seen entry ids/links
+    high_water_mark = models.DateTimeField(blank=True, null=True)
+    recent_entry_ids = models.JSONField(default=list, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -32,11 +45,34 @@ class ArticleRaw(models.Model):
     """Raw article data from RSS feed."""
     source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name='articles')
     title = models.CharField(max_length=500)
-    url = models.URLField(unique=True)
+    url = models.URLField()
+    # SHA-256 of the canonical URL (see utils.url_fingerprint); all URL lookups go through this
+    url_hash = models.CharField(max_length=64, unique=True, editable=False)
+    # URL the fetched page declares as canonical, when it differs from the feed link. url and
+    # url_hash keep the feed link so later polls of the feed still find this row
+    canonical_url = models.URLField(blank=True, null=True)
+    canonical_url_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True, editable=False)
     published_at = models.DateTimeField()
     summary_feed = models.TextField()
     raw_html = models.TextField(blank=True, null=True)
+    # Results of the single page parse (see news.html_extraction.stored_meta): images, paywall signals, ...
+    extraction_meta = models.JSONField(default=dict, blank=True)
+    # Failed content fetches; the batch fetcher backs off and eventually gives up on the article
+    content_attempts = models.IntegerField(default=0)
+    content_attempted_at = models.DateTimeField(blank=True, null=True)
     media_assets = models.ManyToManyField('MediaAsset', blank=True, related_name='articles')
+    
+    # Near-duplicate detection: SimHash of title + summary and its four 16-bit bands
+    simhash = models.BigIntegerField(blank=True, null=True)
+    simhash_band_0 = models.IntegerField(blank=True, null=True, db_index=True)
+    simhash_band_1 = models.IntegerField(blank=True, null=True, db_index=True)
+    simhash_band_2 = models.IntegerField(blank=True, null=True, db_index=True)
+    simhash_band_3 = models.IntegerField(blank=True, null=True, db_index=True)
+    # Set on near-duplicates of an earlier article; these are not curated separately
+    canonical_article = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, blank=True, null=True, related_name='duplicates'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -46,8 +82,24 @@ class ArticleRaw(models.Model):
         ordering = ['-published_at']
         indexes = [
             models.Index(fields=['-published_at']),
-            models.Index(fields=['url']),
         ]
+    
+    # URL as loaded from the database (None if it was deferred)
+    _loaded_url = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_url = instance.__dict__.get('url')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Only new rows and changed URLs are hashed again: variants keyed by
+        # their exact URL (see migration 0009) must keep that hash
+        if self._state.adding or self.__dict__.get('url', self._loaded_url) != self._loaded_url:
+            self.url_hash = url_fingerprint(self.url)
+        super().save(*args, **kwargs)
+        self._loaded_url = self.__dict__.get('url', self._loaded_url)
 
 
 class MediaAsset(models.Model):
@@ -150,6 +202,12 @@ class FeedIngestionLog(models.Model):
     articles_updated = models.IntegerField(default=0)
     error_message = models.TextField(blank=True, null=True)
     execution_time_seconds = models.FloatField(blank=True, null=True)
+    
+    # Per-stage breakdown (see news.stage_timing): seconds and queries by stage name
+    stage_timings = models.JSONField(default=dict, blank=True)
+    stage_queries = models.JSONField(default=dict, blank=True)
+    query_count = models.IntegerField(default=0)
+    bytes_received = models.BigIntegerField(default=0)
 
     def __str__(self):
         return f"{self.source.name} - {self.status} - {self.started_at}"
@@ -163,6 +221,124 @@ class FeedIngestionLog(models.Model):
         ]
 
 
+class WebSubSubscription(models.Model):
+    """WebSub (PubSubHubbub) subscription of a source's feed at its hub."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending verification'),
+        ('active', 'Active'),
+        ('unsubscribing', 'Unsubscribing'),
+        ('unsubscribed', 'Unsubscribed'),
+        ('denied', 'Denied'),
+        ('failed', 'Failed'),
+    ]
+    
+    source = models.OneToOneField(Source, on_delete=models.CASCADE, related_name='websub')
+    hub_url = models.URLField(max_length=500)
+    topic_url = models.URLField(max_length=500)
+    # HMAC key the hub signs pushed content with
+    secret = models.CharField(max_length=64, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    lease_seconds = models.IntegerField(blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    requested_at = models.DateTimeField(blank=True, null=True)
+    verified_at = models.DateTimeField(blank=True, null=True)
+    last_push_at = models.DateTimeField(blank=True, null=True)
+    push_count = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source.name} @ {self.hub_url} ({self.status})"
+
+    class Meta:
+        ordering = ['expires_at']
+
+
+class ExtractionStrategyStat(models.Model):
+    """How well a content extraction strategy has worked for a domain (see news.strategy_memory)."""
+    STRATEGY_CHOICES = [
+        ('requests', 'Requests + lxml'),
+        ('newspaper3k', 'Newspaper3k'),
+        ('playwright', 'Playwright'),
+    ]
+
+    domain = models.CharField(max_length=255)
+    strategy = models.CharField(max_length=20, choices=STRATEGY_CHOICES)
+    attempts = models.IntegerField(default=0)
+    successes = models.IntegerField(default=0)
+    total_content_length = models.BigIntegerField(default=0)
+    total_latency_seconds = models.FloatField(default=0)
+    last_success_at = models.DateTimeField(blank=True, null=True)
+    last_failure_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.domain} / {self.strategy}: {self.successes}/{self.attempts}"
+
+    class Meta:
+        ordering = ['domain', 'strategy']
+        unique_together = [('domain', 'strategy')]
+
+
+class CurationBatch(models.Model):
+    """Articles curated offline through a batch service (see news.batch_curation)."""
+    STATUS_CHOICES = [
+        ('submitted', 'Submitted'),
+        ('completed', 'Completed'),
+        ('applied', 'Applied'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    backend = models.CharField(max_length=100)
+    # The batch service's id for the batch
+    batch_id = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted', db_index=True)
+    article_ids = models.JSONField(default=list)
+    # Also rewrites articles that are already curated
+    recurate = models.BooleanField(default=False)
+    request_count = models.IntegerField(default=0)
+    applied_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    applied_at = models.DateTimeField(blank=True, null=True)
+    
+    def __str__(self):
+        return f"{self.backend} batch {self.batch_id} ({self.status})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'curation batches'
+
+
+class LLMCacheEntry(models.Model):
+    """Cached result of an LLM call (see news.llm_cache)."""
+    # SHA-256 of operation, model, prompt version and normalized input
+    key = models.CharField(max_length=64, unique=True)
+    operation = models.CharField(max_length=50, db_index=True)
+    model = models.CharField(max_length=100)
+    value = models.JSONField()
+    size_bytes = models.IntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.operation} ({self.model}): {self.key[:12]}"
+    
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name_plural = 'LLM cache entries'
+
+
 class AudioSegment(models.Model):
     """Daily AI-generated audio news segment."""
     date = models.DateField(unique=True, db_index=True)
@@ -0,0 +1,175 @@
+"""
+Cross-source near-duplicate detection for ingested articles.
+
+Each article gets a 64-bit SimHash of the word shingles in its title and
+feed summary. The hash is stored with its four 16-bit bands; two hashes
+within SIMHASH_MAX_DISTANCE (at most 3) bits of each other always share at
+least one band, so candidates are found with indexed equality lookups and
+then compared on the full hash.
+"""
+import hashlib
+import logging
+import re
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import ArticleRaw
+
+logger = logging.getLogger(__name__)
+
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Words per shingle
+SHINGLE_SIZE = 3
+# Texts shorter than this many words are too short to fingerprint reliably
+MIN_WORDS = 8
+
+TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'\w+')
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash of a text's word shingles.
+    
+    Returns:
+        Unsigned hash, or None if the text is too short
+    """
+    words = WORD_RE.findall(TAG_RE.sub(' ', text).lower())
+    if len(words) < MIN_WORDS:
+        return None
+    
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count('1')
+
+
+def to_signed(value: int) -> int:
+    """Store an unsigned 64-bit hash in a signed BigIntegerField."""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def bands(value: int) -> List[int]:
+    """Split a hash into its 16-bit bands."""
+    value &= (1 << SIMHASH_BITS) - 1
+    return [(value >> (BAND_BITS * i)) & BAND_MASK for i in range(SIMHASH_BANDS)]
+
+
+class NearDuplicateIndex:
+    """Fingerprint new articles and link them to an earlier near-identical article."""
+    
+    def __init__(self, max_distance: Optional[int] = None, window_days: Optional[int] = None):
+        """
+        Args:
+            max_distance: Max differing bits for a duplicate (defaults to settings.SIMHASH_MAX_DISTANCE, at most 3)
+            window_days: How far apart in publish time duplicates may be (defaults to settings.DUPLICATE_WINDOW_DAYS)
+        """
+        max_distance = settings.SIMHASH_MAX_DISTANCE if max_distance is None else max_distance
+        # The band lookup only guarantees recall up to one differing bit per band
+        self.max_distance = min(max_distance, SIMHASH_BANDS - 1)
+        self.window = timedelta(days=window_days or settings.DUPLICATE_WINDOW_DAYS)
+    
+    def fingerprint(self, article: ArticleRaw) -> Optional[int]:
+        """Set the simhash and band fields of an (unsaved) article; returns the hash."""
+        value = simhash(f"{article.title} {article.summary_feed}")
+        if value is None:
+            return None
+        
+        article.simhash = to_signed(value)
+        for i, band in enumerate(bands(value)):
+            setattr(article, f'simhash_band_{i}', band)
+        return value
+    
+    def link_duplicates(self, articles: Iterable[ArticleRaw]) -> int:
+        """
+        Fingerprint new articles and point near-duplicates at their canonical article.
+        
+        Candidates are earlier articles sharing a band and published within
+        the window; a duplicate of a duplicate is linked to the original.
+        Uses one query for the whole batch.
+        
+        Returns:
+            Number of articles marked as duplicates
+        """
+        fingerprinted = []
+        for article in articles:
+            value = self.fingerprint(article)
+            if value is not None:
+                fingerprinted.append((article, value))
+        if not fingerprinted:
+            return 0
+        
+        band_filter = Q()
+        band_values = [set() for _ in range(SIMHASH_BANDS)]
+        for _, value in fingerprinted:
+            for i, band in enumerate(bands(value)):
+                band_values[i].add(band)
+        for i, values in enumerate(band_values):
+            band_filter |= Q(**{f'simhash_band_{i}__in': values})
+        
+        published = [article.published_at for article, _ in fingerprinted if article.published_at]
+        candidates_qs = ArticleRaw.objects.filter(band_filter)
+        if published:
+            candidates_qs = candidates_qs.filter(
+                published_at__gte=min(published) - self.window,
+                published_at__lte=max(published) + self.window,
+            )
+        
+        # Candidates by (band index, band value)
+        candidates: Dict[tuple, List[dict]] = {}
+        for candidate in candidates_qs.values('id', 'url_hash', 'simhash', 'canonical_article_id', 'published_at').order_by('id'):
+            for i, band in enumerate(bands(candidate['simhash'])):
+                candidates.setdefault((i, band), []).append(candidate)
+        
+        linked = 0
+        for article, value in fingerprinted:
+            match = self._closest(article, value, candidates)
+            if match is None:
+                continue
+            article.canonical_article_id = match['canonical_article_id'] or match['id']
+            linked += 1
+            logger.info(f"Near-duplicate: '{article.title[:60]}' -> article {article.canonical_article_id}")
+        return linked
+    
+    def _closest(self, article: ArticleRaw, value: int, candidates: Dict[tuple, List[dict]]) -> Optional[dict]:
+        best = None
+        best_distance = self.max_distance + 1
+        for i, band in enumerate(bands(value)):
+            for candidate in candidates.get((i, band), ()):
+                if candidate['url_hash'] == article.url_hash:
+                    continue
+                if article.published_at and abs(candidate['published_at'] - article.published_at) > self.window:
+                    continue
+                distance = hamming_distance(value, candidate['simhash'])
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best
+
+
+# Global index instance
+_duplicate_index = None
+
+
+def get_duplicate_index() -> NearDuplicateIndex:
+    """Get or create the global near-duplicate index."""
+    global _duplicate_index
+    if _duplicate_index is None:
+        _duplicate_index = NearDuplicateIndex()
+    return _duplicate_index
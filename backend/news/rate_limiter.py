@@ -0,0 +1,144 @@
+"""
+Shared per-domain rate limiting for outbound fetches.
+
+Uses the generic cell rate algorithm (a token bucket expressed as a single
+"theoretical arrival time" per domain), stored in Redis so every Celery
+worker and node shares the same budget, with an in-memory fallback when
+Redis is unavailable.
+
+Reserving a slot never sleeps: it returns the time at which the caller may
+send its request, so callers can reschedule a task, ``await`` or, as a last
+resort, block.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from .utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# Atomically reserve the next slot for KEYS[1] using Redis server time, so
+# clock skew between worker nodes does not matter. Returns the delay in
+# seconds (as a string, since Lua numbers are truncated to integers).
+GCRA_RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < now then tat = now end
+local allowed_at = tat - (burst - 1) * interval
+if allowed_at < now then allowed_at = now end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+return tostring(allowed_at - now)
+"""
+
+
+class DomainRateLimiter:
+    """Token-bucket rate limiter keyed by domain, shared across workers."""
+    
+    KEY_PREFIX = 'genienews:ratelimit:'
+    
+    def __init__(self, interval: Optional[float] = None, burst: Optional[int] = None):
+        """
+        Args:
+            interval: Seconds between requests to one domain (defaults to settings.RATE_LIMIT_DELAY)
+            burst: Requests allowed back-to-back before spacing applies (defaults to settings.RATE_LIMIT_BURST)
+        """
+        self._interval = interval
+        self._burst = burst
+        self._lock = threading.Lock()
+        self._local_tat: Dict[str, float] = {}
+        self._script = None
+    
+    @property
+    def interval(self) -> float:
+        if self._interval is not None:
+            return self._interval
+        from django.conf import settings
+        return float(settings.RATE_LIMIT_DELAY)
+    
+    @property
+    def burst(self) -> int:
+        if self._burst is not None:
+            return self._burst
+        from django.conf import settings
+        return int(settings.RATE_LIMIT_BURST)
+    
+    def reserve(self, domain: str) -> float:
+        """
+        Reserve the next request slot for a domain.
+        
+        The slot is consumed immediately; the caller must not send its
+        request before the returned time.
+        
+        Returns:
+            Unix timestamp at which the request is allowed (<= now if immediately)
+        """
+        interval = self.interval
+        if not domain or interval <= 0:
+            return time.time()
+        
+        delay = self._reserve_redis(domain, interval)
+        if delay is None:
+            delay = self._reserve_local(domain, interval)
+        
+        if delay > 0:
+            logger.debug(f"Rate limiting: next slot for {domain} in {delay:.2f}s")
+        return time.time() + delay
+    
+    def wait(self, domain: str) -> float:
+        """Reserve a slot and block the current thread until it arrives. Returns seconds waited."""
+        delay = max(0.0, self.reserve(domain) - time.time())
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+    
+    async def wait_async(self, domain: str) -> float:
+        """Reserve a slot and ``await`` until it arrives. Returns seconds waited."""
+        # The reservation is a blocking Redis call; keep it off the event loop
+        delay = max(0.0, await asyncio.to_thread(self.reserve, domain) - time.time())
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+    
+    def _reserve_redis(self, domain: str, interval: float) -> Optional[float]:
+        """Reserve a slot in Redis; returns the delay, or None if Redis is unavailable."""
+        client = get_redis_client()
+        if client is None:
+            return None
+        
+        try:
+            if self._script is None:
+                self._script = client.register_script(GCRA_RESERVE_SCRIPT)
+            delay = self._script(keys=[self.KEY_PREFIX + domain], args=[interval, self.burst])
+            return float(delay)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter failed for {domain}, using in-memory fallback: {str(e)}")
+            return None
+    
+    def _reserve_local(self, domain: str, interval: float) -> float:
+        """Reserve a slot in process-local state; returns the delay."""
+        with self._lock:
+            now = time.time()
+            tat = max(self._local_tat.get(domain, 0.0), now)
+            allowed_at = max(tat - (self.burst - 1) * interval, now)
+            self._local_tat[domain] = tat + interval
+            return allowed_at - now
+
+
+# Global limiter instance
+_rate_limiter = None
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Get or create the global per-domain rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = DomainRateLimiter()
+    return _rate_limiter
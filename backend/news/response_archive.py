@@ -0,0 +1,268 @@
+"""
+Content-addressed on-disk archive of fetched article pages and feed bodies.
+
+Every body is stored once, zstd-compressed, under its SHA-256 digest
+(``blobs/ab/abcdef....zst``), so a page or feed fetched again unchanged
+costs one index row, not another copy. A per-node SQLite index records each
+fetch: kind ('page', 'rendered' or 'feed'), canonical URL, fetch time,
+status, content type and charset. When the blobs outgrow
+RESPONSE_ARCHIVE_MAX_MB the least recently fetched ones are evicted along
+with their index rows.
+
+Archived pages can be re-extracted without any network access (see the
+``reextract_archive`` command), and archived feeds serve as realistic
+inputs for ``benchmark_feed_parsers --archive``.
+
+zstandard is optional: without it the archive stays disabled.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .utils import canonicalize_url, url_fingerprint
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('page', 'rendered', 'feed')
+# Evict down to this share of the size limit, so eviction does not run on every store
+EVICT_TO = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    compressed_size INTEGER NOT NULL,
+    last_fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_last_fetched ON blobs (last_fetched_at);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    url_key TEXT NOT NULL,
+    final_url TEXT NOT NULL DEFAULT '',
+    fetched_at REAL NOT NULL,
+    digest TEXT NOT NULL,
+    status INTEGER,
+    content_type TEXT NOT NULL DEFAULT '',
+    encoding TEXT
+);
+CREATE INDEX IF NOT EXISTS fetches_url ON fetches (kind, url_key, fetched_at);
+CREATE INDEX IF NOT EXISTS fetches_digest ON fetches (digest);
+"""
+
+ENTRY_FIELDS = ('id', 'kind', 'url', 'url_key', 'final_url', 'fetched_at', 'digest', 'status', 'content_type', 'encoding')
+
+
+class ResponseArchive:
+    """Compressed response bodies keyed by content digest, indexed by canonical URL and fetch time."""
+    
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None, level: int = 3):
+        """
+        Args:
+            root: Archive directory (defaults to settings.RESPONSE_ARCHIVE_DIR)
+            max_bytes: Compressed size above which old blobs are evicted (defaults to settings.RESPONSE_ARCHIVE_MAX_MB)
+            level: zstd compression level
+        """
+        self.root = Path(root or settings.RESPONSE_ARCHIVE_DIR)
+        self.max_bytes = max_bytes or settings.RESPONSE_ARCHIVE_MAX_MB * 1024 * 1024
+        self.level = level
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Bytes stored since the total size was last checked
+        self._unchecked_bytes = None
+    
+    @staticmethod
+    def available() -> bool:
+        """Whether zstandard is installed."""
+        return zstandard is not None
+    
+    def store(self, kind: str, url: str, body: bytes, final_url: str = '', status: Optional[int] = None,
+              content_type: str = '', encoding: Optional[str] = None) -> Optional[str]:
+        """
+        Archive one fetched body.
+        
+        Never raises: archiving must not fail a fetch, so errors are logged.
+        
+        Returns:
+            The body's digest, or None if it was not archived
+        """
+        if not body:
+            return None
+        try:
+            digest = hashlib.sha256(body).hexdigest()
+            path = self.blob_path(digest)
+            compressed_size = path.stat().st_size if path.exists() else self._write_blob(path, body)
+            now = time.time()
+            db = self._db()
+            with db:
+                db.execute(
+                    'INSERT INTO blobs (digest, size, compressed_size, last_fetched_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(digest) DO UPDATE SET last_fetched_at = excluded.last_fetched_at',
+                    (digest, len(body), compressed_size, now),
+                )
+                db.execute(
+                    'INSERT INTO fetches (kind, url, url_key, final_url, fetched_at, digest, status, content_type, encoding) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (kind, canonicalize_url(url), url_fingerprint(url), final_url or '', now, digest, status,
+                     content_type or '', encoding),
+                )
+            self._maybe_evict(compressed_size)
+            return digest
+        except (OSError, sqlite3.Error, zstandard.ZstdError) as e:
+            logger.warning(f"Could not archive {kind} {url}: {str(e)}")
+            return None
+    
+    def read(self, digest: str) -> bytes:
+        """Decompressed body for a digest. Only reads the blob file, so it is safe in any process."""
+        with open(self.blob_path(digest), 'rb') as f:
+            return zstandard.ZstdDecompressor().decompress(f.read())
+    
+    def entries(self, kind: Optional[str] = None, since: Optional[float] = None,
+                latest_only: bool = True, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Index rows, oldest fetch first.
+        
+        Args:
+            kind: Only this kind of response
+            since: Only fetches at or after this Unix time
+            latest_only: Only the most recent fetch of each URL (per kind)
+            limit: Max rows
+        """
+        conditions, params = [], []
+        if kind:
+            conditions.append('kind = ?')
+            params.append(kind)
+        if since:
+            conditions.append('fetched_at >= ?')
+            params.append(since)
+        if latest_only:
+            conditions.append('id IN (SELECT MAX(id) FROM fetches GROUP BY kind, url_key)')
+        query = f"SELECT {', '.join(ENTRY_FIELDS)} FROM fetches"
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY id'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        return [dict(zip(ENTRY_FIELDS, row)) for row in self._db().execute(query, params)]
+    
+    def stats(self) -> Dict:
+        """Number of fetches, blobs, and raw and compressed bytes."""
+        db = self._db()
+        fetches = db.execute('SELECT COUNT(*) FROM fetches').fetchone()[0]
+        blobs, size, compressed = db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(compressed_size), 0) FROM blobs'
+        ).fetchone()
+        return {'fetches': fetches, 'blobs': blobs, 'bytes': size, 'compressed_bytes': compressed}
+    
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """
+        Remove the least recently fetched blobs (and their fetches) until the archive fits.
+        
+        Returns:
+            Number of blobs removed
+        """
+        target = int(self.max_bytes * EVICT_TO) if target_bytes is None else target_bytes
+        db = self._db()
+        with db:
+            # Take the write lock up front: other processes may be storing
+            db.execute('BEGIN IMMEDIATE')
+            total = db.execute('SELECT COALESCE(SUM(compressed_size), 0) FROM blobs').fetchone()[0]
+            if total <= target:
+                return 0
+            evicted = []
+            for digest, compressed_size in db.execute('SELECT digest, compressed_size FROM blobs ORDER BY last_fetched_at'):
+                if total <= target:
+                    break
+                evicted.append(digest)
+                total -= compressed_size
+            for start in range(0, len(evicted), 500):
+                chunk = evicted[start:start + 500]
+                marks = ', '.join('?' * len(chunk))
+                db.execute(f'DELETE FROM fetches WHERE digest IN ({marks})', chunk)
+                db.execute(f'DELETE FROM blobs WHERE digest IN ({marks})', chunk)
+        for digest in evicted:
+            try:
+                self.blob_path(digest).unlink()
+            except FileNotFoundError:
+                pass
+        logger.info(f"Evicted {len(evicted)} blobs from the response archive")
+        return len(evicted)
+    
+    def blob_path(self, digest: str) -> Path:
+        return self.root / 'blobs' / digest[:2] / f'{digest}.zst'
+    
+    def _write_blob(self, path: Path, body: bytes) -> int:
+        """Compress a body into place atomically; returns its compressed size."""
+        data = zstandard.ZstdCompressor(level=self.level).compress(body)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return len(data)
+    
+    def _maybe_evict(self, added: int):
+        """Check the total size once every few percent of the limit has been written."""
+        with self._lock:
+            if self._unchecked_bytes is not None:
+                self._unchecked_bytes += added
+                if self._unchecked_bytes < self.max_bytes * (1 - EVICT_TO) / 2:
+                    return
+            self._unchecked_bytes = 0
+        self.evict()
+    
+    def _db(self) -> sqlite3.Connection:
+        """This thread's index connection (a new one after a fork)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.root / 'index.sqlite3', timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            # Autocommit, except inside "with conn:" blocks
+            conn.isolation_level = 'DEFERRED'
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+
+# Global archive instance
+_response_archive = None
+
+
+def get_response_archive() -> ResponseArchive:
+    """Get or create the global response archive."""
+    global _response_archive
+    if _response_archive is None:
+        _response_archive = ResponseArchive()
+    return _response_archive
+
+
+def is_enabled() -> bool:
+    """Whether fetched responses are archived."""
+    return settings.RESPONSE_ARCHIVE_ENABLED and ResponseArchive.available()
+
+
+def archive_response(kind: str, url: str, body: bytes, **fields) -> Optional[str]:
+    """Archive a fetched body if archiving is enabled (see ResponseArchive.store)."""
+    if not is_enabled():
+        return None
+    return get_response_archive().store(kind, url, body, **fields)
@@ -0,0 +1,176 @@
+"""
+Adaptive per-source fetch scheduling.
+
+Learns how often each source publishes from its ArticleRaw history and
+recent FeedIngestionLog results, and sets ``Source.next_fetch_at`` so busy
+feeds are polled often while quiet or failing feeds back off towards
+``Source.fetch_interval_minutes`` (the per-source maximum).
+"""
+import heapq
+import logging
+import statistics
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ArticleRaw, FeedIngestionLog, Source, WebSubSubscription
+
+logger = logging.getLogger(__name__)
+
+
+class FetchScheduler:
+    """Compute next-due times for sources and hand out due sources in priority order."""
+    
+    # Number of recent articles used to estimate a source's publishing rate
+    HISTORY_SIZE = 20
+    # Poll this many times per average gap between posts
+    POLLS_PER_POST = 2
+    # Interval used while a source has no usable publishing history
+    DEFAULT_INTERVAL_MINUTES = 60
+    # Growth factor per consecutive fetch that found nothing new
+    QUIET_BACKOFF = 1.5
+    # Growth factor per consecutive failed fetch
+    FAILURE_BACKOFF = 2.0
+    
+    def __init__(self, min_interval_minutes: Optional[float] = None):
+        self.min_interval_minutes = min_interval_minutes or settings.FEED_MIN_INTERVAL_MINUTES
+    
+    def plan(self, sources, now: Optional[datetime] = None) -> Tuple[List[Source], List[Source]]:
+        """
+        Split sources into due and not-due.
+        
+        Due sources come back most-overdue first (never-scheduled sources
+        first of all), popped from a priority queue keyed on next-due time.
+        
+        Returns:
+            Tuple of (due_sources, not_due_sources)
+        """
+        now = now or timezone.now()
+        queue = []
+        for source in sources:
+            due_at = self.next_due_at(source)
+            # Unscheduled sources sort before everything else
+            key = due_at.timestamp() if due_at else float('-inf')
+            heapq.heappush(queue, (key, source.id, source))
+        
+        due = []
+        while queue and queue[0][0] <= now.timestamp():
+            due.append(heapq.heappop(queue)[2])
+        not_due = [item[2] for item in queue]
+        return due, not_due
+    
+    def next_due_at(self, source: Source) -> Optional[datetime]:
+        """When the source should next be fetched; None if it has never been fetched."""
+        if source.next_fetch_at:
+            return source.next_fetch_at
+        if source.last_fetched_at:
+            # Sources fetched before adaptive scheduling existed
+            return source.last_fetched_at + timedelta(minutes=source.fetch_interval_minutes)
+        return None
+    
+    def schedule(self, source: Source, articles_created: Optional[int] = None,
+                 failed: bool = False, now: Optional[datetime] = None) -> datetime:
+        """
+        Set ``next_fetch_at`` (and the learned publish interval) after a fetch.
+        
+        The caller saves the source.
+        
+        Args:
+            source: Source that was just fetched
+            articles_created: New articles found by this fetch (None if unknown)
+            failed: Whether this fetch failed; ``source.error_count`` must
+                already include it
+        """
+        now = now or timezone.now()
+        interval = self.compute_interval(source, articles_created=articles_created, failed=failed)
+        source.next_fetch_at = now + timedelta(minutes=interval)
+        logger.info(f"Next fetch for {source.name} in {interval:.0f} minutes")
+        return source.next_fetch_at
+    
+    def compute_interval(self, source: Source, articles_created: Optional[int] = None,
+                         failed: bool = False) -> float:
+        """Minutes until the next fetch of a source."""
+        publish_interval = self.estimate_publish_interval(source)
+        source.publish_interval_minutes = publish_interval
+        max_interval = max(source.fetch_interval_minutes, self.min_interval_minutes)
+        
+        if not failed and self._has_push_subscription(source):
+            # A WebSub hub pushes new entries; polling is only a safety net
+            return max_interval
+        
+        if publish_interval:
+            interval = publish_interval / self.POLLS_PER_POST
+        else:
+            interval = self.DEFAULT_INTERVAL_MINUTES
+        
+        if failed:
+            interval *= self.FAILURE_BACKOFF ** source.error_count
+        else:
+            quiet_streak = self._quiet_streak(source, articles_created)
+            interval *= self.QUIET_BACKOFF ** quiet_streak
+        
+        return min(max(interval, self.min_interval_minutes), max_interval)
+    
+    def estimate_publish_interval(self, source: Source) -> Optional[float]:
+        """
+        Estimate minutes between posts from recent published dates.
+        
+        Uses the median gap between the latest articles, stretched when the
+        feed has been silent for longer than that (a blog that went dormant).
+        """
+        published = list(
+            ArticleRaw.objects.filter(source=source)
+            .order_by('-published_at')
+            .values_list('published_at', flat=True)[:self.HISTORY_SIZE]
+        )
+        if len(published) < 2:
+            return None
+        
+        gaps = [
+            (newer - older).total_seconds() / 60
+            for newer, older in zip(published, published[1:])
+        ]
+        gaps = [gap for gap in gaps if gap > 0]
+        if not gaps:
+            return None
+        
+        median_gap = statistics.median(gaps)
+        silence = (timezone.now() - published[0]).total_seconds() / 60
+        return round(max(median_gap, silence / 2), 1)
+    
+    def _has_push_subscription(self, source: Source) -> bool:
+        """Whether a WebSub hub currently pushes this source's new entries."""
+        return WebSubSubscription.objects.filter(
+            source=source, status='active', expires_at__gt=timezone.now()
+        ).exists()
+    
+    def _quiet_streak(self, source: Source, articles_created: Optional[int]) -> int:
+        """Count consecutive recent fetches (including this one) that found nothing new."""
+        if articles_created:
+            return 0
+        
+        streak = 1 if articles_created == 0 else 0
+        recent_logs = (
+            FeedIngestionLog.objects.filter(source=source, completed_at__isnull=False)
+            .order_by('-started_at')
+            .values_list('status', 'articles_created')[:10]
+        )
+        for status, created in recent_logs:
+            if status != 'success' or created:
+                break
+            streak += 1
+        return streak
+
+
+# Global scheduler instance
+_scheduler = None
+
+
+def get_scheduler() -> FetchScheduler:
+    """Get or create the global fetch scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FetchScheduler()
+    return _scheduler
@@ -0,0 +1,161 @@
+"""
+Per-stage timing of feed ingestion.
+
+A StageTimer travels with one source's ingestion and accumulates wall time
+per stage (rate-limit wait, connect, server wait, download, parse, entry
+normalization, duplicate detection, DB write, media). Stages nest, and each
+records only its own time, so the stages add up to the total instead of
+counting nested work twice. The timer also acts as a database execute
+wrapper that attributes every query to the stage that ran it.
+"""
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List
+
+from django.db import connection
+
+# Stages in pipeline order (used for display)
+STAGES = (
+    'queue', 'rate_limit', 'connect', 'wait', 'download', 'parse',
+    'normalize', 'dedup', 'db_write', 'media',
+)
+
+
+class StageTimer:
+    """Accumulate exclusive wall time and query counts per ingestion stage."""
+    
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.queries: Dict[str, int] = {}
+        self.bytes_received = 0
+        # Open stages: [name, start, time spent in nested stages]
+        self._stack: List[list] = []
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as ``name``, excluding any stages nested inside it."""
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - frame[2]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+    
+    def add(self, name: str, seconds: float):
+        """Record time measured elsewhere (e.g. connect time reported by the HTTP client)."""
+        seconds = max(seconds, 0.0)
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        if self._stack:
+            self._stack[-1][2] += seconds
+    
+    def timed_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Wrap a body iterator so waiting for chunks counts as 'download'."""
+        iterator = iter(chunks)
+        while True:
+            with self.stage('download'):
+                chunk = next(iterator, None)
+            if chunk is None:
+                return
+            self.bytes_received += len(chunk)
+            yield chunk
+    
+    def track_queries(self):
+        """Context manager counting this thread's queries per stage."""
+        return connection.execute_wrapper(self)
+    
+    def __call__(self, execute, sql, params, many, context):
+        name = self._stack[-1][0] if self._stack else 'other'
+        self.queries[name] = self.queries.get(name, 0) + 1
+        return execute(sql, params, many, context)
+    
+    @property
+    def query_count(self) -> int:
+        return sum(self.queries.values())
+    
+    def apply_to(self, ingestion_log):
+        """Copy the measurements onto a FeedIngestionLog (saved by the caller)."""
+        ingestion_log.stage_timings = {name: round(seconds, 4) for name, seconds in self.timings.items()}
+        ingestion_log.stage_queries = dict(self.queries)
+        ingestion_log.query_count = self.query_count
+        ingestion_log.bytes_received = self.bytes_received
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile, 0 for no values."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _distribution(values: List[float]) -> Dict:
+    return {
+        'count': len(values),
+        'p50': round(percentile(values, 50), 4),
+        'p95': round(percentile(values, 95), 4),
+    }
+
+
+def _stage_distributions(logs: List[Dict]) -> Dict[str, Dict]:
+    """p50/p95 seconds and queries per stage, over the logs that ran the stage."""
+    seconds: Dict[str, List[float]] = {}
+    queries: Dict[str, List[int]] = {}
+    for log in logs:
+        for name, value in (log['stage_timings'] or {}).items():
+            seconds.setdefault(name, []).append(value)
+        for name, value in (log['stage_queries'] or {}).items():
+            queries.setdefault(name, []).append(value)
+    
+    order = {name: i for i, name in enumerate(STAGES)}
+    stages = {}
+    for name in sorted(set(seconds) | set(queries), key=lambda n: (order.get(n, len(order)), n)):
+        stages[name] = {
+            'seconds': _distribution(seconds.get(name, [])),
+            'queries': _distribution(queries.get(name, [])),
+        }
+    return stages
+
+
+def summarize_ingestion_logs(logs: Iterable[Dict]) -> Dict:
+    """
+    Aggregate per-stage timings of FeedIngestionLog rows.
+    
+    Args:
+        logs: Dicts with 'source_id', 'source__name', 'status', 'stage_timings',
+            'stage_queries', 'query_count', 'bytes_received' and
+            'execution_time_seconds' (a ``.values()`` queryset)
+    
+    Returns:
+        Dict with overall 'stages' p50/p95 (seconds and queries), totals, and
+        a 'sources' breakdown sorted by p95 execution time, slowest first
+    """
+    logs = list(logs)
+    by_source: Dict[int, List[Dict]] = {}
+    for log in logs:
+        by_source.setdefault(log['source_id'], []).append(log)
+    
+    def summarize(rows: List[Dict]) -> Dict:
+        stages = _stage_distributions(rows)
+        return {
+            'logs': len(rows),
+            'failed': sum(1 for row in rows if row['status'] == 'failed'),
+            'execution_time': _distribution([
+                row['execution_time_seconds'] for row in rows if row['execution_time_seconds'] is not None
+            ]),
+            'query_count': _distribution([row['query_count'] for row in rows]),
+            'bytes_received': _distribution([row['bytes_received'] for row in rows]),
+            'slowest_stage': max(stages, key=lambda name: stages[name]['seconds']['p95'], default=None),
+            'stages': stages,
+        }
+    
+    sources = []
+    for source_id, rows in by_source.items():
+        sources.append({'source_id': source_id, 'source_name': rows[0]['source__name'], **summarize(rows)})
+    sources.sort(key=lambda row: row['execution_time']['p95'], reverse=True)
+    
+    return {**summarize(logs), 'sources': sources}
@@ -0,0 +1,192 @@
+"""
+Per-domain memory of which content extraction strategy works.
+
+ContentExtractor records every strategy attempt (success, content length,
+latency) here. The counts live in ExtractionStrategyStat rows, shared by all
+workers; each process buffers its own increments and adds them to the rows
+with F() updates every STRATEGY_STATS_FLUSH_SECONDS, and reads the whole
+(small) table back at the same pace.
+
+For a domain, strategies are then tried most-likely-to-succeed first, and a
+strategy that has failed nearly every time after STRATEGY_MIN_ATTEMPTS tries
+is skipped, except for an occasional probe (STRATEGY_EXPLORE_RATE) so a site
+that changes its markup is noticed.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ExtractionStrategyStat
+
+logger = logging.getLogger(__name__)
+
+
+def _new_counts() -> List:
+    """Buffered outcomes: attempts, successes, total content length, total latency, last success, last failure."""
+    return [0, 0, 0, 0.0, None, None]
+
+
+class StrategyMemory:
+    """Learned per-domain success rates of the extraction strategies."""
+    
+    def __init__(self, min_attempts: Optional[int] = None, skip_below: Optional[float] = None,
+                 explore_rate: Optional[float] = None, flush_seconds: Optional[float] = None):
+        """
+        Args:
+            min_attempts: Attempts before a strategy's record is trusted (defaults to settings.STRATEGY_MIN_ATTEMPTS)
+            skip_below: Success rate under which a trusted strategy is skipped (defaults to settings.STRATEGY_SKIP_BELOW)
+            explore_rate: Chance of still trying a skipped strategy (defaults to settings.STRATEGY_EXPLORE_RATE)
+            flush_seconds: Seconds between writes and reloads of the table (defaults to settings.STRATEGY_STATS_FLUSH_SECONDS)
+        """
+        self.min_attempts = min_attempts or settings.STRATEGY_MIN_ATTEMPTS
+        self.skip_below = settings.STRATEGY_SKIP_BELOW if skip_below is None else skip_below
+        self.explore_rate = settings.STRATEGY_EXPLORE_RATE if explore_rate is None else explore_rate
+        self.flush_seconds = settings.STRATEGY_STATS_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._lock = threading.Lock()
+        # {domain: {strategy: [attempts, successes]}} as last read, plus local increments
+        self._known: Dict[str, Dict[str, List[int]]] = {}
+        # {(domain, strategy): buffered outcomes} not written yet
+        self._pending: Dict[Tuple[str, str], List] = {}
+        self._loaded_at = 0.0
+        self._flushed_at = time.monotonic()
+    
+    def plan(self, domain: str, strategies: Sequence[str]) -> List[str]:
+        """
+        Order ``strategies`` for a domain, dropping the ones that keep failing there.
+        
+        Strategies are ranked by their smoothed success rate, ties (such as a
+        domain seen for the first time) keeping the given default order. At
+        least one strategy is always returned.
+        """
+        with self._lock:
+            known = {name: tuple(counts) for name, counts in self._known.get(domain, {}).items()}
+        
+        def score(name):
+            attempts, successes = known.get(name, (0, 0))
+            return (successes + 1) / (attempts + 2)
+        
+        ranked = sorted(strategies, key=score, reverse=True)
+        kept = [name for name in ranked if not self.is_unreliable(*known.get(name, (0, 0)))]
+        if not kept:
+            return ranked
+        probes = [name for name in ranked if name not in kept and random.random() < self.explore_rate]
+        return kept + probes
+    
+    def is_unreliable(self, attempts: int, successes: int) -> bool:
+        """Whether a strategy with this record should be skipped."""
+        return attempts >= self.min_attempts and successes < attempts * self.skip_below
+    
+    def record(self, domain: str, strategy: str, success: bool, content_length: int = 0, latency: float = 0.0):
+        """Buffer the outcome of one strategy attempt. Never touches the database."""
+        now = timezone.now()
+        with self._lock:
+            counts = self._pending.setdefault((domain, strategy), _new_counts())
+            counts[0] += 1
+            counts[2] += content_length
+            counts[3] += latency
+            if success:
+                counts[1] += 1
+                counts[4] = now
+            else:
+                counts[5] = now
+            known = self._known.setdefault(domain, {}).setdefault(strategy, [0, 0])
+            known[0] += 1
+            known[1] += int(success)
+    
+    def sync(self, force: bool = False):
+        """Write buffered outcomes and reload the table, if due (or ``force``)."""
+        if force or time.monotonic() - self._flushed_at >= self.flush_seconds:
+            self.flush()
+        if force or time.monotonic() - self._loaded_at >= self.flush_seconds:
+            self.load()
+    
+    def flush(self):
+        """Add the buffered outcomes to the ExtractionStrategyStat rows."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        
+        for index, ((domain, strategy), counts) in enumerate(pending.items()):
+            try:
+                self._write(domain, strategy, counts)
+            except DatabaseError as e:
+                logger.warning(f"Could not store extraction strategy stats: {str(e)}")
+                # Keep what was not written for the next flush
+                with self._lock:
+                    for key, unwritten in list(pending.items())[index:]:
+                        self._merge(self._pending.setdefault(key, _new_counts()), unwritten)
+                return
+    
+    def load(self):
+        """Read the learned table, keeping increments not written yet on top of it."""
+        try:
+            rows = list(ExtractionStrategyStat.objects.values_list('domain', 'strategy', 'attempts', 'successes'))
+        except DatabaseError as e:
+            logger.warning(f"Could not load extraction strategy stats: {str(e)}")
+            return
+        
+        known: Dict[str, Dict[str, List[int]]] = {}
+        for domain, strategy, attempts, successes in rows:
+            known.setdefault(domain, {})[strategy] = [attempts, successes]
+        with self._lock:
+            for (domain, strategy), counts in self._pending.items():
+                entry = known.setdefault(domain, {}).setdefault(strategy, [0, 0])
+                entry[0] += counts[0]
+                entry[1] += counts[1]
+            self._known = known
+            self._loaded_at = time.monotonic()
+    
+    @staticmethod
+    def _write(domain: str, strategy: str, counts: List):
+        attempts, successes, content_length, latency, last_success, last_failure = counts
+        changes = {
+            'attempts': F('attempts') + attempts,
+            'successes': F('successes') + successes,
+            'total_content_length': F('total_content_length') + content_length,
+            'total_latency_seconds': F('total_latency_seconds') + latency,
+            'updated_at': timezone.now(),
+        }
+        if last_success:
+            changes['last_success_at'] = last_success
+        if last_failure:
+            changes['last_failure_at'] = last_failure
+        
+        rows = ExtractionStrategyStat.objects.filter(domain=domain, strategy=strategy)
+        if rows.update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                ExtractionStrategyStat.objects.create(
+                    domain=domain, strategy=strategy, attempts=attempts, successes=successes,
+                    total_content_length=content_length, total_latency_seconds=latency,
+                    last_success_at=last_success, last_failure_at=last_failure,
+                )
+        except IntegrityError:
+            # Another worker created the row in the meantime
+            rows.update(**changes)
+    
+    @staticmethod
+    def _merge(into: List, counts: List):
+        for i in range(4):
+            into[i] += counts[i]
+        into[4] = counts[4] or into[4]
+        into[5] = counts[5] or into[5]
+
+
+# Global memory instance
+_strategy_memory = None
+
+
+def get_strategy_memory() -> StrategyMemory:
+    """Get or create the global extraction strategy memory."""
+    global _strategy_memory
+    if _strategy_memory is None:
+        _strategy_memory = StrategyMemory()
+    return _strategy_memory
@@ -2,14 +2,19 @@ from celery import shared_task
 import logging
 import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from django.utils import timezone
-from django.db import transaction
+from django.db.models import F, Q
 
-from .models import Source, ArticleRaw, MediaAsset, FeedIngestionLog
-from .feed_parser import parse_feed, FeedParseError
+from .models import Source, ArticleRaw, FeedIngestionLog, WebSubSubscription
+from .feed_parser import FeedParser, parse_feed, is_not_modified, merge_seen_entry_ids, FeedParseError
 from .content_extractor import extract_article_content
+from .ingest_writer import BulkArticleWriter
+from .scheduler import get_scheduler
+from .stage_timing import StageTimer
+from .utils import url_fingerprint
+from . import websub
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +25,13 @@ def ingest_all_feeds_task():
     Main orchestrator task to ingest all active feeds.
     
     This task:
-    1. Gets all active sources
-    2. Spawns individual tasks per source
+    1. Gets all active sources that are due for a fetch (see news.scheduler)
+    2. Fetches them concurrently in this task (FEED_INGEST_MODE='async'),
+       or spawns individual tasks per source (FEED_INGEST_MODE='fanout')
     3. Collects results and logs summary
     """
+    from django.conf import settings
+    
     logger.info("Starting feed ingestion for all sources")
     
     # Get all active sources
@@ -35,12 +43,33 @@ def ingest_all_feeds_task():
     
     logger.info(f"Found {sources.count()} active sources")
     
-    # Spawn individual tasks
+    # Split sources into due (most overdue first) and not-due
+    due_sources, not_due_sources = get_scheduler().plan(sources)
     task_results = []
-    for source in sources:
-        try:
-            # Check if source needs to be fetched (based on interval)
-            if _should_fetch_source(source):
+    for source in not_due_sources:
+        logger.info(f"Skipping {source.name} - not due for fetch yet")
+        task_results.append({
+            'source_id': source.id,
+            'source_name': source.name,
+            'status': 'skipped',
+            'reason': 'not_due'
+        })
+    
+    if settings.FEED_INGEST_MODE == 'async':
+        # Fetch every due source concurrently inside this task
+        feed_results = _ingest_sources_concurrently(due_sources)
+        task_results.extend(feed_results)
+        
+        articles_to_curate = sum(
+            r.get('articles_created', 0) - r.get('articles_duplicate', 0) for r in feed_results
+        )
+        if articles_to_curate > 0 and settings.FEED_AUTO_CURATE:
+            logger.info(f"Triggering curation for {articles_to_curate} new articles")
+            curate_articles_task.delay(batch_size=articles_to_curate)
+    else:
+        # Spawn individual tasks
+        for source in due_sources:
+            try:
                 result = ingest_single_feed_task.delay(source.id)
                 task_results.append({
                     'source_id': source.id,
@@ -49,22 +78,14 @@ def ingest_all_feeds_task():
                     'status': 'queued'
                 })
                 logger.info(f"Queued feed ingestion for: {source.name}")
-            else:
-                logger.info(f"Skipping {source.name} - not due for fetch yet")
+            except Exception as e:
+                logger.error(f"Error queuing task for {source.name}: {str(e)}")
                 task_results.append({
                     'source_id': source.id,
                     'source_name': source.name,
-                    'status': 'skipped',
-                    'reason': 'not_due'
+                    'status': 'error',
+                    'error': str(e)
                 })
-        except Exception as e:
-            logger.error(f"Error queuing task for {source.name}: {str(e)}")
-            task_results.append({
-                'source_id': source.id,
-                'source_name': source.name,
-                'status': 'error',
-                'error': str(e)
-            })
     
     logger.info(f"Feed ingestion orchestration completed. {len(task_results)} sources processed.")
     return {
@@ -75,13 +96,17 @@ def ingest_all_feeds_task():
 
 
 @shared_task(rate_limit='10/m')  # 10 tasks per minute max
-def ingest_single_feed_task(source_id: int):
+def ingest_single_feed_task(source_id: int, slot_reserved: bool = False):
     """
     Ingest a single RSS/Atom feed.
     
     Args:
         source_id: ID of the Source to process
+        slot_reserved: True when a per-domain rate-limit slot was already reserved
+            (the task was rescheduled to that slot)
     """
+    from django.conf import settings
+    
     start_time = time.time()
     ingestion_log = None
     
@@ -93,6 +118,16 @@ def ingest_single_feed_task(source_id: int):
             logger.error(f"Source {source_id} not found or inactive")
             return {"status": "error", "message": "Source not found or inactive"}
         
+        # Politeness: reschedule instead of sleeping when the domain is busy
+        if not slot_reserved:
+            countdown = _reserve_fetch_slot(source.feed_url)
+            if countdown:
+                ingest_single_feed_task.apply_async(
+                    args=(source_id,), kwargs={'slot_reserved': True}, countdown=countdown
+                )
+                logger.info(f"Rescheduled {source.name} in {countdown:.1f}s (domain rate limit)")
+                return {"status": "rescheduled", "countdown": countdown}
+        
         logger.info(f"Starting feed ingestion for: {source.name}")
         
         # Create ingestion log
@@ -102,66 +137,38 @@ def ingest_single_feed_task(source_id: int):
             started_at=timezone.now()
         )
         
-        # Parse feed
+        # Parse feed, timing each stage
+        timer = StageTimer()
         try:
             feed, entries = parse_feed(
                 source.feed_url,
                 custom_headers=source.custom_headers,
-                max_articles=source.max_articles_per_fetch
+                max_articles=source.max_articles_per_fetch,
+                etag=source.etag,
+                last_modified=source.last_modified,
+                content_hash=source.content_hash,
+                rate_limit=False,  # The domain slot was reserved above (or by the rescheduling run)
+                high_water_mark=source.high_water_mark,
+                seen_entry_ids=source.recent_entry_ids,
+                timer=timer,
             )
         except FeedParseError as e:
             logger.error(f"Feed parsing failed for {source.name}: {str(e)}")
-            _update_source_error(source, str(e))
-            ingestion_log.error_message = str(e)
-            ingestion_log.completed_at = timezone.now()
-            ingestion_log.execution_time_seconds = time.time() - start_time
-            ingestion_log.save()
+            _record_ingestion_failure(source, ingestion_log, str(e), start_time, timer)
             return {"status": "error", "message": str(e)}
         
-        # Process entries
-        articles_created = 0
-        articles_updated = 0
-        
-        with transaction.atomic():
-            for entry_data in entries:
-                try:
-                    article, created = _create_or_update_article(source, entry_data)
-                    if created:
-                        articles_created += 1
-                    else:
-                        articles_updated += 1
-                except Exception as e:
-                    logger.error(f"Error processing article {entry_data.get('title', 'Unknown')}: {str(e)}")
-                    continue
-        
-        # Update source status
-        _update_source_success(source)
+        with timer.track_queries():
+            result = _store_feed_result(source, feed, entries, ingestion_log, start_time, timer)
         
-        # Update ingestion log
-        ingestion_log.status = 'success'
-        ingestion_log.articles_found = len(entries)
-        ingestion_log.articles_created = articles_created
-        ingestion_log.articles_updated = articles_updated
-        ingestion_log.completed_at = timezone.now()
-        ingestion_log.execution_time_seconds = time.time() - start_time
-        ingestion_log.save()
+        # Trigger curation task if new (non-duplicate) articles were created
+        articles_to_curate = result.get('articles_created', 0) - result.get('articles_duplicate', 0)
+        curation_triggered = articles_to_curate > 0 and settings.FEED_AUTO_CURATE
+        if curation_triggered:
+            logger.info(f"Triggering curation for {articles_to_curate} new articles")
+            curate_articles_task.delay(batch_size=articles_to_curate)
         
-        logger.info(f"Successfully processed {source.name}: {articles_created} created, {articles_updated} updated")
-        
-        # Trigger curation task if new articles were created
-        if articles_created > 0:
-            logger.info(f"Triggering curation for {articles_created} new articles")
-            curate_articles_task.delay(batch_size=articles_created)
-        
-        return {
-            "status": "success",
-            "source_name": source.name,
-            "articles_found": len(entries),
-            "articles_created": articles_created,
-            "articles_updated": articles_updated,
-            "execution_time": time.time() - start_time,
-            "curation_triggered": articles_created > 0
-        }
+        result['curation_triggered'] = curation_triggered
+        return result
         
     except Exception as e:
         logger.error(f"Unexpected error in ingest_single_feed_task: {str(e)}")
@@ -180,167 +187,391 @@ def ingest_single_feed_task(source_id: int):
         return {"status": "error", "message": str(e)}
 
 
-def _should_fetch_source(source: Source) -> bool:
-    """Check if source should be fetched based on interval."""
-    if not source.last_fetched_at:
-        return True
+def ingest_pushed_feed(subscription: WebSubSubscription, body: bytes, link_header: str = '') -> Dict[str, Any]:
+    """
+    Ingest feed content a WebSub hub pushed for a subscribed source.
+    
+    The body goes through the same parsing, high-water mark filtering and
+    bulk upsert as a polled feed. ``link_header`` is the push's ``Link``
+    header, which names the hub and topic the same way the feed response
+    did. Called from the callback view, so a bad push is logged on the
+    ingestion log without counting as a source error.
+    """
+    from django.conf import settings
     
-    time_since_last = timezone.now() - source.last_fetched_at
-    interval_minutes = source.fetch_interval_minutes
+    source = subscription.source
+    start_time = time.time()
+    timer = StageTimer()
+    ingestion_log = FeedIngestionLog.objects.create(source=source, status='failed', started_at=timezone.now())
     
-    return time_since_last.total_seconds() >= (interval_minutes * 60)
+    parser = FeedParser(max_articles=source.max_articles_per_fetch, rate_limit=False, timer=timer)
+    try:
+        feed = parser.parse_response(
+            source.feed_url,
+            status=200,
+            content=body,
+            response_headers={'Link': link_header},
+            etag=source.etag,
+            last_modified=source.last_modified,
+        )
+        # A push holds only the new entries; keep the hash of the last polled body
+        feed['content_hash'] = source.content_hash
+        entries = parser.parse_feed_entries(feed, source.feed_url, source.high_water_mark, source.recent_entry_ids)
+    except FeedParseError as e:
+        logger.error(f"Pushed content for {source.name} could not be parsed: {str(e)}")
+        timer.apply_to(ingestion_log)
+        ingestion_log.error_message = f"WebSub push: {str(e)}"
+        ingestion_log.completed_at = timezone.now()
+        ingestion_log.execution_time_seconds = time.time() - start_time
+        ingestion_log.save()
+        return {"status": "error", "message": str(e)}
+    
+    with timer.track_queries():
+        result = _store_feed_result(source, feed, entries, ingestion_log, start_time, timer)
+    
+    WebSubSubscription.objects.filter(id=subscription.id).update(
+        last_push_at=timezone.now(), push_count=F('push_count') + 1
+    )
+    
+    articles_to_curate = result.get('articles_created', 0) - result.get('articles_duplicate', 0)
+    if articles_to_curate > 0 and settings.FEED_AUTO_CURATE:
+        logger.info(f"Triggering curation for {articles_to_curate} pushed articles")
+        curate_articles_task.delay(batch_size=articles_to_curate)
+    return result
 
 
-def _create_or_update_article(source: Source, entry_data: Dict[str, Any]) -> tuple:
-    """Create or update ArticleRaw from entry data."""
-    article_url = entry_data['url']
+@shared_task
+def subscribe_websub_task(subscription_id: int, mode: str = 'subscribe'):
+    """
+    Send a WebSub (un)subscribe request to a source's hub.
+    
+    The hub confirms by calling back WebSubCallbackView; until then the
+    subscription stays pending.
+    """
+    try:
+        subscription = WebSubSubscription.objects.select_related('source').get(id=subscription_id)
+    except WebSubSubscription.DoesNotExist:
+        logger.error(f"WebSub subscription {subscription_id} not found")
+        return {"status": "error", "message": "Subscription not found"}
+    
+    accepted = websub.request_subscription(subscription, mode=mode)
+    return {"status": "requested" if accepted else "failed", "mode": mode, "topic": subscription.topic_url}
+
+
+@shared_task
+def renew_websub_subscriptions_task():
+    """
+    Renew WebSub leases that are about to expire and retry unverified requests.
     
-    # Get or create article
-    article, created = ArticleRaw.objects.get_or_create(
-        url=article_url,
-        defaults={
-            'source': source,
-            'title': entry_data['title'],
-            'published_at': entry_data['published_at'],
-            'summary_feed': entry_data['summary_feed'],
+    Runs from Celery beat; a lapsed lease only means the source falls back to
+    polling until its next fetch subscribes it again.
+    """
+    if not websub.is_enabled():
+        return {"status": "disabled"}
+    
+    renewed = 0
+    failed = 0
+    for subscription in websub.subscriptions_to_renew():
+        if websub.request_subscription(subscription):
+            renewed += 1
+        else:
+            failed += 1
+    
+    logger.info(f"WebSub renewal completed: {renewed} requested, {failed} failed")
+    return {"status": "completed", "renewed": renewed, "failed": failed}
+
+
+def _store_feed_result(source: Source, feed, entries: List[Dict[str, Any]],
+                       ingestion_log: FeedIngestionLog, start_time: float,
+                       timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+    """
+    Write the parsed entries of a fetched feed and finalize its ingestion log.
+    
+    Shared by the per-source task and the concurrent sweep. Does not trigger
+    curation; callers decide how to batch that. The timer's stage timings are
+    stored on the log.
+    """
+    timer = timer or StageTimer()
+    
+    # Nothing changed since the last fetch: skip entry processing entirely
+    if is_not_modified(feed):
+        _update_source_success(source, feed)
+        
+        timer.apply_to(ingestion_log)
+        ingestion_log.status = 'success'
+        ingestion_log.completed_at = timezone.now()
+        ingestion_log.execution_time_seconds = time.time() - start_time
+        ingestion_log.save()
+        
+        logger.info(f"Feed unchanged for {source.name}, skipping entry processing")
+        return {
+            "status": "not_modified",
+            "source_name": source.name,
+            "articles_created": 0,
+            "execution_time": time.time() - start_time,
         }
-    )
     
-    # Update if not created (in case of updates)
-    if not created:
-        article.title = entry_data['title']
-        article.published_at = entry_data['published_at']
-        article.summary_feed = entry_data['summary_feed']
-        article.save()
+    # Process entries
+    write_stats = BulkArticleWriter(source, timer=timer).write(entries)
+    articles_created = write_stats['created']
+    articles_updated = write_stats['updated']
+    articles_duplicate = write_stats['duplicates']
+    
+    # Subscribe at the feed's WebSub hub, if it advertises one
+    websub.ensure_subscription(source, feed)
+    
+    # Update source status
+    _advance_high_water_mark(source, feed, entries)
+    _update_source_success(source, feed, articles_created=articles_created)
+    
+    # Update ingestion log
+    timer.apply_to(ingestion_log)
+    ingestion_log.status = 'success'
+    ingestion_log.articles_found = len(entries)
+    ingestion_log.articles_created = articles_created
+    ingestion_log.articles_updated = articles_updated
+    ingestion_log.completed_at = timezone.now()
+    ingestion_log.execution_time_seconds = time.time() - start_time
+    ingestion_log.save()
     
-    # Process media assets
-    _process_media_assets(article, entry_data.get('media_assets', []))
+    logger.info(
+        f"Successfully processed {source.name}: {articles_created} created "
+        f"({articles_duplicate} near-duplicates), {articles_updated} updated"
+    )
     
-    return article, created
+    return {
+        "status": "success",
+        "source_name": source.name,
+        "articles_found": len(entries),
+        "articles_created": articles_created,
+        "articles_updated": articles_updated,
+        "articles_duplicate": articles_duplicate,
+        "execution_time": time.time() - start_time,
+    }
+
 
+def _record_ingestion_failure(source: Source, ingestion_log: FeedIngestionLog,
+                              error_message: str, start_time: float,
+                              timer: Optional[StageTimer] = None):
+    """Mark a feed fetch as failed on both the source and its ingestion log."""
+    _update_source_error(source, error_message)
+    if timer is not None:
+        timer.apply_to(ingestion_log)
+    ingestion_log.error_message = error_message
+    ingestion_log.completed_at = timezone.now()
+    ingestion_log.execution_time_seconds = time.time() - start_time
+    ingestion_log.save()
 
-def _process_media_assets(article: ArticleRaw, media_assets: List[Dict]):
-    """Process and create MediaAsset objects from RSS media data."""
-    for media_data in media_assets:
+
+def _ingest_sources_concurrently(sources: List[Source]) -> List[Dict[str, Any]]:
+    """
+    Fetch and parse all given sources concurrently, then store the results.
+    
+    Network I/O and parsing run on one asyncio event loop bounded by
+    FEED_FETCH_CONCURRENCY overall and FEED_FETCH_PER_HOST per host; the
+    parsed entries are then written source by source in this thread, since
+    the ORM is synchronous.
+    """
+    from django.conf import settings
+    from .async_ingest import AsyncFeedFetcher
+    
+    fetcher = AsyncFeedFetcher(
+        timeout=settings.FEED_FETCH_TIMEOUT,
+        max_concurrency=settings.FEED_FETCH_CONCURRENCY,
+        per_host_limit=settings.FEED_FETCH_PER_HOST,
+    )
+    fetch_results = fetcher.run(sources)
+    
+    task_results = []
+    for fetch_result in fetch_results:
+        source = fetch_result['source']
+        start_time = fetch_result['started_at']
+        timer = fetch_result['timer']
+        ingestion_log = FeedIngestionLog.objects.create(source=source, status='failed')
+        
         try:
-            media_url = media_data['url']
-            media_type = media_data.get('type', 'image')
-            
-            # Determine MIME type
-            mime_type = _get_mime_type(media_url, media_type)
-            
-            # Create or get media asset
-            media_asset, created = MediaAsset.objects.get_or_create(
-                source_url=media_url,
-                defaults={
-                    'type': media_type,
-                    'mime_type': mime_type,
-                    'width': media_data.get('width'),
-                    'height': media_data.get('height'),
-                }
-            )
-            
-            # Link to article if not already linked
-            if not article.media_assets.filter(id=media_asset.id).exists():
-                article.media_assets.add(media_asset)
-                
+            if fetch_result['error']:
+                logger.error(f"Feed parsing failed for {source.name}: {fetch_result['error']}")
+                _record_ingestion_failure(source, ingestion_log, fetch_result['error'], start_time, timer)
+                result = {"status": "error", "source_name": source.name, "message": fetch_result['error']}
+            else:
+                with timer.track_queries():
+                    result = _store_feed_result(
+                        source, fetch_result['feed'], fetch_result['entries'], ingestion_log, start_time, timer
+                    )
         except Exception as e:
-            logger.error(f"Error processing media asset: {str(e)}")
-            continue
+            logger.error(f"Unexpected error storing feed {source.name}: {str(e)}")
+            _record_ingestion_failure(source, ingestion_log, str(e), start_time, timer)
+            result = {"status": "error", "source_name": source.name, "message": str(e)}
+        
+        result['source_id'] = source.id
+        task_results.append(result)
+    
+    return task_results
 
 
-def _get_mime_type(url: str, media_type: str) -> str:
-    """Determine MIME type from URL and media type."""
-    if media_type == 'image':
-        if url.lower().endswith(('.jpg', '.jpeg')):
-            return 'image/jpeg'
-        elif url.lower().endswith('.png'):
-            return 'image/png'
-        elif url.lower().endswith('.gif'):
-            return 'image/gif'
-        elif url.lower().endswith('.webp'):
-            return 'image/webp'
-        else:
-            return 'image/jpeg'  # Default
-    elif media_type == 'video':
-        if url.lower().endswith('.mp4'):
-            return 'video/mp4'
-        elif url.lower().endswith('.webm'):
-            return 'video/webm'
-        else:
-            return 'video/mp4'  # Default
-    else:
-        return 'application/octet-stream'
+def _reserve_fetch_slot(url: str) -> float:
+    """
+    Reserve a per-domain rate-limit slot for a fetch from a Celery task.
+    
+    Returns 0 if the caller may proceed now (after at most a short inline
+    wait), otherwise the countdown in seconds the task should be rescheduled
+    with; the slot stays reserved for the rescheduled run.
+    """
+    from django.conf import settings
+    from .rate_limiter import get_rate_limiter
+    from .utils import get_domain_from_url
+    
+    delay = get_rate_limiter().reserve(get_domain_from_url(url)) - time.time()
+    if delay <= 0:
+        return 0
+    if delay <= settings.RATE_LIMIT_MAX_INLINE_WAIT:
+        time.sleep(delay)
+        return 0
+    return delay
+
 
+def _advance_high_water_mark(source: Source, feed, entries: List[Dict[str, Any]]):
+    """Remember the feed's current entry ids and the newest published date seen (saved by the caller)."""
+    source.recent_entry_ids = merge_seen_entry_ids(
+        feed, source.recent_entry_ids or [], source.max_articles_per_fetch
+    )
+    
+    # Undated entries (stamped with the fetch time) say nothing about the
+    # feed's position, and a future date must not hide real new entries
+    now = timezone.now()
+    newest = None
+    for entry in entries:
+        published_at = entry.get('published_at')
+        if not published_at or entry.get('date_estimated'):
+            continue
+        if timezone.is_naive(published_at):
+            published_at = timezone.make_aware(published_at)
+        published_at = min(published_at, now)
+        if newest is None or published_at > newest:
+            newest = published_at
+    if source.high_water_mark is not None and source.high_water_mark > now:
+        source.high_water_mark = now  # Pushed ahead before dates were clamped
+    if newest is not None and (source.high_water_mark is None or newest > source.high_water_mark):
+        source.high_water_mark = newest
 
-def _update_source_success(source: Source):
-    """Update source after successful fetch."""
+
+def _update_source_success(source: Source, feed=None, articles_created: int = 0):
+    """Update source after successful fetch, storing validators and scheduling the next fetch."""
     source.last_fetched_at = timezone.now()
     source.last_error = None
     source.error_count = 0
+    if feed is not None:
+        source.etag = feed.get('etag')
+        source.last_modified = feed.get('modified')
+        source.content_hash = feed.get('content_hash')
+    get_scheduler().schedule(source, articles_created=articles_created)
     source.save()
 
 
 def _update_source_error(source: Source, error_message: str):
-    """Update source after failed fetch."""
+    """
+    Update source after failed fetch.
+    
+    Failing sources stay active: the scheduler backs off their next fetch
+    and the host's circuit breaker keeps dead hosts from costing requests,
+    so a source recovers by itself once its host is back.
+    """
     source.last_error = error_message
     source.error_count += 1
-    
-    # Deactivate source after 5 consecutive failures
-    if source.error_count >= 5:
-        source.active = False
-        logger.warning(f"Deactivating source {source.name} after {source.error_count} consecutive failures")
-    
+    get_scheduler().schedule(source, failed=True)
     source.save()
 
 
 @shared_task
-def fetch_missing_content_task():
+def fetch_missing_content_task(limit: int = None):
     """
     Fetch full HTML content for articles missing raw_html.
     
-    This task:
-    1. Finds ArticleRaw entries without raw_html
-    2. Uses progressive content extraction strategies
-    3. Updates articles with extracted content
+    Runs the whole backfill in this task with a BatchContentFetcher (see
+    news.content_batch): articles are paged by id, fetched concurrently
+    within the global and per-host limits, and written back in bulk.
+    
+    Args:
+        limit: Max articles to fetch (defaults to settings.CONTENT_BATCH_LIMIT)
     """
-    logger.info("Starting content fetching for articles missing raw_html")
+    from django.conf import settings
+    from .content_batch import BatchContentFetcher
     
-    # Get articles without raw_html
-    articles = ArticleRaw.objects.filter(raw_html__isnull=True).exclude(raw_html='')
+    logger.info("Starting content fetching for articles missing raw_html")
+    if settings.ENABLE_PLAYWRIGHT:
+        # Pages of JavaScript-only sources are left to the browser queue
+        stats = BatchContentFetcher(limit=limit, javascript=False).run()
+        fetch_rendered_content_task.delay(limit=limit)
+    else:
+        stats = BatchContentFetcher(limit=limit).run()
     
-    if not articles.exists():
+    if not stats['fetched']:
         logger.info("No articles need content fetching")
         return {"status": "no_articles", "message": "No articles need content fetching"}
     
-    logger.info(f"Found {articles.count()} articles needing content")
+    return {"status": "completed", **stats}
+
+
+@shared_task
+def fetch_rendered_content_task(limit: int = None):
+    """
+    Fetch full content for articles of requires_javascript sources.
     
-    success_count = 0
-    error_count = 0
+    Routed to the browser queue (settings.PLAYWRIGHT_QUEUE), whose worker
+    keeps a headless browser pool alive between runs; one page is rendered
+    per browser context at a time.
     
-    for article in articles[:100]:  # Limit to 100 articles per run
-        try:
-            result = fetch_article_content_task.delay(article.id)
-            logger.info(f"Queued content fetching for article: {article.title}")
-        except Exception as e:
-            logger.error(f"Error queuing content fetch for {article.title}: {str(e)}")
-            error_count += 1
+    Args:
+        limit: Max articles to fetch (defaults to settings.CONTENT_BATCH_LIMIT)
+    """
+    from django.conf import settings
+    from .content_batch import BatchContentFetcher
     
-    logger.info(f"Content fetching queued for {articles.count()} articles")
-    return {
-        "status": "queued",
-        "articles_queued": articles.count(),
-        "errors": error_count
-    }
+    logger.info("Starting rendered content fetching for JavaScript-only sources")
+    stats = BatchContentFetcher(limit=limit, javascript=True, max_workers=settings.PLAYWRIGHT_CONTEXTS).run()
+    
+    if not stats['fetched']:
+        return {"status": "no_articles", "message": "No JavaScript-only articles need content fetching"}
+    
+    return {"status": "completed", **stats}
+
+
+def _apply_canonical_url(article, canonical_url: str):
+    """
+    Record the URL a page declares as canonical.
+    
+    The article keeps its feed URL (and url_hash) so the feed entry keeps
+    matching it. If another article already has the canonical URL, as its
+    own or declared URL, this one is a variant of it and is linked to it as
+    a duplicate instead.
+    """
+    if not canonical_url:
+        return
+    
+    url_hash = url_fingerprint(canonical_url)
+    if url_hash == article.url_hash or len(canonical_url) > ArticleRaw._meta.get_field('canonical_url').max_length:
+        return
+    
+    original = ArticleRaw.objects.filter(
+        Q(url_hash=url_hash) | Q(canonical_url_hash=url_hash)
+    ).exclude(pk=article.pk).only('id', 'canonical_article_id').order_by('id').first()
+    if original is not None:
+        article.canonical_article_id = original.canonical_article_id or original.id
+        logger.info(f"Article {article.id} is a URL variant of article {article.canonical_article_id}")
+    else:
+        article.canonical_url = canonical_url
+        article.canonical_url_hash = url_hash
 
 
 @shared_task
-def fetch_article_content_task(article_id: int):
+def fetch_article_content_task(article_id: int, slot_reserved: bool = False):
     """
     Fetch full HTML content for a specific article.
     
     Args:
         article_id: ID of the ArticleRaw to process
+        slot_reserved: True when a per-domain rate-limit slot was already reserved
     """
     try:
         article = ArticleRaw.objects.get(id=article_id)
@@ -348,18 +579,31 @@ def fetch_article_content_task(article_id: int):
         logger.error(f"Article {article_id} not found")
         return {"status": "error", "message": "Article not found"}
     
+    # Politeness: reschedule instead of sleeping when the domain is busy
+    if not slot_reserved:
+        countdown = _reserve_fetch_slot(article.url)
+        if countdown:
+            fetch_article_content_task.apply_async(
+                args=(article_id,), kwargs={'slot_reserved': True}, countdown=countdown
+            )
+            return {"status": "rescheduled", "countdown": countdown}
+    
     logger.info(f"Fetching content for: {article.title}")
     
     try:
         # Extract content using progressive strategies
         result = extract_article_content(
             article.url,
-            custom_headers=article.source.custom_headers
+            custom_headers=article.source.custom_headers,
+            rate_limit=False,
+            requires_javascript=article.source.requires_javascript,
         )
         
         if result['success'] and result['content']:
             # Update article with content
             article.raw_html = result['content']
+            article.extraction_meta = result.get('meta') or {}
+            _apply_canonical_url(article, result.get('canonical_url'))
             article.save()
             
             logger.info(f"Successfully fetched content for: {article.title} (strategy: {result['strategy_used']})")
@@ -395,23 +639,29 @@ def curate_articles_task(batch_size: int = None):
     5. Generate AI tags
     6. Create ArticleCurated entries
     
+    Steps 2-5 run for settings.CURATION_CONCURRENCY articles at a time on a
+    CurationEngine (see news.curation), which backs off when OpenAI answers 429.
+    
     Args:
         batch_size: Number of articles to process (defaults to settings.AI_BATCH_SIZE)
     """
     from django.conf import settings
     from django.db.models import Q
-    from .models import ArticleRaw, ArticleCurated, MediaAsset
-    from .ai_service import get_ai_service, AIServiceError
+    from .models import ArticleRaw
+    from .curation import CurationEngine
+    from .batch_curation import open_batch_article_ids
     
     start_time = time.time()
     batch_size = batch_size or settings.AI_BATCH_SIZE
     
     logger.info("Starting AI curation task")
     
-    # Get uncurated articles
+    # Get uncurated articles (near-duplicates ride along with their canonical article;
+    # articles submitted for offline curation are left to their batch)
     uncurated_articles = ArticleRaw.objects.filter(
-        Q(curated__isnull=True)
-    ).select_related('source').prefetch_related('media_assets')[:batch_size]
+        Q(curated__isnull=True),
+        canonical_article__isnull=True,
+    ).exclude(id__in=open_batch_article_ids()).select_related('source').prefetch_related('media_assets')[:batch_size]
     
     if not uncurated_articles.exists():
         logger.info("No uncurated articles found")
@@ -422,9 +672,9 @@ def curate_articles_task(batch_size: int = None):
     
     logger.info(f"Found {uncurated_articles.count()} articles to curate")
     
-    # Initialize AI service
+    # Initialize the curation engine (and its AI service)
     try:
-        ai_service = get_ai_service()
+        engine = CurationEngine()
     except Exception as e:
         logger.error(f"Failed to initialize AI service: {str(e)}")
         return {
@@ -432,126 +682,24 @@ def curate_articles_task(batch_size: int = None):
             "message": f"AI service initialization failed: {str(e)}"
         }
     
-    articles_processed = 0
-    articles_created = 0
-    errors = []
-    
-    for article in uncurated_articles:
-        try:
-            logger.info(f"Curating article: {article.title[:60]}...")
-            
-            # Prepare article text (combine available content)
-            article_text = article.summary_feed
-            if article.raw_html:
-                # Use raw_html if available (truncate to reasonable length)
-                article_text = article.raw_html[:10000] + " " + article.summary_feed
-            
-            # Generate summaries
-            try:
-                summary_short, summary_detailed = ai_service.generate_summaries(
-                    article_text, 
-                    article.title
-                )
-            except AIServiceError as e:
-                logger.error(f"Failed to generate summaries for {article.id}: {str(e)}")
-                # Use fallback summaries
-                summary_short = article.title[:500]
-                summary_detailed = article.summary_feed[:2000] if article.summary_feed else article.title
-            
-            # Calculate relevance score
-            try:
-                relevance_score = ai_service.calculate_relevance_score(
-                    article_text,
-                    article.title
-                )
-            except AIServiceError as e:
-                logger.error(f"Failed to calculate relevance for {article.id}: {str(e)}")
-                relevance_score = 0.5  # Default fallback
-            
-            # Generate tags
-            try:
-                ai_tags = ai_service.generate_tags(article_text, article.title)
-            except AIServiceError as e:
-                logger.error(f"Failed to generate tags for {article.id}: {str(e)}")
-                ai_tags = ['ai', 'technology']  # Default fallback
-            
-            # Generate embeddings
-            try:
-                embedding = ai_service.generate_embeddings(summary_detailed)
-            except AIServiceError as e:
-                logger.error(f"Failed to generate embeddings for {article.id}: {str(e)}")
-                embedding = [0.0] * 1536  # Zero vector fallback
-            
-            # Select cover media (first image if available)
-            cover_media = None
-            media_assets = article.media_assets.filter(type='image').first()
-            if media_assets:
-                cover_media = media_assets
-            else:
-                # If no images from RSS, try to extract from HTML content
-                if article.raw_html:
-                    from .utils import extract_best_image_from_html
-                    
-                    best_image = extract_best_image_from_html(article.raw_html, article.url)
-                    if best_image:
-                        # Create MediaAsset for the extracted image
-                        media_asset, created = MediaAsset.objects.get_or_create(
-                            source_url=best_image['url'],
-                            defaults={
-                                'type': 'image',
-                                'width': best_image.get('width'),
-                                'height': best_image.get('height'),
-                                'mime_type': 'image/jpeg'  # Default
-                            }
-                        )
-                        # Link to article
-                        article.media_assets.add(media_asset)
-                        cover_media = media_asset
-                        logger.info(f"Extracted cover image from HTML for article {article.id}")
-            
-            # Create ArticleCurated entry
-            with transaction.atomic():
-                curated_article = ArticleCurated.objects.create(
-                    raw_article=article,
-                    relevance_score=relevance_score,
-                    summary_short=summary_short,
-                    summary_detailed=summary_detailed,
-                    ai_tags=ai_tags,
-                    cover_media=cover_media,
-                    embedding=embedding
-                )
-            
-            articles_created += 1
-            articles_processed += 1
-            
-            logger.info(
-                f"Successfully curated article {article.id}: "
-                f"relevance={relevance_score:.2f}, tags={len(ai_tags)}"
-            )
-            
-        except Exception as e:
-            logger.error(f"Error curating article {article.id}: {str(e)}")
-            errors.append({
-                'article_id': article.id,
-                'title': article.title[:100],
-                'error': str(e)
-            })
-            articles_processed += 1
-            continue
+    stats = engine.run(list(uncurated_articles))
+    articles_created = stats['articles_created']
     
     execution_time = time.time() - start_time
     
     result = {
         "status": "completed",
-        "articles_processed": articles_processed,
+        "articles_processed": stats['articles_processed'],
         "articles_created": articles_created,
-        "errors_count": len(errors),
-        "errors": errors[:5],  # Include first 5 errors
+        "errors_count": len(stats['errors']),
+        "errors": stats['errors'][:5],  # Include first 5 errors
+        "throttled": stats['throttled'],
+        "llm_cache": engine.ai_service.llm_cache.metrics(),
         "execution_time_seconds": round(execution_time, 2)
     }
     
     logger.info(
-        f"Curation task completed: {articles_created}/{articles_processed} articles curated "
+        f"Curation task completed: {articles_created}/{stats['articles_processed']} articles curated "
         f"in {execution_time:.2f}s"
     )
     
@@ -566,6 +714,37 @@ def curate_articles_task(batch_size: int = None):
     return result
 
 
+@shared_task
+def poll_curation_batches_task():
+    """
+    Apply offline curation batches that have finished (see news.batch_curation).
+    
+    Batches are submitted with ``manage.py curate_batch --submit``.
+    """
+    from .models import CurationBatch
+    from .batch_curation import BatchCurator
+    
+    if not CurationBatch.objects.filter(status='submitted').exists():
+        return {"status": "no_batches"}
+    
+    stats = BatchCurator().poll()
+    logger.info(
+        f"Curation batches: {stats['applied']} applied ({stats['articles']} articles, "
+        f"{stats['failed']} failed requests), {stats['pending']} pending, {stats['errors']} not applied"
+    )
+    return {"status": "completed", **stats}
+
+
+@shared_task
+def evict_llm_cache_task():
+    """Drop expired LLM cache entries and, above LLM_CACHE_MAX_MB, the least recently used ones."""
+    from .llm_cache import get_llm_cache
+    
+    cache = get_llm_cache()
+    evicted = cache.evict()
+    return {"status": "completed", "evicted": evicted, "metrics": cache.metrics()}
+
+
 @shared_task
 def generate_audio_segment_task():
     """
@@ -1,3 +1,1660 @@
-from django.test import TestCase
+import asyncio
+import gc
+import hashlib
+import hmac
+import json
+import random
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import feedparser
+import httpx
+from openai import BadRequestError, RateLimitError
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .ai_service import EMBEDDING_DIMENSIONS, AIService
+from .async_ingest import AsyncFeedFetcher
+from .batch_curation import BatchCurator, LocalBatchBackend, get_batch_backend
+from .circuit_breaker import HostCircuitBreaker, is_host_failure
+from .content_batch import BatchContentFetcher
+from .curation import AdaptiveConcurrency
+from .date_parsing import FeedDateParser
+from .feed_parser import FeedParseError, FeedParser, StreamingFeedReader, merge_seen_entry_ids
+from .html_extraction import best_image, extract_page, parse_html, stored_meta
+from .http_client import PooledHTTPClient
+from .ingest_writer import BulkArticleWriter
+from .llm_cache import LLMCache
+from .models import (
+    ArticleCurated, ArticleRaw, CurationBatch, ExtractionStrategyStat, FeedIngestionLog, LLMCacheEntry, MediaAsset,
+    Source, WebSubSubscription,
+)
+from .near_duplicates import NearDuplicateIndex, bands, hamming_distance, simhash, to_signed
+from .rate_limiter import DomainRateLimiter
+from .response_archive import ResponseArchive, archive_response
+from .scheduler import FetchScheduler
+from .stage_timing import StageTimer, percentile, summarize_ingestion_logs
+from .strategy_memory import StrategyMemory
+from .tasks import _advance_high_water_mark
+from .utils import canonicalize_url, url_fingerprint
+from .websub import discover_hub, verify_intent, verify_signature
+
+
+class CanonicalizeUrlTests(SimpleTestCase):
+    """canonicalize_url / url_fingerprint decide the unique ArticleRaw.url_hash."""
+    
+    def test_amp_subdomain_is_stripped(self):
+        self.assertEqual(canonicalize_url('https://amp.example.com/story'), 'https://example.com/story')
+        self.assertEqual(canonicalize_url('https://amp.example.co.uk/story'), 'https://example.co.uk/story')
+    
+    def test_amp_label_kept_without_registrable_domain(self):
+        self.assertEqual(canonicalize_url('https://amp.dev/documentation/'), 'https://amp.dev/documentation')
+        self.assertEqual(canonicalize_url('https://amp.co.uk/story'), 'https://amp.co.uk/story')
+        self.assertNotEqual(url_fingerprint('https://amp.dev/about'), url_fingerprint('https://dev/about'))
+    
+    def test_amp_paths_and_cache(self):
+        expected = 'https://www.example.com/2024/story'
+        self.assertEqual(canonicalize_url('https://www.example.com/2024/story/amp/'), expected)
+        self.assertEqual(canonicalize_url('https://www.example.com/2024/story.amp.html'), expected + '.html')
+        self.assertEqual(
+            canonicalize_url('https://www-example-com.cdn.ampproject.org/c/s/www.example.com/2024/story'),
+            expected,
+        )
+    
+    def test_tracking_params_are_stripped(self):
+        self.assertEqual(
+            canonicalize_url('https://example.com/story?utm_source=rss&utm_medium=feed&fbclid=abc&id=7'),
+            'https://example.com/story?id=7',
+        )
+    
+    def test_ref_and_amp_params_are_kept(self):
+        self.assertEqual(canonicalize_url('https://example.com/story?ref=main'), 'https://example.com/story?ref=main')
+        self.assertEqual(canonicalize_url('https://example.com/story?amp=1'), 'https://example.com/story?amp=1')
+        self.assertNotEqual(
+            url_fingerprint('https://example.com/compare?ref=a'),
+            url_fingerprint('https://example.com/compare?ref=b'),
+        )
+    
+    def test_query_params_are_sorted(self):
+        self.assertEqual(canonicalize_url('https://example.com/s?b=2&a=1'), 'https://example.com/s?a=1&b=2')
+    
+    def test_domain_rules(self):
+        self.assertEqual(
+            canonicalize_url('https://www.youtube.com/watch?v=abc&feature=share'),
+            'https://www.youtube.com/watch?v=abc',
+        )
+        self.assertEqual(canonicalize_url('https://www.nytimes.com/2024/story.html?smid=tw'), 'https://www.nytimes.com/2024/story.html')
+    
+    def test_www_scheme_and_host_variants_share_a_fingerprint(self):
+        fingerprint = url_fingerprint('https://example.com/story')
+        for variant in (
+            'https://www.example.com/story',
+            'http://example.com/story/',
+            'https://EXAMPLE.com:443/story#comments',
+            'https://www.example.com/story?utm_campaign=x',
+        ):
+            self.assertEqual(url_fingerprint(variant), fingerprint, variant)
+    
+    def test_subdomains_are_not_merged(self):
+        self.assertNotEqual(url_fingerprint('https://blog.example.com/story'), url_fingerprint('https://example.com/story'))
+
+
+class ArticleUrlHashTests(TestCase):
+    """ArticleRaw.save only rehashes a new article or a changed URL."""
+    
+    def setUp(self):
+        self.source = Source.objects.create(name='Wire', feed_url='https://wire.example.com/feed', site_url='https://wire.example.com')
+    
+    def create(self, url):
+        return ArticleRaw.objects.create(
+            source=self.source, title='Story', url=url, published_at=timezone.now(), summary_feed='',
+        )
+    
+    def test_new_article_is_hashed(self):
+        self.assertEqual(self.create('https://www.wire.example.com/story?utm_source=x').url_hash, url_fingerprint('https://wire.example.com/story'))
+    
+    def test_saving_keeps_a_stored_hash(self):
+        # e.g. an exact-URL hash given to a migrated row that collided with another
+        article = self.create('https://wire.example.com/story')
+        ArticleRaw.objects.filter(id=article.id).update(url_hash='exact')
+        for loaded in (ArticleRaw.objects.get(id=article.id), ArticleRaw.objects.only('id', 'title').get(id=article.id)):
+            loaded.title = 'Edited'
+            loaded.save()
+            self.assertEqual(ArticleRaw.objects.get(id=article.id).url_hash, 'exact')
+    
+    def test_changed_url_is_rehashed(self):
+        article = self.create('https://wire.example.com/story')
+        article.url = 'https://wire.example.com/moved'
+        article.save()
+        self.assertEqual(ArticleRaw.objects.get(id=article.id).url_hash, url_fingerprint('https://wire.example.com/moved'))
+
+
+def _curation_answer(body):
+    """Canned chat completion for a curation request, echoing the article title."""
+    title = body['messages'][1]['content'].split('Article Title: ', 1)[1].split('\n', 1)[0]
+    content = json.dumps({
+        'summary_short': f"Short: {title}",
+        'summary_detailed': f"Detailed: {title}",
+        'tags': ['machine-learning', 'openai'],
+        'relevance': 8,
+    })
+    return {'choices': [{'message': {'role': 'assistant', 'content': content}}]}
+
+
+class DottedBatchBackend(LocalBatchBackend):
+    """A backend only known by its class path."""
+    
+    name = ''
+
+
+class BatchCuratorTests(TestCase):
+    """submit -> poll -> apply with LocalBatchBackend and canned answers."""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.source = Source.objects.create(name='Lab', feed_url='https://lab.example.com/feed', site_url='https://lab.example.com')
+        self.articles = [
+            ArticleRaw.objects.create(
+                source=self.source,
+                title=f"Machine learning story {i}",
+                url=f"https://lab.example.com/story-{i}",
+                published_at=timezone.now(),
+                summary_feed='A new machine learning model from an AI research lab.',
+            )
+            for i in range(2)
+        ]
+        embed = mock.patch(
+            'news.ai_service.AIService.generate_embeddings_batch',
+            side_effect=lambda texts: [[0.5] * 1536 for _ in texts],
+        )
+        self.embed = embed.start()
+        self.addCleanup(embed.stop)
+    
+    def curator(self, responder=_curation_answer, backend=None):
+        return BatchCurator(backend=backend or LocalBatchBackend(self.directory.name, responder))
+    
+    def test_submit_poll_apply(self):
+        curator = self.curator()
+        batches = curator.submit()
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0].backend, 'local')
+        self.assertEqual(batches[0].article_ids, [article.id for article in self.articles])
+        
+        stats = curator.poll()
+        self.assertEqual(stats, {'pending': 0, 'applied': 1, 'articles': 2, 'failed': 0, 'errors': 0})
+        batch = CurationBatch.objects.get()
+        self.assertEqual(batch.status, 'applied')
+        self.assertEqual((batch.applied_count, batch.failed_count), (2, 0))
+        curated = ArticleCurated.objects.get(raw_article=self.articles[0])
+        self.assertEqual(curated.summary_short, 'Short: Machine learning story 0')
+        self.assertEqual(curated.ai_tags, ['machine-learning', 'openai'])
+        self.assertEqual(curator.submit(), [])
+    
+    def test_malformed_output_line_is_skipped(self):
+        curator = self.curator()
+        batch = curator.submit()[0]
+        good = json.dumps({
+            'custom_id': f"article-{self.articles[0].id}",
+            'response': {'status_code': 200, 'body': _curation_answer(
+                curator.ai_service.curation_request('text', self.articles[0].title)
+            )},
+            'error': None,
+        })
+        curator.apply(batch, f"{good}\n{{not json\n".encode())
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'applied')
+        self.assertEqual((batch.applied_count, batch.failed_count), (1, 1))
+        self.assertFalse(ArticleCurated.objects.filter(raw_article=self.articles[1]).exists())
+    
+    def test_failed_request_is_left_uncurated(self):
+        def responder(body):
+            if 'story 1' in body['messages'][1]['content']:
+                raise RuntimeError('server error')
+            return _curation_answer(body)
+        
+        curator = self.curator(responder)
+        curator.submit()
+        stats = curator.poll()
+        self.assertEqual((stats['articles'], stats['failed']), (1, 1))
+        self.assertFalse(ArticleCurated.objects.filter(raw_article=self.articles[1]).exists())
+        # The failed article is submitted again by the next run
+        self.assertEqual(curator.submit()[0].article_ids, [self.articles[1].id])
+    
+    def test_recuration_updates_existing_row(self):
+        curated = ArticleCurated.objects.create(
+            raw_article=self.articles[0], summary_short='old', summary_detailed='old', embedding=[0.0] * 1536,
+        )
+        curator = self.curator()
+        batch = curator.submit(recurate=True)[0]
+        self.assertTrue(batch.recurate)
+        curator.poll()
+        self.assertEqual(ArticleCurated.objects.count(), 2)
+        curated.refresh_from_db()
+        self.assertEqual(curated.summary_short, 'Short: Machine learning story 0')
+    
+    def test_apply_failure_keeps_batch_submitted(self):
+        curator = self.curator()
+        curator.submit()
+        self.embed.side_effect = RuntimeError('embedding service down')
+        stats = curator.poll()
+        self.assertEqual((stats['applied'], stats['errors']), (0, 1))
+        batch = CurationBatch.objects.get()
+        self.assertEqual(batch.status, 'submitted')
+        self.assertIn('embedding service down', batch.error)
+        self.assertFalse(ArticleCurated.objects.exists())
+        
+        self.embed.side_effect = lambda texts: [[0.5] * 1536 for _ in texts]
+        self.assertEqual(curator.poll()['applied'], 1)
+        self.assertEqual(ArticleCurated.objects.count(), 2)
+    
+    def test_dotted_path_backend_is_stored_by_class_path(self):
+        batch = self.curator(backend=DottedBatchBackend(self.directory.name, _curation_answer)).submit()[0]
+        self.assertEqual(batch.backend, 'news.tests.DottedBatchBackend')
+        with self.settings(CURATION_BATCH_LOCAL_DIR=self.directory.name):
+            self.assertIsInstance(get_batch_backend(batch.backend), DottedBatchBackend)
+    
+    def test_unknown_backend_does_not_stop_polling(self):
+        CurationBatch.objects.create(backend='news.missing.Backend', batch_id='gone', article_ids=[self.articles[0].id])
+        curator = self.curator()
+        curator.submit()
+        stats = curator.poll()
+        self.assertEqual((stats['pending'], stats['applied']), (1, 1))
+
+
+class BulkArticleWriterTests(TestCase):
+    """BulkArticleWriter stats, ids and per-entry validation."""
+    
+    def setUp(self):
+        self.source = Source.objects.create(name='Wire', feed_url='https://wire.example.com/feed', site_url='https://wire.example.com')
+    
+    def entry(self, slug, **values):
+        entry = {
+            'title': f"Story {slug}",
+            'url': f"https://wire.example.com/{slug}",
+            'published_at': timezone.now(),
+            'summary_feed': f"Summary of {slug}",
+            'media_assets': [{'url': f"https://cdn.example.com/{slug}.jpg", 'type': 'image/jpeg'}],
+        }
+        entry.update(values)
+        return entry
+    
+    def test_created_updated_unchanged(self):
+        unchanged, changed = self.entry('a'), self.entry('b')
+        BulkArticleWriter(self.source).write([unchanged, changed])
+        stats = BulkArticleWriter(self.source).write([unchanged, {**changed, 'title': 'Story b, updated'}, self.entry('c')])
+        self.assertEqual((stats['created'], stats['updated'], stats['unchanged']), (1, 1, 1))
+        self.assertEqual(ArticleRaw.objects.get(url='https://wire.example.com/b').title, 'Story b, updated')
+        self.assertEqual(ArticleRaw.objects.get(url='https://wire.example.com/c').media_assets.count(), 1)
+    
+    def test_concurrently_inserted_article_counts_as_updated(self):
+        concurrent = {}
+        
+        def link_duplicates(articles):
+            # Another ingest inserts the URL between the prefetch and the bulk insert
+            concurrent['article'] = ArticleRaw.objects.create(
+                source=self.source, title='Story a', url='https://wire.example.com/a',
+                published_at=timezone.now(), summary_feed='Older summary',
+            )
+            return 0
+        
+        index = mock.Mock(link_duplicates=link_duplicates)
+        with mock.patch('news.ingest_writer.get_duplicate_index', return_value=index):
+            stats = BulkArticleWriter(self.source).write([self.entry('a'), self.entry('b')])
+        self.assertEqual((stats['created'], stats['updated']), (1, 1))
+        article = ArticleRaw.objects.get(pk=concurrent['article'].pk)
+        self.assertEqual(article.summary_feed, 'Summary of a')
+        self.assertEqual(list(article.media_assets.values_list('source_url', flat=True)), ['https://cdn.example.com/a.jpg'])
+        self.assertEqual(ArticleRaw.objects.get(url='https://wire.example.com/b').media_assets.count(), 1)
+    
+    def test_bad_entries_are_skipped(self):
+        entries = [
+            self.entry('no-date', published_at=None),
+            self.entry('no-title', title='&nbsp;'),
+            self.entry('long', title='x' * 600, summary_feed='nul\x00byte'),
+            self.entry('long-url', url='https://wire.example.com/' + 'x' * 300),
+        ]
+        stats = BulkArticleWriter(self.source).write(entries)
+        self.assertEqual(stats['created'], 1)
+        article = ArticleRaw.objects.get()
+        self.assertEqual(len(article.title), 500)
+        self.assertEqual(article.summary_feed, 'nulbyte')
+        self.assertEqual(MediaAsset.objects.count(), 1)
+
+
+RSS_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel>
+<title>Example Lab</title>
+<link>https://lab.example.com/</link>
+<item>
+<title>New model beats benchmark</title>
+<link>/2024/new-model</link>
+<guid>lab-1</guid>
+<pubDate>Tue, 02 Jan 2024 10:00:00 GMT</pubDate>
+<description>&lt;p&gt;A &lt;b&gt;new&lt;/b&gt; model.&lt;/p&gt;</description>
+<media:content url="https://cdn.example.com/model.jpg" type="image/jpeg" width="800" height="600"/>
+<category>AI</category>
+</item>
+<item>
+<title>Older post</title>
+<link>https://lab.example.com/2024/older</link>
+<guid>lab-2</guid>
+<dc:date>2024-01-01T08:30:00Z</dc:date>
+<description>Earlier news.</description>
+<enclosure url="https://cdn.example.com/older.mp3" type="audio/mpeg" length="42"/>
+</item>
+</channel>
+</rss>
+"""
+
+
+class ConditionalFetchTests(SimpleTestCase):
+    """Unchanged feeds (304 or same body hash) are not parsed."""
+    
+    def test_conditional_headers(self):
+        self.assertEqual(FeedParser.conditional_headers(), {})
+        self.assertEqual(
+            FeedParser.conditional_headers('"abc"', 'Tue, 02 Jan 2024 10:00:00 GMT'),
+            {'If-None-Match': '"abc"', 'If-Modified-Since': 'Tue, 02 Jan 2024 10:00:00 GMT'},
+        )
+    
+    def test_not_modified_keeps_validators(self):
+        feed = FeedParser().parse_response(
+            'https://lab.example.com/feed', 304, b'', {}, etag='"abc"', last_modified='yesterday', content_hash='h',
+        )
+        self.assertEqual(feed.status, 304)
+        self.assertEqual(feed.entries, [])
+        self.assertEqual((feed.etag, feed.modified, feed.content_hash), ('"abc"', 'yesterday', 'h'))
+    
+    def test_body_hash_decides_whether_to_parse(self):
+        parser = FeedParser()
+        feed = parser.parse_response('https://lab.example.com/feed', 200, RSS_FEED, {'ETag': '"v1"'})
+        self.assertEqual(feed.status, 200)
+        self.assertEqual(len(feed.entries), 2)
+        self.assertEqual(feed.etag, '"v1"')
+        
+        unchanged = parser.parse_response(
+            'https://lab.example.com/feed', 200, [RSS_FEED[:100], RSS_FEED[100:]], {}, content_hash=feed.content_hash,
+        )
+        self.assertEqual(unchanged.status, 304)
+        self.assertEqual(unchanged.entries, [])
+        
+        changed = parser.parse_response(
+            'https://lab.example.com/feed', 200, RSS_FEED.replace(b'Older post', b'Older post, edited'), {},
+            content_hash=feed.content_hash,
+        )
+        self.assertEqual(changed.status, 200)
+        self.assertNotEqual(changed.content_hash, feed.content_hash)
+        self.assertEqual(changed.entries[1].title, 'Older post, edited')
+
+
+class DomainRateLimiterTests(SimpleTestCase):
+    """GCRA slots with the in-memory fallback (no Redis) and a frozen clock."""
+    
+    def setUp(self):
+        redis = mock.patch('news.rate_limiter.get_redis_client', return_value=None)
+        redis.start()
+        self.addCleanup(redis.stop)
+        clock = mock.patch('news.rate_limiter.time')
+        self.time = clock.start()
+        self.addCleanup(clock.stop)
+        self.time.time.return_value = 100.0
+    
+    def test_burst_then_spacing(self):
+        limiter = DomainRateLimiter(interval=10, burst=2)
+        self.assertEqual([limiter.reserve('example.com') for _ in range(4)], [100.0, 100.0, 110.0, 120.0])
+    
+    def test_budget_refills_while_idle(self):
+        limiter = DomainRateLimiter(interval=10, burst=2)
+        for _ in range(3):
+            limiter.reserve('example.com')
+        self.time.time.return_value = 200.0
+        self.assertEqual(limiter.reserve('example.com'), 200.0)
+    
+    def test_domains_are_independent(self):
+        limiter = DomainRateLimiter(interval=10, burst=1)
+        self.assertEqual(limiter.reserve('a.example.com'), 100.0)
+        self.assertEqual(limiter.reserve('b.example.com'), 100.0)
+        self.assertEqual(limiter.reserve('a.example.com'), 110.0)
+    
+    def test_disabled_without_domain_or_interval(self):
+        self.assertEqual(DomainRateLimiter(interval=0, burst=1).reserve('example.com'), 100.0)
+        limiter = DomainRateLimiter(interval=10, burst=1)
+        self.assertEqual([limiter.reserve(''), limiter.reserve('')], [100.0, 100.0])
+    
+    def test_wait_sleeps_until_the_slot(self):
+        limiter = DomainRateLimiter(interval=10, burst=1)
+        self.assertEqual(limiter.wait('example.com'), 0.0)
+        self.assertEqual(limiter.wait('example.com'), 10.0)
+        self.time.sleep.assert_called_once_with(10.0)
+    
+    def test_redis_error_falls_back_to_memory(self):
+        client = mock.Mock()
+        client.register_script.side_effect = ConnectionError('redis down')
+        limiter = DomainRateLimiter(interval=10, burst=1)
+        with mock.patch('news.rate_limiter.get_redis_client', return_value=client):
+            self.assertEqual([limiter.reserve('example.com') for _ in range(2)], [100.0, 110.0])
+    
+    
+    def test_wait_async_reserves_off_the_event_loop(self):
+        limiter = DomainRateLimiter(interval=10, burst=1)
+        threads = []
+        
+        def reserve(domain):
+            threads.append(threading.current_thread())
+            return 100.0
+        
+        with mock.patch.object(limiter, 'reserve', side_effect=reserve):
+            self.assertEqual(asyncio.run(limiter.wait_async('example.com')), 0.0)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+class FetchSchedulerTests(TestCase):
+    """Due-order planning and the adaptive polling interval."""
+    
+    def setUp(self):
+        self.scheduler = FetchScheduler(min_interval_minutes=15)
+        self.source = Source.objects.create(
+            name='Blog', feed_url='https://blog.example.com/feed', site_url='https://blog.example.com',
+            fetch_interval_minutes=24 * 60,
+        )
+    
+    def test_plan_orders_due_sources_most_overdue_first(self):
+        now = timezone.now()
+        never = Source(id=1, name='new')
+        late = Source(id=2, name='late', next_fetch_at=now - timedelta(hours=2))
+        later = Source(id=3, name='later', next_fetch_at=now - timedelta(minutes=5))
+        legacy = Source(id=4, name='legacy', last_fetched_at=now - timedelta(hours=1), fetch_interval_minutes=30)
+        future = Source(id=5, name='future', next_fetch_at=now + timedelta(minutes=5))
+        due, not_due = self.scheduler.plan([future, later, legacy, late, never], now=now)
+        self.assertEqual(due, [never, late, legacy, later])
+        self.assertEqual(not_due, [future])
+    
+    def publish(self, *hours_ago):
+        now = timezone.now()
+        for i, hours in enumerate(hours_ago):
+            ArticleRaw.objects.create(
+                source=self.source, title=f"Post {i}", url=f"https://blog.example.com/{i}",
+                published_at=now - timedelta(hours=hours), summary_feed='',
+            )
+    
+    def test_publish_interval_is_the_median_gap(self):
+        self.assertIsNone(self.scheduler.estimate_publish_interval(self.source))
+        self.publish(0.5, 1.5, 2.5, 10)
+        self.assertEqual(self.scheduler.estimate_publish_interval(self.source), 60.0)
+        # Polled twice per post, and a fetch that found something resets the quiet backoff
+        self.assertEqual(self.scheduler.compute_interval(self.source, articles_created=2), 30.0)
+    
+    def test_dormant_feed_is_stretched_by_its_silence(self):
+        self.publish(48, 49, 50)
+        self.assertEqual(self.scheduler.estimate_publish_interval(self.source), 24 * 60)
+    
+    def test_quiet_fetches_back_off(self):
+        self.publish(0.5, 1.5, 2.5)
+        for _ in range(2):
+            FeedIngestionLog.objects.create(source=self.source, status='success', completed_at=timezone.now())
+        # Two quiet logs plus this quiet fetch: 30 * 1.5 ** 3
+        self.assertAlmostEqual(self.scheduler.compute_interval(self.source, articles_created=0), 101.25)
+    
+    def test_failures_back_off_up_to_the_source_maximum(self):
+        self.source.error_count = 3
+        self.assertEqual(self.scheduler.compute_interval(self.source, failed=True), 60 * 2 ** 3)
+        self.source.error_count = 10
+        self.assertEqual(self.scheduler.compute_interval(self.source, failed=True), 24 * 60)
+    
+    def test_interval_never_below_the_minimum(self):
+        self.publish(0.1, 0.2, 0.3)
+        self.assertEqual(self.scheduler.compute_interval(self.source, articles_created=1), 15)
+    
+    def test_push_subscription_polls_at_the_maximum(self):
+        WebSubSubscription.objects.create(
+            source=self.source, hub_url='https://hub.example.com/', topic_url=self.source.feed_url,
+            status='active', expires_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertEqual(self.scheduler.compute_interval(self.source, articles_created=1), 24 * 60)
+
+
+def _feed_entry(key, published):
+    return feedparser.FeedParserDict(
+        id=key, link=f"https://lab.example.com/{key}", title=f"Entry {key}", summary='',
+        published=published.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+        published_parsed=published.utctimetuple(),
+    )
+
+
+class HighWaterMarkTests(SimpleTestCase):
+    """Already-ingested entries are skipped and stop the walk down the feed."""
+    
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+        self.feed = feedparser.FeedParserDict(entries=[
+            _feed_entry(f"e{i}", self.now - timedelta(days=i)) for i in range(8)
+        ])
+    
+    def keys(self, **kwargs):
+        return [entry['url'].rsplit('/', 1)[1] for entry in FeedParser().iter_new_entries(
+            self.feed, 'https://lab.example.com/feed', **kwargs
+        )]
+    
+    def test_stops_after_a_run_of_seen_entries(self):
+        self.assertEqual(self.keys(seen_entry_ids=['e1', 'e3', 'e4', 'e5']), ['e0', 'e2'])
+    
+    def test_entries_older_than_the_mark_minus_grace_are_known(self):
+        # e2 is within the 24 hour grace period of the mark, e3 onwards are not
+        self.assertEqual(self.keys(high_water_mark=self.now - timedelta(days=1)), ['e0', 'e1', 'e2'])
+    
+    def test_seen_ids_are_merged_newest_first(self):
+        feed = feedparser.FeedParserDict(entries=self.feed.entries[:2])
+        self.assertEqual(merge_seen_entry_ids(feed, ['e1', 'old']), ['e0', 'e1', 'old'])
+    
+    def advance(self, high_water_mark, *entries):
+        source = Source(high_water_mark=high_water_mark, max_articles_per_fetch=50)
+        _advance_high_water_mark(source, feedparser.FeedParserDict(entries=[]), list(entries))
+        return source.high_water_mark
+    
+    def test_mark_advances_to_the_newest_real_date(self):
+        hour_ago = self.now - timedelta(hours=1)
+        self.assertEqual(self.advance(None, {'published_at': hour_ago}, {'published_at': hour_ago - timedelta(days=1)}), hour_ago)
+        self.assertEqual(self.advance(hour_ago, {'published_at': hour_ago - timedelta(days=1)}), hour_ago)
+    
+    def test_estimated_and_future_dates_do_not_push_the_mark(self):
+        hour_ago = self.now - timedelta(hours=1)
+        self.assertEqual(self.advance(hour_ago, {'published_at': timezone.now(), 'date_estimated': True}), hour_ago)
+        mark = self.advance(None, {'published_at': self.now + timedelta(days=30)})
+        self.assertLessEqual(mark, timezone.now())
+        self.assertLessEqual(self.advance(self.now + timedelta(days=30)), timezone.now())
+
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">
+<title>Research Notes</title>
+<link rel="alternate" href="https://notes.example.com/"/>
+<link rel="hub" href="https://hub.example.com/"/>
+<id>urn:notes</id>
+<updated>2024-01-02T12:00:00Z</updated>
+<entry>
+<title>Sparse attention, explained</title>
+<link rel="alternate" href="https://notes.example.com/sparse-attention"/>
+<link rel="enclosure" href="https://cdn.example.com/talk.mp4" type="video/mp4" length="1000"/>
+<id>urn:notes:1</id>
+<published>2024-01-02T09:15:00+01:00</published>
+<updated>2024-01-02T12:00:00Z</updated>
+<author><name>Ada</name><email>ada@example.com</email></author>
+<category term="transformers"/>
+<summary type="html">&lt;p&gt;Why &lt;script&gt;x()&lt;/script&gt;sparsity helps.&lt;/p&gt;</summary>
+<content type="html">&lt;p&gt;Full text.&lt;/p&gt;</content>
+<media:thumbnail url="https://cdn.example.com/thumb.png"/>
+</entry>
+</feed>
+"""
+
+
+class StreamingFeedReaderTests(SimpleTestCase):
+    """The lxml fast path must give parse_entry what feedparser would."""
+    
+    FIELDS = ('title', 'link', 'id', 'summary', 'published_parsed', 'updated_parsed', 'author')
+    
+    def stream(self, body, chunk_size=37, **kwargs):
+        reader = StreamingFeedReader('https://lab.example.com/feed', **kwargs)
+        reader.read(body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+        return reader
+    
+    def assertParity(self, body):
+        reader = self.stream(body)
+        self.assertIsNone(reader.fallback_reason)
+        streamed, parsed = reader.result(), feedparser.parse(body)
+        self.assertEqual(streamed.feed.get('title'), parsed.feed.get('title'))
+        self.assertEqual(streamed.feed.get('link'), parsed.feed.get('link'))
+        self.assertEqual(len(streamed.entries), len(parsed.entries))
+        
+        parser = FeedParser()
+        with mock.patch('news.feed_parser.is_recent_article', return_value=True):
+            for ours, theirs in zip(streamed.entries, parsed.entries):
+                for field in self.FIELDS:
+                    self.assertEqual(ours.get(field), theirs.get(field), field)
+                self.assertEqual([tag.term for tag in ours.get('tags', [])], [tag.term for tag in theirs.get('tags', [])])
+                self.assertEqual(ours.enclosures, theirs.enclosures)
+                ours_parsed = parser.parse_entry(ours, 'https://lab.example.com/feed')
+                theirs_parsed = parser.parse_entry(theirs, 'https://lab.example.com/feed')
+                for parsed_entry in (ours_parsed, theirs_parsed):
+                    del parsed_entry['raw_entry']
+                self.assertEqual(ours_parsed, theirs_parsed)
+    
+    def test_rss_parity(self):
+        self.assertParity(RSS_FEED)
+    
+    def test_atom_parity(self):
+        self.assertParity(ATOM_FEED)
+    
+    def test_hub_link_is_kept(self):
+        links = self.stream(ATOM_FEED).result().feed.links
+        self.assertIn('https://hub.example.com/', [link.href for link in links if link.rel == 'hub'])
+    
+    def test_malformed_and_exotic_feeds_fall_back(self):
+        for body in (
+            RSS_FEED.replace(b'</channel>', b''),
+            RSS_FEED.replace(b'<rss version="2.0"', b'<!DOCTYPE rss><rss version="2.0"', 1),
+            b'<?xml version="1.0"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"/>',
+            RSS_FEED.replace(b'<title>Older post</title>', b'<title>Older <b>post</b></title>'),
+        ):
+            reader = self.stream(body)
+            self.assertTrue(reader.fallback_reason, body[:60])
+            self.assertEqual(reader.entries, [])
+            self.assertEqual(reader.body, body)
+        
+        feed = FeedParser().parse_response('https://lab.example.com/feed', 200, body, {})
+        self.assertNotEqual(feed.get('parser'), 'lxml')
+        self.assertEqual([entry.id for entry in feed.entries], ['lab-1', 'lab-2'])
+    
+    def test_max_entries_stops_parsing_but_hashes_the_whole_body(self):
+        reader = self.stream(RSS_FEED, max_entries=1)
+        self.assertEqual(len(reader.entries), 1)
+        self.assertEqual(reader.content_hash, self.stream(RSS_FEED).content_hash)
+    
+    def test_body_size_limit(self):
+        with self.assertRaises(FeedParseError):
+            self.stream(RSS_FEED, max_bytes=100)
+        with self.assertRaises(FeedParseError):
+            StreamingFeedReader(max_bytes=100).check_content_length('101')
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class PooledHTTPClientTests(SimpleTestCase):
+    """Connections are reused per thread and a finished thread's session is closed."""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        self.client = PooledHTTPClient(pool_connections=4, pool_maxsize=4, connect_timeout=5, retries=0)
+        self.addCleanup(self.client.close)
+    
+    def test_connections_are_kept_alive(self):
+        responses = [self.client.get(self.url, timeout=5) for _ in range(3)]
+        self.assertEqual([response.text for response in responses], ['ok'] * 3)
+        self.assertGreater(responses[0].connect_seconds, 0)
+        self.assertEqual(responses[2].connect_seconds, 0)
+        stats = self.client.stats()
+        self.assertEqual((stats['requests'], stats['connections'], stats['reused']), (3, 1, 2))
+        self.assertEqual(stats['hosts']['127.0.0.1'], {'requests': 3, 'connections': 1})
+    
+    def test_finished_threads_release_their_session(self):
+        sessions = []
+        
+        def fetch():
+            sessions.append(self.client.session)
+            self.client.get(self.url, timeout=5)
+        
+        for _ in range(2):
+            thread = threading.Thread(target=fetch)
+            thread.start()
+            thread.join()
+            del thread
+            gc.collect()
+        self.assertIsNot(sessions[0], sessions[1])
+        self.assertEqual(self.client._sessions, {})
+        # Counts of the closed sessions are kept
+        self.assertEqual(self.client.stats()['requests'], 2)
+
+
+class FeedDateParserTests(SimpleTestCase):
+    """Entry dates, with the format that worked remembered per source."""
+    
+    def setUp(self):
+        self.parser = FeedDateParser()
+    
+    def test_standard_formats(self):
+        expected = datetime(2024, 1, 2, 10, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(self.parser.parse('Tue, 02 Jan 2024 10:00:00 GMT'), expected)
+        self.assertEqual(self.parser.parse('2024-01-02T10:00:00Z'), expected)
+        self.assertEqual(self.parser.parse(' 2024-01-02T11:00:00+01:00 '), expected)
+    
+    def test_naive_dates_are_utc(self):
+        self.assertEqual(self.parser.parse('2024-01-02 10:00:00'), datetime(2024, 1, 2, 10, 0, tzinfo=dt_timezone.utc))
+    
+    def test_format_is_learned_per_source(self):
+        self.assertEqual(self.parser.parse('March 5, 2024', 'blog'), datetime(2024, 3, 5, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.parser._learned, {'blog': '%B %d, %Y'})
+        self.parser.parse('April 6, 2024')
+        self.assertNotIn('', self.parser._learned)
+        # The learned format is tried before the standard ones
+        rfc822 = self.parser._parsers['rfc822'] = mock.Mock(return_value=None)
+        self.assertEqual(self.parser.parse('June 7, 2024', 'blog'), datetime(2024, 6, 7, tzinfo=dt_timezone.utc))
+        rfc822.assert_not_called()
+    
+    def test_unparseable_dates(self):
+        self.assertIsNone(self.parser.parse('sometime last week'))
+        self.assertIsNone(self.parser.parse_entry_date({'published': 'soon'}))
+        self.assertIsNone(self.parser.parse_entry_date({}))
+    
+    def test_entry_prefers_pre_parsed_fields(self):
+        entry = {
+            'published': 'garbage',
+            'published_parsed': datetime(2024, 1, 2, 10, 0).timetuple(),
+            'updated': '2025-01-01T00:00:00Z',
+        }
+        self.assertEqual(self.parser.parse_entry_date(entry), datetime(2024, 1, 2, 10, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(
+            self.parser.parse_entry_date({'updated': '2025-01-01T00:00:00Z'}),
+            datetime(2025, 1, 1, tzinfo=dt_timezone.utc),
+        )
+
+
+class HostCircuitBreakerTests(SimpleTestCase):
+    """Closed -> open -> half-open probe with the in-memory fallback and a frozen clock."""
+    
+    def setUp(self):
+        redis = mock.patch('news.circuit_breaker.get_redis_client', return_value=None)
+        redis.start()
+        self.addCleanup(redis.stop)
+        clock = mock.patch('news.circuit_breaker.time')
+        self.time = clock.start()
+        self.addCleanup(clock.stop)
+        self.time.time.return_value = 1000.0
+        self.breaker = HostCircuitBreaker(failure_threshold=3, base_cooldown=60, max_cooldown=200)
+    
+    def fail(self, times=1):
+        for _ in range(times):
+            self.breaker.record_failure('example.com')
+    
+    def test_opens_at_the_threshold(self):
+        self.fail(2)
+        self.assertTrue(self.breaker.allow('example.com'))
+        self.fail()
+        self.assertFalse(self.breaker.allow('example.com'))
+        self.assertEqual(self.breaker.state('example.com'), 'open')
+        self.assertTrue(self.breaker.allow('other.example.com'))
+    
+    def test_success_resets_the_count(self):
+        self.fail(2)
+        self.breaker.record_success('example.com')
+        self.fail(2)
+        self.assertTrue(self.breaker.allow('example.com'))
+    
+    def test_single_probe_after_cooldown(self):
+        self.fail(3)
+        self.time.time.return_value = 1061.0
+        self.assertTrue(self.breaker.allow('example.com'))
+        self.assertEqual(self.breaker.state('example.com'), 'half_open')
+        self.assertFalse(self.breaker.allow('example.com'))
+        self.breaker.record_success('example.com')
+        self.assertEqual(self.breaker.state('example.com'), 'closed')
+        self.assertTrue(self.breaker.allow('example.com'))
+    
+    def test_failed_probe_doubles_the_cooldown_up_to_the_maximum(self):
+        self.fail(3)
+        for now, cooldown in ((1061.0, 120), (1182.0, 200), (1383.0, 200)):
+            self.time.time.return_value = now
+            self.assertTrue(self.breaker.allow('example.com'))
+            self.fail()
+            self.time.time.return_value = now + cooldown - 1
+            self.assertFalse(self.breaker.allow('example.com'))
+    
+    def test_lost_probe_is_replaced(self):
+        self.fail(3)
+        self.time.time.return_value = 1061.0
+        self.assertTrue(self.breaker.allow('example.com'))
+        self.time.time.return_value = 1061.0 + self.breaker.probe_timeout + 1
+        self.assertTrue(self.breaker.allow('example.com'))
+    
+    def test_host_failures(self):
+        self.assertTrue(is_host_failure(503))
+        self.assertTrue(is_host_failure(429))
+        self.assertFalse(is_host_failure(404))
+
+
+STORY = (
+    'OpenAI released a new reasoning model on Tuesday that scores higher on math and coding '
+    'benchmarks while costing less per token than its predecessor'
+)
+
+
+class SimHashTests(SimpleTestCase):
+    """Fingerprints and the band property the candidate lookup relies on."""
+    
+    def test_short_texts_are_not_fingerprinted(self):
+        self.assertIsNone(simhash('Too short to tell'))
+    
+    def test_markup_and_case_do_not_change_the_hash(self):
+        self.assertEqual(simhash(STORY), simhash(f"<p>{STORY.upper()}</p>"))
+    
+    def test_unrelated_texts_are_far_apart(self):
+        other = 'The city council approved a new budget for road repairs and public parks after a long debate'
+        self.assertGreater(hamming_distance(simhash(STORY), simhash(other)), 10)
+    
+    def test_hashes_within_three_bits_share_a_band(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            value = rng.getrandbits(64)
+            flipped = value
+            for bit in rng.sample(range(64), 3):
+                flipped ^= 1 << bit
+            self.assertEqual(hamming_distance(value, flipped), 3)
+            self.assertTrue(any(a == b for a, b in zip(bands(value), bands(flipped))))
+    
+    def test_signed_storage_keeps_the_bands(self):
+        self.assertEqual(to_signed(2 ** 64 - 1), -1)
+        self.assertEqual(to_signed(5), 5)
+        value = 0xF00D_0000_BEEF_1234
+        self.assertEqual(bands(to_signed(value)), bands(value))
+        self.assertEqual(hamming_distance(to_signed(value), value), 0)
+
+
+class NearDuplicateIndexTests(TestCase):
+    """link_duplicates points syndicated copies at the first article."""
+    
+    def setUp(self):
+        self.index = NearDuplicateIndex(max_distance=3, window_days=3)
+        self.source = Source.objects.create(name='Wire', feed_url='https://wire.example.com/feed', site_url='https://wire.example.com')
+        self.now = timezone.now()
+    
+    def article(self, slug, summary=STORY, published_at=None, save=False, **fields):
+        article = ArticleRaw(
+            source=self.source, title='', url=f"https://wire.example.com/{slug}",
+            published_at=published_at or self.now, summary_feed=summary, **fields,
+        )
+        article.url_hash = url_fingerprint(article.url)
+        if save:
+            self.index.fingerprint(article)
+            article.save()
+        return article
+    
+    def test_copy_is_linked_to_the_original(self):
+        original = self.article('original', save=True)
+        copy, other = self.article('copy'), self.article('other', summary='An entirely different story about sports results and weather')
+        self.assertEqual(self.index.link_duplicates([copy, other]), 1)
+        self.assertEqual(copy.canonical_article_id, original.id)
+        self.assertIsNone(other.canonical_article_id)
+        self.assertEqual(copy.simhash, original.simhash)
+    
+    def test_duplicate_of_a_duplicate_links_to_the_original(self):
+        original = self.article('original', save=True)
+        self.article('copy', save=True, canonical_article=original)
+        copy = self.article('second-copy')
+        self.index.link_duplicates([copy])
+        self.assertEqual(copy.canonical_article_id, original.id)
+    
+    def test_articles_outside_the_window_are_not_linked(self):
+        self.article('original', save=True, published_at=self.now - timedelta(days=10))
+        self.assertEqual(self.index.link_duplicates([self.article('late')]), 0)
+    
+    def test_article_is_not_its_own_duplicate(self):
+        self.article('same', save=True)
+        self.assertEqual(self.index.link_duplicates([self.article('same')]), 0)
+    
+    def stored_with_distance(self, bits):
+        value = simhash(STORY)
+        for bit in (1, 17, 33, 49)[:bits]:
+            value ^= 1 << bit
+        stored = self.article(f"distance-{bits}", summary='x')
+        stored.simhash = to_signed(value)
+        for i, band in enumerate(bands(value)):
+            setattr(stored, f'simhash_band_{i}', band)
+        stored.save()
+        return stored
+    
+    def test_band_matching_finds_hashes_within_the_distance(self):
+        # One flipped bit per band: three differing bits still share a band, four share none
+        near = self.stored_with_distance(3)
+        self.stored_with_distance(4)
+        copy = self.article('copy')
+        self.assertEqual(self.index.link_duplicates([copy]), 1)
+        self.assertEqual(copy.canonical_article_id, near.id)
+    
+    def test_closest_candidate_wins(self):
+        self.stored_with_distance(2)
+        closest = self.stored_with_distance(1)
+        copy = self.article('copy')
+        self.index.link_duplicates([copy])
+        self.assertEqual(copy.canonical_article_id, closest.id)
+
+
+class StageTimerTests(SimpleTestCase):
+    """Nested stages record exclusive time, so stages add up to the total."""
+    
+    def setUp(self):
+        clock = mock.patch('news.stage_timing.time')
+        self.time = clock.start()
+        self.addCleanup(clock.stop)
+        self.time.perf_counter.side_effect = iter(range(0, 100))
+    
+    def test_nested_stages_are_exclusive(self):
+        self.time.perf_counter.side_effect = [0, 1, 2, 10]
+        timer = StageTimer()
+        with timer.stage('db_write'):
+            with timer.stage('dedup'):
+                pass
+            timer.add('media', 3)
+        self.assertEqual(timer.timings, {'dedup': 1, 'media': 3, 'db_write': 6})
+        self.assertEqual(sum(timer.timings.values()), 10)
+    
+    def test_timed_chunks_count_download_time_and_bytes(self):
+        timer = StageTimer()
+        self.assertEqual(list(timer.timed_chunks([b'ab', b'cde'])), [b'ab', b'cde'])
+        self.assertEqual(timer.timings['download'], 3)
+        self.assertEqual(timer.bytes_received, 5)
+    
+    def test_queries_are_attributed_to_the_open_stage(self):
+        timer = StageTimer()
+        execute = mock.Mock(return_value='rows')
+        with timer.stage('db_write'):
+            self.assertEqual(timer(execute, 'SELECT 1', None, False, {}), 'rows')
+        timer(execute, 'SELECT 1', None, False, {})
+        self.assertEqual(timer.queries, {'db_write': 1, 'other': 1})
+        self.assertEqual(timer.query_count, 2)
+
+
+class IngestionSummaryTests(SimpleTestCase):
+    """Percentiles of FeedIngestionLog stage timings."""
+    
+    def test_percentile(self):
+        self.assertEqual(percentile([], 95), 0)
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 50), 3)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+    
+    def test_summary_per_stage_and_source(self):
+        def log(source_id, seconds, status='success'):
+            return {
+                'source_id': source_id, 'source__name': f"Source {source_id}", 'status': status,
+                'stage_timings': {'parse': seconds, 'wait': 1.0}, 'stage_queries': {'db_write': 4},
+                'query_count': 4, 'bytes_received': 1000, 'execution_time_seconds': seconds + 1,
+            }
+        
+        summary = summarize_ingestion_logs([log(1, 0.5), log(1, 0.7, 'failed'), log(2, 5.0)])
+        self.assertEqual(summary['logs'], 3)
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(list(summary['stages']), ['wait', 'parse', 'db_write'])
+        self.assertEqual(summary['stages']['parse']['seconds'], {'count': 3, 'p50': 0.7, 'p95': 5.0})
+        self.assertEqual(summary['slowest_stage'], 'parse')
+        self.assertEqual([source['source_id'] for source in summary['sources']], [2, 1])
+        self.assertEqual(summary['sources'][1]['slowest_stage'], 'wait')
+
+
+class WebSubSignatureTests(SimpleTestCase):
+    """Pushed content is only trusted with a valid X-Hub-Signature."""
+    
+    def sign(self, method, secret=b'secret', body=b'<feed/>'):
+        return f"{method}={hmac.new(secret, body, getattr(hashlib, method)).hexdigest()}"
+    
+    def test_valid_signatures(self):
+        for method in ('sha1', 'sha256', 'sha512'):
+            self.assertTrue(verify_signature('secret', b'<feed/>', self.sign(method)), method)
+        self.assertTrue(verify_signature('secret', b'<feed/>', self.sign('sha256').upper().replace('SHA256=', 'sha256=')))
+    
+    def test_invalid_signatures(self):
+        self.assertFalse(verify_signature('secret', b'<feed/>', self.sign('sha256', secret=b'other')))
+        self.assertFalse(verify_signature('secret', b'<feed>changed</feed>', self.sign('sha256')))
+        self.assertFalse(verify_signature('secret', b'<feed/>', self.sign('md5')))
+        self.assertFalse(verify_signature('secret', b'<feed/>', 'sha256='))
+        self.assertFalse(verify_signature('secret', b'<feed/>', None))
+    
+    def test_discover_hub(self):
+        feed = feedparser.FeedParserDict(feed={'links': [
+            {'rel': 'hub', 'href': 'https://body-hub.example.com/'},
+            {'rel': 'self', 'href': 'https://lab.example.com/feed.xml'},
+        ]}, link_header='<https://header-hub.example.com/>; rel="hub"')
+        self.assertEqual(
+            discover_hub(feed, 'https://lab.example.com/feed'),
+            ('https://header-hub.example.com/', 'https://lab.example.com/feed.xml'),
+        )
+        self.assertIsNone(discover_hub(feedparser.FeedParserDict(feed={'links': []}), 'https://lab.example.com/feed'))
+        self.assertEqual(
+            discover_hub(feedparser.FeedParserDict(link_header='<https://hub.example.com/>; rel="hub"'), 'https://lab.example.com/feed'),
+            ('https://hub.example.com/', 'https://lab.example.com/feed'),
+        )
+
+
+class WebSubIntentTests(TestCase):
+    """Hub verification of intent and the push callback."""
+    
+    TOPIC = 'https://lab.example.com/feed'
+    
+    def setUp(self):
+        self.source = Source.objects.create(name='Lab', feed_url=self.TOPIC, site_url='https://lab.example.com')
+        self.subscription = WebSubSubscription.objects.create(
+            source=self.source, hub_url='https://hub.example.com/', topic_url=self.TOPIC, secret='secret', status='pending',
+        )
+    
+    def verify(self, **params):
+        return verify_intent(self.subscription, {f"hub.{key}": value for key, value in params.items()})
+    
+    def test_subscribe_is_verified(self):
+        self.assertEqual(self.verify(mode='subscribe', topic=self.TOPIC, challenge='c1', lease_seconds='3600'), 'c1')
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'active')
+        self.assertEqual(self.subscription.lease_seconds, 3600)
+        self.assertAlmostEqual(
+            (self.subscription.expires_at - timezone.now()).total_seconds(), 3600, delta=5,
+        )
+    
+    def test_requests_we_did_not_make_are_refused(self):
+        self.assertIsNone(self.verify(mode='subscribe', topic='https://other.example.com/feed', challenge='c1'))
+        self.assertIsNone(self.verify(mode='subscribe', topic=self.TOPIC))
+        self.assertIsNone(self.verify(mode='unsubscribe', topic=self.TOPIC, challenge='c1'))
+        self.subscription.status = 'unsubscribing'
+        self.assertIsNone(self.verify(mode='subscribe', topic=self.TOPIC, challenge='c1'))
+        self.assertEqual(self.verify(mode='unsubscribe', topic=self.TOPIC, challenge='c2'), 'c2')
+        self.assertEqual(self.subscription.status, 'unsubscribed')
+    
+    def test_denial_only_for_our_topic_and_open_subscription(self):
+        self.assertIsNone(self.verify(mode='denied', topic='https://other.example.com/feed'))
+        self.subscription.status = 'unsubscribed'
+        self.assertIsNone(self.verify(mode='denied', topic=self.TOPIC))
+        self.subscription.status = 'active'
+        self.assertEqual(self.verify(mode='denied', topic=self.TOPIC, reason='Not allowed'), '')
+        self.subscription.refresh_from_db()
+        self.assertEqual((self.subscription.status, self.subscription.last_error), ('denied', 'Not allowed'))
+    
+    def test_callback_view(self):
+        url = reverse('websub-callback', args=[self.subscription.id])
+        response = self.client.get(url, {'hub.mode': 'subscribe', 'hub.topic': self.TOPIC, 'hub.challenge': 'c1'})
+        self.assertEqual((response.status_code, response.content), (200, b'c1'))
+        self.assertEqual(self.client.get(url, {'hub.mode': 'subscribe', 'hub.topic': self.TOPIC}).status_code, 404)
+        
+        body = RSS_FEED
+        signature = f"sha256={hmac.new(b'secret', body, hashlib.sha256).hexdigest()}"
+        with mock.patch('news.views.ingest_pushed_feed', return_value={'created': 2}) as ingest:
+            forged = self.client.post(url, body, content_type='application/rss+xml', HTTP_X_HUB_SIGNATURE='sha256=00')
+            self.assertEqual(forged.status_code, 202)
+            ingest.assert_not_called()
+            signed = self.client.post(url, body, content_type='application/rss+xml', HTTP_X_HUB_SIGNATURE=signature)
+            self.assertEqual(signed.status_code, 202)
+            ingest.assert_called_once()
+        
+        WebSubSubscription.objects.filter(id=self.subscription.id).update(status='unsubscribed')
+        self.assertEqual(self.client.post(url, body, content_type='application/rss+xml').status_code, 410)
+
+
+class BatchContentFetcherTests(TestCase):
+    """Politeness per host and backoff for articles whose fetch keeps failing."""
+    
+    def setUp(self):
+        self.source = Source.objects.create(name='Wire', feed_url='https://wire.example.com/feed', site_url='https://wire.example.com')
+    
+    def create(self, url):
+        return ArticleRaw.objects.create(source=self.source, title='Story', url=url, published_at=timezone.now(), summary_feed='')
+    
+    def run_fetcher(self, fetch, **kwargs):
+        with mock.patch('news.content_batch.extract_article_content', side_effect=fetch):
+            return BatchContentFetcher(**kwargs).run()
+    
+    def test_per_host_limit(self):
+        for host in ('a.example.com', 'b.example.com'):
+            for i in range(6):
+                self.create(f"https://{host}/{i}")
+        lock = threading.Lock()
+        in_flight, peak = {}, {}
+        
+        def fetch(url, **kwargs):
+            host = url.split('/')[2]
+            with lock:
+                in_flight[host] = in_flight.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), in_flight[host])
+            threading.Event().wait(0.01)
+            with lock:
+                in_flight[host] -= 1
+            return {'success': True, 'content': f"<p>{url}</p>", 'strategy_used': 'requests'}
+        
+        stats = self.run_fetcher(fetch, max_workers=6, per_host_limit=2, write_batch_size=4)
+        self.assertEqual((stats['fetched'], stats['succeeded'], stats['hosts']), (12, 12, 2))
+        self.assertEqual(stats['strategies'], {'requests': 12})
+        self.assertLessEqual(max(peak.values()), 2)
+        self.assertFalse(ArticleRaw.objects.filter(raw_html__isnull=True).exists())
+    
+    def test_failing_articles_back_off_and_are_given_up(self):
+        article = self.create('https://wire.example.com/dead')
+        failed = {'success': False, 'content': '', 'error': 'HTTP 404'}
+        with self.settings(CONTENT_FETCH_MAX_ATTEMPTS=2, CONTENT_FETCH_RETRY_HOURS=6):
+            self.assertEqual(self.run_fetcher(lambda url, **kwargs: failed)['failed'], 1)
+            # Not retried before the retry interval has passed
+            self.assertEqual(self.run_fetcher(lambda url, **kwargs: failed)['fetched'], 0)
+            ArticleRaw.objects.filter(id=article.id).update(content_attempted_at=timezone.now() - timedelta(hours=7))
+            self.assertEqual(self.run_fetcher(lambda url, **kwargs: failed)['failed'], 1)
+            ArticleRaw.objects.filter(id=article.id).update(content_attempted_at=timezone.now() - timedelta(hours=7))
+            self.assertEqual(self.run_fetcher(lambda url, **kwargs: failed)['fetched'], 0)
+        article.refresh_from_db()
+        self.assertEqual(article.content_attempts, 2)
+    
+    def test_fetch_errors_count_as_failures(self):
+        self.create('https://wire.example.com/error')
+        
+        def fetch(url, **kwargs):
+            raise RuntimeError('boom')
+        
+        stats = self.run_fetcher(fetch)
+        self.assertEqual((stats['fetched'], stats['failed']), (1, 1))
+        self.assertEqual(ArticleRaw.objects.get().content_attempts, 1)
+    
+    def test_canonical_url_of_another_article_links_a_duplicate(self):
+        original = self.create('https://wire.example.com/story')
+        variant = self.create('https://wire.example.com/story-syndicated')
+        ArticleRaw.objects.filter(id=original.id).update(raw_html='<p>done</p>')
+        
+        def fetch(url, **kwargs):
+            return {'success': True, 'content': '<p>copy</p>', 'canonical_url': 'https://wire.example.com/story'}
+        
+        self.run_fetcher(fetch)
+        variant.refresh_from_db()
+        self.assertEqual(variant.canonical_article_id, original.id)
+        self.assertIsNone(variant.canonical_url)
+
+
+ARTICLE_PAGE = """<html><head>
+<title>Site | New model</title>
+<link rel="canonical" href="/2024/new-model?utm_source=x">
+<script type="application/ld+json">{"isAccessibleForFree": "False"}</script>
+</head><body>
+<nav>Home <img src="/logo.png"></nav>
+<article>
+<h1>New model beats benchmark</h1>
+<p>The lab released a model.</p>
+<img src="/small.jpg" width="50" height="50">
+<img src="/figure.jpg" width="800" height="600" alt="Figure">
+<footer>Share this</footer>
+</article>
+<div class="paywall">Subscribe to continue reading</div>
+</body></html>"""
+
+
+class HtmlExtractionTests(SimpleTestCase):
+    """One parse of a page gives title, text, canonical URL, images and paywall signals."""
+    
+    def test_extract_page(self):
+        page = extract_page(ARTICLE_PAGE, 'https://lab.example.com/2024/new-model')
+        self.assertEqual(page['title'], 'New model beats benchmark')
+        self.assertIn('The lab released a model.', page['text'])
+        self.assertNotIn('Share this', page['text'])
+        self.assertEqual(page['canonical_url'], 'https://lab.example.com/2024/new-model')
+        self.assertIsNone(page['lead_image'])
+        self.assertEqual(
+            [(image['url'], image['in_content']) for image in page['images']],
+            [('https://lab.example.com/small.jpg', True), ('https://lab.example.com/figure.jpg', True),
+             ('https://lab.example.com/logo.png', False)],
+        )
+        self.assertTrue(page['is_paywalled'])
+        self.assertIn('json_ld:not_free', page['paywall_signals'])
+        self.assertIn('markup:paywall', page['paywall_signals'])
+    
+    def test_front_page_canonical_is_ignored(self):
+        page = extract_page('<html><head><link rel="canonical" href="https://lab.example.com/"></head></html>', 'https://lab.example.com/a')
+        self.assertEqual(page['canonical_url'], '')
+    
+    def test_charset_from_meta(self):
+        doc = parse_html('<html><head><meta charset="iso-8859-1"></head><body><h1>Caf\xe9</h1></body></html>'.encode('latin-1'))
+        self.assertEqual(doc.findtext('.//h1'), 'Caf\xe9')
+        self.assertIsNone(parse_html(b''))
+    
+    def test_best_image_prefers_the_lead_image(self):
+        page = extract_page(
+            ARTICLE_PAGE.replace('<head>', '<head><meta property="og:image" content="/cover.jpg">'),
+            'https://lab.example.com/2024/new-model',
+        )
+        self.assertEqual(best_image(stored_meta(page)), {'url': 'https://lab.example.com/cover.jpg', 'type': 'image', 'source': 'og:image'})
+    
+    def test_best_image_skips_small_and_non_cover_images(self):
+        image = best_image(stored_meta(extract_page(ARTICLE_PAGE, 'https://lab.example.com/2024/new-model')))
+        self.assertEqual(image['url'], 'https://lab.example.com/figure.jpg')
+        self.assertEqual((image['width'], image['height'], image['source']), (800, 600, 'content'))
+    
+    def test_best_image_falls_back_to_all_images_without_a_content_area(self):
+        page = extract_page(
+            '<html><body><img src="/icon.png"><p>Text</p><img src="/photo.jpg"></body></html>',
+            'https://lab.example.com/a',
+        )
+        self.assertFalse(any(image['in_content'] for image in page['images']))
+        self.assertEqual(best_image(stored_meta(page))['url'], 'https://lab.example.com/photo.jpg')
+        self.assertIsNone(best_image({}))
+        self.assertIsNone(best_image({'images': [{'url': 'https://lab.example.com/logo.png', 'in_content': False}]}))
+
+
+class StrategyMemoryTests(TestCase):
+    """Extraction strategies are ordered by their per-domain record, shared through ExtractionStrategyStat."""
+    
+    def _memory(self, **kwargs):
+        options = {'min_attempts': 3, 'skip_below': 0.2, 'explore_rate': 0.0, 'flush_seconds': 60}
+        options.update(kwargs)
+        return StrategyMemory(**options)
+    
+    def test_unknown_domain_keeps_default_order(self):
+        self.assertEqual(self._memory().plan('new.example.com', ['requests', 'newspaper3k', 'playwright']),
+                         ['requests', 'newspaper3k', 'playwright'])
+    
+    def test_successful_strategy_is_tried_first_and_failing_one_skipped(self):
+        memory = self._memory()
+        for _ in range(3):
+            memory.record('spa.example.com', 'requests', False)
+            memory.record('spa.example.com', 'playwright', True, content_length=2000, latency=3.0)
+        self.assertEqual(memory.plan('spa.example.com', ['requests', 'newspaper3k', 'playwright']),
+                         ['playwright', 'newspaper3k'])
+        self.assertEqual(memory.plan('other.example.com', ['requests', 'playwright']), ['requests', 'playwright'])
+    
+    def test_skipped_strategy_is_still_probed_and_one_is_always_kept(self):
+        memory = self._memory(explore_rate=1.0)
+        for _ in range(3):
+            memory.record('spa.example.com', 'requests', False)
+        self.assertEqual(memory.plan('spa.example.com', ['requests', 'playwright']), ['playwright', 'requests'])
+        self.assertEqual(memory.plan('spa.example.com', ['requests']), ['requests'])
+    
+    def test_flush_adds_buffered_outcomes_to_the_rows(self):
+        ExtractionStrategyStat.objects.create(domain='a.example.com', strategy='requests', attempts=4, successes=1)
+        memory = self._memory()
+        memory.record('a.example.com', 'requests', True, content_length=500, latency=0.5)
+        memory.record('a.example.com', 'requests', False)
+        memory.record('a.example.com', 'playwright', True, content_length=800, latency=2.0)
+        self.assertEqual(ExtractionStrategyStat.objects.count(), 1)
+        memory.sync(force=True)
+        
+        stats = {stat.strategy: stat for stat in ExtractionStrategyStat.objects.filter(domain='a.example.com')}
+        self.assertEqual((stats['requests'].attempts, stats['requests'].successes), (6, 2))
+        self.assertEqual(stats['requests'].total_content_length, 500)
+        self.assertIsNotNone(stats['requests'].last_failure_at)
+        self.assertEqual((stats['playwright'].attempts, stats['playwright'].successes), (1, 1))
+        self.assertIsNone(stats['playwright'].last_failure_at)
+    
+    def test_load_shares_the_table_between_workers(self):
+        writer, reader = self._memory(), self._memory()
+        for _ in range(3):
+            writer.record('spa.example.com', 'requests', False)
+        writer.flush()
+        reader.record('spa.example.com', 'playwright', True)
+        reader.load()
+        self.assertEqual(reader.plan('spa.example.com', ['requests', 'playwright']), ['playwright'])
+        # The reader's own increment is not lost by the reload
+        self.assertEqual(reader._known['spa.example.com']['playwright'], [1, 1])
+    
+    def test_failed_flush_keeps_outcomes_for_the_next_one(self):
+        memory = self._memory()
+        memory.record('a.example.com', 'requests', True)
+        with mock.patch.object(StrategyMemory, '_write', side_effect=DatabaseError('down')):
+            memory.flush()
+        self.assertFalse(ExtractionStrategyStat.objects.exists())
+        memory.flush()
+        self.assertEqual(ExtractionStrategyStat.objects.get(domain='a.example.com').attempts, 1)
+
+
+@skipUnless(ResponseArchive.available(), 'zstandard is not installed')
+class ResponseArchiveTests(SimpleTestCase):
+    """Fetched bodies are stored once per digest and indexed per fetch."""
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive = ResponseArchive(root=tmp.name, max_bytes=1024 * 1024)
+    
+    def test_store_and_read(self):
+        body = ARTICLE_PAGE.encode()
+        digest = self.archive.store('page', 'https://lab.example.com/a?utm_source=x', body, status=200,
+                                    content_type='text/html', encoding='utf-8')
+        self.assertEqual(digest, hashlib.sha256(body).hexdigest())
+        self.assertEqual(self.archive.read(digest), body)
+        [entry] = self.archive.entries()
+        self.assertEqual((entry['kind'], entry['url'], entry['status']), ('page', 'https://lab.example.com/a', 200))
+        self.assertIsNone(self.archive.store('page', 'https://lab.example.com/a', b''))
+    
+    def test_unchanged_body_is_stored_once(self):
+        body = RSS_FEED
+        self.archive.store('feed', 'https://lab.example.com/feed', body)
+        self.archive.store('feed', 'https://lab.example.com/feed', body)
+        self.archive.store('feed', 'https://lab.example.com/other', body)
+        stats = self.archive.stats()
+        self.assertEqual((stats['fetches'], stats['blobs'], stats['bytes']), (3, 1, len(body)))
+        self.assertEqual(len(self.archive.entries()), 2)
+        self.assertEqual(len(self.archive.entries(latest_only=False)), 3)
+        self.assertEqual(self.archive.entries(kind='page'), [])
+    
+    def test_latest_fetch_per_url(self):
+        self.archive.store('page', 'https://lab.example.com/a', b'first')
+        self.archive.store('page', 'https://lab.example.com/a', b'second')
+        [entry] = self.archive.entries(kind='page')
+        self.assertEqual(self.archive.read(entry['digest']), b'second')
+    
+    def test_evict_removes_least_recently_fetched_blobs(self):
+        with mock.patch('news.response_archive.time') as clock:
+            for index, url in enumerate(['https://lab.example.com/old', 'https://lab.example.com/new']):
+                clock.time.return_value = 1000.0 + index
+                self.archive.store('page', url, random.Random(index).randbytes(2000))
+        old, new = self.archive.entries()
+        self.assertEqual(self.archive.evict(target_bytes=3000), 1)
+        self.assertEqual([entry['url'] for entry in self.archive.entries()], ['https://lab.example.com/new'])
+        self.assertFalse(self.archive.blob_path(old['digest']).exists())
+        self.assertTrue(self.archive.blob_path(new['digest']).exists())
+        self.assertEqual(self.archive.evict(target_bytes=3000), 0)
+    
+    def test_archive_response_respects_the_setting(self):
+        with self.settings(RESPONSE_ARCHIVE_ENABLED=False):
+            self.assertIsNone(archive_response('page', 'https://lab.example.com/a', b'body'))
+        with self.settings(RESPONSE_ARCHIVE_ENABLED=True), \
+                mock.patch('news.response_archive.get_response_archive', return_value=self.archive):
+            self.assertIsNotNone(archive_response('page', 'https://lab.example.com/a', b'body'))
+        self.assertEqual(self.archive.stats()['fetches'], 1)
+
+
+class CurationParsingTests(SimpleTestCase):
+    """parse_curation keeps the valid fields of the combined answer and regenerates only the others."""
+    
+    def setUp(self):
+        self.service = AIService()
+        patches = {
+            'generate_summaries': mock.patch.object(self.service, 'generate_summaries', return_value=('Short.', 'Detailed.')),
+            'generate_tags': mock.patch.object(self.service, 'generate_tags', return_value=['fallback-tag']),
+            'calculate_relevance_score': mock.patch.object(self.service, 'calculate_relevance_score', return_value=0.42),
+            '_calculate_keyword_score': mock.patch.object(self.service, '_calculate_keyword_score', return_value=0.5),
+        }
+        self.fallbacks = {name: patch.start() for name, patch in patches.items()}
+        self.addCleanup(mock.patch.stopall)
+    
+    @staticmethod
+    def _answer():
+        return {'summary_short': 'A model.', 'summary_detailed': 'A new model.', 'tags': ['llm', 'openai'], 'relevance': 8}
+    
+    def _parse(self, response):
+        return self.service.parse_curation(response, 'Article text', 'Title')
+    
+    def test_complete_answer_needs_no_fallback(self):
+        result = self._parse(json.dumps(self._answer()))
+        self.assertEqual(result['fallbacks'], [])
+        self.assertEqual(result['tags'], ['llm', 'openai'])
+        self.assertEqual(result['relevance_score'], round(0.3 * 0.5 + 0.7 * 0.8, 3))
+        for fallback in ('generate_summaries', 'generate_tags', 'calculate_relevance_score'):
+            self.fallbacks[fallback].assert_not_called()
+    
+    def test_only_the_malformed_field_falls_back(self):
+        answer = self._answer()
+        answer['relevance'] = 'very'
+        result = self._parse(json.dumps(answer))
+        self.assertEqual(result['fallbacks'], ['relevance'])
+        self.assertEqual(result['relevance_score'], 0.42)
+        self.assertEqual(result['summary_short'], answer['summary_short'])
+        self.fallbacks['generate_summaries'].assert_not_called()
+        
+        answer = self._answer()
+        answer['summary_detailed'] = '  '
+        del answer['tags']
+        result = self._parse(json.dumps(answer))
+        self.assertEqual(result['fallbacks'], ['summaries', 'tags'])
+        self.assertEqual((result['summary_short'], result['summary_detailed']), ('Short.', 'Detailed.'))
+        self.assertEqual(result['tags'], ['fallback-tag'])
+    
+    def test_failed_or_unparsable_answer_falls_back_entirely(self):
+        for response in (None, 'Sorry, I cannot help with that.', '[1, 2]'):
+            self.assertEqual(self._parse(response)['fallbacks'], ['summaries', 'tags', 'relevance'])
+    
+    def test_off_topic_article_is_decided_by_keywords(self):
+        self.fallbacks['_calculate_keyword_score'].return_value = 0.05
+        answer = self._answer()
+        del answer['relevance']
+        result = self._parse(json.dumps(answer))
+        self.assertEqual((result['fallbacks'], result['relevance_score']), ([], 0.05))
+    
+    def test_fields_are_recovered_from_loose_values(self):
+        fields = self.service._curation_fields({
+            'summary_short': ' Short. ', 'summary_detailed': 'Detailed.', 'tags': 'LLM, openai, x', 'relevance': '7/10',
+        })
+        self.assertEqual(fields, {'summary_short': 'Short.', 'summary_detailed': 'Detailed.', 'tags': ['llm', 'openai'],
+                                  'relevance': 0.7})
+        self.assertEqual(self.service._curation_fields({'tags': [], 'relevance': True}), {})
+        self.assertNotIn('relevance', self.service._curation_fields({'relevance': 12}))
+    
+    def test_json_object_in_code_fences(self):
+        self.assertEqual(AIService._parse_json_object('```json\n{"relevance": 8}\n```'), {'relevance': 8})
+        with self.assertRaises(ValueError):
+            AIService._parse_json_object('"just a string"')
+
+
+class AdaptiveConcurrencyTests(SimpleTestCase):
+    """The OpenAI request limit grows additively on success and halves once per burst of 429s."""
+    
+    def test_limit_grows_by_about_one_per_window_of_successes(self):
+        limiter = AdaptiveConcurrency(maximum=8, initial=2)
+        for _ in range(2):
+            with limiter.slot():
+                pass
+        self.assertEqual(limiter.limit, 2)
+        for _ in range(3):
+            with limiter.slot():
+                pass
+        self.assertEqual(limiter.limit, 3)
+        for _ in range(50):
+            with limiter.slot():
+                pass
+        self.assertEqual(limiter.limit, 8)
+    
+    def test_failed_request_does_not_grow_the_limit(self):
+        limiter = AdaptiveConcurrency(maximum=8, initial=2)
+        for _ in range(5):
+            with self.assertRaises(RuntimeError), limiter.slot():
+                raise RuntimeError('boom')
+        self.assertEqual((limiter.limit, limiter._in_flight), (2, 0))
+    
+    @mock.patch('news.curation.time')
+    def test_throttle_halves_once_per_burst(self, clock):
+        limiter = AdaptiveConcurrency(maximum=16, minimum=3, cooldown=2.0)
+        clock.monotonic.return_value = 100.0
+        limiter.throttled()
+        clock.monotonic.return_value = 101.0
+        limiter.throttled()
+        self.assertEqual((limiter.limit, limiter.throttles), (8, 2))
+        for now in (103.0, 106.0, 109.0):
+            clock.monotonic.return_value = now
+            limiter.throttled()
+        self.assertEqual(limiter.limit, 3)
+    
+    def test_slot_waits_while_the_limit_is_reached(self):
+        limiter = AdaptiveConcurrency(maximum=1)
+        entered = threading.Event()
+        
+        def request():
+            with limiter.slot():
+                entered.set()
+        
+        with limiter.slot():
+            waiter = threading.Thread(target=request)
+            waiter.start()
+            self.assertFalse(entered.wait(0.1))
+        waiter.join(1)
+        self.assertTrue(entered.is_set())
+
+
+class _FakeEmbeddings:
+    """Stands in for client.embeddings: vectors of the text length, returned in reverse order."""
+    
+    def __init__(self, rejected=()):
+        self.rejected = set(rejected)
+        self.requests = []
+    
+    def create(self, model, input):
+        self.requests.append(list(input))
+        if self.rejected & set(input):
+            request = httpx.Request('POST', 'https://api.openai.com/v1/embeddings')
+            raise BadRequestError('Invalid input', response=httpx.Response(400, request=request), body=None)
+        data = [SimpleNamespace(index=index, embedding=[float(len(text))] * EMBEDDING_DIMENSIONS)
+                for index, text in enumerate(input)]
+        return SimpleNamespace(data=data[::-1])
+
+
+class EmbeddingBatchTests(SimpleTestCase):
+    """generate_embeddings_batch packs texts into few requests and isolates rejected inputs."""
+    
+    def setUp(self):
+        self.service = AIService()
+        self.service.llm_cache = LLMCache(enabled=False)
+        # Count tokens as characters / 4 instead of loading tiktoken
+        self.service._embedding_encoding = False
+        self.embeddings = _FakeEmbeddings()
+        self.service.client = SimpleNamespace(embeddings=self.embeddings)
+    
+    def test_vectors_follow_the_returned_index(self):
+        texts = ['a', 'bb', '', 'dddd', '   ']
+        vectors = self.service.generate_embeddings_batch(texts)
+        self.assertEqual([vector[0] for vector in vectors], [1.0, 2.0, 0.0, 4.0, 0.0])
+        self.assertEqual(self.embeddings.requests, [['a', 'bb', 'dddd']])
+    
+    def test_requests_are_bounded_by_inputs_and_tokens(self):
+        self.service.embedding_batch_inputs = 2
+        self.service.generate_embeddings_batch(['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(self.embeddings.requests, [['a', 'b'], ['c', 'd'], ['e']])
+        
+        self.embeddings.requests = []
+        self.service.embedding_batch_inputs = 100
+        self.service.embedding_batch_tokens = 30
+        self.service.generate_embeddings_batch(['x' * 40, 'y' * 40, 'z' * 40, 'w' * 100])
+        self.assertEqual([len(request) for request in self.embeddings.requests], [2, 1, 1])
+    
+    def test_rejected_request_is_split_down_to_the_bad_input(self):
+        self.embeddings.rejected = {'bad'}
+        vectors = self.service.generate_embeddings_batch(['a', 'bb', 'bad', 'dddd'])
+        self.assertEqual([vector[0] for vector in vectors], [1.0, 2.0, 0.0, 4.0])
+        self.assertEqual(self.embeddings.requests, [['a', 'bb', 'bad', 'dddd'], ['a', 'bb'], ['bad', 'dddd'], ['bad'], ['dddd']])
+    
+    @mock.patch('news.ai_service.time')
+    def test_rate_limited_request_is_not_split(self, clock):
+        request = httpx.Request('POST', 'https://api.openai.com/v1/embeddings')
+        error = RateLimitError('Slow down', response=httpx.Response(429, request=request), body=None)
+        with mock.patch.object(self.embeddings, 'create', side_effect=error) as create:
+            vectors = self.service.generate_embeddings_batch(['a', 'bb'])
+        self.assertEqual(create.call_count, self.service.max_attempts)
+        self.assertEqual(vectors, [[0.0] * EMBEDDING_DIMENSIONS] * 2)
+
+
+@mock.patch('news.llm_cache.get_redis_client', return_value=None)
+class LLMCacheTests(TestCase):
+    """LLM results are keyed by operation, model, prompt version and whitespace-normalized inputs."""
+    
+    def setUp(self):
+        self.cache = LLMCache(enabled=True, ttl_days=30, max_bytes=1024 * 1024)
+    
+    def test_key_ignores_whitespace_only(self, redis):
+        key = LLMCache.make_key('tags', 'gpt-4o-mini', 1, 'New  model\nreleased ', 'Title')
+        self.assertEqual(key, LLMCache.make_key('tags', 'gpt-4o-mini', 1, 'New model released', 'Title'))
+        self.assertNotEqual(key, LLMCache.make_key('tags', 'gpt-4o-mini', 2, 'New model released', 'Title'))
+        self.assertNotEqual(key, LLMCache.make_key('tags', 'gpt-4o', 1, 'New model released', 'Title'))
+        self.assertNotEqual(key, LLMCache.make_key('summaries', 'gpt-4o-mini', 1, 'New model released', 'Title'))
+        # Inputs are delimited, not concatenated
+        self.assertNotEqual(LLMCache.make_key('tags', 'm', 1, 'ab', 'c'), LLMCache.make_key('tags', 'm', 1, 'a', 'bc'))
+    
+    def test_get_many_returns_stored_values_and_counts_hits(self, redis):
+        self.cache.set_many('tags', 'gpt-4o-mini', {'k1': ['llm'], 'k2': ['openai']})
+        self.cache.set('tags', 'gpt-4o-mini', 'k1', ['llm', 'agents'])
+        self.assertEqual(self.cache.get_many('tags', ['k1', 'k2', 'k3']), {'k1': ['llm', 'agents'], 'k2': ['openai']})
+        self.assertIsNone(self.cache.get('tags', 'k3'))
+        self.assertEqual(self.cache.metrics(), {'tags': {'hits': 2, 'misses': 2}})
+        self.assertEqual(LLMCacheEntry.objects.get(key='k1').hits, 1)
+    
+    def test_expired_and_disabled_entries_are_not_returned(self, redis):
+        self.cache.set('tags', 'gpt-4o-mini', 'k1', ['llm'])
+        LLMCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.cache.get_many('tags', ['k1']), {})
+        
+        disabled = LLMCache(enabled=False)
+        disabled.set('tags', 'gpt-4o-mini', 'k2', ['llm'])
+        self.assertFalse(LLMCacheEntry.objects.filter(key='k2').exists())
+    
+    def test_evict_removes_expired_then_least_recently_used(self, redis):
+        for index in range(4):
+            self.cache.set('embedding', 'text-embedding-3-small', f'k{index}', 'x' * 100)
+        now = timezone.now()
+        for index in range(4):
+            LLMCacheEntry.objects.filter(key=f'k{index}').update(last_used_at=now - timedelta(hours=4 - index))
+        LLMCacheEntry.objects.filter(key='k3').update(expires_at=now - timedelta(seconds=1))
+        
+        self.cache.max_bytes = 150
+        self.assertEqual(self.cache.evict(), 3)
+        self.assertEqual(list(LLMCacheEntry.objects.values_list('key', flat=True)), ['k2'])
+
+
+class _GatedRateLimiter:
+    """Stands in for the domain rate limiter: requests to a gated host wait until its gate opens."""
+    
+    def __init__(self):
+        self.gates = {}
+    
+    async def wait_async(self, domain):
+        if domain in self.gates:
+            await self.gates[domain].wait()
+        return 0.0
+
+
+class AsyncFeedFetcherTests(SimpleTestCase):
+    """Concurrent feed fetching: rate-limit waits hold no global slot, Redis calls run off the loop."""
+    
+    def setUp(self):
+        self.breaker = mock.Mock()
+        self.breaker.allow.return_value = True
+        self.limiter = _GatedRateLimiter()
+        for target, value in (('get_circuit_breaker', self.breaker), ('get_rate_limiter', self.limiter)):
+            patch = mock.patch(f'news.async_ingest.{target}', return_value=value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.fetcher = AsyncFeedFetcher(max_concurrency=1, max_attempts=1)
+        self.fetcher._global_semaphore = asyncio.Semaphore(1)
+    
+    @staticmethod
+    def _respond(request):
+        return httpx.Response(200, content=RSS_FEED, headers={'Content-Type': 'application/rss+xml'})
+    
+    async def _fetch(self, *urls):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(self._respond)) as client:
+            tasks = [asyncio.create_task(self.fetcher._fetch_source(client, Source(name=url, feed_url=url)))
+                     for url in urls]
+            return await asyncio.gather(*tasks)
+    
+    def test_rate_limited_host_does_not_hold_the_global_slot(self):
+        async def scenario():
+            gate = self.limiter.gates['slow.example.com'] = asyncio.Event()
+            slow = asyncio.create_task(self._fetch('https://slow.example.com/feed'))
+            await asyncio.sleep(0.01)
+            # With one global slot, this would wait forever if the throttled fetch held it
+            [fast] = await asyncio.wait_for(self._fetch('https://fast.example.com/feed'), 5)
+            gate.set()
+            [slow] = await slow
+            return slow, fast
+        
+        slow, fast = asyncio.run(scenario())
+        for result in (slow, fast):
+            self.assertIsNone(result['error'])
+            self.assertEqual(len(result['feed']['entries']), 2)
+    
+    def test_breaker_runs_off_the_event_loop(self):
+        threads = []
+        self.breaker.allow.side_effect = lambda host: threads.append(threading.current_thread()) or True
+        [result] = asyncio.run(self._fetch('https://lab.example.com/feed'))
+        self.assertIsNone(result['error'])
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.breaker.record_success.assert_called_once_with('lab.example.com')
+    
+    def test_open_circuit_skips_the_fetch(self):
+        self.breaker.allow.return_value = False
+        [result] = asyncio.run(self._fetch('https://lab.example.com/feed'))
+        self.assertIn('Circuit open', result['error'])
+        self.breaker.record_success.assert_not_called()
@@ -5,7 +5,9 @@ from .views import (
     UserInteractionViewSet,
     ArticleSummaryView,
     ChatConversationView,
-    GenerateAudioSegmentView
+    GenerateAudioSegmentView,
+    IngestionStatsView,
+    WebSubCallbackView
 )
 
 router = DefaultRouter()
@@ -17,5 +19,7 @@ urlpatterns = [
     path('chat/summary/<int:article_id>/', ArticleSummaryView.as_view(), name='article-summary'),
     path('chat/message/', ChatConversationView.as_view(), name='chat-message'),
     path('audio/daily-segment/', GenerateAudioSegmentView.as_view(), name='daily-audio-segment'),
+    path('ingestion/stats/', IngestionStatsView.as_view(), name='ingestion-stats'),
+    path('websub/callback/<int:subscription_id>/', WebSubCallbackView.as_view(), name='websub-callback'),
 ]
 
@@ -1,11 +1,14 @@
 """
 Utility functions for feed ingestion.
 """
+import hashlib
 import logging
+import re
 import time
 import random
-from urllib.parse import urlparse, urljoin
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlsplit, urlunsplit
 from typing import Optional, Dict, Any
+import tldextract
 from fake_useragent import UserAgent
 from tenacity import (
     retry, 
@@ -62,6 +65,123 @@ def normalize_url(url: str, base_url: Optional[str] = None) -> str:
         return ""
 
 
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'ocid', 'cmp', 'cmpid',
+    'ncid', 'ref_src', 'ref_url', 'referrer', 'smid', 'smtyp', 'sr_share', 'taid',
+    'guccounter', 'outputtype', '__twitter_impression',
+}
+TRACKING_PARAM_PREFIXES = ('utm_', 'mc_', 'pk_', 'hmb_', 'at_', '_hs', 'ga_', 'itm_', 'int_')
+
+# Per-domain rules (matched against the host and its parent domains):
+# 'keep_params' lists the only query parameters that identify an article,
+# 'strip_params' adds site-specific tracking parameters.
+CANONICAL_URL_RULES = {
+    'youtube.com': {'keep_params': {'v', 'list'}},
+    'news.ycombinator.com': {'keep_params': {'id'}},
+    'reddit.com': {'keep_params': set()},
+    'nytimes.com': {'keep_params': set()},
+    'washingtonpost.com': {'keep_params': set()},
+    'medium.com': {'keep_params': set()},
+    'bloomberg.com': {'strip_params': {'srnd', 'sref', 'leadsource'}},
+    'cnn.com': {'strip_params': {'iid', 'hpt'}},
+}
+
+AMP_CACHE_HOST = 'cdn.ampproject.org'
+
+# Public suffix lookups from the list bundled with tldextract (no network, no cache files)
+_extract_domain = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+
+def _domain_rule(host: str) -> Dict[str, Any]:
+    parts = host.split('.')
+    for i in range(len(parts) - 1):
+        rule = CANONICAL_URL_RULES.get('.'.join(parts[i:]))
+        if rule is not None:
+            return rule
+    return {}
+
+
+def _is_tracking_param(name: str, rule: Dict[str, Any]) -> bool:
+    lowered = name.lower()
+    return (
+        lowered in TRACKING_PARAMS
+        or lowered.startswith(TRACKING_PARAM_PREFIXES)
+        or lowered in rule.get('strip_params', ())
+    )
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce an article URL to a canonical form so variants of one article match.
+    
+    Lowercases the host, drops default ports, fragments, tracking parameters
+    and trailing slashes, sorts the remaining query parameters and maps AMP
+    variants (amp. subdomains, /amp paths, .amp.html, the Google AMP cache)
+    back to the regular page. The scheme is kept; url_fingerprint ignores it.
+    
+    Returns:
+        Canonical URL, or the input unchanged if it cannot be parsed
+    """
+    try:
+        parsed = urlsplit(url.strip())
+        host = (parsed.hostname or '').lower().rstrip('.')
+        port = parsed.port
+    except ValueError:
+        return url
+    if not parsed.scheme or not host:
+        return url
+    
+    scheme = parsed.scheme.lower()
+    path = parsed.path or '/'
+    
+    # https://www-example-com.cdn.ampproject.org/c/s/www.example.com/story
+    if host.endswith(AMP_CACHE_HOST):
+        match = re.match(r'^/[a-z]/(s/)?([^/]+)(/.*)?$', path)
+        if match:
+            scheme = 'https' if match.group(1) else 'http'
+            host = match.group(2).lower()
+            path = match.group(3) or '/'
+            port = None
+    
+    # amp.example.com, but not amp.dev (nothing registrable would be left)
+    if host.startswith('amp.') and _extract_domain(host[len('amp.'):]).domain:
+        host = host[len('amp.'):]
+    path = re.sub(r'/amp/?$', '/', path)
+    path = re.sub(r'\.amp(\.html?)$', r'\1', path)
+    path = re.sub(r'/{2,}', '/', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+    
+    rule = _domain_rule(host)
+    keep = rule.get('keep_params')
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if (name in keep if keep is not None else not _is_tracking_param(name, rule))
+    )
+    
+    netloc = host
+    if port and not (scheme == 'http' and port == 80) and not (scheme == 'https' and port == 443):
+        netloc = f"{host}:{port}"
+    
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def url_fingerprint(url: str) -> str:
+    """
+    Fixed-width key for looking up an article by URL.
+    
+    SHA-256 of the canonical URL without its scheme or a leading 'www.', so
+    http/https and www/bare-domain variants share one key.
+    """
+    canonical = canonicalize_url(url)
+    key = canonical.split('://', 1)[-1]
+    if key.startswith('www.'):
+        key = key[len('www.'):]
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
 def is_valid_url(url: str) -> bool:
     """Check if URL is valid."""
     try:
@@ -80,23 +200,42 @@ def get_domain_from_url(url: str) -> str:
         return ""
 
 
-def add_rate_limit_delay(domain: str, min_delay: float = 2.0, max_delay: float = 5.0):
-    """Add random delay between requests to same domain."""
-    # Simple in-memory tracking (in production, use Redis)
-    if not hasattr(add_rate_limit_delay, '_last_request'):
-        add_rate_limit_delay._last_request = {}
+_redis_client = None
+_redis_retry_at = 0.0
+
+
+def get_redis_client():
+    """
+    Get the shared Redis client used for cross-worker coordination.
+    
+    Returns None when Redis is unreachable so callers can fall back to
+    process-local state; the connection is retried after a short pause.
+    """
+    global _redis_client, _redis_retry_at
+    
+    if _redis_client is not None:
+        return _redis_client
     
     now = time.time()
-    last_request = add_rate_limit_delay._last_request.get(domain, 0)
+    if now < _redis_retry_at:
+        return None
     
-    if last_request > 0:
-        elapsed = now - last_request
-        if elapsed < min_delay:
-            delay = min_delay - elapsed + random.uniform(0, max_delay - min_delay)
-            logger.debug(f"Rate limiting: waiting {delay:.2f}s for domain {domain}")
-            time.sleep(delay)
+    from django.conf import settings
+    import redis
     
-    add_rate_limit_delay._last_request[domain] = time.time()
+    try:
+        client = redis.Redis.from_url(
+            settings.SHARED_STATE_REDIS_URL,
+            socket_timeout=2,
+            socket_connect_timeout=2,
+        )
+        client.ping()
+        _redis_client = client
+        return client
+    except Exception as e:
+        logger.warning(f"Redis unavailable for shared state, using in-memory fallback: {str(e)}")
+        _redis_retry_at = now + 60
+        return None
 
 
 def retry_with_exponential_backoff(
@@ -132,26 +271,52 @@ def get_request_headers(custom_headers: Optional[Dict[str, Any]] = None) -> Dict
     return headers
 
 
+# Phrases that give away a paywall or registration wall
+PAYWALL_INDICATORS = (
+    'subscribe to continue',
+    'paywall',
+    'premium content',
+    'subscription required',
+    'sign in to read',
+    'free articles remaining',
+    'you have reached your',
+    'unlock this article',
+    'become a member',
+    'join now to read',
+)
+
+
 def detect_paywall(html_content: str) -> bool:
     """Detect if content is behind a paywall."""
     if not html_content:
         return False
     
-    paywall_indicators = [
-        'subscribe to continue',
-        'paywall',
-        'premium content',
-        'subscription required',
-        'sign in to read',
-        'free articles remaining',
-        'you have reached your',
-        'unlock this article',
-        'become a member',
-        'join now to read',
-    ]
-    
     content_lower = html_content.lower()
-    return any(indicator in content_lower for indicator in paywall_indicators)
+    return any(indicator in content_lower for indicator in PAYWALL_INDICATORS)
+
+
+def get_mime_type(url: str, media_type: str) -> str:
+    """Determine MIME type from URL and media type."""
+    if media_type == 'image':
+        if url.lower().endswith(('.jpg', '.jpeg')):
+            return 'image/jpeg'
+        elif url.lower().endswith('.png'):
+            return 'image/png'
+        elif url.lower().endswith('.gif'):
+            return 'image/gif'
+        elif url.lower().endswith('.webp'):
+            return 'image/webp'
+        else:
+            return 'image/jpeg'  # Default
+    elif media_type == 'video':
+        if url.lower().endswith('.mp4'):
+            return 'video/mp4'
+        elif url.lower().endswith('.webm'):
+            return 'video/webm'
+        else:
+            return 'video/mp4'  # Default
+    else:
+        return 'application/octet-stream'
 
 
 def extract_media_from_rss_entry(entry) -> list:
@@ -229,81 +394,17 @@ def extract_best_image_from_html(html_content: str, base_url: str = '') -> Optio
     """
     Extract the best/primary image from HTML content.
     Prioritizes og:image, twitter:image, then large images in content.
+    
+    Parses the page; for fetched articles use the images already stored on
+    ``ArticleRaw.extraction_meta`` (see news.html_extraction.best_image).
     """
     if not html_content:
         return None
     
-    from bs4 import BeautifulSoup
-    import re
+    from .html_extraction import best_image, extract_page, stored_meta
     
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Priority 1: Open Graph image
-        og_image = soup.find('meta', property='og:image')
-        if og_image and og_image.get('content'):
-            img_url = og_image['content']
-            if base_url and not img_url.startswith('http'):
-                img_url = normalize_url(img_url, base_url)
-            if is_valid_url(img_url):
-                return {
-                    'url': img_url,
-                    'type': 'image',
-                    'source': 'og:image'
-                }
-        
-        # Priority 2: Twitter image
-        twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-        if twitter_image and twitter_image.get('content'):
-            img_url = twitter_image['content']
-            if base_url and not img_url.startswith('http'):
-                img_url = normalize_url(img_url, base_url)
-            if is_valid_url(img_url):
-                return {
-                    'url': img_url,
-                    'type': 'image',
-                    'source': 'twitter:image'
-                }
-        
-        # Priority 3: First large image in article content
-        # Look for images in article/main content areas
-        content_areas = soup.find_all(['article', 'main', 'div'], class_=re.compile(r'(article|content|post|entry)', re.I))
-        if not content_areas:
-            content_areas = [soup]
-        
-        for area in content_areas:
-            for img in area.find_all('img'):
-                img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                if not img_url:
-                    continue
-                
-                # Skip small images (likely ads/icons)
-                width = img.get('width')
-                height = img.get('height')
-                if width and height:
-                    try:
-                        if int(width) < 200 or int(height) < 200:
-                            continue
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Normalize URL
-                if base_url and not img_url.startswith('http'):
-                    img_url = normalize_url(img_url, base_url)
-                
-                if is_valid_url(img_url):
-                    # Skip common ad/tracking images
-                    if any(x in img_url.lower() for x in ['ad', 'tracking', 'pixel', 'logo', 'icon', 'avatar']):
-                        continue
-                    
-                    return {
-                        'url': img_url,
-                        'type': 'image',
-                        'width': width,
-                        'height': height,
-                        'source': 'content'
-                    }
-        
+        return best_image(stored_meta(extract_page(html_content, base_url)))
     except Exception as e:
         logger.error(f"Error extracting image from HTML: {str(e)}")
     
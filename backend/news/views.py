@@ -1,13 +1,15 @@
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, filters, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
 from django.conf import settings
+import logging
 import os
-from datetime import date
+from datetime import date, timedelta
 
-from .models import ArticleCurated, UserInteraction, AudioSegment
+from .models import ArticleCurated, UserInteraction, AudioSegment, FeedIngestionLog, WebSubSubscription
 from .serializers import (
     ArticleCuratedListSerializer,
     ArticleCuratedDetailSerializer,
@@ -18,6 +20,11 @@ from .serializers import (
     AudioSegmentSerializer
 )
 from .ai_service import get_ai_service
+from .stage_timing import summarize_ingestion_logs
+from .tasks import ingest_pushed_feed
+from .websub import verify_intent, verify_signature
+
+logger = logging.getLogger(__name__)
 
 
 class ArticleCuratedViewSet(viewsets.ReadOnlyModelViewSet):
@@ -199,3 +206,76 @@ class GenerateAudioSegmentView(APIView):
                 {'error': f'Failed to retrieve audio segment: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class IngestionStatsView(APIView):
+    """
+    Per-stage feed ingestion timings, overall and per source.
+    GET /api/ingestion/stats/?days=7&source=<source_id>
+    
+    Reports p50/p95 seconds and query counts for each stage (connect, wait,
+    download, parse, normalize, dedup, db_write, media, ...) so a slow
+    source can be traced to the stage that makes it slow.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    # Most recent logs considered
+    MAX_LOGS = 10000
+    
+    def get(self, request):
+        """Return the stage timing summary for the requested window."""
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        logs = FeedIngestionLog.objects.filter(started_at__gte=timezone.now() - timedelta(days=days))
+        source_id = request.query_params.get('source')
+        if source_id:
+            if not source_id.isdigit():
+                return Response({'error': 'source must be a source id'}, status=status.HTTP_400_BAD_REQUEST)
+            logs = logs.filter(source_id=source_id)
+        
+        rows = logs.order_by('-started_at').values(
+            'source_id', 'source__name', 'status', 'stage_timings', 'stage_queries',
+            'query_count', 'bytes_received', 'execution_time_seconds',
+        )[:self.MAX_LOGS]
+        return Response({'days': days, **summarize_ingestion_logs(rows)})
+
+
+class WebSubCallbackView(APIView):
+    """
+    WebSub subscriber callback for one subscription.
+    GET  /api/websub/callback/<id>/  - hub verifies our (un)subscribe intent
+    POST /api/websub/callback/<id>/  - hub pushes new feed content
+    
+    Pushed bodies must carry a valid X-Hub-Signature (HMAC with the
+    subscription's secret); unsigned or forged pushes are acknowledged, as
+    the spec requires, but ignored.
+    """
+    # Hubs are not users: no session auth, so no CSRF check on their POSTs
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, subscription_id):
+        """Echo hub.challenge if we asked for this (un)subscription."""
+        subscription = get_object_or_404(WebSubSubscription, id=subscription_id)
+        challenge = verify_intent(subscription, request.query_params)
+        if challenge is None:
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(challenge, content_type='text/plain')
+    
+    def post(self, request, subscription_id):
+        """Ingest pushed content through the regular entry parsing and upsert path."""
+        subscription = get_object_or_404(WebSubSubscription.objects.select_related('source'), id=subscription_id)
+        if subscription.status not in ('active', 'unsubscribing') or not subscription.source.active:
+            # Tells the hub to drop the subscription
+            return HttpResponse(status=status.HTTP_410_GONE)
+        
+        body = request.body
+        if not verify_signature(subscription.secret, body, request.headers.get('X-Hub-Signature')):
+            logger.warning(f"Ignoring WebSub push with a bad signature for {subscription.topic_url}")
+            return HttpResponse(status=status.HTTP_202_ACCEPTED)
+        
+        result = ingest_pushed_feed(subscription, body, link_header=request.headers.get('Link', ''))
+        return Response(result, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,236 @@
+"""
+WebSub (PubSubHubbub) subscriber.
+
+Feeds that advertise a hub (``<link rel="hub">`` in the feed or an HTTP
+``Link`` header) are subscribed at that hub, which then POSTs new content to
+our callback as soon as it is published. Pushed bodies go through the same
+parsing and upsert path as polled feeds, and subscribed sources are only
+polled at their maximum interval as a safety net.
+
+Subscribing needs a public callback URL (settings.WEBSUB_CALLBACK_BASE_URL);
+without one WebSub is disabled and every source is polled as before.
+"""
+import hashlib
+import hmac
+import logging
+import secrets
+from datetime import timedelta
+from typing import Mapping, Optional, Tuple
+
+import feedparser
+import requests
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Source, WebSubSubscription
+from .utils import get_request_headers
+
+logger = logging.getLogger(__name__)
+
+# Digests hubs may sign pushed content with (X-Hub-Signature: <method>=<hex>)
+SIGNATURE_METHODS = {
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'sha384': hashlib.sha384,
+    'sha512': hashlib.sha512,
+}
+
+# Re-request a subscription the hub has not verified after this long
+PENDING_RETRY_AFTER = timedelta(hours=6)
+
+
+def is_enabled() -> bool:
+    """Whether hubs have a public callback URL to reach us at."""
+    return bool(settings.WEBSUB_CALLBACK_BASE_URL)
+
+
+def discover_hub(feed: feedparser.FeedParserDict, feed_url: str) -> Optional[Tuple[str, str]]:
+    """
+    Find the hub a fetched feed advertises.
+    
+    The HTTP ``Link`` header takes precedence over links in the feed body,
+    as the WebSub spec prescribes. The topic is the feed's ``rel="self"``
+    URL, falling back to the URL it was fetched from.
+    
+    Returns:
+        Tuple of (hub_url, topic_url), or None if the feed has no hub
+    """
+    links = [
+        (link.get('rel', ''), link.get('url', ''))
+        for link in requests.utils.parse_header_links(feed.get('link_header') or '')
+    ]
+    links += [(link.get('rel', ''), link.get('href', '')) for link in feed.get('feed', {}).get('links', [])]
+    
+    hub_url = next((href for rel, href in links if rel == 'hub' and href), None)
+    if not hub_url:
+        return None
+    topic_url = next((href for rel, href in links if rel == 'self' and href), feed_url)
+    return hub_url, topic_url
+
+
+def callback_url(subscription: WebSubSubscription) -> str:
+    """Public URL the hub verifies intent at and pushes content to."""
+    path = reverse('websub-callback', args=[subscription.id])
+    return settings.WEBSUB_CALLBACK_BASE_URL.rstrip('/') + path
+
+
+def ensure_subscription(source: Source, feed: feedparser.FeedParserDict) -> Optional[WebSubSubscription]:
+    """
+    Subscribe a source at the hub its freshly fetched feed advertises.
+    
+    Does nothing when WebSub is disabled, the feed has no hub, or the source
+    already has a subscription at the same hub and topic, whatever its
+    status: failed requests are retried by ``renew_websub_subscriptions_task``,
+    and subscriptions that were unsubscribed or denied are only requested
+    again through the admin "resubscribe" action. A new or changed hub queues
+    ``subscribe_websub_task``.
+    
+    Returns:
+        The source's subscription, or None if it has none
+    """
+    if not is_enabled():
+        return None
+    discovered = discover_hub(feed, source.feed_url)
+    subscription = WebSubSubscription.objects.filter(source=source).first()
+    if not discovered:
+        return subscription
+    
+    hub_url, topic_url = discovered
+    if subscription and subscription.hub_url == hub_url and subscription.topic_url == topic_url:
+        return subscription
+    
+    from .tasks import subscribe_websub_task
+    
+    if subscription is None:
+        subscription = WebSubSubscription(source=source)
+    subscription.hub_url = hub_url
+    subscription.topic_url = topic_url
+    subscription.secret = secrets.token_hex(32)
+    subscription.status = 'pending'
+    subscription.last_error = None
+    subscription.save()
+    
+    logger.info(f"Discovered WebSub hub {hub_url} for {source.name}, subscribing")
+    subscribe_websub_task.delay(subscription.id)
+    return subscription
+
+
+def request_subscription(subscription: WebSubSubscription, mode: str = 'subscribe') -> bool:
+    """
+    Ask the hub to (un)subscribe; the hub then verifies intent at our callback.
+    
+    Args:
+        subscription: Subscription to request
+        mode: 'subscribe' (also used to renew a lease) or 'unsubscribe'
+    
+    Returns:
+        True if the hub accepted the request
+    """
+    from .http_client import get_http_client
+    
+    data = {
+        'hub.mode': mode,
+        'hub.topic': subscription.topic_url,
+        'hub.callback': callback_url(subscription),
+    }
+    if mode == 'subscribe':
+        data['hub.lease_seconds'] = settings.WEBSUB_LEASE_SECONDS
+        data['hub.secret'] = subscription.secret
+    
+    # Set the state first: hubs may verify intent before answering this request
+    if mode == 'unsubscribe':
+        subscription.status = 'unsubscribing'
+    elif subscription.status != 'active':
+        subscription.status = 'pending'
+    subscription.requested_at = timezone.now()
+    subscription.save(update_fields=['status', 'requested_at', 'updated_at'])
+    
+    try:
+        response = get_http_client().session.post(
+            subscription.hub_url,
+            data=data,
+            headers=get_request_headers(),
+            timeout=(settings.HTTP_CONNECT_TIMEOUT, settings.FEED_FETCH_TIMEOUT),
+        )
+    except requests.exceptions.RequestException as e:
+        error = f"Hub request failed: {str(e)}"
+    else:
+        # 202 Accepted per spec; some hubs verify synchronously and answer 204
+        if response.status_code in (202, 204):
+            logger.info(f"WebSub {mode} requested for {subscription.topic_url} at {subscription.hub_url}")
+            return True
+        error = f"Hub answered HTTP {response.status_code}: {response.text[:200]}"
+    
+    logger.warning(f"WebSub {mode} of {subscription.topic_url} failed: {error}")
+    # An active lease keeps running; anything else is retried by the renewal task
+    WebSubSubscription.objects.filter(id=subscription.id).exclude(status='active').update(status='failed')
+    WebSubSubscription.objects.filter(id=subscription.id).update(last_error=error)
+    return False
+
+
+def verify_intent(subscription: WebSubSubscription, params: Mapping[str, str]) -> Optional[str]:
+    """
+    Answer a hub's verification of intent (GET on the callback).
+    
+    Returns:
+        The body to answer 200 with (the echoed ``hub.challenge``, or empty
+        for a denial notice), or None to answer 404 because we did not ask
+        for this
+    """
+    mode = params.get('hub.mode')
+    
+    if mode == 'denied':
+        # The callback is public: only take denials of a subscription we asked for, for its topic
+        if params.get('hub.topic') != subscription.topic_url or subscription.status not in ('pending', 'active'):
+            return None
+        subscription.status = 'denied'
+        subscription.last_error = params.get('hub.reason') or 'Subscription denied by hub'
+        subscription.save()
+        logger.warning(f"WebSub hub denied {subscription.topic_url}: {subscription.last_error}")
+        return ''
+    
+    challenge = params.get('hub.challenge')
+    if not challenge or params.get('hub.topic') != subscription.topic_url:
+        return None
+    
+    now = timezone.now()
+    if mode == 'subscribe' and subscription.status in ('pending', 'active'):
+        lease = params.get('hub.lease_seconds', '')
+        subscription.lease_seconds = int(lease) if lease.isdigit() else settings.WEBSUB_LEASE_SECONDS
+        subscription.expires_at = now + timedelta(seconds=subscription.lease_seconds)
+        subscription.status = 'active'
+        subscription.verified_at = now
+        subscription.last_error = None
+        subscription.save()
+        logger.info(f"WebSub subscription verified for {subscription.topic_url} ({subscription.lease_seconds}s lease)")
+        return challenge
+    
+    if mode == 'unsubscribe' and subscription.status == 'unsubscribing':
+        subscription.status = 'unsubscribed'
+        subscription.expires_at = None
+        subscription.save()
+        return challenge
+    
+    return None
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a push's ``X-Hub-Signature`` header against our HMAC of the body."""
+    method, _, digest = (signature or '').partition('=')
+    digestmod = SIGNATURE_METHODS.get(method.lower())
+    if not digestmod or not digest:
+        return False
+    expected = hmac.new(secret.encode(), body, digestmod).hexdigest()
+    return hmac.compare_digest(expected, digest.lower())
+
+
+def subscriptions_to_renew(now=None):
+    """Active subscriptions whose lease ends soon, plus requests the hub never verified."""
+    now = now or timezone.now()
+    renew_before = now + timedelta(hours=settings.WEBSUB_RENEW_MARGIN_HOURS)
+    active = WebSubSubscription.objects.filter(status='active', expires_at__lte=renew_before)
+    stale = WebSubSubscription.objects.filter(
+        status__in=('pending', 'failed'), requested_at__lte=now - PENDING_RETRY_AFTER
+    )
+    return (active | stale).select_related('source').filter(source__active=True)